@@ -0,0 +1,48 @@
+"""Add composite and unique indexes for APS and tariff access paths
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Datos mensuales: (aps_id, period) único y (aps_id, year, month) para ventanas de 6 meses.
+    # Requiere que no existan períodos duplicados por APS.
+    op.create_index('uq_monthly_aps_period', 'aps_monthly_data', ['aps_id', 'period'], unique=True)
+    op.create_index('idx_monthly_aps_year_month', 'aps_monthly_data', ['aps_id', 'year', 'month'], unique=False)
+
+    # Tarifas: detalle/validación por (aps_id, period, calculation_type) y
+    # covering index del histórico en PostgreSQL
+    op.create_index(
+        'idx_tariff_aps_period_type',
+        'tariff_calculation',
+        ['aps_id', 'period', 'calculation_type'],
+        unique=False,
+        postgresql_include=['tariff_stratum_4_final', 'calculated_by', 'calculation_date', 'notes'],
+    )
+    # Una sola tarifa oficial por APS y período
+    op.create_index(
+        'uq_tariff_official_aps_period',
+        'tariff_calculation',
+        ['aps_id', 'period'],
+        unique=True,
+        sqlite_where=sa.text("calculation_type = 'official'"),
+        postgresql_where=sa.text("calculation_type = 'official'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_tariff_official_aps_period', table_name='tariff_calculation')
+    op.drop_index('idx_tariff_aps_period_type', table_name='tariff_calculation')
+    op.drop_index('idx_monthly_aps_year_month', table_name='aps_monthly_data')
+    op.drop_index('uq_monthly_aps_period', table_name='aps_monthly_data')
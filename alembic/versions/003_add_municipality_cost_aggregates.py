@@ -0,0 +1,66 @@
+"""Add municipality CRT/CDF aggregates for VBA
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Sumas ponderadas por toneladas de CRT y CDF por municipio y período (Art. 34)
+    op.create_table(
+        'municipality_cost_aggregate',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('municipality', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('department', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('period', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('crt_weighted_sum', sa.Float(), nullable=False),
+        sa.Column('crt_tons', sa.Float(), nullable=False),
+        sa.Column('cdf_weighted_sum', sa.Float(), nullable=False),
+        sa.Column('cdf_tons', sa.Float(), nullable=False),
+        sa.Column('aps_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'uq_municipality_cost_period', 'municipality_cost_aggregate',
+        ['municipality', 'department', 'period'], unique=True
+    )
+
+    # Último aporte de cada APS (para reemplazarlo al recalcular)
+    op.create_table(
+        'municipality_cost_contribution',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('aps_id', sa.Integer(), nullable=False),
+        sa.Column('period', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('municipality', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('department', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('crt', sa.Float(), nullable=False),
+        sa.Column('crt_tons', sa.Float(), nullable=False),
+        sa.Column('cdf', sa.Float(), nullable=False),
+        sa.Column('cdf_tons', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['aps_id'], ['aps.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'uq_municipality_contribution_aps_period', 'municipality_cost_contribution',
+        ['aps_id', 'period'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_municipality_contribution_aps_period', table_name='municipality_cost_contribution')
+    op.drop_table('municipality_cost_contribution')
+    op.drop_index('uq_municipality_cost_period', table_name='municipality_cost_aggregate')
+    op.drop_table('municipality_cost_aggregate')
@@ -0,0 +1,62 @@
+"""Add weighbridge tickets and daily/monthly rollups
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tiquetes de báscula (sólo inserción)
+    op.create_table(
+        'weigh_ticket',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ticket_number', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('aps_id', sa.Integer(), nullable=False),
+        sa.Column('vehicle_plate', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('ticket_type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('weighed_at', sa.DateTime(), nullable=False),
+        sa.Column('net_tons', sa.Float(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['aps_id'], ['aps.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_weigh_ticket_number', 'weigh_ticket', ['ticket_number'], unique=True)
+    op.create_index('idx_weigh_ticket_aps_weighed_at', 'weigh_ticket', ['aps_id', 'weighed_at'], unique=False)
+
+    # Toneladas por APS, tipo y día/mes
+    op.create_table(
+        'weigh_ticket_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('aps_id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('bucket', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('ticket_type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('tons', sa.Float(), nullable=False),
+        sa.Column('ticket_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['aps_id'], ['aps.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'uq_weigh_rollup_bucket', 'weigh_ticket_rollup',
+        ['aps_id', 'granularity', 'bucket', 'ticket_type'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_weigh_rollup_bucket', table_name='weigh_ticket_rollup')
+    op.drop_table('weigh_ticket_rollup')
+    op.drop_index('idx_weigh_ticket_aps_weighed_at', table_name='weigh_ticket')
+    op.drop_index('uq_weigh_ticket_number', table_name='weigh_ticket')
+    op.drop_table('weigh_ticket')
@@ -0,0 +1,62 @@
+"""Add background job queue table
+
+Revision ID: 004a
+Revises: 004
+Create Date: 2026-10-19 15:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision = '004a'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Las BD inicializadas con create_all ya tienen la tabla
+    if 'background_job' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    # Cola persistente de trabajos en segundo plano
+    op.create_table(
+        'background_job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False),
+        sa.Column('progress', sa.Float(), nullable=False),
+        sa.Column('progress_message', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error_message', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('submitted_by', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+        sa.ForeignKeyConstraint(['submitted_by'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_background_job_job_type'), 'background_job', ['job_type'], unique=False)
+    op.create_index(op.f('ix_background_job_status'), 'background_job', ['status'], unique=False)
+    op.create_index(op.f('ix_background_job_company_id'), 'background_job', ['company_id'], unique=False)
+    op.create_index(op.f('ix_background_job_created_at'), 'background_job', ['created_at'], unique=False)
+    op.create_index('idx_job_status_priority', 'background_job', ['status', 'priority', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_job_status_priority', table_name='background_job')
+    op.drop_index(op.f('ix_background_job_created_at'), table_name='background_job')
+    op.drop_index(op.f('ix_background_job_company_id'), table_name='background_job')
+    op.drop_index(op.f('ix_background_job_status'), table_name='background_job')
+    op.drop_index(op.f('ix_background_job_job_type'), table_name='background_job')
+    op.drop_table('background_job')
@@ -0,0 +1,43 @@
+"""Add GPS-measured sweeping kilometers per APS and period
+
+Revision ID: 005
+Revises: 004a
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # LBL medido desde trazas GPS (Art. 21)
+    op.create_table(
+        'sweeping_gps_summary',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('aps_id', sa.Integer(), nullable=False),
+        sa.Column('period', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('swept_km', sa.Float(), nullable=False),
+        sa.Column('traveled_km', sa.Float(), nullable=False),
+        sa.Column('points', sa.Integer(), nullable=False),
+        sa.Column('segments_used', sa.Integer(), nullable=False),
+        sa.Column('segments_discarded', sa.Integer(), nullable=False),
+        sa.Column('files', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['aps_id'], ['aps.id'], ),
+        sa.ForeignKeyConstraint(['job_id'], ['background_job.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_sweeping_gps_aps_period', 'sweeping_gps_summary', ['aps_id', 'period'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_sweeping_gps_aps_period', table_name='sweeping_gps_summary')
+    op.drop_table('sweeping_gps_summary')
@@ -0,0 +1,41 @@
+"""Add georeferenced landfills and transfer stations
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rellenos sanitarios y estaciones de transferencia (Art. 24)
+    op.create_table(
+        'disposal_site',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('site_type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('municipality', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('department', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('latitude', sa.Float(), nullable=False),
+        sa.Column('longitude', sa.Float(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_disposal_site_type_active', 'disposal_site', ['site_type', 'is_active'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_disposal_site_type_active', table_name='disposal_site')
+    op.drop_table('disposal_site')
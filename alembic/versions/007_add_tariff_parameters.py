@@ -0,0 +1,48 @@
+"""Add effective-dated tariff parameters
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Parámetros de cálculo con vigencia por APS, municipio o globales
+    op.create_table(
+        'tariff_parameter',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('scope', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('aps_id', sa.Integer(), nullable=True),
+        sa.Column('municipality', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('department', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('valid_from', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('valid_to', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.Column('notes', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+        sa.ForeignKeyConstraint(['aps_id'], ['aps.id'], ),
+        sa.ForeignKeyConstraint(['created_by'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_tariff_parameter_scope', 'tariff_parameter', ['scope', 'name', 'valid_from'], unique=False)
+    op.create_index('idx_tariff_parameter_aps', 'tariff_parameter', ['aps_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_tariff_parameter_aps', table_name='tariff_parameter')
+    op.drop_index('idx_tariff_parameter_scope', table_name='tariff_parameter')
+    op.drop_table('tariff_parameter')
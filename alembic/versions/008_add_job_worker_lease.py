@@ -0,0 +1,27 @@
+"""Add owning worker to background jobs (lease-based requeue)
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Worker dueño del trabajo en ejecución; updated_at es su heartbeat
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('background_job')}
+    if 'worker_id' not in columns:
+        op.add_column('background_job', sa.Column('worker_id', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('background_job', 'worker_id')
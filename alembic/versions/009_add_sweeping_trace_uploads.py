@@ -0,0 +1,39 @@
+"""Store uploaded GPS sweeping traces in the database
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 22:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Trazas subidas pendientes de procesar, por bloques
+    op.create_table(
+        'sweeping_trace_chunk',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('upload_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('file_index', sa.Integer(), nullable=False),
+        sa.Column('extension', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('chunk_index', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'uq_sweeping_trace_chunk', 'sweeping_trace_chunk', ['upload_id', 'file_index', 'chunk_index'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_sweeping_trace_chunk', table_name='sweeping_trace_chunk')
+    op.drop_table('sweeping_trace_chunk')
@@ -3,6 +3,9 @@ from sqlmodel import Session
 from datetime import datetime
 
 from app.repositories.aps_repository import APSRepository, APSMonthlyDataRepository
+from app.repositories.tariff_calculation_repository import TariffCalculationRepository, TARIFF_STRATA
+from app.repositories.weigh_ticket_repository import WeighTicketRepository
+from app.repositories.sweeping_gps_repository import SweepingGpsRepository
 from app.models.aps import APS
 from app.models.aps_monthly_data import APSMonthlyData
 from app.schemas.aps import (
@@ -15,6 +18,8 @@ from app.core.exceptions import (
     ValidationError,
     InsufficientPermissionsError,
 )
+from app.core.http_cache import make_etag
+from app.core.responses import dump_orm_rows
 
 
 class APSController:
@@ -24,6 +29,8 @@ class APSController:
         self.session = session
         self.repository = APSRepository(session)
         self.monthly_repo = APSMonthlyDataRepository(session)
+        self.weigh_ticket_repo = WeighTicketRepository(session)
+        self.sweeping_gps_repo = SweepingGpsRepository(session)
     
     # ========================================
     # OPERACIONES CRUD
@@ -141,17 +148,24 @@ class APSController:
         # Validar que el APS existe y pertenece a la empresa
         aps = self.get_aps(data.aps_id, current_user_company_id, is_system_user)
         
+        # Las toneladas pesadas en báscula y el LBL medido con GPS prevalecen sobre los digitados
+        measured_fields = self.weigh_ticket_repo.get_monthly_fields(data.aps_id, data.period)
+        sweeping = self.sweeping_gps_repo.get_by_aps_and_period(data.aps_id, data.period)
+        if sweeping:
+            measured_fields["sweeping_length_km"] = sweeping.swept_km
+        
         # Verificar si ya existen datos para este período
         existing = self.monthly_repo.get_by_aps_and_period(data.aps_id, data.period)
         
         if existing:
             # Actualizar datos existentes
             update_data = data.model_dump(exclude={"aps_id", "period"})
+            update_data.update(measured_fields)
             updated = self.monthly_repo.update(existing.id, update_data)
             return updated
         
         # Crear nuevos datos
-        monthly_data = APSMonthlyData(**data.model_dump())
+        monthly_data = APSMonthlyData(**{**data.model_dump(), **measured_fields})
         return self.monthly_repo.create(monthly_data)
     
     def get_monthly_data(
@@ -251,29 +265,107 @@ class APSController:
         # Obtener APS
         aps = self.get_aps(aps_id, current_user_company_id, is_system_user)
         
-        # Obtener último mes registrado
-        all_data = self.monthly_repo.get_all_by_aps(aps_id)
-        last_month = all_data[0] if all_data else None
-        
-        # Calcular promedios si hay datos
-        averages = None
-        if last_month:
-            try:
-                averages = self.monthly_repo.calculate_6_month_averages(
-                    aps_id, 
-                    last_month.period
-                )
-            except:
-                averages = None
-        
+        # Último mes, conteo y promedios en consultas agregadas
+        stats = self.monthly_repo.get_summary_stats(aps_id)
+        return self._build_summary(aps, stats)
+    
+    def get_aps_summaries(
+        self,
+        aps_ids: List[int],
+        current_user_company_id: int,
+        is_system_user: bool = False
+    ) -> List[Dict]:
+        """Obtiene el resumen de varios APS con un número fijo de consultas"""
+        aps_ids = list(dict.fromkeys(aps_ids))
+        aps_by_id = {aps.id: aps for aps in self.repository.get_by_ids(aps_ids)}
+        
+        for aps_id in aps_ids:
+            aps = aps_by_id.get(aps_id)
+            if not aps:
+                raise APSNotFoundError(aps_id)
+            if not is_system_user and aps.company_id != current_user_company_id:
+                raise APSNotBelongsToCompanyError(aps_id, aps.company_id)
+        
+        stats = self.monthly_repo.get_summary_stats_batch(aps_ids)
+        return [self._build_summary(aps_by_id[aps_id], stats[aps_id]) for aps_id in aps_ids]
+    
+    def _build_summary(self, aps: APS, stats: Dict) -> Dict:
+        """Arma el diccionario de resumen de un APS"""
         return {
             "aps": aps,
-            "last_month_data": last_month,
-            "six_month_averages": averages,
+            "last_month_data": stats["last_month_data"],
+            "six_month_averages": stats["six_month_averages"],
             "effective_distance_km": aps.get_effective_distance(),
-            "total_months_registered": len(all_data)
+            "total_months_registered": stats["total_months_registered"]
+        }
+    
+    def get_company_dashboard(
+        self,
+        company_id: int,
+        current_user_company_id: int,
+        is_system_user: bool = False
+    ) -> Dict:
+        """
+        Tablero de todos los APS activos de una empresa
+        
+        Por APS: datos básicos, promedios de 6 meses, estado de verificación
+        y última tarifa oficial por estrato. Usa un número fijo de consultas
+        (APS, último mes, agregados mensuales, última tarifa) sin importar
+        cuántos APS tenga la empresa.
+        """
+        aps_list = self.get_all_aps_by_company(company_id, current_user_company_id, is_system_user)
+        aps_ids = [aps.id for aps in aps_list]
+        
+        stats = self.monthly_repo.get_summary_stats_batch(aps_ids)
+        tariffs = TariffCalculationRepository(self.session).get_latest_by_aps_ids(aps_ids)
+        
+        cards = []
+        for aps, aps_row in zip(aps_list, dump_orm_rows(aps_list, APSRead)):
+            aps_stats = stats[aps.id]
+            last_month = aps_stats["last_month_data"]
+            total = aps_stats["total_months_registered"]
+            tariff = tariffs.get(aps.id)
+            
+            cards.append({
+                "aps": aps_row,
+                "effective_distance_km": aps.get_effective_distance(),
+                "last_period": last_month.period if last_month else None,
+                "six_month_averages": aps_stats["six_month_averages"],
+                "verification": {
+                    "total_months": total,
+                    "verified_months": aps_stats["verified_months"],
+                    "unverified_months": total - aps_stats["verified_months"],
+                    "last_month_verified": bool(last_month and last_month.verified),
+                },
+                "latest_tariff": {
+                    "calculation_id": tariff.id,
+                    "period": tariff.period,
+                    "calculation_date": tariff.calculation_date,
+                    "base": {s: getattr(tariff, f"tariff_{s}_base") for s in TARIFF_STRATA},
+                    "final": {s: getattr(tariff, f"tariff_{s}_final") for s in TARIFF_STRATA},
+                } if tariff else None,
+            })
+        
+        return {
+            "company_id": company_id,
+            "total_aps": len(cards),
+            "aps": cards,
         }
     
+    def get_aps_summary_etag(
+        self,
+        aps_id: int,
+        current_user_company_id: int,
+        is_system_user: bool = False
+    ) -> str:
+        """
+        ETag del resumen del APS sin cargar los datos mensuales
+        
+        Se basa en updated_at del APS y el token de versión de sus meses.
+        """
+        aps = self.get_aps(aps_id, current_user_company_id, is_system_user)
+        return make_etag("aps-summary", aps.id, aps.updated_at, self.monthly_repo.get_version(aps_id))
+    
     def get_aps_by_municipality(
         self,
         municipality: str,
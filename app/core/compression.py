@@ -0,0 +1,181 @@
+"""
+Middleware de compresión de respuestas (brotli o gzip)
+
+Negocia la codificación con Accept-Encoding: prefiere brotli cuando el
+paquete está instalado y el cliente lo acepta, si no usa gzip. Solo
+comprime respuestas por encima de un tamaño mínimo; las respuestas en
+streaming se comprimen por bloques.
+"""
+
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# Contenidos que ya vienen comprimidos o que no deben bufferizarse
+EXCLUDED_CONTENT_TYPES = (
+    "application/zip",
+    "application/gzip",
+    "text/event-stream",
+    "image/",
+    "video/",
+    "audio/",
+)
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """Convierte 'gzip, br;q=0.8' en {'gzip': 1.0, 'br': 0.8}"""
+    encodings = {}
+    for part in header.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """Elige 'br', 'gzip' o None según lo que acepta el cliente"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = []
+    if brotli is not None:
+        candidates.append(("br", accepted.get("br", wildcard)))
+    candidates.append(("gzip", accepted.get("gzip", wildcard)))
+    # A igual calidad gana el primero (brotli)
+    best = max(candidates, key=lambda item: item[1])
+    return best[0] if best[1] > 0 else None
+
+
+class _Compressor:
+    """Compresor incremental con la misma interfaz para gzip y brotli"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._gzip = None
+        else:
+            self._brotli = None
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._gzip.compress(data)
+        return out + self._gzip.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Comprime respuestas HTTP con brotli o gzip según Accept-Encoding.
+
+    Usage:
+        app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = GZIP_LEVEL,
+        brotli_quality: int = BROTLI_QUALITY
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(
+            send, encoding, self.minimum_size, self.gzip_level, self.brotli_quality
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int, gzip_level: int, brotli_quality: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Retener los headers hasta conocer el primer bloque del cuerpo
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "").lower()
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 206, 304)
+                or any(content_type.startswith(excluded) for excluded in EXCLUDED_CONTENT_TYPES)
+            )
+            if self.passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body and len(body) < self.minimum_size:
+                # Respuesta pequeña: no vale la pena comprimir
+                self.passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            self.compressor = _Compressor(self.encoding, self.gzip_level, self.brotli_quality)
+            compressed = self.compressor.compress(body, final=not more_body)
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(compressed))
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+
+        compressed = self.compressor.compress(body, final=not more_body)
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
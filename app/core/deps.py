@@ -1,9 +1,9 @@
-from fastapi import Depends, HTTPException, Header, Request
+from fastapi import Depends, HTTPException, Header, Request, WebSocket
 from sqlmodel import Session
 from typing import Optional
 from ..core.security import decode_access_token
 from ..repositories.user_repository import UserRepository
-from ..db import get_session
+from ..db import get_session, read_router
 from ..models.user import User, Role
 
 
@@ -48,6 +48,56 @@ def get_current_user(
     if not user.is_active:
         raise HTTPException(status_code=403, detail="User is inactive")
     
+    # Owner of the request session, for read-your-writes routing
+    session.info["user_id"] = user.id
+    return user
+
+
+def get_read_session(
+    user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """
+    Session for read-only endpoints (history, audit, summaries).
+    
+    Uses a read replica when DATABASE_REPLICA_URLS is configured, unless the
+    user committed a write within READ_YOUR_WRITES_SECONDS or no replica is
+    reachable; in those cases it reuses the request's primary session.
+    """
+    read_session = read_router.open_session(user.id)
+    if read_session is None:
+        yield session
+        return
+    with read_session:
+        yield read_session
+
+
+def get_websocket_user(websocket: WebSocket, session: Session) -> Optional[User]:
+    """
+    Get authenticated user for a WebSocket connection.
+    
+    Browsers cannot set headers on WebSocket handshakes, so the JWT is read
+    from the `token` query parameter or, if present, the Authorization header.
+    Returns None if the token is missing/invalid or the user is inactive.
+    """
+    token = websocket.query_params.get("token")
+    auth_header = websocket.headers.get("Authorization")
+    if auth_header:
+        parts = auth_header.split()
+        if len(parts) == 2 and parts[0].lower() == "bearer":
+            token = parts[1]
+    if not token:
+        return None
+    
+    try:
+        payload = decode_access_token(token)
+        user_id = int(payload.get("sub"))
+    except Exception:
+        return None
+    
+    user = UserRepository(session).get_by_id(user_id)
+    if not user or not user.is_active:
+        return None
     return user
 
 
@@ -364,6 +364,34 @@ class AuditLogAccessDeniedError(SanitationSystemError):
         )
 
 
+# ========================================
+# BACKGROUND JOB ERRORS
+# ========================================
+
+class JobNotFoundError(SanitationSystemError):
+    """Trabajo en segundo plano no encontrado"""
+    
+    def __init__(self, job_id: int):
+        super().__init__(
+            message=f"Trabajo con ID {job_id} no encontrado",
+            error_code="JOB_NOT_FOUND",
+            status_code=404,
+            details={"job_id": job_id}
+        )
+
+
+class JobAlreadyFinishedError(SanitationSystemError):
+    """El trabajo ya terminó y no puede cancelarse"""
+    
+    def __init__(self, job_id: int, status: str):
+        super().__init__(
+            message=f"El trabajo {job_id} ya terminó con estado '{status}'",
+            error_code="JOB_ALREADY_FINISHED",
+            status_code=409,
+            details={"job_id": job_id, "status": status}
+        )
+
+
 # ========================================
 # FEATURE ERRORS
 # ========================================
@@ -0,0 +1,52 @@
+"""
+Utilidades HTTP de caché condicional (ETag / If-None-Match)
+
+Los endpoints de lectura calculan un ETag fuerte a partir de un
+"token de versión" barato (conteos, max(updated_at), max(id)) antes de
+cargar los datos. Si el cliente ya tiene esa versión se responde 304
+sin consultar ni serializar nada más.
+"""
+
+import hashlib
+import json
+import os
+
+from fastapi import Request, Response
+
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+
+def make_etag(*parts) -> str:
+    """Genera un ETag fuerte a partir de los componentes de versión"""
+    raw = json.dumps(parts, default=str, separators=(",", ":"))
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Indica si el If-None-Match del cliente contiene el ETag actual"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match usa comparación débil: se ignora el prefijo W/
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def cache_headers(etag: str) -> dict:
+    """Headers ETag + Cache-Control para respuestas privadas por usuario"""
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={HTTP_CACHE_MAX_AGE}, must-revalidate",
+    }
+
+
+def set_cache_headers(response: Response, etag: str) -> None:
+    """Agrega ETag y Cache-Control a la respuesta"""
+    response.headers.update(cache_headers(etag))
+
+
+def not_modified_response(etag: str) -> Response:
+    """Respuesta 304 sin cuerpo"""
+    return Response(status_code=304, headers=cache_headers(etag))
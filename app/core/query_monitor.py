@@ -0,0 +1,171 @@
+"""
+Monitor de consultas SQL por request
+
+Cuenta las consultas y el tiempo en BD de cada request HTTP (eventos del
+engine + contextvar), registra en el log los requests que superan el
+presupuesto y marca las sentencias idénticas repetidas (patrón N+1).
+
+Configuración:
+    QUERY_MONITOR_ENABLED   true/false (default true)
+    QUERY_BUDGET            máximo de consultas por request (default 15)
+    QUERY_TIME_BUDGET_MS    máximo de ms en BD por request (default 250)
+    N_PLUS_ONE_THRESHOLD    repeticiones de una sentencia para marcarla (default 5)
+
+Usage en tests:
+    with capture_queries(engine) as stats:
+        client.get("/api/aps/1/summary", headers=headers)
+    assert stats.count <= 4, stats.report()
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+QUERY_MONITOR_ENABLED = os.getenv("QUERY_MONITOR_ENABLED", "true").lower() == "true"
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "15"))
+QUERY_TIME_BUDGET_MS = float(os.getenv("QUERY_TIME_BUDGET_MS", "250"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+# Largo máximo de una sentencia en el log
+_STATEMENT_LOG_LENGTH = 200
+
+
+class QueryStats:
+    """Consultas ejecutadas dentro de un request (o bloque capturado)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        """Sentencias idénticas ejecutadas `threshold` veces o más (posible N+1)"""
+        return {statement: n for statement, n in self.statements.items() if n >= threshold}
+
+    def report(self) -> str:
+        """Resumen legible: total y sentencias ordenadas por repeticiones"""
+        lines = [f"{self.count} consultas, {self.total_ms:.1f} ms"]
+        for statement, n in self.statements.most_common():
+            lines.append(f"  {n}x {_shorten(statement)}")
+        return "\n".join(lines)
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_captures: list = []
+
+
+def _shorten(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > _STATEMENT_LOG_LENGTH:
+        return statement[:_STATEMENT_LOG_LENGTH] + "..."
+    return statement
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_time")
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000 if starts else 0.0
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    for engine, captured in _captures:
+        if engine is conn.engine:
+            captured.record(statement, elapsed_ms)
+
+
+def install_query_monitor(engine: Engine) -> None:
+    """Registra los eventos de conteo en el engine (idempotente)"""
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Cuenta las consultas del contexto actual (request, tarea o hilo copiado)"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def capture_queries(engine: Engine) -> Iterator[QueryStats]:
+    """
+    Cuenta todas las consultas de `engine` mientras dure el bloque, sin
+    importar el hilo (TestClient ejecuta la app en otro hilo)
+    """
+    install_query_monitor(engine)
+    entry = (engine, QueryStats())
+    _captures.append(entry)
+    try:
+        yield entry[1]
+    finally:
+        _captures.remove(entry)
+
+
+def check_query_budget(label: str, stats: QueryStats) -> bool:
+    """
+    Registra en el log si `stats` supera el presupuesto o tiene
+    sentencias repetidas. Retorna True si hubo advertencia.
+    """
+    repeated = stats.repeated()
+    over_count = stats.count > QUERY_BUDGET
+    over_time = stats.total_ms > QUERY_TIME_BUDGET_MS
+    if not (over_count or over_time or repeated):
+        return False
+
+    if over_count or over_time:
+        logger.warning(
+            "Presupuesto de consultas excedido en %s: %d consultas (máx %d), %.1f ms (máx %.0f)",
+            label, stats.count, QUERY_BUDGET, stats.total_ms, QUERY_TIME_BUDGET_MS
+        )
+    for statement, n in repeated.items():
+        logger.warning("Posible N+1 en %s: %dx %s", label, n, _shorten(statement))
+    return True
+
+
+class QueryMonitorMiddleware:
+    """
+    Mide las consultas de cada request HTTP y advierte en el log los
+    que exceden QUERY_BUDGET / QUERY_TIME_BUDGET_MS o repiten sentencias.
+
+    Usage:
+        app.add_middleware(QueryMonitorMiddleware)
+    """
+
+    def __init__(self, app: ASGIApp, enabled: bool = QUERY_MONITOR_ENABLED):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                check_query_budget(f"{scope['method']} {scope['path']}", stats)
@@ -0,0 +1,50 @@
+"""
+Respuestas JSON rápidas para endpoints con listas grandes
+
+Usa orjson cuando está instalado (serializa datetime/Decimal de forma
+nativa y varias veces más rápido que json + jsonable_encoder). Para
+filas ORM ya validadas al escribirse, permite omitir la re-validación
+Pydantic y serializar directamente los atributos del modelo.
+"""
+
+import os
+from typing import Any, Iterable, List, Type
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+# Omitir re-validación Pydantic de filas ORM en endpoints pesados
+SKIP_RESPONSE_VALIDATION = os.getenv("SKIP_RESPONSE_VALIDATION", "true").lower() == "true"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializada con orjson (con fallback a json estándar)"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(
+                content,
+                default=jsonable_encoder,
+                option=orjson.OPT_NON_STR_KEYS
+            )
+        return super().render(jsonable_encoder(content))
+
+
+def dump_orm_rows(rows: Iterable[Any], schema: Type[BaseModel]) -> List[dict]:
+    """
+    Convierte filas ORM a dicts usando solo los campos del schema de lectura.
+
+    No ejecuta validación: se asume que los datos se validaron al escribirse.
+    Con SKIP_RESPONSE_VALIDATION=false se usa la validación Pydantic normal.
+    """
+    if not SKIP_RESPONSE_VALIDATION:
+        return [schema.model_validate(row).model_dump(mode="json") for row in rows]
+
+    fields = tuple(schema.model_fields.keys())
+    return [{field: getattr(row, field, None) for field in fields} for row in rows]
@@ -0,0 +1,202 @@
+"""
+Log de consultas lentas
+
+Registra las sentencias que superan SLOW_QUERY_THRESHOLD_MS con el método
+de repositorio que las originó, los parámetros redactados y el plan de
+ejecución (EXPLAIN en PostgreSQL, EXPLAIN QUERY PLAN en SQLite).
+
+Los registros se escriben como JSON por línea en un archivo rotativo y se
+conservan los últimos en memoria para el endpoint de administración.
+
+Configuración:
+    SLOW_QUERY_THRESHOLD_MS    umbral en ms (default 200; 0 desactiva)
+    SLOW_QUERY_LOG_FILE        archivo (default logs/slow_queries.log; vacío = sin archivo)
+    SLOW_QUERY_LOG_MAX_BYTES   tamaño antes de rotar (default 5 MB)
+    SLOW_QUERY_LOG_BACKUPS     archivos rotados a conservar (default 5)
+    SLOW_QUERY_EXPLAIN         capturar plan de los SELECT (default true)
+    SLOW_QUERY_BUFFER_SIZE     registros en memoria (default 200)
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE", os.path.join("logs", "slow_queries.log"))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_REPOSITORIES_DIR = os.path.join(_APP_DIR, "repositories")
+_IGNORED_DIRS = (os.path.join(_APP_DIR, "core"),)
+
+_recent: deque = deque(maxlen=SLOW_QUERY_BUFFER_SIZE)
+_file_logger: Optional[logging.Logger] = None
+_file_lock = threading.Lock()
+
+
+# ========================================
+# REGISTROS
+# ========================================
+
+def get_recent_slow_queries(limit: int = 50) -> List[Dict]:
+    """Registros más recientes primero"""
+    return list(reversed(_recent))[:limit]
+
+
+def clear_slow_queries() -> None:
+    _recent.clear()
+
+
+def redact_parameters(parameters):
+    """
+    Conserva números, booleanos, fechas y NULL; los textos y binarios se
+    reemplazan por su tipo y largo
+    """
+    if isinstance(parameters, dict):
+        return {key: redact_parameters(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact_parameters(value) for value in parameters]
+    if parameters is None or isinstance(parameters, (bool, int, float, datetime, date)):
+        return parameters if not isinstance(parameters, (datetime, date)) else parameters.isoformat()
+    if isinstance(parameters, (bytes, bytearray, memoryview)):
+        return f"<bytes len={len(parameters)}>"
+    return f"<{type(parameters).__name__} len={len(str(parameters))}>"
+
+
+def find_caller() -> Optional[str]:
+    """
+    Método de repositorio (o, si no hay, primer frame de la app fuera de
+    core/) que originó la consulta: "Clase.metodo (archivo:línea)"
+    """
+    fallback = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(_APP_DIR) and not filename.startswith(_IGNORED_DIRS):
+            owner = frame.f_locals.get("self")
+            name = frame.f_code.co_name
+            if owner is not None:
+                name = f"{type(owner).__name__}.{name}"
+            location = f"{name} ({os.path.relpath(filename, os.path.dirname(_APP_DIR))}:{frame.f_lineno})"
+            if filename.startswith(_REPOSITORIES_DIR):
+                return location
+            fallback = fallback or location
+        frame = frame.f_back
+    return fallback
+
+
+def explain(conn, cursor, statement: str, parameters) -> Optional[str]:
+    """
+    Plan de ejecución del SELECT usando el cursor DBAPI (no dispara
+    eventos del engine). En PostgreSQL corre dentro de un SAVEPOINT para
+    no abortar la transacción si falla.
+    """
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+
+    dialect = conn.dialect.name
+    explain_cursor = cursor.connection.cursor()
+    try:
+        if dialect == "postgresql":
+            explain_cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                explain_cursor.execute("EXPLAIN " + statement, parameters)
+                rows = explain_cursor.fetchall()
+            finally:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return "\n".join(row[0] for row in rows)
+        if dialect == "sqlite":
+            explain_cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            return "\n".join(str(row[-1]) for row in explain_cursor.fetchall())
+        return None
+    except Exception as e:
+        return f"EXPLAIN falló: {e}"
+    finally:
+        explain_cursor.close()
+
+
+def _write_to_file(record: Dict) -> None:
+    global _file_logger
+    if not SLOW_QUERY_LOG_FILE:
+        return
+    with _file_lock:
+        if _file_logger is None:
+            directory = os.path.dirname(SLOW_QUERY_LOG_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                SLOW_QUERY_LOG_FILE,
+                maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+                backupCount=SLOW_QUERY_LOG_BACKUPS,
+                encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            file_logger = logging.getLogger(f"{__name__}.file")
+            file_logger.setLevel(logging.INFO)
+            file_logger.propagate = False
+            file_logger.addHandler(handler)
+            _file_logger = file_logger
+    _file_logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+def record_slow_query(conn, cursor, statement: str, parameters, elapsed_ms: float, executemany: bool) -> Dict:
+    """Arma el registro, lo guarda en memoria y en el archivo"""
+    record = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "elapsed_ms": round(elapsed_ms, 2),
+        "statement": " ".join(statement.split()),
+        "parameters": redact_parameters(parameters),
+        "caller": find_caller(),
+        "plan": None,
+    }
+    if SLOW_QUERY_EXPLAIN and not executemany:
+        record["plan"] = explain(conn, cursor, statement, parameters)
+
+    _recent.append(record)
+    try:
+        _write_to_file(record)
+    except OSError as e:
+        logger.warning("No se pudo escribir el log de consultas lentas: %s", e)
+    logger.warning("Consulta lenta (%.1f ms) desde %s", elapsed_ms, record["caller"])
+    return record
+
+
+# ========================================
+# EVENTOS DEL ENGINE
+# ========================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._slow_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_slow_query_start", None)
+    if start is None or SLOW_QUERY_THRESHOLD_MS <= 0:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if elapsed_ms >= SLOW_QUERY_THRESHOLD_MS:
+        record_slow_query(conn, cursor, statement, parameters, elapsed_ms, executemany)
+
+
+def install_slow_query_log(engine: Engine) -> None:
+    """Registra los eventos del log de consultas lentas (idempotente)"""
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,20 +1,102 @@
+import itertools
 import os
+import re
+import threading
 import time
+from typing import Dict, List, Optional
 from sqlmodel import create_engine, SQLModel, Session
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, OperationalError
+from .core.query_monitor import install_query_monitor
+from .core.slow_query_log import install_slow_query_log
 
 # Single database connection for the company
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
 engine = create_engine(DATABASE_URL, echo=False)
 
+# Conteo de consultas y tiempo por request (ver core/query_monitor.py)
+install_query_monitor(engine)
 
-def init_db(retries: int = 10, delay: int = 2):
+# Consultas lentas con plan de ejecución (ver core/slow_query_log.py)
+install_slow_query_log(engine)
+
+# Réplicas de lectura (URLs separadas por coma) para histórico, auditoría y resúmenes
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+# Tras una escritura propia, las lecturas del usuario van al primario durante esta ventana
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# Tiempo que una réplica caída queda fuera de rotación
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+replica_engines = [create_engine(url, echo=False, pool_pre_ping=True) for url in DATABASE_REPLICA_URLS]
+for _replica in replica_engines:
+    install_query_monitor(_replica)
+    install_slow_query_log(_replica)
+
+# auto: omite create_all si la BD está en el head de Alembic y tiene todas las tablas
+# create_all: siempre ejecuta create_all | skip: nunca (el esquema lo maneja Alembic)
+DB_INIT_MODE = os.getenv("DB_INIT_MODE", "auto")
+
+ALEMBIC_VERSIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic", "versions"
+)
+_REVISION_PATTERN = re.compile(r"^(down_revision|revision)\s*=\s*['\"]?([^'\"\s]+)['\"]?", re.MULTILINE)
+
+
+def get_alembic_head(versions_dir: str = ALEMBIC_VERSIONS_DIR) -> Optional[str]:
+    """
+    Revisión head de las migraciones, leída de los archivos sin importar
+    Alembic. None si no hay migraciones o hay más de un head.
+    """
+    if not os.path.isdir(versions_dir):
+        return None
+    revisions = set()
+    parents = set()
+    for filename in os.listdir(versions_dir):
+        if not filename.endswith(".py"):
+            continue
+        with open(os.path.join(versions_dir, filename), encoding="utf-8") as f:
+            for key, value in _REVISION_PATTERN.findall(f.read()):
+                (revisions if key == "revision" else parents).add(value)
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
+
+
+def schema_is_current(connection) -> bool:
+    """La BD está en el head de Alembic y tiene todas las tablas de los modelos"""
+    head = get_alembic_head()
+    if head is None:
+        return False
+    tables = set(inspect(connection).get_table_names())
+    if "alembic_version" not in tables or not set(SQLModel.metadata.tables) <= tables:
+        return False
+    try:
+        current = connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except DBAPIError:
+        return False
+    return current == head
+
+
+def init_db(retries: int = 10, delay: int = 2, mode: str = DB_INIT_MODE):
     """
     Initialize database - create all tables for single company.
     Called once at startup.
+    
+    With mode "auto" create_all is skipped when the schema is already at
+    the Alembic head; with "skip" only connectivity is checked.
     """
     for attempt in range(1, retries + 1):
         try:
+            with engine.connect() as connection:
+                if mode == "skip":
+                    print("[Startup] Schema management left to Alembic")
+                    return
+                if mode == "auto" and schema_is_current(connection):
+                    print("[Startup] Schema at Alembic head, skipping create_all")
+                    return
+            
             # Create all tables
             SQLModel.metadata.create_all(engine)
             print("[Startup] Database initialized successfully")
@@ -30,3 +112,100 @@ def get_session():
     """Get database session for current company"""
     with Session(engine) as session:
         yield session
+
+
+class ReadRouter:
+    """
+    Enruta sesiones de sólo lectura a las réplicas (round robin).
+    
+    - Read-your-writes: si el usuario hizo commit de una escritura hace
+      menos de `read_your_writes_seconds`, sus lecturas van al primario.
+    - Fallback: si una réplica no acepta conexiones queda fuera de rotación
+      `retry_seconds` y se usa la siguiente (o el primario).
+    
+    El registro de escrituras es por proceso: con varios workers la
+    garantía aplica a las peticiones atendidas por el mismo proceso.
+    """
+    
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: List[Engine],
+        read_your_writes_seconds: float = READ_YOUR_WRITES_SECONDS,
+        retry_seconds: float = REPLICA_RETRY_SECONDS
+    ):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.retry_seconds = retry_seconds
+        self._last_write: Dict[int, float] = {}
+        self._down_until: Dict[int, float] = {}
+        self._cycle = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        self._lock = threading.Lock()
+    
+    def record_write(self, user_id: int) -> None:
+        with self._lock:
+            self._last_write[user_id] = time.monotonic()
+    
+    def wrote_recently(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        last_write = self._last_write.get(user_id)
+        return last_write is not None and time.monotonic() - last_write < self.read_your_writes_seconds
+    
+    def candidates(self, user_id: Optional[int] = None) -> List[Engine]:
+        """Engines a intentar en orden (el primario siempre al final)"""
+        if not self.replicas or self.wrote_recently(user_id):
+            return [self.primary]
+        now = time.monotonic()
+        with self._lock:
+            start = next(self._cycle)
+        ordered = self.replicas[start:] + self.replicas[:start]
+        healthy = [replica for replica in ordered if self._down_until.get(id(replica), 0) <= now]
+        return healthy + [self.primary]
+    
+    def mark_down(self, replica: Engine) -> None:
+        self._down_until[id(replica)] = time.monotonic() + self.retry_seconds
+    
+    def open_session(self, user_id: Optional[int] = None) -> Optional[Session]:
+        """
+        Sesión conectada a la primera réplica disponible, o None si la
+        lectura debe ir al primario
+        """
+        for target in self.candidates(user_id):
+            if target is self.primary:
+                return None
+            session = Session(target)
+            try:
+                session.connection()
+                return session
+            except OperationalError:
+                session.close()
+                self.mark_down(target)
+        return None
+
+
+read_router = ReadRouter(engine, replica_engines)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_session_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _record_user_write(session):
+    """Registra la escritura del usuario dueño de la sesión (read-your-writes)"""
+    if session.info.pop("wrote", False) and session.info.get("user_id") is not None:
+        read_router.record_write(session.info["user_id"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_session_write(session):
+    session.info.pop("wrote", None)
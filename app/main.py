@@ -1,10 +1,11 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Session
+from sqlmodel import Session, select
 from .db import init_db, engine
 from .core.error_handler import register_exception_handlers
-from .repositories.user_repository import UserRepository
+from .core.compression import CompressionMiddleware
+from .core.query_monitor import QueryMonitorMiddleware
 from .repositories.company_repository import CompanyRepository
 from .controllers.auth_controller import register_user
 from .models.user import Role, User
@@ -14,44 +15,65 @@ from .models.audit_log import AuditLog
 from .models.aps import APS
 from .models.aps_monthly_data import APSMonthlyData
 from .models.tariff_calculation import TariffCalculation
+from .models.job import Job
+from .models.municipality_costs import MunicipalityCostAggregate, MunicipalityCostContribution
+from .models.weigh_ticket import WeighTicket, WeighTicketRollup
+from .models.sweeping_gps import SweepingGpsSummary, SweepingTraceChunk
+from .models.disposal_site import DisposalSite
+from .models.tariff_parameter import TariffParameter
+from .services.job_queue import start_job_queue, stop_job_queue
+from .services import job_handlers  # Registra los handlers de trabajos
+from .services.report_generator import shutdown_report_pool
 import os
+import time
+from typing import Optional, Tuple
+
+
+JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "true").lower() == "true"
+
+
+DEFAULT_COMPANY_NAME = "Default Company"
+
+
+def get_seed_state(session: Session, admin_username: str) -> Tuple[Optional[int], bool]:
+    """
+    (id de la empresa por defecto, existe el usuario admin) en una sola consulta
+    """
+    company_id = select(Company.id).where(Company.name == DEFAULT_COMPANY_NAME).limit(1).scalar_subquery()
+    admin_id = select(User.id).where(User.username == admin_username).limit(1).scalar_subquery()
+    row = session.exec(select(company_id, admin_id)).one()
+    return row[0], row[1] is not None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifecycle - startup and shutdown"""
+    started = time.perf_counter()
     try:
-        # 1. Initialize database
+        # 1. Initialize database (create_all sólo si el esquema no está al día)
         init_db()
         print("[Startup] Database initialized")
         
-        # 2. Seed default company if needed
+        # 2-3. Seed default company and SYSTEM admin user if needed.
+        #      One query checks both; the password is hashed only when creating the user.
+        admin_user = os.getenv("ADMIN_USERNAME", "admin")
+        admin_pass = os.getenv("ADMIN_PASSWORD", "admin123456")
+        
         with Session(engine) as session:
-            company_repo = CompanyRepository(session)
-            default_company = company_repo.get_by_name("Default Company")
+            default_company_id, admin_exists = get_seed_state(session, admin_user)
             
-            if not default_company:
-                default_company = Company(
-                    name="Default Company",
+            if default_company_id is None:
+                default_company = CompanyRepository(session).create(Company(
+                    name=DEFAULT_COMPANY_NAME,
                     nit="0000000000",
                     email="admin@default.com"
-                )
-                default_company = company_repo.create(default_company)
+                ))
                 print("[Startup] Created default company")
                 default_company_id = default_company.id
-            else:
-                default_company_id = default_company.id
-        
-        # 3. Create SYSTEM admin user if specified in env vars
-        admin_user = os.getenv("ADMIN_USERNAME", "admin")
-        admin_pass = os.getenv("ADMIN_PASSWORD", "admin123456")
-        
-        if admin_user and admin_pass:
-            with Session(engine) as session:
-                user_repo = UserRepository(session)
-                
-                if not user_repo.get_by_username(admin_user):
-                    user = register_user(
+            
+            if admin_user and admin_pass:
+                if not admin_exists:
+                    register_user(
                         username=admin_user,
                         password=admin_pass,
                         session=session,
@@ -63,7 +85,12 @@ async def lifespan(app: FastAPI):
                 else:
                     print(f"[Startup] Admin user {admin_user} already exists")
         
-        print("[Startup] Application ready")
+        # 4. Start background job workers
+        if JOB_QUEUE_ENABLED:
+            queue = start_job_queue(engine)
+            print(f"[Startup] Job queue started with {queue.workers} workers")
+        
+        print(f"[Startup] Application ready in {(time.perf_counter() - started) * 1000:.0f} ms")
     except Exception as e:
         print(f"[Startup] Error during initialization: {e}")
         import traceback
@@ -71,6 +98,8 @@ async def lifespan(app: FastAPI):
     
     yield
     # Shutdown logic
+    stop_job_queue()
+    shutdown_report_pool()
     print("[Shutdown] Application closing")
 
 
@@ -95,6 +124,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (brotli/gzip negotiated via Accept-Encoding)
+app.add_middleware(CompressionMiddleware)
+
+# Log requests over the query budget and repeated statements (N+1)
+app.add_middleware(QueryMonitorMiddleware)
+
 # Register exception handlers
 register_exception_handlers(app)
 
@@ -105,6 +140,13 @@ from .routes.user_routes import router as user_router
 from .routes.audit_routes import router as audit_router
 from .routes.aps import router as aps_router
 from .routes.tariff_calculation import router as tariff_calc_router
+from .routes.job_routes import router as job_router
+from .routes.diagnostics_routes import router as diagnostics_router
+from .routes.report_routes import router as report_router
+from .routes.weigh_ticket_routes import router as weigh_ticket_router
+from .routes.sweeping_routes import router as sweeping_router
+from .routes.spatial_routes import router as spatial_router
+from .routes.tariff_parameter_routes import router as tariff_parameter_router
 
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(company_router, prefix="/companies", tags=["companies"])
@@ -112,6 +154,13 @@ app.include_router(user_router, prefix="/users", tags=["users"])
 app.include_router(audit_router, prefix="/audit", tags=["audit"])
 app.include_router(aps_router, prefix="/api")
 app.include_router(tariff_calc_router, prefix="/api")
+app.include_router(job_router, prefix="/jobs", tags=["jobs"])
+app.include_router(diagnostics_router, prefix="/admin", tags=["admin"])
+app.include_router(report_router, prefix="/reports", tags=["reports"])
+app.include_router(weigh_ticket_router, prefix="/weigh-tickets", tags=["weigh-tickets"])
+app.include_router(sweeping_router, prefix="/sweeping", tags=["sweeping"])
+app.include_router(spatial_router, prefix="/spatial", tags=["spatial"])
+app.include_router(tariff_parameter_router, prefix="/tariff-parameters", tags=["tariff-parameters"])
 
 @app.get("/health", tags=["health"])
 def health_check():
@@ -1,5 +1,6 @@
 from typing import Optional
 from sqlmodel import SQLModel, Field, Column, JSON
+from sqlalchemy import Index
 from datetime import datetime
 from decimal import Decimal
 
@@ -124,6 +125,14 @@ class APSMonthlyData(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
+    # Índices para las rutas de acceso reales (migración 002)
+    __table_args__ = (
+        # get_by_aps_and_period / upsert mensual: un registro por APS y período
+        Index('uq_monthly_aps_period', 'aps_id', 'period', unique=True),
+        # get_last_6_months, resúmenes y listados ordenados por año/mes
+        Index('idx_monthly_aps_year_month', 'aps_id', 'year', 'month'),
+    )
+    
     class Config:
         json_schema_extra = {
             "example": {
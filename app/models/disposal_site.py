@@ -0,0 +1,40 @@
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+from datetime import datetime
+
+
+class DisposalSiteType:
+    """Tipo de sitio (Art. 24)"""
+    LANDFILL = "landfill"                  # Relleno sanitario
+    TRANSFER_STATION = "transfer_station"  # Estación de transferencia
+
+    ALL = (LANDFILL, TRANSFER_STATION)
+
+
+class DisposalSite(SQLModel, table=True):
+    """
+    Relleno sanitario o estación de transferencia georreferenciado
+
+    Los sitios sin empresa (company_id nulo) son regionales y los ven
+    todas las empresas.
+    """
+    __tablename__ = "disposal_site"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    company_id: Optional[int] = Field(default=None, foreign_key="company.id")
+
+    name: str
+    site_type: str = Field(default=DisposalSiteType.LANDFILL)
+    municipality: str
+    department: str
+
+    latitude: float
+    longitude: float
+
+    is_active: bool = Field(default=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_disposal_site_type_active', 'site_type', 'is_active'),
+    )
@@ -0,0 +1,63 @@
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, JSON, Index
+from datetime import datetime
+
+
+class JobStatus:
+    """Estados posibles de un trabajo en segundo plano"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class Job(SQLModel, table=True):
+    """
+    Trabajo en segundo plano (recálculos masivos, exportaciones, simulaciones)
+
+    La tabla actúa como cola persistente: los workers reclaman trabajos
+    en estado "queued" ordenados por prioridad y fecha de creación.
+    """
+    __tablename__ = "background_job"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    # Tipo de trabajo (clave del handler registrado) y parámetros
+    job_type: str = Field(index=True)  # "tariff.recalculate", ...
+    payload: dict = Field(default_factory=dict, sa_column=Column(JSON))
+
+    # Planificación
+    status: str = Field(default=JobStatus.QUEUED, index=True)
+    priority: int = Field(default=0)  # Mayor valor = se ejecuta primero
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    cancel_requested: bool = Field(default=False)
+
+    # Progreso y resultado
+    progress: float = Field(default=0.0)  # 0.0 - 1.0
+    progress_message: Optional[str] = None
+    result: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    error_message: Optional[str] = None
+
+    # Worker que lo ejecuta ("host:pid:hilo"); mientras corre, updated_at
+    # es su heartbeat y el trabajo sólo se reencola si el lease vence
+    worker_id: Optional[str] = None
+
+    # Quién lo solicitó
+    company_id: Optional[int] = Field(default=None, foreign_key="company.id", index=True)
+    submitted_by: int = Field(foreign_key="user.id")
+
+    # Timestamps
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    # Índice para reclamar el siguiente trabajo pendiente
+    __table_args__ = (
+        Index('idx_job_status_priority', 'status', 'priority', 'created_at'),
+    )
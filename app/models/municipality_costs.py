@@ -0,0 +1,68 @@
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+from datetime import datetime
+
+
+class MunicipalityCostAggregate(SQLModel, table=True):
+    """
+    Sumas ponderadas por toneladas de CRT y CDF de los APS de un municipio
+    en un período (Art. 34: CRT_p y CDF_p para el VBA)
+
+    CRT_p = crt_weighted_sum / crt_tons
+    CDF_p = cdf_weighted_sum / cdf_tons
+
+    Se actualiza incrementalmente con cada aporte de APS (ver
+    MunicipalityCostContribution); la lectura es una fila por índice único.
+    """
+    __tablename__ = "municipality_cost_aggregate"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    municipality: str
+    department: str
+    period: str  # "2026-02"
+
+    # Σ CRT_i × QRT_i y Σ QRT_i (toneladas no aprovechables recolectadas)
+    crt_weighted_sum: float = Field(default=0.0)
+    crt_tons: float = Field(default=0.0)
+
+    # Σ CDF_i × QRS_i y Σ QRS_i (toneladas dispuestas en relleno)
+    cdf_weighted_sum: float = Field(default=0.0)
+    cdf_tons: float = Field(default=0.0)
+
+    aps_count: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __table_args__ = (
+        Index('uq_municipality_cost_period', 'municipality', 'department', 'period', unique=True),
+    )
+
+
+class MunicipalityCostContribution(SQLModel, table=True):
+    """
+    Último aporte de un APS a las sumas de su municipio en un período
+
+    Permite recalcular un APS restando su aporte anterior en lugar de
+    recorrer todos los APS del municipio.
+    """
+    __tablename__ = "municipality_cost_contribution"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    aps_id: int = Field(foreign_key="aps.id")
+    period: str
+
+    # Municipio al que se sumó el aporte (por si el APS cambia de municipio)
+    municipality: str
+    department: str
+
+    crt: float
+    crt_tons: float
+    cdf: float
+    cdf_tons: float
+
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __table_args__ = (
+        Index('uq_municipality_contribution_aps_period', 'aps_id', 'period', unique=True),
+    )
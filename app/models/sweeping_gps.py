@@ -0,0 +1,57 @@
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, Index, LargeBinary
+from datetime import datetime
+
+
+class SweepingGpsSummary(SQLModel, table=True):
+    """
+    Kilómetros barridos de un APS en el mes calculados desde trazas GPS
+
+    Respalda el LBL (Art. 21) que se copia a APSMonthlyData.sweeping_length_km.
+    Cada procesamiento reemplaza el resultado anterior del período.
+    """
+    __tablename__ = "sweeping_gps_summary"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    aps_id: int = Field(foreign_key="aps.id")
+    period: str  # YYYY-MM
+
+    # Kilómetros distintos barridos y kilómetros recorridos barriendo
+    swept_km: float
+    traveled_km: float
+
+    points: int
+    segments_used: int
+    segments_discarded: int
+    files: int
+
+    job_id: Optional[int] = Field(default=None, foreign_key="background_job.id")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __table_args__ = (
+        Index('uq_sweeping_gps_aps_period', 'aps_id', 'period', unique=True),
+    )
+
+
+class SweepingTraceChunk(SQLModel, table=True):
+    """
+    Bloque de un archivo de trazas GPS subido, pendiente de procesar
+
+    Las trazas se guardan en la BD (no en el disco de la instancia que
+    recibió la subida) para que cualquier worker pueda procesarlas. Se
+    eliminan cuando el trabajo termina, con éxito o en el último intento.
+    """
+    __tablename__ = "sweeping_trace_chunk"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    upload_id: str  # Una subida = todas las trazas del mes
+    file_index: int
+    extension: str  # ".gpx" / ".csv" (elige el parser)
+    chunk_index: int
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __table_args__ = (
+        Index('uq_sweeping_trace_chunk', 'upload_id', 'file_index', 'chunk_index', unique=True),
+    )
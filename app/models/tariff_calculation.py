@@ -1,5 +1,6 @@
 from typing import Optional
 from sqlmodel import SQLModel, Field, Column, JSON
+from sqlalchemy import Index, text
 from datetime import datetime
 from decimal import Decimal
 
@@ -188,6 +189,25 @@ class TariffCalculation(SQLModel, table=True):
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
+    # Índices para las rutas de acceso reales (migración 002)
+    __table_args__ = (
+        # Detalle/validación por (APS, período, tipo) e histórico ordenado por período.
+        # En PostgreSQL incluye las columnas del listado (index-only scan).
+        Index(
+            'idx_tariff_aps_period_type', 'aps_id', 'period', 'calculation_type',
+            postgresql_include=[
+                'tariff_stratum_4_final', 'calculated_by', 'calculation_date', 'notes'
+            ],
+        ),
+        # Una sola tarifa oficial por APS y período
+        Index(
+            'uq_tariff_official_aps_period', 'aps_id', 'period',
+            unique=True,
+            sqlite_where=text("calculation_type = 'official'"),
+            postgresql_where=text("calculation_type = 'official'"),
+        ),
+    )
+    
     class Config:
         json_schema_extra = {
             "example": {
@@ -0,0 +1,64 @@
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+from datetime import datetime
+
+from app.tariff_core.engine import SUBSIDY_FACTOR_PREFIX
+
+
+class TariffParameterScope:
+    """Alcance de un parámetro; el más específico tiene prioridad"""
+    APS = "aps"                    # Un APS
+    MUNICIPALITY = "municipality"  # Todos los APS de un municipio
+    GLOBAL = "global"              # Todos los APS (de la empresa o del sistema)
+
+    ALL = (APS, MUNICIPALITY, GLOBAL)
+
+
+class TariffParameterName:
+    """Parámetros de cálculo que cambian en el tiempo"""
+    WATER_PRICE_PER_M3 = "water_price_per_m3"                  # Art. 20 - lavado de áreas públicas
+    TOLLS_COST_MONTH = "tolls_cost_month"                      # Art. 24 - PRT
+    PUBLIC_CONTRIBUTION = "has_public_contribution"            # Art. 22, 26, 29 - 1 = hay aporte
+    EXTENDED_POSTCLOSURE_YEARS = "extended_postclosure_years"  # Art. 28 Par. 5
+    INCENTIVE_DISCOUNT = "incentive_discount"                  # Art. 34 - DINC (0 a 0.04)
+
+    # Factores de subsidio/contribución: "subsidy_factor.stratum_1", ...
+    SUBSIDY_FACTOR_PREFIX = SUBSIDY_FACTOR_PREFIX
+
+    ALL = (WATER_PRICE_PER_M3, TOLLS_COST_MONTH, PUBLIC_CONTRIBUTION, EXTENDED_POSTCLOSURE_YEARS, INCENTIVE_DISCOUNT)
+
+
+class TariffParameter(SQLModel, table=True):
+    """
+    Valor de un parámetro vigente desde `valid_from` hasta `valid_to`
+    (períodos YYYY-MM, ambos inclusive; valid_to nulo = sin fin)
+
+    Alcance:
+    - aps: aps_id
+    - municipality: municipality + department
+    - global: sin llave
+    company_id nulo en municipality/global aplica a todas las empresas.
+    """
+    __tablename__ = "tariff_parameter"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str
+    scope: str = Field(default=TariffParameterScope.GLOBAL)
+    company_id: Optional[int] = Field(default=None, foreign_key="company.id")
+    aps_id: Optional[int] = Field(default=None, foreign_key="aps.id")
+    municipality: Optional[str] = None
+    department: Optional[str] = None
+
+    valid_from: str  # "2026-01"
+    valid_to: Optional[str] = None
+    value: float
+
+    notes: Optional[str] = None
+    created_by: Optional[int] = Field(default=None, foreign_key="user.id")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_tariff_parameter_scope', 'scope', 'name', 'valid_from'),
+        Index('idx_tariff_parameter_aps', 'aps_id'),
+    )
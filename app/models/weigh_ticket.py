@@ -0,0 +1,65 @@
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+from datetime import datetime
+
+
+class WeighTicketType:
+    """Tipo de pesaje y campo de APSMonthlyData que alimenta"""
+    COLLECTION = "collection"  # Recolección no aprovechable (QNA)
+    LANDFILL = "landfill"      # Recibido en relleno sanitario (QRS)
+
+    MONTHLY_FIELDS = {
+        COLLECTION: "tons_collected_non_recyclable",
+        LANDFILL: "tons_received_landfill",
+    }
+
+
+class WeighTicket(SQLModel, table=True):
+    """
+    Tiquete de báscula (pesaje individual de un vehículo)
+
+    Tabla de sólo inserción: los tiquetes no se actualizan; las sumas
+    diarias y mensuales se mantienen en WeighTicketRollup.
+    """
+    __tablename__ = "weigh_ticket"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    # Número del tiquete en la báscula (idempotencia de reintentos)
+    ticket_number: str
+    aps_id: int = Field(foreign_key="aps.id")
+    vehicle_plate: str
+    ticket_type: str = Field(default=WeighTicketType.COLLECTION)
+
+    weighed_at: datetime
+    net_tons: float
+
+    received_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __table_args__ = (
+        Index('uq_weigh_ticket_number', 'ticket_number', unique=True),
+        Index('idx_weigh_ticket_aps_weighed_at', 'aps_id', 'weighed_at'),
+    )
+
+
+class WeighTicketRollup(SQLModel, table=True):
+    """
+    Toneladas y número de tiquetes por APS, tipo y día ("2026-02-03") o
+    mes ("2026-02"). Se actualiza con cada lote ingerido.
+    """
+    __tablename__ = "weigh_ticket_rollup"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    aps_id: int = Field(foreign_key="aps.id")
+    granularity: str  # "day" o "month"
+    bucket: str
+    ticket_type: str
+
+    tons: float = Field(default=0.0)
+    ticket_count: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __table_args__ = (
+        Index('uq_weigh_rollup_bucket', 'aps_id', 'granularity', 'bucket', 'ticket_type', unique=True),
+    )
@@ -1,9 +1,38 @@
-from typing import List, Optional
-from sqlmodel import Session, select
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import case
+from sqlmodel import Session, select, func
 from app.models.aps import APS
 from app.models.aps_monthly_data import APSMonthlyData
 
 
+# Variables operativas promediadas a 6 meses (Art. 4, Resolución 720)
+AVERAGE_FIELDS = (
+    "num_subscribers_total",
+    "num_subscribers_vacant",
+    "tons_collected_non_recyclable",
+    "tons_collected_sweeping",
+    "tons_collected_urban_cleaning",
+    "tons_collected_recyclable",
+    "tons_rejection_recycling",
+    "tons_received_landfill",
+    "leachate_volume_m3",
+    "sweeping_length_km",
+)
+
+
+def _period_index(period: str) -> int:
+    """'2026-02' -> año * 12 + mes"""
+    year, month = map(int, period.split('-'))
+    return year * 12 + month
+
+
+def _index_to_period(index: int) -> str:
+    """Inverso de _period_index"""
+    year, month = divmod(index - 1, 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
 class APSRepository:
     """Repositorio para operaciones con APS"""
     
@@ -25,6 +54,13 @@ class APSRepository:
         """Obtiene un APS por ID"""
         return self.session.get(APS, aps_id)
     
+    def get_by_ids(self, aps_ids: List[int]) -> List[APS]:
+        """Obtiene varios APS en una sola consulta"""
+        if not aps_ids:
+            return []
+        statement = select(APS).where(APS.id.in_(aps_ids))
+        return list(self.session.exec(statement).all())
+    
     def get_by_code(self, code: str) -> Optional[APS]:
         """Obtiene un APS por su código único"""
         statement = select(APS).where(APS.code == code)
@@ -63,6 +99,7 @@ class APSRepository:
             return False
         
         aps.is_active = False
+        aps.updated_at = datetime.utcnow()
         self.session.add(aps)
         self.session.commit()
         return True
@@ -99,6 +136,17 @@ class APSRepository:
             APS.is_active == True
         )
         return list(self.session.exec(statement).all())
+    
+    def get_located(self, company_id: Optional[int] = None) -> List[APS]:
+        """APS activos con centroide (Art. 9); todas las empresas si company_id es None"""
+        statement = select(APS).where(
+            APS.is_active == True,
+            APS.centroid_lat.is_not(None),
+            APS.centroid_lon.is_not(None)
+        )
+        if company_id is not None:
+            statement = statement.where(APS.company_id == company_id)
+        return list(self.session.exec(statement.order_by(APS.id)).all())
 
 
 class APSMonthlyDataRepository:
@@ -182,6 +230,19 @@ class APSMonthlyDataRepository:
         
         return list(self.session.exec(statement).all())
     
+    def get_version(self, aps_id: int) -> Tuple:
+        """
+        Token de versión barato para ETags: (conteo, max id, max updated_at)
+        
+        Cambia cuando se crea, actualiza, verifica o borra un mes del APS.
+        """
+        statement = select(
+            func.count(APSMonthlyData.id),
+            func.max(APSMonthlyData.id),
+            func.max(APSMonthlyData.updated_at),
+        ).where(APSMonthlyData.aps_id == aps_id)
+        return tuple(self.session.exec(statement).one())
+    
     def update(self, data_id: int, updates: dict) -> Optional[APSMonthlyData]:
         """Actualiza datos mensuales"""
         data = self.get_by_id(data_id)
@@ -196,6 +257,7 @@ class APSMonthlyDataRepository:
         if 'beach_cleaning_m2' in updates:
             data.beach_cleaning_km = data.beach_cleaning_m2 * 0.0007
         
+        data.updated_at = datetime.utcnow()
         self.session.add(data)
         self.session.commit()
         self.session.refresh(data)
@@ -207,8 +269,6 @@ class APSMonthlyDataRepository:
         verified_by: int
     ) -> Optional[APSMonthlyData]:
         """Marca datos como verificados por un auditor"""
-        from datetime import datetime
-        
         data = self.get_by_id(data_id)
         if not data:
             return None
@@ -216,6 +276,7 @@ class APSMonthlyDataRepository:
         data.verified = True
         data.verified_by = verified_by
         data.verified_at = datetime.utcnow()
+        data.updated_at = data.verified_at
         
         self.session.add(data)
         self.session.commit()
@@ -239,18 +300,7 @@ class APSMonthlyDataRepository:
             return {}
         
         # Inicializar sumas
-        totals = {
-            "num_subscribers_total": 0,
-            "num_subscribers_vacant": 0,
-            "tons_collected_non_recyclable": 0.0,
-            "tons_collected_sweeping": 0.0,
-            "tons_collected_urban_cleaning": 0.0,
-            "tons_collected_recyclable": 0.0,
-            "tons_rejection_recycling": 0.0,
-            "tons_received_landfill": 0.0,
-            "leachate_volume_m3": 0.0,
-            "sweeping_length_km": 0.0,
-        }
+        totals = {key: 0 for key in AVERAGE_FIELDS}
         
         count = len(data_list)
         
@@ -264,3 +314,170 @@ class APSMonthlyDataRepository:
         averages["months_count"] = count
         
         return averages
+    
+    def get_range(self, aps_id: int, start_period: str, end_period: str) -> List[APSMonthlyData]:
+        """
+        Datos mensuales entre dos períodos (inclusive), ordenados ascendente
+        
+        Incluye los 5 meses previos a start_period para poder armar la
+        ventana de 6 meses del primer período.
+        """
+        start_index = _period_index(start_period) - 5
+        end_index = _period_index(end_period)
+        month_index = APSMonthlyData.year * 12 + APSMonthlyData.month
+        statement = select(APSMonthlyData).where(
+            APSMonthlyData.aps_id == aps_id,
+            month_index >= start_index,
+            month_index <= end_index
+        ).order_by(APSMonthlyData.year, APSMonthlyData.month)
+        return list(self.session.exec(statement).all())
+    
+    def calculate_rolling_6_month_averages(
+        self,
+        aps_id: int,
+        start_period: str,
+        end_period: str
+    ) -> Dict[str, dict]:
+        """
+        Promedios de 6 meses (Art. 4) para cada período de un rango
+        
+        Una sola lectura (get_range) y sumas acumuladas: al avanzar un mes
+        se suma el mes que entra y se resta el que sale de la ventana.
+        Devuelve {period: promedios}; los períodos sin datos en su ventana
+        se devuelven como {} (igual que calculate_6_month_averages).
+        """
+        rows = {
+            _period_index(row.period): row
+            for row in self.get_range(aps_id, start_period, end_period)
+        }
+        start_index = _period_index(start_period)
+        end_index = _period_index(end_period)
+        
+        totals = {key: 0 for key in AVERAGE_FIELDS}
+        count = 0
+        results = {}
+        for index in range(start_index - 5, end_index + 1):
+            entering = rows.get(index)
+            if entering is not None:
+                count += 1
+                for key in AVERAGE_FIELDS:
+                    totals[key] += getattr(entering, key, 0) or 0
+            
+            leaving = rows.get(index - 6)
+            if leaving is not None:
+                count -= 1
+                for key in AVERAGE_FIELDS:
+                    totals[key] -= getattr(leaving, key, 0) or 0
+            
+            if index < start_index:
+                continue
+            
+            period = _index_to_period(index)
+            if not count:
+                results[period] = {}
+                continue
+            averages = {key: value / count for key, value in totals.items()}
+            averages["months_count"] = count
+            results[period] = averages
+        
+        return results
+    
+    # ========================================
+    # RESÚMENES AGREGADOS
+    # ========================================
+    
+    def get_summary_stats(self, aps_id: int) -> Dict:
+        """
+        Resumen de datos mensuales de un APS sin cargar todo el histórico
+        
+        Returns:
+            dict con last_month_data, total_months_registered y six_month_averages
+        """
+        return self.get_summary_stats_batch([aps_id])[aps_id]
+    
+    def get_summary_stats_batch(self, aps_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Resumen de datos mensuales de varios APS en dos consultas
+        
+        1. Último mes de cada APS (ROW_NUMBER por APS)
+        2. Conteo total, meses verificados y sumas de la ventana de 6 meses
+           (agregación condicional)
+        
+        El costo no depende de cuántos años de histórico tenga cada APS
+        más allá del recorrido del índice (aps_id, year, month).
+        """
+        summaries = {
+            aps_id: {
+                "last_month_data": None,
+                "total_months_registered": 0,
+                "verified_months": 0,
+                "six_month_averages": None,
+            }
+            for aps_id in aps_ids
+        }
+        if not aps_ids:
+            return summaries
+        
+        month_index = APSMonthlyData.year * 12 + APSMonthlyData.month
+        
+        # 1. Último mes registrado por APS
+        ranked = (
+            select(
+                APSMonthlyData.id.label("data_id"),
+                func.row_number().over(
+                    partition_by=APSMonthlyData.aps_id,
+                    order_by=(APSMonthlyData.year.desc(), APSMonthlyData.month.desc())
+                ).label("rn")
+            )
+            .where(APSMonthlyData.aps_id.in_(aps_ids))
+            .subquery()
+        )
+        latest_rows = self.session.exec(
+            select(APSMonthlyData)
+            .join(ranked, APSMonthlyData.id == ranked.c.data_id)
+            .where(ranked.c.rn == 1)
+        ).all()
+        latest_index = {}
+        for row in latest_rows:
+            summaries[row.aps_id]["last_month_data"] = row
+            latest_index[row.aps_id] = row.year * 12 + row.month
+        
+        # 2. Conteo total + sumas de la ventana de 6 meses que termina en el último mes
+        last = (
+            select(
+                APSMonthlyData.aps_id.label("aps_id"),
+                func.max(month_index).label("last_index")
+            )
+            .where(APSMonthlyData.aps_id.in_(aps_ids))
+            .group_by(APSMonthlyData.aps_id)
+            .subquery()
+        )
+        in_window = month_index > last.c.last_index - 6
+        columns = [
+            APSMonthlyData.aps_id,
+            func.count(APSMonthlyData.id),
+            func.sum(case((APSMonthlyData.verified == True, 1), else_=0)),
+            func.sum(case((in_window, 1), else_=0)),
+        ] + [
+            func.sum(case((in_window, func.coalesce(getattr(APSMonthlyData, field), 0)), else_=0))
+            for field in AVERAGE_FIELDS
+        ]
+        aggregates = self.session.exec(
+            select(*columns)
+            .join(last, APSMonthlyData.aps_id == last.c.aps_id)
+            .group_by(APSMonthlyData.aps_id)
+        ).all()
+        
+        for aps_id, total, verified, window_count, *sums in aggregates:
+            summary = summaries[aps_id]
+            summary["total_months_registered"] = total
+            summary["verified_months"] = verified or 0
+            if window_count:
+                averages = {
+                    field: (value or 0) / window_count
+                    for field, value in zip(AVERAGE_FIELDS, sums)
+                }
+                averages["months_count"] = window_count
+                summary["six_month_averages"] = averages
+        
+        return summaries
@@ -0,0 +1,36 @@
+from typing import List, Optional
+
+from sqlalchemy import or_
+from sqlmodel import Session, select
+
+from app.models.disposal_site import DisposalSite
+
+
+class DisposalSiteRepository:
+    """Repositorio de rellenos sanitarios y estaciones de transferencia"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def create(self, site: DisposalSite) -> DisposalSite:
+        self.session.add(site)
+        self.session.commit()
+        self.session.refresh(site)
+        return site
+
+    def get_by_id(self, site_id: int) -> Optional[DisposalSite]:
+        return self.session.get(DisposalSite, site_id)
+
+    def get_active(self, company_id: Optional[int] = None, site_type: Optional[str] = None) -> List[DisposalSite]:
+        """
+        Sitios activos visibles para una empresa (los propios y los
+        regionales); todos si company_id es None
+        """
+        statement = select(DisposalSite).where(DisposalSite.is_active == True)
+        if company_id is not None:
+            statement = statement.where(
+                or_(DisposalSite.company_id == company_id, DisposalSite.company_id.is_(None))
+            )
+        if site_type is not None:
+            statement = statement.where(DisposalSite.site_type == site_type)
+        return list(self.session.exec(statement.order_by(DisposalSite.id)).all())
@@ -0,0 +1,207 @@
+from typing import Iterable, List, Optional
+from datetime import datetime, timedelta
+from sqlmodel import Session, select, desc, update
+from app.models.job import Job, JobStatus
+
+
+class JobRepository:
+    """Repositorio para la cola de trabajos en segundo plano"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def create(self, job: Job) -> Job:
+        """Encola un nuevo trabajo"""
+        self.session.add(job)
+        self.session.commit()
+        self.session.refresh(job)
+        return job
+
+    def get_by_id(self, job_id: int) -> Optional[Job]:
+        """Obtiene un trabajo por ID"""
+        return self.session.get(Job, job_id)
+
+    def list_jobs(
+        self,
+        company_id: Optional[int] = None,
+        status: Optional[str] = None,
+        limit: int = 50
+    ) -> List[Job]:
+        """Lista los trabajos más recientes (opcionalmente por empresa y estado)"""
+        statement = select(Job)
+        if company_id is not None:
+            statement = statement.where(Job.company_id == company_id)
+        if status:
+            statement = statement.where(Job.status == status)
+        statement = statement.order_by(desc(Job.created_at)).limit(limit)
+        return list(self.session.exec(statement).all())
+
+    def claim_next(self, worker_id: str) -> Optional[Job]:
+        """
+        Reclama el siguiente trabajo pendiente (mayor prioridad primero).
+
+        El cambio de estado se hace con un UPDATE condicionado al estado
+        "queued", de modo que dos workers nunca ejecutan el mismo trabajo.
+        El trabajo queda a nombre de `worker_id` (ver heartbeat).
+        """
+        candidates = self.session.exec(
+            select(Job.id)
+            .where(Job.status == JobStatus.QUEUED)
+            .order_by(desc(Job.priority), Job.created_at, Job.id)
+            .limit(5)
+        ).all()
+
+        for job_id in candidates:
+            now = datetime.utcnow()
+            claimed = self.session.exec(
+                update(Job)
+                .where(Job.id == job_id, Job.status == JobStatus.QUEUED)
+                .values(
+                    status=JobStatus.RUNNING,
+                    worker_id=worker_id,
+                    attempts=Job.attempts + 1,
+                    started_at=now,
+                    updated_at=now,
+                )
+            )
+            self.session.commit()
+            if claimed.rowcount == 1:
+                job = self.session.get(Job, job_id)
+                self.session.refresh(job)
+                return job
+        return None
+
+    def update_progress(self, job_id: int, progress: float, message: Optional[str] = None) -> bool:
+        """
+        Guarda el progreso del trabajo.
+
+        Returns:
+            bool: True si se solicitó la cancelación del trabajo
+        """
+        self.session.exec(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(
+                progress=max(0.0, min(1.0, progress)),
+                progress_message=message,
+                updated_at=datetime.utcnow(),
+            )
+        )
+        self.session.commit()
+        return self.is_cancel_requested(job_id)
+
+    def is_cancel_requested(self, job_id: int) -> bool:
+        """Consulta si el usuario pidió cancelar el trabajo"""
+        return bool(self.session.exec(
+            select(Job.cancel_requested).where(Job.id == job_id)
+        ).first())
+
+    def _update_own_running(self, job: Job, owner: str, **values) -> bool:
+        """
+        UPDATE del trabajo sólo si sigue "running" a nombre del worker que
+        lo reclamó: si su lease venció y otro worker lo tomó, la ejecución
+        anterior no pisa el estado de la nueva.
+        """
+        result = self.session.exec(
+            update(Job)
+            .where(Job.id == job.id, Job.worker_id == owner, Job.status == JobStatus.RUNNING)
+            .values(updated_at=datetime.utcnow(), **values)
+        )
+        self.session.commit()
+        return result.rowcount > 0
+
+    def finish(
+        self,
+        job: Job,
+        worker_id: str,
+        status: str,
+        result: Optional[dict] = None,
+        error_message: Optional[str] = None
+    ) -> bool:
+        """
+        Marca un trabajo como terminado (éxito, fallo o cancelado)
+
+        Args:
+            worker_id: worker que lo reclamó (no job.worker_id, que se
+                recarga de la BD y puede ser ya el del nuevo dueño)
+
+        Returns:
+            False si el worker ya no era dueño del trabajo (no se guardó nada)
+        """
+        values = dict(status=status, result=result, error_message=error_message, finished_at=datetime.utcnow())
+        if status == JobStatus.SUCCEEDED:
+            values["progress"] = 1.0
+        return self._update_own_running(job, worker_id, **values)
+
+    def requeue(self, job: Job, worker_id: str, error_message: str) -> bool:
+        """
+        Devuelve el trabajo a la cola para un nuevo intento
+
+        Returns:
+            False si el worker ya no era dueño del trabajo
+        """
+        return self._update_own_running(
+            job, worker_id, status=JobStatus.QUEUED, worker_id=None, error_message=error_message
+        )
+
+    def request_cancel(self, job: Job) -> Job:
+        """
+        Solicita la cancelación de un trabajo.
+
+        Si aún no ha iniciado se cancela de inmediato; si está corriendo,
+        el worker lo detiene en el siguiente reporte de progreso.
+        """
+        job.cancel_requested = True
+        job.updated_at = datetime.utcnow()
+        if job.status == JobStatus.QUEUED:
+            job.status = JobStatus.CANCELLED
+            job.finished_at = job.updated_at
+        self.session.add(job)
+        self.session.commit()
+        self.session.refresh(job)
+        return job
+
+    def heartbeat(self, job_ids: Iterable[int], worker_id: str) -> int:
+        """Renueva el lease de los trabajos que `worker_id` está ejecutando"""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        result = self.session.exec(
+            update(Job)
+            .where(Job.id.in_(job_ids), Job.status == JobStatus.RUNNING, Job.worker_id == worker_id)
+            .values(updated_at=datetime.utcnow())
+        )
+        self.session.commit()
+        return result.rowcount
+
+    def requeue_expired(self, lease_seconds: float) -> int:
+        """
+        Reencola los trabajos "running" cuyo worker dejó de renovar el
+        lease (proceso caído o reiniciado); los que ya agotaron sus
+        intentos quedan como fallidos. Los trabajos que otro worker o
+        instancia sigue ejecutando no se tocan.
+
+        Returns:
+            Número de trabajos recuperados
+        """
+        now = datetime.utcnow()
+        expired = (
+            Job.status == JobStatus.RUNNING,
+            Job.updated_at < now - timedelta(seconds=lease_seconds),
+        )
+        error_message = "El worker dejó de responder (lease vencido)"
+        requeued = self.session.exec(
+            update(Job)
+            .where(*expired, Job.attempts < Job.max_attempts)
+            .values(status=JobStatus.QUEUED, worker_id=None, error_message=error_message, updated_at=now)
+        )
+        failed = self.session.exec(
+            update(Job)
+            .where(*expired, Job.attempts >= Job.max_attempts)
+            .values(
+                status=JobStatus.FAILED, worker_id=None, error_message=error_message,
+                finished_at=now, updated_at=now
+            )
+        )
+        self.session.commit()
+        return requeued.rowcount + failed.rowcount
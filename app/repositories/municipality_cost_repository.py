@@ -0,0 +1,244 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from app.models.aps import APS
+from app.models.municipality_costs import MunicipalityCostAggregate, MunicipalityCostContribution
+
+
+# Sumas de los demás APS del municipio (sin el APS que se calcula)
+EMPTY_MUNICIPALITY_COSTS = {"crt_sum": 0.0, "crt_tons": 0.0, "cdf_sum": 0.0, "cdf_tons": 0.0}
+
+_AGGREGATE_KEY_COLUMNS = ["municipality", "department", "period"]
+_CONTRIBUTION_KEY_COLUMNS = ["aps_id", "period"]
+
+
+class MunicipalityCostRepository:
+    """
+    Sumas ponderadas de CRT/CDF por municipio y período (VBA, Art. 34)
+
+    Los métodos de escritura no hacen commit: el aporte se guarda en la
+    misma transacción que el cálculo que lo origina.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_aggregate(self, municipality: str, department: str, period: str) -> Optional[MunicipalityCostAggregate]:
+        """Sumas del municipio en el período (una fila por índice único)"""
+        statement = select(MunicipalityCostAggregate).where(
+            MunicipalityCostAggregate.municipality == municipality,
+            MunicipalityCostAggregate.department == department,
+            MunicipalityCostAggregate.period == period
+        )
+        return self.session.exec(statement).first()
+
+    def get_contribution(self, aps_id: int, period: str) -> Optional[MunicipalityCostContribution]:
+        statement = select(MunicipalityCostContribution).where(
+            MunicipalityCostContribution.aps_id == aps_id,
+            MunicipalityCostContribution.period == period
+        )
+        return self.session.exec(statement).first()
+
+    def get_other_aps_costs(self, aps: APS, periods: List[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Sumas de los demás APS del municipio por período, en una sola consulta
+
+        Resta el aporte previo del propio APS para que el cálculo lo
+        reemplace por sus valores actuales.
+        """
+        if not periods:
+            return {}
+        own = and_(
+            MunicipalityCostContribution.aps_id == aps.id,
+            MunicipalityCostContribution.period == MunicipalityCostAggregate.period,
+            MunicipalityCostContribution.municipality == MunicipalityCostAggregate.municipality,
+            MunicipalityCostContribution.department == MunicipalityCostAggregate.department,
+        )
+        statement = (
+            select(
+                MunicipalityCostAggregate.period,
+                MunicipalityCostAggregate.crt_weighted_sum,
+                MunicipalityCostAggregate.crt_tons,
+                MunicipalityCostAggregate.cdf_weighted_sum,
+                MunicipalityCostAggregate.cdf_tons,
+                MunicipalityCostContribution.crt,
+                MunicipalityCostContribution.crt_tons.label("own_crt_tons"),
+                MunicipalityCostContribution.cdf,
+                MunicipalityCostContribution.cdf_tons.label("own_cdf_tons"),
+            )
+            .outerjoin(MunicipalityCostContribution, own)
+            .where(
+                MunicipalityCostAggregate.municipality == aps.municipality,
+                MunicipalityCostAggregate.department == aps.department,
+                MunicipalityCostAggregate.period.in_(periods)
+            )
+        )
+        costs = {period: dict(EMPTY_MUNICIPALITY_COSTS) for period in periods}
+        for row in self.session.exec(statement).all():
+            own_crt = (row.crt or 0.0) * (row.own_crt_tons or 0.0)
+            own_cdf = (row.cdf or 0.0) * (row.own_cdf_tons or 0.0)
+            costs[row.period] = {
+                "crt_sum": row.crt_weighted_sum - own_crt,
+                "crt_tons": row.crt_tons - (row.own_crt_tons or 0.0),
+                "cdf_sum": row.cdf_weighted_sum - own_cdf,
+                "cdf_tons": row.cdf_tons - (row.own_cdf_tons or 0.0),
+            }
+        return costs
+
+    def _dialect_insert(self):
+        """insert() con ON CONFLICT del motor (None si no lo soporta)"""
+        dialect = self.session.get_bind().dialect.name
+        return {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(dialect)
+
+    def _add_to_aggregate(
+        self,
+        municipality: str,
+        department: str,
+        period: str,
+        crt_sum: float,
+        crt_tons: float,
+        cdf_sum: float,
+        cdf_tons: float,
+        aps_count: int
+    ) -> None:
+        """
+        Suma los deltas a las sumas del municipio (crea la fila si no existe).
+        En PostgreSQL y SQLite usa INSERT ... ON CONFLICT DO UPDATE; en otros
+        motores, UPDATE y luego INSERT si la fila no existía.
+        """
+        aggregate = MunicipalityCostAggregate
+        now = datetime.utcnow()
+        dialect_insert = self._dialect_insert()
+        if dialect_insert is not None:
+            statement = dialect_insert(aggregate).values(
+                municipality=municipality, department=department, period=period,
+                crt_weighted_sum=crt_sum, crt_tons=crt_tons,
+                cdf_weighted_sum=cdf_sum, cdf_tons=cdf_tons,
+                aps_count=aps_count, updated_at=now
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=_AGGREGATE_KEY_COLUMNS,
+                set_={
+                    "crt_weighted_sum": aggregate.crt_weighted_sum + statement.excluded.crt_weighted_sum,
+                    "crt_tons": aggregate.crt_tons + statement.excluded.crt_tons,
+                    "cdf_weighted_sum": aggregate.cdf_weighted_sum + statement.excluded.cdf_weighted_sum,
+                    "cdf_tons": aggregate.cdf_tons + statement.excluded.cdf_tons,
+                    "aps_count": aggregate.aps_count + statement.excluded.aps_count,
+                    "updated_at": statement.excluded.updated_at,
+                }
+            )
+            self.session.execute(statement)
+            return
+
+        result = self.session.execute(
+            update(aggregate)
+            .where(
+                aggregate.municipality == municipality,
+                aggregate.department == department,
+                aggregate.period == period
+            )
+            .values(
+                crt_weighted_sum=aggregate.crt_weighted_sum + crt_sum,
+                crt_tons=aggregate.crt_tons + crt_tons,
+                cdf_weighted_sum=aggregate.cdf_weighted_sum + cdf_sum,
+                cdf_tons=aggregate.cdf_tons + cdf_tons,
+                aps_count=aggregate.aps_count + aps_count,
+                updated_at=now
+            )
+        )
+        if result.rowcount == 0:
+            self.session.add(MunicipalityCostAggregate(
+                municipality=municipality,
+                department=department,
+                period=period,
+                crt_weighted_sum=crt_sum,
+                crt_tons=crt_tons,
+                cdf_weighted_sum=cdf_sum,
+                cdf_tons=cdf_tons,
+                aps_count=aps_count
+            ))
+
+    def _insert_contribution(self, aps: APS, period: str, values: Dict[str, float]) -> bool:
+        """
+        Inserta el aporte si el APS no tenía uno en el período. Con ON
+        CONFLICT DO NOTHING, de dos cálculos concurrentes sólo uno lo crea.
+
+        Returns:
+            False si ya existía (hay que reemplazarlo)
+        """
+        dialect_insert = self._dialect_insert()
+        row = dict(
+            aps_id=aps.id, period=period, municipality=aps.municipality, department=aps.department,
+            updated_at=datetime.utcnow(), **values
+        )
+        if dialect_insert is None:
+            if self.get_contribution(aps.id, period) is not None:
+                return False
+            self.session.add(MunicipalityCostContribution(**row))
+            self.session.flush()
+            return True
+        statement = (
+            dialect_insert(MunicipalityCostContribution)
+            .values(**row)
+            .on_conflict_do_nothing(index_elements=_CONTRIBUTION_KEY_COLUMNS)
+            .returning(MunicipalityCostContribution.id)
+        )
+        return self.session.execute(statement).first() is not None
+
+    def record_contribution(
+        self,
+        aps: APS,
+        period: str,
+        crt: float,
+        crt_tons: float,
+        cdf: float,
+        cdf_tons: float
+    ) -> MunicipalityCostContribution:
+        """
+        Registra (o reemplaza) el aporte del APS en el período y actualiza
+        las sumas del municipio con la diferencia respecto al aporte anterior
+
+        El aporte anterior se lee con SELECT ... FOR UPDATE para que dos
+        recálculos concurrentes del mismo APS no resten el mismo aporte.
+        """
+        values = {"crt": crt, "crt_tons": crt_tons, "cdf": cdf, "cdf_tons": cdf_tons}
+        own = (
+            MunicipalityCostContribution.aps_id == aps.id,
+            MunicipalityCostContribution.period == period,
+        )
+        new_sums = (
+            aps.municipality, aps.department, period,
+            crt * crt_tons, crt_tons, cdf * cdf_tons, cdf_tons, 1
+        )
+        if self._insert_contribution(aps, period, values):
+            self._add_to_aggregate(*new_sums)
+            return self.session.exec(
+                select(MunicipalityCostContribution).where(*own).execution_options(populate_existing=True)
+            ).one()
+
+        contribution = self.session.exec(
+            select(MunicipalityCostContribution).where(*own)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).one()
+
+        # Retirar el aporte anterior de su municipio
+        self._add_to_aggregate(
+            contribution.municipality, contribution.department, period,
+            -contribution.crt * contribution.crt_tons, -contribution.crt_tons,
+            -contribution.cdf * contribution.cdf_tons, -contribution.cdf_tons,
+            -1
+        )
+        self._add_to_aggregate(*new_sums)
+        contribution.municipality = aps.municipality
+        contribution.department = aps.department
+        for field, value in values.items():
+            setattr(contribution, field, value)
+        contribution.updated_at = datetime.utcnow()
+        self.session.add(contribution)
+        self.session.flush()
+        return contribution
@@ -0,0 +1,109 @@
+import os
+from datetime import datetime
+from typing import BinaryIO, Dict, List, Optional
+
+from sqlalchemy import delete, insert, update
+from sqlmodel import Session, select
+
+from app.models.aps_monthly_data import APSMonthlyData
+from app.models.sweeping_gps import SweepingGpsSummary, SweepingTraceChunk
+
+
+class SweepingGpsRepository:
+    """Resultados del procesamiento de trazas GPS de barrido (no hace commit)"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_by_aps_and_period(self, aps_id: int, period: str) -> Optional[SweepingGpsSummary]:
+        statement = select(SweepingGpsSummary).where(
+            SweepingGpsSummary.aps_id == aps_id,
+            SweepingGpsSummary.period == period
+        )
+        return self.session.exec(statement).first()
+
+    def save_result(self, aps_id: int, period: str, result: Dict, job_id: Optional[int] = None) -> SweepingGpsSummary:
+        """Guarda el resultado del período, reemplazando el anterior"""
+        summary = self.get_by_aps_and_period(aps_id, period) or SweepingGpsSummary(
+            aps_id=aps_id, period=period, swept_km=0.0, traveled_km=0.0,
+            points=0, segments_used=0, segments_discarded=0, files=0
+        )
+        for field in ("swept_km", "traveled_km", "points", "segments_used", "segments_discarded", "files"):
+            setattr(summary, field, result[field])
+        summary.job_id = job_id
+        summary.updated_at = datetime.utcnow()
+        self.session.add(summary)
+        self.session.flush()
+        return summary
+
+    def sync_monthly_data(self, aps_id: int, period: str, swept_km: float) -> bool:
+        """
+        Copia el LBL medido a APSMonthlyData si el mes ya está registrado.
+        Un LBL de 0 km (trazas sin segmentos de barrido) no se copia: se
+        arrastraría como dato del mes a los períodos siguientes.
+        """
+        if swept_km <= 0:
+            return False
+        result = self.session.execute(
+            update(APSMonthlyData)
+            .where(APSMonthlyData.aps_id == aps_id, APSMonthlyData.period == period)
+            .values(sweeping_length_km=swept_km, updated_at=datetime.utcnow())
+        )
+        return result.rowcount > 0
+
+    # ========================================
+    # TRAZAS SUBIDAS
+    # ========================================
+
+    def store_trace(self, upload_id: str, file_index: int, extension: str,
+                    stream: BinaryIO, chunk_bytes: int = 1024 * 1024) -> int:
+        """
+        Guarda un archivo subido por bloques (no se carga completo en memoria)
+
+        Returns:
+            Tamaño del archivo en bytes
+        """
+        size = 0
+        chunk_index = 0
+        while True:
+            data = stream.read(chunk_bytes)
+            if not data:
+                break
+            # INSERT directo: los bloques no quedan retenidos en la sesión
+            self.session.execute(insert(SweepingTraceChunk).values(
+                upload_id=upload_id, file_index=file_index, extension=extension,
+                chunk_index=chunk_index, data=data, created_at=datetime.utcnow()
+            ))
+            size += len(data)
+            chunk_index += 1
+        return size
+
+    def export_traces(self, upload_id: str, directory: str) -> List[str]:
+        """Escribe los archivos de una subida en `directory` y retorna sus rutas"""
+        statement = (
+            select(SweepingTraceChunk.file_index, SweepingTraceChunk.extension, SweepingTraceChunk.data)
+            .where(SweepingTraceChunk.upload_id == upload_id)
+            .order_by(SweepingTraceChunk.file_index, SweepingTraceChunk.chunk_index)
+            .execution_options(yield_per=16)
+        )
+        paths: Dict[int, str] = {}
+        target = None
+        try:
+            for file_index, extension, data in self.session.exec(statement):
+                if file_index not in paths:
+                    if target is not None:
+                        target.close()
+                    paths[file_index] = os.path.join(directory, f"{file_index:04d}{extension}")
+                    target = open(paths[file_index], "wb")
+                target.write(data)
+        finally:
+            if target is not None:
+                target.close()
+        return list(paths.values())
+
+    def delete_traces(self, upload_id: str) -> int:
+        """Elimina los archivos de una subida"""
+        result = self.session.execute(
+            delete(SweepingTraceChunk).where(SweepingTraceChunk.upload_id == upload_id)
+        )
+        return result.rowcount
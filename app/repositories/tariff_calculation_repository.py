@@ -0,0 +1,245 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlmodel import Session, select, func
+from app.models.tariff_calculation import TariffCalculation
+
+
+# Sufijos de las columnas tariff_<estrato>_base / tariff_<estrato>_final
+TARIFF_STRATA = (
+    "stratum_1", "stratum_2", "stratum_3",
+    "stratum_4", "stratum_5", "stratum_6",
+    "commercial",
+)
+
+# Componentes de costo guardados como columnas
+COST_COLUMNS = ("cft", "ccs", "clus", "cbls", "cvna", "crt", "cdf", "ctl", "vba")
+
+
+class TariffCalculationRepository:
+    """Repositorio para cálculos tarifarios guardados"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_by_id(self, calculation_id: int) -> Optional[TariffCalculation]:
+        """Obtiene un cálculo por ID"""
+        return self.session.get(TariffCalculation, calculation_id)
+
+    def get_by_aps_and_period(self, aps_id: int, period: str) -> Optional[TariffCalculation]:
+        """Obtiene el cálculo de un APS en un período"""
+        statement = select(TariffCalculation).where(
+            TariffCalculation.aps_id == aps_id,
+            TariffCalculation.period == period
+        )
+        return self.session.exec(statement).first()
+
+    def get_by_ids(self, calculation_ids: List[int]) -> List[TariffCalculation]:
+        """Cálculos completos por ID en una sola consulta, en el orden recibido"""
+        if not calculation_ids:
+            return []
+        statement = select(TariffCalculation).where(TariffCalculation.id.in_(calculation_ids))
+        by_id = {calculation.id: calculation for calculation in self.session.exec(statement).all()}
+        return [by_id[calculation_id] for calculation_id in calculation_ids if calculation_id in by_id]
+
+    def get_ids_by_company_period(
+        self,
+        company_id: int,
+        period: str,
+        calculation_type: str = "official"
+    ) -> List[int]:
+        """IDs de los cálculos de una empresa en un período, por APS"""
+        statement = (
+            select(TariffCalculation.id)
+            .where(
+                TariffCalculation.company_id == company_id,
+                TariffCalculation.period == period,
+                TariffCalculation.calculation_type == calculation_type
+            )
+            .order_by(TariffCalculation.aps_id, TariffCalculation.id)
+        )
+        return list(self.session.exec(statement).all())
+
+    def get_final_tariff_history(
+        self,
+        aps_ids: List[int],
+        until_period: str,
+        calculation_type: str = "official",
+        from_period: Optional[str] = None
+    ) -> List:
+        """
+        Tarifas finales por estrato de varios APS hasta `until_period`
+        (inclusive, y desde `from_period` si se indica), en una sola
+        consulta y sin hidratar los JSON
+        """
+        if not aps_ids:
+            return []
+        columns = [TariffCalculation.id, TariffCalculation.aps_id, TariffCalculation.period] + [
+            getattr(TariffCalculation, f"tariff_{stratum}_final") for stratum in TARIFF_STRATA
+        ]
+        statement = (
+            select(*columns)
+            .where(
+                TariffCalculation.aps_id.in_(aps_ids),
+                TariffCalculation.period <= until_period,
+                TariffCalculation.calculation_type == calculation_type
+            )
+            .order_by(TariffCalculation.aps_id, TariffCalculation.period, TariffCalculation.id)
+        )
+        if from_period is not None:
+            statement = statement.where(TariffCalculation.period >= from_period)
+        return list(self.session.exec(statement).all())
+
+    def get_history_rows(self, aps_id: int) -> List:
+        """
+        Histórico de un APS con solo las columnas del listado
+
+        No hidrata los JSON (input_data, fórmulas, validaciones) de cada cálculo.
+        """
+        statement = (
+            select(
+                TariffCalculation.id,
+                TariffCalculation.period,
+                TariffCalculation.tariff_stratum_4_final,
+                TariffCalculation.calculated_by,
+                TariffCalculation.calculation_date,
+                TariffCalculation.calculation_type,
+                TariffCalculation.notes,
+            )
+            .where(TariffCalculation.aps_id == aps_id)
+            .order_by(TariffCalculation.period.desc())
+        )
+        return list(self.session.exec(statement).all())
+
+    def get_latest_by_aps_ids(
+        self,
+        aps_ids: List[int],
+        calculation_type: str = "official"
+    ) -> Dict[int, object]:
+        """
+        Último cálculo de cada APS en una sola consulta (ROW_NUMBER por APS)
+        
+        Devuelve solo identificación y tarifas base/final por estrato.
+        """
+        if not aps_ids:
+            return {}
+        
+        ranked = (
+            select(
+                TariffCalculation.id.label("calculation_id"),
+                func.row_number().over(
+                    partition_by=TariffCalculation.aps_id,
+                    order_by=(
+                        TariffCalculation.period.desc(),
+                        TariffCalculation.calculation_date.desc()
+                    )
+                ).label("rn")
+            )
+            .where(
+                TariffCalculation.aps_id.in_(aps_ids),
+                TariffCalculation.calculation_type == calculation_type
+            )
+            .subquery()
+        )
+        columns = [
+            TariffCalculation.id,
+            TariffCalculation.aps_id,
+            TariffCalculation.period,
+            TariffCalculation.calculation_date,
+        ] + [
+            getattr(TariffCalculation, f"tariff_{stratum}_{kind}")
+            for stratum in TARIFF_STRATA
+            for kind in ("base", "final")
+        ]
+        rows = self.session.exec(
+            select(*columns)
+            .join(ranked, TariffCalculation.id == ranked.c.calculation_id)
+            .where(ranked.c.rn == 1)
+        ).all()
+        return {row.aps_id: row for row in rows}
+    
+    def get_version(self, aps_id: int, period: Optional[str] = None) -> Tuple:
+        """
+        Token de versión barato para ETags: (conteo, max id, max fecha de cálculo)
+
+        Cambia cuando se crea, borra o recalcula un cálculo del APS (y período).
+        """
+        statement = select(
+            func.count(TariffCalculation.id),
+            func.max(TariffCalculation.id),
+            func.max(TariffCalculation.calculation_date),
+        ).where(TariffCalculation.aps_id == aps_id)
+        if period:
+            statement = statement.where(TariffCalculation.period == period)
+        return tuple(self.session.exec(statement).one())
+
+    def count_for_replay(
+        self,
+        company_id: Optional[int] = None,
+        aps_ids: Optional[Sequence[int]] = None,
+        calculation_type: Optional[str] = None,
+        start_period: Optional[str] = None,
+        end_period: Optional[str] = None
+    ) -> int:
+        """Número de cálculos que recorre iter_replay_chunks con los mismos filtros"""
+        statement = self._replay_filters(
+            select(func.count(TariffCalculation.id)),
+            company_id, aps_ids, calculation_type, start_period, end_period
+        )
+        return self.session.exec(statement).one()
+
+    def iter_replay_chunks(
+        self,
+        chunk_size: int,
+        company_id: Optional[int] = None,
+        aps_ids: Optional[Sequence[int]] = None,
+        calculation_type: Optional[str] = None,
+        start_period: Optional[str] = None,
+        end_period: Optional[str] = None,
+        after_id: int = 0
+    ) -> Iterator[List]:
+        """
+        Recorre los cálculos en bloques de `chunk_size` ordenados por ID
+
+        Paginación por llave (id > último id del bloque anterior): cada
+        bloque es una consulta indexada sin OFFSET, así el costo no crece
+        con la posición en la tabla. Trae sólo los datos de entrada, los
+        factores de subsidio, los componentes y las tarifas por estrato.
+        """
+        columns = [
+            TariffCalculation.id,
+            TariffCalculation.aps_id,
+            TariffCalculation.period,
+            TariffCalculation.calculation_type,
+            TariffCalculation.input_data,
+            TariffCalculation.subsidy_contribution_factors,
+        ] + [getattr(TariffCalculation, name) for name in COST_COLUMNS] + [
+            getattr(TariffCalculation, f"tariff_{stratum}_{kind}")
+            for stratum in TARIFF_STRATA
+            for kind in ("base", "final")
+        ]
+        last_id = after_id
+        while True:
+            statement = self._replay_filters(
+                select(*columns).where(TariffCalculation.id > last_id),
+                company_id, aps_ids, calculation_type, start_period, end_period
+            )
+            rows = list(self.session.exec(statement.order_by(TariffCalculation.id).limit(chunk_size)).all())
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1].id
+
+    @staticmethod
+    def _replay_filters(statement, company_id, aps_ids, calculation_type, start_period, end_period):
+        if company_id is not None:
+            statement = statement.where(TariffCalculation.company_id == company_id)
+        if aps_ids:
+            statement = statement.where(TariffCalculation.aps_id.in_(list(aps_ids)))
+        if calculation_type is not None:
+            statement = statement.where(TariffCalculation.calculation_type == calculation_type)
+        if start_period is not None:
+            statement = statement.where(TariffCalculation.period >= start_period)
+        if end_period is not None:
+            statement = statement.where(TariffCalculation.period <= end_period)
+        return statement
@@ -0,0 +1,94 @@
+from typing import List, Optional, Sequence
+
+from sqlalchemy import and_, or_
+from sqlmodel import Session, select
+
+from app.models.aps import APS
+from app.models.tariff_parameter import TariffParameter, TariffParameterScope
+
+
+class TariffParameterRepository:
+    """Repositorio de parámetros de cálculo con vigencia"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def create(self, parameter: TariffParameter) -> TariffParameter:
+        self.session.add(parameter)
+        self.session.commit()
+        self.session.refresh(parameter)
+        return parameter
+
+    def get_by_id(self, parameter_id: int) -> Optional[TariffParameter]:
+        return self.session.get(TariffParameter, parameter_id)
+
+    def get_visible(
+        self,
+        company_id: Optional[int] = None,
+        name: Optional[str] = None,
+        scope: Optional[str] = None
+    ) -> List[TariffParameter]:
+        """Parámetros visibles para una empresa (propios y del sistema); todos si company_id es None"""
+        statement = select(TariffParameter)
+        if company_id is not None:
+            statement = statement.where(
+                or_(TariffParameter.company_id == company_id, TariffParameter.company_id.is_(None))
+            )
+        if name is not None:
+            statement = statement.where(TariffParameter.name == name)
+        if scope is not None:
+            statement = statement.where(TariffParameter.scope == scope)
+        return list(self.session.exec(
+            statement.order_by(TariffParameter.name, TariffParameter.scope, TariffParameter.valid_from)
+        ).all())
+
+    def find_overlapping(self, parameter: TariffParameter) -> List[TariffParameter]:
+        """Valores del mismo parámetro y alcance cuya vigencia se cruza con la de `parameter`"""
+        statement = select(TariffParameter).where(
+            TariffParameter.name == parameter.name,
+            TariffParameter.scope == parameter.scope,
+            TariffParameter.aps_id == parameter.aps_id if parameter.aps_id is not None
+            else TariffParameter.aps_id.is_(None),
+            TariffParameter.company_id == parameter.company_id if parameter.company_id is not None
+            else TariffParameter.company_id.is_(None),
+            TariffParameter.municipality == parameter.municipality if parameter.municipality is not None
+            else TariffParameter.municipality.is_(None),
+            TariffParameter.department == parameter.department if parameter.department is not None
+            else TariffParameter.department.is_(None),
+            or_(TariffParameter.valid_to.is_(None), TariffParameter.valid_to >= parameter.valid_from),
+        )
+        if parameter.valid_to is not None:
+            statement = statement.where(TariffParameter.valid_from <= parameter.valid_to)
+        if parameter.id is not None:
+            statement = statement.where(TariffParameter.id != parameter.id)
+        return list(self.session.exec(statement).all())
+
+    def get_for_aps(self, aps_list: Sequence[APS], start_period: str, end_period: str) -> List[TariffParameter]:
+        """
+        Todos los valores que pueden aplicar a los APS en el rango de
+        períodos (sus parámetros propios, los de sus municipios y los
+        globales) en una sola consulta
+        """
+        if not aps_list:
+            return []
+        company_ids = sorted({aps.company_id for aps in aps_list})
+        municipalities = sorted({aps.municipality for aps in aps_list})
+        shared_company = or_(TariffParameter.company_id.is_(None), TariffParameter.company_id.in_(company_ids))
+
+        statement = select(TariffParameter).where(
+            TariffParameter.valid_from <= end_period,
+            or_(TariffParameter.valid_to.is_(None), TariffParameter.valid_to >= start_period),
+            or_(
+                and_(
+                    TariffParameter.scope == TariffParameterScope.APS,
+                    TariffParameter.aps_id.in_([aps.id for aps in aps_list])
+                ),
+                and_(
+                    TariffParameter.scope == TariffParameterScope.MUNICIPALITY,
+                    TariffParameter.municipality.in_(municipalities),
+                    shared_company
+                ),
+                and_(TariffParameter.scope == TariffParameterScope.GLOBAL, shared_company),
+            )
+        )
+        return list(self.session.exec(statement).all())
@@ -0,0 +1,184 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from app.models.aps_monthly_data import APSMonthlyData
+from app.models.weigh_ticket import WeighTicket, WeighTicketRollup, WeighTicketType
+
+# (aps_id, granularity, bucket, ticket_type)
+RollupKey = Tuple[int, str, str, str]
+
+_ROLLUP_KEY_COLUMNS = ["aps_id", "granularity", "bucket", "ticket_type"]
+
+# Filas por INSERT ... ON CONFLICT (límite de parámetros del motor)
+_UPSERT_CHUNK = 1000
+
+
+class WeighTicketRepository:
+    """
+    Repositorio de tiquetes de báscula y sus sumas diarias/mensuales
+
+    Las escrituras usan sentencias Core (executemany / upsert) sin
+    instanciar objetos ORM por tiquete y no hacen commit.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_existing_ticket_numbers(self, ticket_numbers: Iterable[str]) -> Set[str]:
+        """Números de tiquete ya ingeridos (una consulta por lote)"""
+        ticket_numbers = list(ticket_numbers)
+        if not ticket_numbers:
+            return set()
+        statement = select(WeighTicket.ticket_number).where(WeighTicket.ticket_number.in_(ticket_numbers))
+        return set(self.session.exec(statement).all())
+
+    def insert_new(self, rows: List[Dict]) -> Set[str]:
+        """
+        Inserta los tiquetes que no existían y retorna sus números. En
+        PostgreSQL y SQLite usa INSERT ... ON CONFLICT (ticket_number) DO
+        NOTHING RETURNING, así que dos lotes concurrentes con el mismo
+        tiquete no chocan con uq_weigh_ticket_number; en otros motores,
+        SELECT de los existentes y un executemany.
+        """
+        if not rows:
+            return set()
+
+        dialect = self.session.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            inserted: Set[str] = set()
+            for start in range(0, len(rows), _UPSERT_CHUNK):
+                statement = (
+                    dialect_insert(WeighTicket)
+                    .values(rows[start:start + _UPSERT_CHUNK])
+                    .on_conflict_do_nothing(index_elements=["ticket_number"])
+                    .returning(WeighTicket.ticket_number)
+                )
+                inserted.update(self.session.execute(statement).scalars())
+            return inserted
+
+        existing = self.get_existing_ticket_numbers(row["ticket_number"] for row in rows)
+        new_rows = [row for row in rows if row["ticket_number"] not in existing]
+        if new_rows:
+            self.session.execute(insert(WeighTicket), new_rows)
+        return {row["ticket_number"] for row in new_rows}
+
+    def add_to_rollups(self, deltas: Dict[RollupKey, Tuple[float, int]]) -> int:
+        """
+        Suma (toneladas, tiquetes) a cada rollup. En PostgreSQL y SQLite usa
+        INSERT ... ON CONFLICT DO UPDATE; en otros motores, UPDATE y luego
+        INSERT de las claves que no existían.
+        """
+        if not deltas:
+            return 0
+        now = datetime.utcnow()
+        rows = [
+            dict(zip(_ROLLUP_KEY_COLUMNS, key), tons=tons, ticket_count=count, updated_at=now)
+            for key, (tons, count) in deltas.items()
+        ]
+
+        dialect = self.session.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            for start in range(0, len(rows), _UPSERT_CHUNK):
+                statement = dialect_insert(WeighTicketRollup).values(rows[start:start + _UPSERT_CHUNK])
+                statement = statement.on_conflict_do_update(
+                    index_elements=_ROLLUP_KEY_COLUMNS,
+                    set_={
+                        "tons": WeighTicketRollup.tons + statement.excluded.tons,
+                        "ticket_count": WeighTicketRollup.ticket_count + statement.excluded.ticket_count,
+                        "updated_at": statement.excluded.updated_at,
+                    }
+                )
+                self.session.execute(statement)
+            return len(rows)
+
+        missing = []
+        for row in rows:
+            result = self.session.execute(
+                update(WeighTicketRollup)
+                .where(*(getattr(WeighTicketRollup, column) == row[column] for column in _ROLLUP_KEY_COLUMNS))
+                .values(
+                    tons=WeighTicketRollup.tons + row["tons"],
+                    ticket_count=WeighTicketRollup.ticket_count + row["ticket_count"],
+                    updated_at=now
+                )
+            )
+            if result.rowcount == 0:
+                missing.append(row)
+        if missing:
+            self.session.execute(insert(WeighTicketRollup), missing)
+        return len(rows)
+
+    def get_monthly_totals(self, keys: Iterable[Tuple[int, str]]) -> Dict[Tuple[int, str], Dict[str, float]]:
+        """{(aps_id, período): {tipo: toneladas}} de los meses indicados"""
+        keys = set(keys)
+        if not keys:
+            return {}
+        statement = select(
+            WeighTicketRollup.aps_id,
+            WeighTicketRollup.bucket,
+            WeighTicketRollup.ticket_type,
+            WeighTicketRollup.tons,
+        ).where(
+            WeighTicketRollup.granularity == "month",
+            WeighTicketRollup.aps_id.in_({aps_id for aps_id, _ in keys}),
+            WeighTicketRollup.bucket.in_({period for _, period in keys})
+        )
+        totals: Dict[Tuple[int, str], Dict[str, float]] = {}
+        for row in self.session.exec(statement).all():
+            if (row.aps_id, row.bucket) in keys:
+                totals.setdefault((row.aps_id, row.bucket), {})[row.ticket_type] = row.tons
+        return totals
+
+    def get_monthly_fields(self, aps_id: int, period: str) -> Dict[str, float]:
+        """Campos de APSMonthlyData que aportan los tiquetes del mes"""
+        totals = self.get_monthly_totals([(aps_id, period)]).get((aps_id, period), {})
+        return {
+            WeighTicketType.MONTHLY_FIELDS[ticket_type]: tons
+            for ticket_type, tons in totals.items()
+            if ticket_type in WeighTicketType.MONTHLY_FIELDS
+        }
+
+    def sync_monthly_data(self, totals: Dict[Tuple[int, str], Dict[str, float]]) -> int:
+        """
+        Copia las toneladas mensuales de los tiquetes a APSMonthlyData (un
+        executemany por tipo). Sólo actualiza meses ya registrados.
+        """
+        updated = 0
+        now = datetime.utcnow()
+        for ticket_type, field in WeighTicketType.MONTHLY_FIELDS.items():
+            params = [
+                {"b_aps_id": aps_id, "b_period": period, "b_tons": by_type[ticket_type], "b_now": now}
+                for (aps_id, period), by_type in totals.items()
+                if ticket_type in by_type
+            ]
+            if not params:
+                continue
+            statement = (
+                update(APSMonthlyData.__table__)
+                .where(
+                    APSMonthlyData.__table__.c.aps_id == bindparam("b_aps_id"),
+                    APSMonthlyData.__table__.c.period == bindparam("b_period")
+                )
+                .values({field: bindparam("b_tons"), "updated_at": bindparam("b_now")})
+            )
+            result = self.session.connection().execute(statement, params)
+            updated += max(result.rowcount, 0)
+        return updated
+
+    def get_rollups(self, aps_id: int, period: str) -> List[WeighTicketRollup]:
+        """Rollups del mes y de sus días, ordenados por bucket"""
+        statement = (
+            select(WeighTicketRollup)
+            .where(
+                WeighTicketRollup.aps_id == aps_id,
+                WeighTicketRollup.bucket.startswith(period)
+            )
+            .order_by(WeighTicketRollup.granularity, WeighTicketRollup.bucket, WeighTicketRollup.ticket_type)
+        )
+        return list(self.session.exec(statement).all())
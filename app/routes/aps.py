@@ -1,8 +1,10 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlmodel import Session
 
-from app.core.deps import get_session, get_current_user, check_user_role
+from app.core.deps import get_session, get_read_session, get_current_user, check_user_role
+from app.core.responses import FastJSONResponse, dump_orm_rows
+from app.core.http_cache import etag_matches, not_modified_response, set_cache_headers
 from app.controllers.aps_controller import APSController
 from app.schemas.aps import (
     APSCreate, APSUpdate, APSRead,
@@ -43,6 +45,28 @@ def create_aps(
     )
 
 
+@router.get("/summaries")
+def get_aps_summaries(
+    aps_ids: List[int] = Query(..., min_length=1, max_length=200),
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Obtiene el resumen de varios APS en una sola petición
+    
+    **Permisos**: SYSTEM, ADMIN, USER
+    
+    Ejemplo: /aps/summaries?aps_ids=1&aps_ids=2
+    """
+    check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
+    controller = APSController(session)
+    return controller.get_aps_summaries(
+        aps_ids=aps_ids,
+        current_user_company_id=current_user.company_id,
+        is_system_user=(current_user.role == "SYSTEM")
+    )
+
+
 @router.get("/{aps_id}", response_model=APSRead)
 def get_aps(
     aps_id: int,
@@ -90,6 +114,32 @@ def get_aps_by_company(
     )
 
 
+@router.get("/company/{company_id}/dashboard")
+def get_company_dashboard(
+    company_id: int,
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Tablero de todos los APS de una empresa en una sola petición
+    
+    **Permisos**: SYSTEM, ADMIN, USER
+    
+    Por cada APS activo incluye:
+    - Datos básicos y distancia efectiva
+    - Promedios de 6 meses
+    - Estado de verificación de los datos mensuales
+    - Última tarifa oficial por estrato (base y final)
+    """
+    check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
+    controller = APSController(session)
+    return FastJSONResponse(controller.get_company_dashboard(
+        company_id=company_id,
+        current_user_company_id=current_user.company_id,
+        is_system_user=(current_user.role == "SYSTEM")
+    ))
+
+
 @router.put("/{aps_id}", response_model=APSRead)
 def update_aps(
     aps_id: int,
@@ -210,12 +260,14 @@ def get_all_monthly_data(
     """
     check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
     controller = APSController(session)
-    return controller.get_all_monthly_data(
+    rows = controller.get_all_monthly_data(
         aps_id=aps_id,
         year=year,
         current_user_company_id=current_user.company_id,
         is_system_user=(current_user.role == "SYSTEM")
     )
+    # Lista potencialmente larga: serialización directa con orjson
+    return FastJSONResponse(dump_orm_rows(rows, APSMonthlyDataRead))
 
 
 @router.get("/{aps_id}/averages/{end_period}")
@@ -279,7 +331,9 @@ def verify_monthly_data(
 @router.get("/{aps_id}/summary")
 def get_aps_summary(
     aps_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -293,13 +347,21 @@ def get_aps_summary(
     - Promedios de 6 meses
     - Distancia efectiva ajustada por vías sin pavimentar
     - Total de meses registrados
+    
+    Soporta If-None-Match: responde 304 si el APS y sus meses no cambiaron.
     """
     check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
     controller = APSController(session)
+    is_system_user = current_user.role == "SYSTEM"
+    etag = controller.get_aps_summary_etag(aps_id, current_user.company_id, is_system_user)
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    
+    set_cache_headers(response, etag)
     return controller.get_aps_summary(
         aps_id=aps_id,
         current_user_company_id=current_user.company_id,
-        is_system_user=(current_user.role == "SYSTEM")
+        is_system_user=is_system_user
     )
 
 
@@ -3,11 +3,11 @@ from sqlmodel import Session
 from datetime import datetime
 from typing import Optional
 
-from ..core.deps import get_current_user, require_system_user, require_company_access
-from ..db import get_session
+from ..core.deps import get_current_user, get_read_session, require_system_user, require_company_access
 from ..models.user import User, Role
 from ..schemas.audit_log import AuditLogRead, AuditLogListResponse
 from ..repositories.audit_log_repository import AuditLogRepository
+from ..core.responses import FastJSONResponse, dump_orm_rows
 from ..core.exceptions import (
     AuditLogAccessDeniedError,
     AuditLogNotFoundError,
@@ -17,10 +17,10 @@ from ..core.exceptions import (
 router = APIRouter(prefix="/audit", tags=["audit"])
 
 
-@router.get("/logs")
+@router.get("/logs", response_model=AuditLogListResponse)
 def list_audit_logs(
     user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     days: int = Query(30, ge=1, le=365),
     action: Optional[str] = Query(None),
     resource_type: Optional[str] = Query(None),
@@ -54,17 +54,18 @@ def list_audit_logs(
         user_id=user_filter,
     )
     
-    return AuditLogListResponse(
-        total=len(logs),
-        logs=[AuditLogRead.from_orm(log) for log in logs],
-    )
+    return FastJSONResponse({
+        "total": len(logs),
+        "logs": dump_orm_rows(logs, AuditLogRead),
+        "filters": None,
+    })
 
 
 @router.get("/logs/{log_id}")
 def get_audit_log(
     log_id: int,
     user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ) -> AuditLogRead:
     """Get specific audit log entry"""
     if user.role == Role.USER:
@@ -87,7 +88,7 @@ def get_audit_log(
 def get_user_recent_activity(
     user_id: Optional[int] = None,
     user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     limit: int = Query(10, ge=1, le=100),
 ) -> list[AuditLogRead]:
     """
@@ -115,7 +116,7 @@ def get_resource_history(
     resource_type: str,
     resource_id: int,
     user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ) -> list[AuditLogRead]:
     """
     Get all changes made to a specific resource.
@@ -0,0 +1,46 @@
+"""
+Endpoints de diagnóstico para administradores del sistema
+"""
+
+from fastapi import APIRouter, Depends, Query
+
+from ..core.deps import require_system_user
+from ..core.slow_query_log import (
+    SLOW_QUERY_THRESHOLD_MS,
+    clear_slow_queries,
+    get_recent_slow_queries,
+)
+from ..models.user import User
+
+router = APIRouter()
+
+
+@router.get("/slow-queries", response_model=dict)
+def list_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    user: User = Depends(require_system_user),
+):
+    """
+    Consultas más lentas que el umbral, más recientes primero
+
+    Cada registro incluye el método de repositorio que la originó,
+    los parámetros redactados y el plan de ejecución capturado.
+
+    **Permisos**: SYSTEM
+    """
+    records = get_recent_slow_queries(limit)
+    return {
+        "threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+        "total": len(records),
+        "queries": records,
+    }
+
+
+@router.delete("/slow-queries", status_code=204)
+def reset_slow_queries(user: User = Depends(require_system_user)):
+    """
+    Vacía los registros en memoria (el archivo rotativo se conserva)
+
+    **Permisos**: SYSTEM
+    """
+    clear_slow_queries()
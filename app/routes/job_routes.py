@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+from typing import List, Optional
+
+from ..core.deps import get_current_user, get_session
+from ..models.user import User, Role
+from ..models.job import Job, JobStatus
+from ..schemas.job import JobCreate, JobRead
+from ..repositories.job_repository import JobRepository
+from ..services.job_queue import validate_job_payload
+from ..core.exceptions import (
+    InsufficientPermissionsError,
+    JobAlreadyFinishedError,
+    JobNotFoundError,
+)
+
+router = APIRouter()
+
+
+def _get_job_for_user(session: Session, job_id: int, user: User) -> Job:
+    """Obtiene el trabajo validando que pertenezca a la empresa del usuario"""
+    job = JobRepository(session).get_by_id(job_id)
+    if not job:
+        raise JobNotFoundError(job_id)
+    if user.role != Role.SYSTEM and job.company_id != user.company_id:
+        raise JobNotFoundError(job_id)
+    return job
+
+
+@router.post("", response_model=JobRead, status_code=202)
+def submit_job(
+    data: JobCreate,
+    user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """
+    Encola un trabajo pesado y retorna de inmediato
+
+    **Permisos**: SYSTEM, ADMIN
+
+    El payload se valida al encolar (422 si es inválido). El cliente
+    consulta `GET /jobs/{id}` para ver progreso y resultado.
+    """
+    if user.role == Role.USER:
+        raise InsufficientPermissionsError("Usuarios no pueden encolar trabajos")
+
+    payload = validate_job_payload(session, data.job_type, data.payload, user.company_id)
+
+    job = Job(
+        job_type=data.job_type,
+        payload=payload,
+        priority=data.priority,
+        max_attempts=data.max_attempts,
+        company_id=user.company_id,
+        submitted_by=user.id,
+    )
+    return JobRepository(session).create(job)
+
+
+@router.get("", response_model=List[JobRead])
+def list_jobs(
+    status: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """Lista los trabajos recientes de la empresa (SYSTEM ve todos)"""
+    company_id = None if user.role == Role.SYSTEM else user.company_id
+    return JobRepository(session).list_jobs(company_id=company_id, status=status, limit=limit)
+
+
+@router.get("/{job_id}", response_model=JobRead)
+def get_job(
+    job_id: int,
+    user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """Consulta estado, progreso y resultado de un trabajo"""
+    return _get_job_for_user(session, job_id, user)
+
+
+@router.post("/{job_id}/cancel", response_model=JobRead)
+def cancel_job(
+    job_id: int,
+    user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """
+    Cancela un trabajo
+
+    **Permisos**: SYSTEM, ADMIN
+
+    Si está en cola se cancela de inmediato; si está corriendo se detiene
+    en su siguiente reporte de progreso.
+    """
+    if user.role == Role.USER:
+        raise InsufficientPermissionsError("Usuarios no pueden cancelar trabajos")
+
+    job = _get_job_for_user(session, job_id, user)
+    if job.status in JobStatus.FINISHED:
+        raise JobAlreadyFinishedError(job_id, job.status)
+
+    return JobRepository(session).request_cancel(job)
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+
+from ..core.deps import get_read_session, require_company_access
+from ..core.exceptions import TariffNotFoundError, ValidationError
+from ..core.validators import validate_period_format
+from ..db import engine, read_router
+from ..models.tariff_calculation import TariffCalculation
+from ..models.user import User
+from ..repositories.tariff_calculation_repository import TariffCalculationRepository
+from ..schemas.report import ReportPackRequest
+from ..services.report_generator import REPORT_FORMATS, TariffReportGenerator
+
+router = APIRouter()
+
+# Máximo de cálculos por paquete
+MAX_REPORT_CALCULATIONS = 1000
+
+
+@router.post("/pack")
+def generate_report_pack(
+    data: ReportPackRequest,
+    user: User = Depends(require_company_access),
+    session: Session = Depends(get_read_session),
+):
+    """
+    Paquete zip con reporte XLSX y/o PDF de cada cálculo y un resumen.xlsx
+
+    Recibe `calculation_ids` o un `period` (todos los cálculos de la
+    empresa en el período, p.ej. el cierre de mes). El zip se entrega en
+    streaming a medida que se renderiza cada archivo.
+    """
+    formats = [fmt.lower() for fmt in data.formats]
+    invalid = sorted(set(formats) - set(REPORT_FORMATS))
+    if invalid or not formats:
+        raise ValidationError("formats", f"Formatos soportados: {', '.join(REPORT_FORMATS)}")
+
+    repo = TariffCalculationRepository(session)
+    if data.calculation_ids:
+        calculation_ids = list(dict.fromkeys(data.calculation_ids))
+    elif data.period:
+        validate_period_format(data.period)
+        calculation_ids = repo.get_ids_by_company_period(user.company_id, data.period, data.calculation_type)
+    else:
+        raise ValidationError("calculation_ids", "Indique calculation_ids o period")
+
+    if not calculation_ids:
+        raise ValidationError("period", "No hay cálculos para el período")
+    if len(calculation_ids) > MAX_REPORT_CALCULATIONS:
+        raise ValidationError(
+            "calculation_ids", f"Un paquete no puede superar {MAX_REPORT_CALCULATIONS} cálculos"
+        )
+
+    # Los cálculos de otra empresa se reportan como inexistentes
+    owned = set(session.exec(
+        select(TariffCalculation.id).where(
+            TariffCalculation.id.in_(calculation_ids),
+            TariffCalculation.company_id == user.company_id
+        )
+    ).all())
+    missing = [calculation_id for calculation_id in calculation_ids if calculation_id not in owned]
+    if missing:
+        raise TariffNotFoundError(missing[0])
+
+    def content():
+        # La sesión del request se cierra antes de terminar el streaming
+        report_session = read_router.open_session(user.id) or Session(engine)
+        with report_session:
+            yield from TariffReportGenerator(report_session).stream_pack(
+                calculation_ids, formats, include_summary=data.include_summary
+            )
+
+    filename = f"reportes_tarifas_{data.period or 'seleccion'}.zip"
+    return StreamingResponse(
+        content(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,133 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+
+from ..core.deps import check_user_role, get_current_user, get_read_session, get_session
+from ..core.responses import FastJSONResponse
+from ..models.disposal_site import DisposalSite
+from ..models.user import Role, User
+from ..repositories.disposal_site_repository import DisposalSiteRepository
+from ..schemas.spatial import (
+    DisposalSiteCreate, DisposalSiteRead, DistanceMatrixRequest, TransferStationOptimizeRequest
+)
+from ..services.spatial_planning import SpatialPlanningService
+from ..services.transfer_station_optimizer import TransferStationOptimizer
+
+router = APIRouter()
+
+
+def _planning_service(session: Session, user: User) -> SpatialPlanningService:
+    """SYSTEM consulta todas las empresas; los demás sólo la suya"""
+    return SpatialPlanningService(session, None if user.role == Role.SYSTEM else user.company_id)
+
+
+@router.post("/sites", response_model=DisposalSiteRead, status_code=201)
+def create_disposal_site(
+    data: DisposalSiteCreate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Registra un relleno sanitario o estación de transferencia
+
+    **Permisos**: SYSTEM, ADMIN
+
+    Los sitios que registra SYSTEM son regionales (visibles para todas
+    las empresas); los de ADMIN pertenecen a su empresa.
+    """
+    check_user_role(current_user, ["SYSTEM", "ADMIN"])
+    site = DisposalSite(**data.model_dump(), company_id=current_user.company_id)
+    return DisposalSiteRepository(session).create(site)
+
+
+@router.get("/sites", response_model=List[DisposalSiteRead])
+def list_disposal_sites(
+    site_type: Optional[str] = Query(None),
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Sitios activos visibles para el usuario"""
+    check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
+    return _planning_service(session, current_user).sites_of_type(site_type)
+
+
+@router.get("/sites/nearest")
+def get_nearest_sites(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    site_type: Optional[str] = Query(None),
+    k: int = Query(1, ge=1, le=50),
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Los k sitios más cercanos a un punto (distancia en línea recta)"""
+    check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
+    return FastJSONResponse(_planning_service(session, current_user).nearest_sites(lat, lon, site_type, k))
+
+
+@router.get("/aps/within-radius")
+def get_aps_within_radius(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(..., gt=0, le=1000),
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """APS cuyo centroide está dentro del radio"""
+    check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
+    return FastJSONResponse(_planning_service(session, current_user).aps_within_radius(lat, lon, radius_km))
+
+
+@router.post("/distance-matrix")
+def get_distance_matrix(
+    data: DistanceMatrixRequest,
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Matriz de distancias (km) de centroides de APS a sitios"""
+    check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
+    return FastJSONResponse(
+        _planning_service(session, current_user).distance_matrix(data.aps_ids, data.site_type)
+    )
+
+
+@router.get("/effective-distances")
+def get_effective_distances(
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Distancia efectiva de todos los APS y sus sitios más cercanos
+
+    **Permisos**: SYSTEM, ADMIN, USER
+    """
+    check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
+    return FastJSONResponse(_planning_service(session, current_user).effective_distance_report())
+
+
+@router.post("/transfer-stations/optimize")
+def optimize_transfer_stations(
+    data: TransferStationOptimizeRequest,
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Mejores ubicaciones para estaciones de transferencia compartidas
+
+    **Permisos**: SYSTEM, ADMIN
+
+    Evalúa f2 (Art. 24) de cada APS pasando por cada candidato (estaciones
+    registradas, centroides de APS y `candidates`) y elige hasta
+    `max_stations` sitios que minimizan Σ toneladas × CRT. Retorna los
+    sitios elegidos, el ranking individual y el cambio de CRT por APS.
+    """
+    check_user_role(current_user, ["SYSTEM", "ADMIN"])
+    optimizer = TransferStationOptimizer(session, None if current_user.role == Role.SYSTEM else current_user.company_id)
+    return FastJSONResponse(optimizer.optimize(
+        aps_ids=data.aps_ids,
+        max_stations=data.max_stations,
+        include_aps_centroids=data.include_aps_centroids,
+        candidates=[point.model_dump() for point in data.candidates],
+        top=data.top,
+    ))
@@ -0,0 +1,94 @@
+import os
+import uuid
+from typing import List
+
+from fastapi import APIRouter, Depends, File, UploadFile
+from sqlmodel import Session
+
+from ..core.deps import check_user_role, get_current_user, get_read_session, get_session
+from ..core.exceptions import RecordNotFoundError, ValidationError
+from ..core.validators import validate_period_format, validate_user_owns_aps
+from ..models.job import Job
+from ..models.user import User
+from ..repositories.job_repository import JobRepository
+from ..repositories.sweeping_gps_repository import SweepingGpsRepository
+from ..schemas.job import JobRead
+from ..schemas.sweeping import SweepingGpsSummaryRead
+from ..services.job_queue import validate_job_payload
+
+router = APIRouter()
+
+# Máximo de archivos por mes
+MAX_TRACE_FILES = 500
+
+TRACE_EXTENSIONS = (".gpx", ".csv")
+
+
+@router.post("/{aps_id}/{period}/traces", response_model=JobRead, status_code=202)
+def upload_sweeping_traces(
+    aps_id: int,
+    period: str,
+    files: List[UploadFile] = File(...),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Sube las trazas GPS (GPX o CSV) de las cuadrillas de barrido del mes
+
+    **Permisos**: SYSTEM, ADMIN
+
+    Encola un trabajo `sweeping.process_traces` que calcula los kilómetros
+    barridos distintos y los copia al LBL de los datos mensuales. Deben
+    subirse juntas todas las trazas del mes; el resultado reemplaza al
+    anterior. El progreso se consulta en `GET /jobs/{id}`.
+    """
+    check_user_role(current_user, ["SYSTEM", "ADMIN"])
+    validate_period_format(period)
+    validate_user_owns_aps(session, aps_id, current_user)
+
+    if len(files) > MAX_TRACE_FILES:
+        raise ValidationError("files", f"No se pueden subir más de {MAX_TRACE_FILES} archivos")
+    invalid = [upload.filename for upload in files if not (upload.filename or "").lower().endswith(TRACE_EXTENSIONS)]
+    if invalid:
+        raise ValidationError("files", f"Formatos soportados: {', '.join(TRACE_EXTENSIONS)}", {"files": invalid})
+
+    # Se guardan en la BD por bloques (no se cargan en memoria) para que
+    # cualquier instancia o worker pueda procesarlas
+    repository = SweepingGpsRepository(session)
+    upload_id = uuid.uuid4().hex
+    for index, upload in enumerate(files):
+        repository.store_trace(upload_id, index, os.path.splitext(upload.filename)[1].lower(), upload.file)
+
+    payload = validate_job_payload(
+        session, "sweeping.process_traces",
+        {"aps_id": aps_id, "period": period, "upload_id": upload_id, "files": len(files)},
+        current_user.company_id
+    )
+    job = Job(
+        job_type="sweeping.process_traces",
+        payload=payload,
+        company_id=current_user.company_id,
+        submitted_by=current_user.id,
+    )
+    return JobRepository(session).create(job)
+
+
+@router.get("/{aps_id}/{period}", response_model=SweepingGpsSummaryRead)
+def get_sweeping_summary(
+    aps_id: int,
+    period: str,
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Kilómetros barridos medidos con GPS en el período
+
+    **Permisos**: SYSTEM, ADMIN, USER
+    """
+    check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
+    validate_period_format(period)
+    validate_user_owns_aps(session, aps_id, current_user)
+    summary = SweepingGpsRepository(session).get_by_aps_and_period(aps_id, period)
+    if not summary:
+        raise RecordNotFoundError("SweepingGpsSummary", f"{aps_id}/{period}")
+    return summary
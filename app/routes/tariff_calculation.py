@@ -5,31 +5,49 @@ Endpoints para:
 2. Creador: Crear tarifas mensuales (guardar en BD)
 """
 
-from fastapi import APIRouter, Depends
+import json
+import logging
+
+from fastapi import APIRouter, Depends, Request, Response, WebSocket, WebSocketDisconnect, status
 from sqlmodel import Session, select
 
 from ..schemas.tariff_calculation import (
     SimulateTariffRequest,
+    BackCalculationRequest,
+    WhatIfRequest,
     TariffCalculationResult,
     CreateTariffRequest,
     TariffHistoryResponse,
     TariffHistoryItem,
 )
 from ..services.tariff_calculation_service import TariffCalculationService
+from ..tariff_core.formula_graph import AVERAGE_INPUTS
+from ..tariff_core.rule_sets import rule_sets
 from ..models.user import User
 from ..models.tariff_calculation import TariffCalculation
-from ..core.deps import get_current_user, get_session
+from ..core.deps import get_current_user, get_read_session, get_session, get_websocket_user
+from ..db import engine
 from ..core.validators import (
     validate_period_format,
     validate_user_owns_aps,
     validate_tariff_not_exists,
     validate_tariff_calculation_input,
 )
-from ..core.exceptions import UnauthorizedError
+from ..core.exceptions import SanitationSystemError, UnauthorizedError, ValidationError
+from ..core.responses import FastJSONResponse
+from ..core.http_cache import (
+    make_etag, etag_matches, cache_headers, set_cache_headers, not_modified_response
+)
+from ..repositories.tariff_calculation_repository import TariffCalculationRepository
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter(prefix="/api/tariff-calculation", tags=["tariff-calculation"])
 
+# Máximo de períodos por recálculo de rango
+MAX_BACK_CALCULATION_MONTHS = 120
+
 
 @router.post("/validator/simulate", response_model=TariffCalculationResult)
 async def simulate_tariff(
@@ -70,6 +88,166 @@ async def simulate_tariff(
     return result
 
 
+@router.post("/validator/back-calculate", response_model=dict)
+async def back_calculate_tariffs(
+    request: BackCalculationRequest,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+) -> dict:
+    """
+    Recalcula las tarifas de un APS para un rango de períodos SIN guardar en BD
+    
+    Usado para validar el calculador contra tarifas históricas:
+    dos años de histórico se calculan en una sola llamada con una
+    sola lectura de datos mensuales.
+    """
+    
+    if not current_user:
+        raise UnauthorizedError()
+    
+    validate_period_format(request.start_period)
+    validate_period_format(request.end_period)
+    validate_user_owns_aps(session, request.aps_id, current_user)
+    
+    if request.end_period < request.start_period:
+        raise ValidationError("end_period", "Debe ser posterior o igual a start_period")
+    start_year, start_month = map(int, request.start_period.split("-"))
+    end_year, end_month = map(int, request.end_period.split("-"))
+    months = (end_year - start_year) * 12 + end_month - start_month + 1
+    if months > MAX_BACK_CALCULATION_MONTHS:
+        raise ValidationError(
+            "end_period", f"El rango no puede superar {MAX_BACK_CALCULATION_MONTHS} meses"
+        )
+    
+    service = TariffCalculationService(session)
+    results = service.back_calculate_range(
+        aps_id=request.aps_id,
+        start_period=request.start_period,
+        end_period=request.end_period,
+        subsidy_factors=request.subsidy_factors,
+        extra_categories=[
+            category.model_dump() for category in request.extra_categories or []
+        ],
+        exact=request.exact
+    )
+    
+    return FastJSONResponse({
+        "aps_id": request.aps_id,
+        "start_period": request.start_period,
+        "end_period": request.end_period,
+        "total_periods": len(results),
+        "results": results,
+    })
+
+
+@router.post("/validator/what-if", response_model=dict)
+async def what_if_tariff(
+    request: WhatIfRequest,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+) -> dict:
+    """
+    Evalúa un escenario "qué pasa si" sobre los promedios de un período SIN guardar en BD
+    
+    Las fórmulas se evalúan como grafo: sólo se recalculan los nodos
+    afectados por las entradas modificadas. Con include_trace=true se
+    devuelven los valores intermedios de cada nodo para auditoría.
+    """
+    
+    if not current_user:
+        raise UnauthorizedError()
+    
+    validate_period_format(request.period)
+    validate_user_owns_aps(session, request.aps_id, current_user)
+    
+    unknown = sorted(set(request.overrides) - set(AVERAGE_INPUTS))
+    if unknown:
+        raise ValidationError("overrides", f"Entradas no modificables: {', '.join(unknown)}")
+    
+    service = TariffCalculationService(session)
+    result = service.what_if(
+        aps_id=request.aps_id,
+        period=request.period,
+        overrides=request.overrides,
+        subsidy_factors=request.subsidy_factors,
+        include_trace=request.include_trace
+    )
+    
+    return FastJSONResponse(result)
+
+
+@router.websocket("/validator/live")
+async def live_simulation(websocket: WebSocket):
+    """
+    Simulación en vivo por WebSocket (no guarda en BD)
+    
+    El cliente inicia la sesión con un APS-período y luego envía sólo los
+    campos que cambió; el servidor re-evalúa los nodos afectados del grafo
+    y responde sólo con las salidas que cambiaron.
+    
+    Autenticación: `?token=<JWT>` o header Authorization.
+    
+    **Mensajes:**
+    ```
+    → {"type": "init", "aps_id": 1, "period": "2025-06", "subsidy_factors": {...}}
+    ← {"type": "snapshot", "inputs": {...}, "outputs": {...}}
+    → {"type": "delta", "seq": 7, "changes": {"leachate_volume_m3": 420}}
+    ← {"type": "update", "seq": 7, "recomputed": ["ctl", ...], "changed": {...}}
+    ← {"type": "error", "seq": 7, "detail": "..."}
+    ```
+    """
+    await websocket.accept()
+    with Session(engine) as session:
+        current_user = get_websocket_user(websocket, session)
+    if not current_user:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    live = None
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            seq = None
+            try:
+                message = json.loads(raw)
+                if not isinstance(message, dict):
+                    raise ValueError("El mensaje debe ser un objeto JSON")
+                seq = message.get("seq")
+                
+                if message.get("type") == "init":
+                    period = str(message.get("period", ""))
+                    aps_id = int(message.get("aps_id", 0))
+                    validate_period_format(period)
+                    with Session(engine) as session:
+                        validate_user_owns_aps(session, aps_id, current_user)
+                        live = TariffCalculationService(session).start_live_simulation(
+                            aps_id, period, message.get("subsidy_factors")
+                        )
+                    await websocket.send_json({"type": "snapshot", "seq": seq, **live.snapshot()})
+                elif message.get("type") == "delta":
+                    if live is None:
+                        raise ValueError("Sesión no iniciada: envíe primero un mensaje init")
+                    await websocket.send_json({"type": "update", "seq": seq, **live.apply(message.get("changes"))})
+                else:
+                    raise ValueError("type debe ser init o delta")
+            except SanitationSystemError as e:
+                await websocket.send_json({"type": "error", "seq": seq, "detail": e.message})
+            except (TypeError, ValueError) as e:
+                await websocket.send_json({"type": "error", "seq": seq, "detail": str(e)})
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                # Errores del grafo (KeyError, ArithmeticError...) o de la BD:
+                # la sesión sigue abierta y el cliente recibe el error
+                logger.error(f"[Live] Error procesando mensaje seq={seq}: {e}", exc_info=True)
+                await websocket.send_json({
+                    "type": "error", "seq": seq,
+                    "detail": f"Error interno ({e.__class__.__name__})",
+                })
+    except WebSocketDisconnect:
+        return
+
+
 @router.post("/monthly/create", response_model=dict)
 async def create_monthly_tariff(
     request: CreateTariffRequest,
@@ -135,16 +313,43 @@ async def create_monthly_tariff(
     }
 
 
+@router.get("/rule-sets", response_model=dict)
+def list_rule_sets(current_user: User = Depends(get_current_user)) -> dict:
+    """
+    Versiones de la regla tarifaria y el período desde el que rige cada una
+
+    Cada período se calcula con la última versión cuyo `effective_from`
+    es anterior o igual a él.
+    """
+    if not current_user:
+        raise UnauthorizedError()
+    
+    return {
+        "rule_sets": [
+            {
+                "version": rule_set.version,
+                "effective_from": rule_set.effective_from,
+                "description": rule_set.description,
+                "constants": sorted(rule_set.constants),
+                "formula_overrides": sorted(rule_set.formula_overrides),
+            }
+            for rule_set in rule_sets()
+        ]
+    }
+
+
 @router.get("/aps/{aps_id}/history", response_model=TariffHistoryResponse)
 async def get_tariff_history(
     aps_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_read_session)
 ) -> TariffHistoryResponse:
     """
     Obtiene histórico de tarifas de un APS
     
-    Útil para ver tendencias y detectar anomalías
+    Útil para ver tendencias y detectar anomalías.
+    Soporta If-None-Match: responde 304 si no hay cálculos nuevos.
     """
     
     if not current_user:
@@ -153,29 +358,34 @@ async def get_tariff_history(
     # Validar que APS existe y pertenece al usuario
     aps = validate_user_owns_aps(session, aps_id, current_user)
     
-    tariffs = session.exec(
-        select(TariffCalculation)
-        .where(TariffCalculation.aps_id == aps_id)
-        .order_by(TariffCalculation.period.desc())
-    ).all()
+    tariff_repo = TariffCalculationRepository(session)
+    etag = make_etag("tariff-history", aps_id, tariff_repo.get_version(aps_id))
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    
+    # Solo las columnas del listado: no se hidratan los JSON de cada cálculo
+    rows = tariff_repo.get_history_rows(aps_id)
     
     history_items = [
-        TariffHistoryItem(
-            id=t.id,
-            period=t.period,
-            tariff_final=t.tariff_final,
-            calculated_by=t.calculated_by,
-            calculation_date=t.calculation_date,
-            calculation_type=t.calculation_type,
-            notes=getattr(t, 'notes', None)
-        )
-        for t in tariffs
+        {
+            "id": row.id,
+            "period": row.period,
+            "tariff_final": row.tariff_stratum_4_final,
+            "calculated_by": row.calculated_by,
+            "calculation_date": row.calculation_date,
+            "calculation_type": row.calculation_type,
+            "notes": row.notes,
+        }
+        for row in rows
     ]
     
-    return TariffHistoryResponse(
-        aps_id=aps_id,
-        total_count=len(history_items),
-        tariffs=history_items
+    return FastJSONResponse(
+        {
+            "aps_id": aps_id,
+            "total_count": len(history_items),
+            "tariffs": history_items,
+        },
+        headers=cache_headers(etag)
     )
 
 
@@ -183,11 +393,15 @@ async def get_tariff_history(
 async def get_tariff_detail(
     period: str,
     aps_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_read_session)
 ) -> dict:
     """
     Obtiene detalles completos de una tarifa calculada
+    
+    Soporta If-None-Match: responde 304 si el cálculo no cambió.
     """
     
     if not current_user:
@@ -197,12 +411,13 @@ async def get_tariff_detail(
     validate_period_format(period)
     aps = validate_user_owns_aps(session, aps_id, current_user)
     
-    tariff = session.exec(
-        select(TariffCalculation).where(
-            (TariffCalculation.aps_id == aps_id) &
-            (TariffCalculation.period == period)
-        )
-    ).first()
+    tariff_repo = TariffCalculationRepository(session)
+    version = tariff_repo.get_version(aps_id, period)
+    etag = make_etag("tariff-detail", aps_id, period, aps.updated_at, version)
+    if version[0] and etag_matches(request, etag):
+        return not_modified_response(etag)
+    
+    tariff = tariff_repo.get_by_aps_and_period(aps_id, period)
     
     if not tariff:
         from ..core.exceptions import TariffNotFoundError
@@ -212,6 +427,7 @@ async def get_tariff_detail(
         select(User).where(User.id == tariff.calculated_by)
     ).first()
     
+    set_cache_headers(response, etag)
     return {
         "period": tariff.period,
         "aps_id": tariff.aps_id,
@@ -225,8 +441,8 @@ async def get_tariff_detail(
         "cdf": tariff.cdf,
         "ctl": tariff.ctl,
         "vba": tariff.vba,
-        "tariff_base": tariff.tariff_base,
-        "tariff_final": tariff.tariff_final,
+        "tariff_base": tariff.tariff_stratum_4_base,
+        "tariff_final": tariff.tariff_stratum_4_final,
         "calculation_type": tariff.calculation_type,
         "calculated_date": tariff.calculation_date,
         "calculated_by_username": user.username if user else "unknown",
@@ -0,0 +1,71 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+
+from ..core.deps import check_user_role, get_current_user, get_read_session, get_session
+from ..core.responses import FastJSONResponse
+from ..core.validators import validate_period_format, validate_user_owns_aps
+from ..models.tariff_parameter import TariffParameter
+from ..models.user import Role, User
+from ..schemas.tariff_parameter import ResolvedParametersRead, TariffParameterCreate, TariffParameterRead
+from ..services.parameter_store import TariffParameterService
+
+router = APIRouter()
+
+
+@router.post("/", response_model=TariffParameterRead, status_code=201)
+def create_tariff_parameter(
+    data: TariffParameterCreate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Registra el valor de un parámetro de cálculo con vigencia
+
+    **Permisos**: SYSTEM, ADMIN
+
+    Los valores municipales o globales que registra SYSTEM aplican a todas
+    las empresas; los de ADMIN sólo a la suya. Un valor no puede cruzar su
+    vigencia con otro del mismo parámetro y alcance.
+    """
+    check_user_role(current_user, ["SYSTEM", "ADMIN"])
+    is_system = current_user.role == Role.SYSTEM
+    parameter = TariffParameter(
+        **data.model_dump(),
+        company_id=None if is_system else current_user.company_id,
+        created_by=current_user.id
+    )
+    return TariffParameterService(session).create(parameter, None if is_system else current_user.company_id)
+
+
+@router.get("/", response_model=List[TariffParameterRead])
+def list_tariff_parameters(
+    name: Optional[str] = Query(None),
+    scope: Optional[str] = Query(None),
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Parámetros visibles para el usuario (de su empresa y del sistema)"""
+    check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
+    company_id = None if current_user.role == Role.SYSTEM else current_user.company_id
+    return TariffParameterService(session).repo.get_visible(company_id, name, scope)
+
+
+@router.get("/resolve/{aps_id}/{period}", response_model=ResolvedParametersRead)
+def resolve_tariff_parameters(
+    aps_id: int,
+    period: str,
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Parámetros vigentes de un APS en un período (el alcance más específico gana)
+
+    **Permisos**: SYSTEM, ADMIN, USER
+    """
+    check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
+    validate_period_format(period)
+    aps = validate_user_owns_aps(session, aps_id, current_user)
+    store = TariffParameterService(session).store_for([aps], [period])
+    return FastJSONResponse({"aps_id": aps_id, "period": period, "parameters": store.resolve(aps, period)})
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends
+from sqlmodel import Session, select
+
+from ..core.deps import check_user_role, get_current_user, get_read_session, get_session
+from ..core.exceptions import APSNotBelongsToCompanyError, APSNotFoundError
+from ..core.responses import FastJSONResponse
+from ..core.validators import validate_period_format, validate_user_owns_aps
+from ..models.aps import APS
+from ..models.user import User
+from ..schemas.weigh_ticket import WeighTicketBatch, WeighTicketBatchResult, WeighTicketRollupRead
+from ..services.weigh_ticket_ingestion import WeighTicketIngestionService
+
+router = APIRouter()
+
+
+@router.post("/batch", response_model=WeighTicketBatchResult)
+def ingest_weigh_tickets(
+    data: WeighTicketBatch,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Ingresa un lote de tiquetes de báscula
+
+    **Permisos**: SYSTEM, ADMIN, USER
+
+    Los tiquetes ya recibidos (mismo `ticket_number`) se ignoran, por lo que
+    la báscula puede reenviar un lote completo. Las toneladas se suman a los
+    rollups diarios y mensuales y se copian a los datos mensuales del APS
+    (QNA para `collection`, QRS para `landfill`).
+    """
+    check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
+
+    # Todos los APS del lote en una consulta
+    aps_ids = {ticket.aps_id for ticket in data.tickets}
+    companies = dict(session.exec(select(APS.id, APS.company_id).where(APS.id.in_(aps_ids))).all())
+    for aps_id in sorted(aps_ids):
+        if aps_id not in companies:
+            raise APSNotFoundError(aps_id)
+        if current_user.role != "SYSTEM" and companies[aps_id] != current_user.company_id:
+            raise APSNotBelongsToCompanyError(aps_id, current_user.company_id)
+
+    return FastJSONResponse(WeighTicketIngestionService(session).ingest(data.tickets))
+
+
+@router.get("/rollups/{aps_id}/{period}", response_model=WeighTicketRollupRead)
+def get_weigh_ticket_rollups(
+    aps_id: int,
+    period: str,
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Toneladas pesadas de un APS en el mes, por tipo y por día
+
+    **Permisos**: SYSTEM, ADMIN, USER
+    """
+    check_user_role(current_user, ["SYSTEM", "ADMIN", "USER"])
+    validate_period_format(period)
+    validate_user_owns_aps(session, aps_id, current_user)
+    return FastJSONResponse(WeighTicketIngestionService(session).get_rollups(aps_id, period))
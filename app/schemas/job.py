@@ -0,0 +1,36 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional
+from datetime import datetime
+
+
+class JobCreate(BaseModel):
+    """Schema para encolar un trabajo en segundo plano"""
+    model_config = ConfigDict(extra="forbid")
+
+    job_type: str = Field(..., description="Ej: tariff.recalculate")
+    payload: dict = Field(default_factory=dict)
+    priority: int = Field(default=0, ge=-10, le=10, description="Mayor valor = antes")
+    max_attempts: int = Field(default=3, ge=1, le=10)
+
+
+class JobRead(BaseModel):
+    """Schema para consultar estado y resultado de un trabajo"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    job_type: str
+    payload: dict
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    progress: float
+    progress_message: Optional[str] = None
+    result: Optional[dict] = None
+    error_message: Optional[str] = None
+    company_id: Optional[int] = None
+    submitted_by: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
+
+
+class ReportPackRequest(BaseModel):
+    """Schema para generar un paquete de reportes (zip) de varios cálculos"""
+    model_config = ConfigDict(extra="forbid")
+
+    calculation_ids: Optional[List[int]] = Field(
+        None, description="IDs de los cálculos; si se omite se usan los del período"
+    )
+    period: Optional[str] = Field(
+        None, description="Período YYYY-MM: todos los cálculos de la empresa en ese período"
+    )
+    calculation_type: str = Field(default="official", description="Tipo de cálculo al filtrar por período")
+    formats: List[str] = Field(default_factory=lambda: ["xlsx", "pdf"], description="xlsx y/o pdf")
+    include_summary: bool = Field(default=True, description="Incluir resumen.xlsx del lote")
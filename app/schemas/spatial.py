@@ -0,0 +1,59 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
+from datetime import datetime
+
+
+class DisposalSiteCreate(BaseModel):
+    """Schema para registrar un relleno o estación de transferencia"""
+    model_config = ConfigDict(extra="forbid")
+
+    name: str = Field(..., min_length=3, max_length=120)
+    site_type: Literal["landfill", "transfer_station"] = "landfill"
+    municipality: str
+    department: str
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+
+class DisposalSiteRead(BaseModel):
+    """Schema de respuesta de un sitio de disposición"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    company_id: Optional[int] = None
+    name: str
+    site_type: str
+    municipality: str
+    department: str
+    latitude: float
+    longitude: float
+    is_active: bool
+    created_at: datetime
+
+
+class DistanceMatrixRequest(BaseModel):
+    """Schema para la matriz de distancias APS x sitios"""
+    model_config = ConfigDict(extra="forbid")
+
+    aps_ids: Optional[List[int]] = Field(None, description="Si se omite, todos los APS con centroide")
+    site_type: Optional[Literal["landfill", "transfer_station"]] = None
+
+
+class CandidatePoint(BaseModel):
+    """Punto candidato para una estación de transferencia"""
+    model_config = ConfigDict(extra="forbid")
+
+    name: Optional[str] = None
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+
+class TransferStationOptimizeRequest(BaseModel):
+    """Schema para buscar la mejor ubicación de estaciones de transferencia"""
+    model_config = ConfigDict(extra="forbid")
+
+    aps_ids: Optional[List[int]] = Field(None, description="Si se omite, todos los APS con centroide")
+    max_stations: int = Field(default=1, ge=1, le=20)
+    include_aps_centroids: bool = Field(default=True, description="Usar los centroides de APS como candidatos")
+    candidates: List[CandidatePoint] = Field(default_factory=list, max_length=5000)
+    top: int = Field(default=10, ge=1, le=100, description="Sitios en el ranking individual")
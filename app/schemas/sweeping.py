@@ -0,0 +1,19 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import datetime
+
+
+class SweepingGpsSummaryRead(BaseModel):
+    """Kilómetros barridos medidos con GPS en un período"""
+    model_config = ConfigDict(from_attributes=True)
+
+    aps_id: int
+    period: str
+    swept_km: float
+    traveled_km: float
+    points: int
+    segments_used: int
+    segments_discarded: int
+    files: int
+    job_id: Optional[int] = None
+    updated_at: datetime
@@ -190,6 +190,66 @@ class SimulateTariffRequest(BaseModel):
         }
 
 
+class SubscriberCategoryInput(BaseModel):
+    """
+    Categoría de suscriptor adicional a los estratos 1-6 y comercial
+    (oficiales, especiales, grandes productores con aforo)
+    """
+    
+    name: str = Field(description="Nombre de la categoría, ej: official")
+    production_factor: float = Field(1.0, ge=0, description="Factor de producción F_u (Art. 42)")
+    subsidy_factor: float = Field(0.0, ge=-1, description="Factor de subsidio/contribución")
+    subscribers: float = Field(0, ge=0, description="Número de suscriptores")
+    weighed_tons: float = Field(0.0, ge=0, description="Toneladas aforadas (TAFNA); 0 si no hay aforo")
+
+
+class BackCalculationRequest(BaseModel):
+    """Request para recalcular tarifas de un rango de períodos (no guarda)"""
+    
+    aps_id: int = Field(description="ID del APS")
+    start_period: str = Field(description="Período inicial YYYY-MM")
+    end_period: str = Field(description="Período final YYYY-MM (inclusive)")
+    subsidy_factors: Optional[Dict[str, float]] = Field(
+        None, description="Factores de subsidio/contribución por estrato"
+    )
+    extra_categories: Optional[List[SubscriberCategoryInput]] = Field(
+        None, description="Categorías de suscriptor adicionales"
+    )
+    exact: bool = Field(False, description="Aritmética Decimal exacta (como las tarifas oficiales)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "aps_id": 1,
+                "start_period": "2024-01",
+                "end_period": "2025-12"
+            }
+        }
+
+
+class WhatIfRequest(BaseModel):
+    """Request para evaluar un escenario sobre el grafo de fórmulas (no guarda)"""
+    
+    aps_id: int = Field(description="ID del APS")
+    period: str = Field(description="Período base YYYY-MM")
+    overrides: Dict[str, float] = Field(
+        default_factory=dict, description="Entradas del grafo a modificar sobre los promedios"
+    )
+    subsidy_factors: Optional[Dict[str, float]] = Field(
+        None, description="Factores de subsidio/contribución por estrato"
+    )
+    include_trace: bool = Field(False, description="Incluir valores intermedios de cada nodo")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "aps_id": 1,
+                "period": "2025-01",
+                "overrides": {"leachate_volume_m3": 420.0}
+            }
+        }
+
+
 class TariffHistoryItem(BaseModel):
     """Item en histórico de tarifas"""
     
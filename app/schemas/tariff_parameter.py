@@ -0,0 +1,44 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, Literal, Optional
+from datetime import datetime
+
+
+class TariffParameterCreate(BaseModel):
+    """Schema para registrar el valor de un parámetro con vigencia"""
+    model_config = ConfigDict(extra="forbid")
+
+    name: str = Field(..., description="water_price_per_m3, tolls_cost_month, ..., subsidy_factor.<categoría>")
+    scope: Literal["aps", "municipality", "global"] = "global"
+    aps_id: Optional[int] = None
+    municipality: Optional[str] = None
+    department: Optional[str] = None
+    valid_from: str = Field(..., pattern=r"^\d{4}-\d{2}$")
+    valid_to: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}$", description="Inclusive; vacío = sin fin")
+    value: float
+    notes: Optional[str] = Field(None, max_length=500)
+
+
+class TariffParameterRead(BaseModel):
+    """Schema de respuesta de un parámetro"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    scope: str
+    company_id: Optional[int] = None
+    aps_id: Optional[int] = None
+    municipality: Optional[str] = None
+    department: Optional[str] = None
+    valid_from: str
+    valid_to: Optional[str] = None
+    value: float
+    notes: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: datetime
+
+
+class ResolvedParametersRead(BaseModel):
+    """Parámetros vigentes de un APS en un período"""
+    aps_id: int
+    period: str
+    parameters: Dict[str, float]
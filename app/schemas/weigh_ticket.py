@@ -0,0 +1,40 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, List, Literal
+from datetime import datetime
+
+# Máximo de tiquetes por lote
+MAX_WEIGH_TICKETS_PER_BATCH = 5000
+
+
+class WeighTicketCreate(BaseModel):
+    """Schema de un tiquete de báscula"""
+    model_config = ConfigDict(extra="forbid")
+
+    ticket_number: str = Field(..., min_length=1, max_length=64)
+    aps_id: int
+    vehicle_plate: str = Field(..., min_length=1, max_length=16)
+    ticket_type: Literal["collection", "landfill"] = "collection"
+    weighed_at: datetime
+    net_tons: float = Field(..., gt=0, le=100, description="Peso neto en toneladas")
+
+
+class WeighTicketBatch(BaseModel):
+    """Schema para ingerir un lote de tiquetes"""
+    tickets: List[WeighTicketCreate] = Field(..., min_length=1, max_length=MAX_WEIGH_TICKETS_PER_BATCH)
+
+
+class WeighTicketBatchResult(BaseModel):
+    """Resultado de la ingesta de un lote"""
+    received: int
+    inserted: int
+    duplicates: int
+    rollups_updated: int
+    monthly_data_updated: int
+
+
+class WeighTicketRollupRead(BaseModel):
+    """Toneladas de un APS en un mes, con el detalle diario"""
+    aps_id: int
+    period: str
+    monthly: Dict[str, Dict[str, float]]
+    daily: List[Dict]
@@ -0,0 +1,370 @@
+"""
+Kilómetros de barrido (LBL, Art. 21) a partir de trazas GPS
+
+Las trazas de las cuadrillas (GPX o CSV) se leen por bloques de
+GPS_CHUNK_POINTS puntos, así la memoria no depende del tamaño del mes:
+
+1. Distancia haversine entre puntos consecutivos de la misma traza
+   (vectorizada con numpy cuando está instalado)
+2. Se descartan tramos de tránsito (velocidad > GPS_MAX_SWEEP_SPEED_KMH)
+   y huecos de señal (> GPS_MAX_GAP_SECONDS)
+3. Cada tramo se reparte en una grilla de celdas de GPS_GRID_CELL_METERS;
+   por celda se acredita la mayor longitud recorrida por una sola traza,
+   hasta la diagonal de la celda. Así las pasadas repetidas por la misma
+   cuneta (otra cuadrilla, otro día, ida y vuelta) cuentan una sola vez.
+
+Los kilómetros barridos distintos son la suma de las celdas. Sólo el
+índice de celdas crece con el mes, y lo hace con la longitud de vías
+barridas, no con el número de puntos.
+
+Formato CSV: encabezado con columnas de traza (track_id / vehicle /
+device_id), tiempo (timestamp, ISO 8601 o segundos epoch), lat y lon.
+Los puntos de cada traza deben venir en orden cronológico y agrupados.
+"""
+import csv
+import io
+import math
+import os
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..tariff_core.stratum_tariffs import load_numpy
+
+GPS_CHUNK_POINTS = int(os.getenv("GPS_CHUNK_POINTS", "250000"))
+GPS_GRID_CELL_METERS = float(os.getenv("GPS_GRID_CELL_METERS", "5"))
+GPS_MAX_SWEEP_SPEED_KMH = float(os.getenv("GPS_MAX_SWEEP_SPEED_KMH", "20"))
+GPS_MAX_GAP_SECONDS = float(os.getenv("GPS_MAX_GAP_SECONDS", "120"))
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180.0
+
+# Las celdas se codifican como fila * _CELL_ROW + columna en un entero de 64 bits
+_CELL_OFFSET = 1 << 26
+_CELL_ROW = 1 << 28
+
+_CSV_COLUMNS = {
+    "track": ("track_id", "track", "vehicle", "vehicle_plate", "device_id"),
+    "time": ("timestamp", "time", "datetime", "recorded_at"),
+    "lat": ("lat", "latitude", "latitud"),
+    "lon": ("lon", "lng", "longitude", "longitud"),
+}
+
+# (trazas, tiempos epoch o nan, latitudes, longitudes)
+TraceChunk = Tuple[List[str], List[float], List[float], List[float]]
+
+
+def parse_timestamp(value: Optional[str]) -> float:
+    """Segundos epoch de un texto ISO 8601 o numérico; nan si no hay tiempo"""
+    if not value:
+        return math.nan
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        return (parsed - datetime(1970, 1, 1)).total_seconds()
+    return parsed.timestamp()
+
+
+class _ChunkBuffer:
+    """Acumula puntos y entrega bloques de tamaño fijo"""
+
+    def __init__(self, chunk_points: int):
+        self.chunk_points = chunk_points
+        self._reset()
+
+    def _reset(self):
+        self.tracks, self.times, self.lats, self.lons = [], [], [], []
+
+    def add(self, track: str, timestamp: float, lat: float, lon: float) -> Optional[TraceChunk]:
+        self.tracks.append(track)
+        self.times.append(timestamp)
+        self.lats.append(lat)
+        self.lons.append(lon)
+        if len(self.tracks) >= self.chunk_points:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[TraceChunk]:
+        if not self.tracks:
+            return None
+        chunk = (self.tracks, self.times, self.lats, self.lons)
+        self._reset()
+        return chunk
+
+
+def iter_csv_chunks(fileobj, prefix: str = "", chunk_points: int = GPS_CHUNK_POINTS) -> Iterator[TraceChunk]:
+    """Lee un CSV de puntos por bloques; las filas inválidas se omiten"""
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    reader = csv.reader(fileobj)
+    header = [name.strip().lower() for name in next(reader, [])]
+
+    positions = {}
+    for key, aliases in _CSV_COLUMNS.items():
+        found = next((header.index(alias) for alias in aliases if alias in header), None)
+        if found is None and key != "time":
+            raise ValueError(f"El CSV no tiene columna {aliases[0]}")
+        positions[key] = found
+    track_at, time_at, lat_at, lon_at = (positions[key] for key in ("track", "time", "lat", "lon"))
+
+    buffer = _ChunkBuffer(chunk_points)
+    for row in reader:
+        try:
+            lat, lon = float(row[lat_at]), float(row[lon_at])
+            timestamp = parse_timestamp(row[time_at]) if time_at is not None else math.nan
+        except (ValueError, IndexError):
+            continue
+        chunk = buffer.add(prefix + row[track_at], timestamp, lat, lon)
+        if chunk:
+            yield chunk
+    chunk = buffer.flush()
+    if chunk:
+        yield chunk
+
+
+def iter_gpx_chunks(fileobj, prefix: str = "", chunk_points: int = GPS_CHUNK_POINTS) -> Iterator[TraceChunk]:
+    """
+    Lee un GPX por bloques con iterparse; cada <trkseg> es una traza.
+    Los <trkpt> procesados se eliminan del árbol para no acumularlos.
+    """
+    buffer = _ChunkBuffer(chunk_points)
+    parents: List[ET.Element] = []
+    track_index = segment_index = 0
+
+    for event, element in ET.iterparse(fileobj, events=("start", "end")):
+        tag = element.tag.rsplit("}", 1)[-1]
+        if event == "start":
+            parents.append(element)
+            if tag == "trk":
+                track_index += 1
+            elif tag == "trkseg":
+                segment_index += 1
+            continue
+
+        parents.pop()
+        if tag != "trkpt":
+            continue
+        time_text = next(
+            (child.text for child in element if child.tag.rsplit("}", 1)[-1] == "time"), None
+        )
+        try:
+            lat, lon = float(element.get("lat")), float(element.get("lon"))
+            timestamp = parse_timestamp(time_text)
+        except (TypeError, ValueError):
+            lat = None
+        if parents:
+            parents[-1].remove(element)
+        if lat is None:
+            continue
+        chunk = buffer.add(f"{prefix}{track_index}:{segment_index}", timestamp, lat, lon)
+        if chunk:
+            yield chunk
+    chunk = buffer.flush()
+    if chunk:
+        yield chunk
+
+
+def iter_trace_chunks(path: str, prefix: str = "", chunk_points: int = GPS_CHUNK_POINTS) -> Iterator[TraceChunk]:
+    """Bloques de puntos de un archivo .gpx o .csv"""
+    reader = iter_gpx_chunks if path.lower().endswith(".gpx") else iter_csv_chunks
+    with open(path, "rb") as fileobj:
+        yield from reader(fileobj, prefix, chunk_points)
+
+
+class SweptDistanceAccumulator:
+    """Índice de celdas barridas y contadores de un conjunto de trazas"""
+
+    def __init__(
+        self,
+        cell_meters: float = GPS_GRID_CELL_METERS,
+        max_speed_kmh: float = GPS_MAX_SWEEP_SPEED_KMH,
+        max_gap_seconds: float = GPS_MAX_GAP_SECONDS,
+    ):
+        self.cell_meters = cell_meters
+        self.max_speed_ms = max_speed_kmh / 3.6
+        self.max_gap_seconds = max_gap_seconds
+        # Longitud máxima de una recta dentro de una celda
+        self.cell_cap = cell_meters * math.sqrt(2)
+
+        self.cells: Dict[int, float] = {}
+        self.points = 0
+        self.segments_used = 0
+        self.segments_discarded = 0
+        self.traveled_m = 0.0
+        self._cos_ref: Optional[float] = None
+        self._last: Optional[Tuple[str, float, float, float]] = None
+        # Longitud por celda de la traza que sigue en el próximo bloque
+        self._open_track: Optional[str] = None
+        self._open_cells: Dict[int, float] = {}
+
+    def add_chunk(self, tracks: Sequence[str], times: Sequence[float], lats: Sequence[float], lons: Sequence[float]) -> None:
+        """Agrega un bloque; el último punto se conserva para unirlo con el siguiente"""
+        if not tracks:
+            return
+        self.points += len(tracks)
+        if self._cos_ref is None:
+            self._cos_ref = math.cos(math.radians(lats[0]))
+        if self._last is not None:
+            track, timestamp, lat, lon = self._last
+            tracks, times = [track, *tracks], [timestamp, *times]
+            lats, lons = [lat, *lats], [lon, *lons]
+        self._last = (tracks[-1], times[-1], lats[-1], lons[-1])
+
+        if load_numpy() is not None:
+            groups = self._group_numpy(tracks, times, lats, lons)
+        else:
+            groups = self._group_python(tracks, times, lats, lons)
+        self._fold(groups, continuing=tracks[-1])
+
+    def _fold(self, groups: Dict[Tuple[str, int], float], continuing: Optional[str]) -> None:
+        """
+        Acredita la longitud por (traza, celda) del bloque. La traza que
+        continúa en el siguiente bloque se acumula aparte hasta terminar,
+        así una celda partida entre dos bloques suma sus dos tramos.
+        """
+        for cell, length in self._open_cells.items():
+            key = (self._open_track, cell)
+            groups[key] = groups.get(key, 0.0) + length
+        self._open_track, self._open_cells = continuing, {}
+
+        best: Dict[int, float] = {}
+        for (track, cell), length in groups.items():
+            if track == continuing:
+                self._open_cells[cell] = length
+            elif length > best.get(cell, 0.0):
+                best[cell] = length
+
+        cells, cap = self.cells, self.cell_cap
+        for cell, length in best.items():
+            length = min(length, cap)
+            if length > cells.get(cell, 0.0):
+                cells[cell] = length
+
+    def _cell_key(self, lat: float, lon: float) -> int:
+        row = math.floor(lat * METERS_PER_DEGREE / self.cell_meters)
+        col = math.floor(lon * METERS_PER_DEGREE * self._cos_ref / self.cell_meters)
+        return (row + _CELL_OFFSET) * _CELL_ROW + (col + _CELL_OFFSET)
+
+    def _segment_ok(self, distance: float, elapsed: float) -> bool:
+        if math.isnan(elapsed):
+            return True
+        return 0 < elapsed <= self.max_gap_seconds and distance / elapsed <= self.max_speed_ms
+
+    def _group_python(self, tracks, times, lats, lons) -> Dict[Tuple[str, int], float]:
+        groups: Dict[Tuple[str, int], float] = {}
+        for i in range(1, len(tracks)):
+            if tracks[i] != tracks[i - 1]:
+                continue
+            lat0, lon0, lat1, lon1 = lats[i - 1], lons[i - 1], lats[i], lons[i]
+            distance = haversine_m(lat0, lon0, lat1, lon1)
+            if distance <= 0:
+                continue
+            if not self._segment_ok(distance, times[i] - times[i - 1]):
+                self.segments_discarded += 1
+                continue
+            self.segments_used += 1
+            self.traveled_m += distance
+
+            pieces = max(1, math.ceil(distance / self.cell_meters))
+            for j in range(pieces):
+                fraction = (j + 0.5) / pieces
+                key = (tracks[i], self._cell_key(lat0 + fraction * (lat1 - lat0), lon0 + fraction * (lon1 - lon0)))
+                groups[key] = groups.get(key, 0.0) + distance / pieces
+        return groups
+
+    def _group_numpy(self, tracks, times, lats, lons) -> Dict[Tuple[str, int], float]:
+        np = load_numpy()
+        codes: Dict[str, int] = {}
+        track_codes = np.fromiter((codes.setdefault(track, len(codes)) for track in tracks), dtype=np.int64, count=len(tracks))
+        times = np.asarray(times, dtype=float)
+        lat_deg = np.asarray(lats, dtype=float)
+        lon_deg = np.asarray(lons, dtype=float)
+
+        lat, lon = np.radians(lat_deg), np.radians(lon_deg)
+        a = (
+            np.sin((lat[1:] - lat[:-1]) / 2) ** 2
+            + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin((lon[1:] - lon[:-1]) / 2) ** 2
+        )
+        distance = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+        moving = (track_codes[1:] == track_codes[:-1]) & (distance > 0)
+        elapsed = times[1:] - times[:-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bad_time = (elapsed <= 0) | (elapsed > self.max_gap_seconds) | (distance / elapsed > self.max_speed_ms)
+        valid = moving & ~(np.isfinite(elapsed) & bad_time)
+
+        self.segments_discarded += int(np.count_nonzero(moving & ~valid))
+        index = np.flatnonzero(valid)
+        if index.size == 0:
+            return {}
+        self.segments_used += int(index.size)
+        self.traveled_m += float(distance[index].sum())
+
+        # Tramos más largos que una celda se parten en piezas de a lo sumo una celda
+        pieces = np.maximum(1, np.ceil(distance[index] / self.cell_meters)).astype(np.int64)
+        segment = np.repeat(index, pieces)
+        per_piece = np.repeat(pieces, pieces)
+        step = np.arange(segment.size) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        fraction = (step + 0.5) / per_piece
+        mid_lat = lat_deg[segment] + fraction * (lat_deg[segment + 1] - lat_deg[segment])
+        mid_lon = lon_deg[segment] + fraction * (lon_deg[segment + 1] - lon_deg[segment])
+        length = distance[segment] / per_piece
+
+        rows = np.floor(mid_lat * METERS_PER_DEGREE / self.cell_meters).astype(np.int64)
+        cols = np.floor(mid_lon * METERS_PER_DEGREE * self._cos_ref / self.cell_meters).astype(np.int64)
+        keys = (rows + _CELL_OFFSET) * _CELL_ROW + (cols + _CELL_OFFSET)
+        owners = track_codes[segment + 1]
+
+        # Suma por (traza, celda)
+        order = np.lexsort((keys, owners))
+        keys, owners, length = keys[order], owners[order], length[order]
+        group_start = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]) | (owners[1:] != owners[:-1])])
+        names = list(codes)
+        return {
+            (names[owner], key): total
+            for owner, key, total in zip(
+                owners[group_start].tolist(), keys[group_start].tolist(),
+                np.add.reduceat(length, group_start).tolist()
+            )
+        }
+
+    def result(self) -> Dict:
+        """Resultado final (acredita la última traza abierta)"""
+        self._fold({}, continuing=None)
+        return {
+            "points": self.points,
+            "segments_used": self.segments_used,
+            "segments_discarded": self.segments_discarded,
+            "traveled_km": round(self.traveled_m / 1000, 6),
+            "swept_km": round(sum(self.cells.values()) / 1000, 6),
+            "cells": len(self.cells),
+        }
+
+
+def haversine_m(lat0: float, lon0: float, lat1: float, lon1: float) -> float:
+    """Distancia en metros entre dos puntos (grados)"""
+    lat0, lon0, lat1, lon1 = map(math.radians, (lat0, lon0, lat1, lon1))
+    a = math.sin((lat1 - lat0) / 2) ** 2 + math.cos(lat0) * math.cos(lat1) * math.sin((lon1 - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def process_trace_files(
+    paths: Sequence[str],
+    progress: Optional[Callable[[float], None]] = None,
+    chunk_points: int = GPS_CHUNK_POINTS,
+) -> Dict:
+    """Kilómetros barridos distintos de un conjunto de archivos GPX/CSV"""
+    accumulator = SweptDistanceAccumulator()
+    total_bytes = sum(os.path.getsize(path) for path in paths) or 1
+    done_bytes = 0
+    for file_index, path in enumerate(paths):
+        for chunk in iter_trace_chunks(path, prefix=f"{file_index}/", chunk_points=chunk_points):
+            accumulator.add_chunk(*chunk)
+            if progress:
+                progress(min(0.99, done_bytes / total_bytes))
+        done_bytes += os.path.getsize(path)
+    return {**accumulator.result(), "files": len(paths)}
@@ -0,0 +1,296 @@
+"""
+Handlers de trabajos en segundo plano
+
+Cada handler recibe la sesión de BD, el payload del trabajo y un
+JobContext para reportar progreso. Lo que retorna se guarda como
+resultado del trabajo. El validador registrado con cada handler revisa
+el payload al encolar.
+"""
+
+import math
+import tempfile
+from typing import Optional
+
+from sqlmodel import Session, select
+
+from .gps_sweeping import process_trace_files
+from .job_queue import register_job_handler, JobCancelled, JobContext
+from .tariff_calculation_service import TariffCalculationService
+from .tariff_replay import TariffReplayService
+from ..core.exceptions import InvalidPeriodError, ValidationError
+from ..core.validators import validate_period_format
+from ..models.aps import APS
+from ..models.sweeping_gps import SweepingTraceChunk
+from ..models.tariff_calculation import TariffCalculation
+from ..repositories.sweeping_gps_repository import SweepingGpsRepository
+
+
+# ========================================
+# VALIDACIÓN DE PAYLOADS (al encolar)
+# ========================================
+
+def _period(payload: dict, key: str, required: bool = False) -> Optional[str]:
+    value = payload.get(key)
+    if value is None:
+        if required:
+            raise ValidationError(f"payload.{key}", "Campo requerido (YYYY-MM)")
+        return None
+    if not isinstance(value, str):
+        raise ValidationError(f"payload.{key}", "Debe ser un período YYYY-MM")
+    try:
+        return validate_period_format(value)
+    except InvalidPeriodError:
+        raise ValidationError(f"payload.{key}", f"Período inválido: {value}")
+
+
+def _positive_int(payload: dict, key: str, required: bool = False) -> Optional[int]:
+    value = payload.get(key)
+    if value is None:
+        if required:
+            raise ValidationError(f"payload.{key}", "Campo requerido")
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValidationError(f"payload.{key}", "Debe ser un entero positivo")
+    return value
+
+
+def _id_list(payload: dict, key: str) -> Optional[list]:
+    value = payload.get(key)
+    if value is None:
+        return None
+    if (
+        not isinstance(value, list) or not value
+        or not all(isinstance(item, int) and not isinstance(item, bool) for item in value)
+    ):
+        raise ValidationError(f"payload.{key}", "Debe ser una lista no vacía de IDs")
+    return value
+
+
+def _is_finite_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _number(payload: dict, key: str) -> Optional[float]:
+    value = payload.get(key)
+    if value is None:
+        return None
+    if not _is_finite_number(value) or value < 0:
+        raise ValidationError(f"payload.{key}", "Debe ser un número no negativo")
+    return value
+
+
+def validate_recalculate_payload(session: Session, payload: dict, company_id: Optional[int]) -> dict:
+    """
+    period requerido; SYSTEM (sin empresa) debe indicar company_id o
+    aps_ids para no recalcular todas las empresas con una sola solicitud
+    """
+    _period(payload, "period", required=True)
+    _id_list(payload, "aps_ids")
+    target_company = _positive_int(payload, "company_id")
+    if company_id is not None and target_company not in (None, company_id):
+        raise ValidationError("payload.company_id", "No puede recalcular APS de otra empresa")
+    if company_id is None and target_company is None and not payload.get("aps_ids"):
+        raise ValidationError(
+            "payload", "SYSTEM debe indicar company_id o aps_ids para recalcular"
+        )
+    factors = payload.get("subsidy_factors")
+    if factors is not None and (
+        not isinstance(factors, dict) or not all(_is_finite_number(v) for v in factors.values())
+    ):
+        raise ValidationError("payload.subsidy_factors", "Debe ser un objeto {categoría: factor}")
+    return payload
+
+
+def validate_replay_payload(session: Session, payload: dict, company_id: Optional[int]) -> dict:
+    _id_list(payload, "aps_ids")
+    if payload.get("calculation_type") is not None and not isinstance(payload["calculation_type"], str):
+        raise ValidationError("payload.calculation_type", "Debe ser texto")
+    start, end = _period(payload, "start_period"), _period(payload, "end_period")
+    if start and end and start > end:
+        raise ValidationError("payload.start_period", "Debe ser anterior o igual a end_period")
+    _number(payload, "abs_tolerance")
+    _number(payload, "rel_tolerance")
+    _positive_int(payload, "chunk_size")
+    return payload
+
+
+def validate_sweeping_payload(session: Session, payload: dict, company_id: Optional[int]) -> dict:
+    _positive_int(payload, "aps_id", required=True)
+    _period(payload, "period", required=True)
+    upload_id = payload.get("upload_id")
+    if not isinstance(upload_id, str) or session.exec(
+        select(SweepingTraceChunk.id).where(SweepingTraceChunk.upload_id == upload_id).limit(1)
+    ).first() is None:
+        raise ValidationError("payload.upload_id", "No hay trazas subidas con ese upload_id")
+    return payload
+
+
+@register_job_handler("tariff.recalculate", validate_payload=validate_recalculate_payload)
+def recalculate_tariffs(session: Session, payload: dict, context: JobContext) -> dict:
+    """
+    Calcula la tarifa oficial de varios APS para un período
+
+    Payload:
+        {
+            "period": "2026-02",
+            "aps_ids": [1, 2, 3],          # Opcional: todos los APS activos de la empresa
+            "company_id": 4,               # Sólo SYSTEM: empresa a recalcular
+            "subsidy_factors": {...}       # Opcional
+        }
+
+    SYSTEM (sin empresa) debe indicar company_id o aps_ids: una solicitud
+    no recalcula todas las empresas.
+
+    Los APS que ya tienen tarifa oficial en el período se omiten, así
+    un reintento no duplica los cálculos que ya quedaron guardados.
+
+    Antes de calcular se registran los CRT/CDF de todos los APS en las
+    sumas de su municipio, así el VBA de cada APS usa el promedio
+    ponderado completo sin importar el orden de cálculo.
+    """
+    period = validate_period_format(payload["period"])
+    subsidy_factors = payload.get("subsidy_factors")
+
+    company_id = context.company_id if context.company_id is not None else payload.get("company_id")
+    if company_id is None and not payload.get("aps_ids"):
+        raise ValueError("SYSTEM debe indicar company_id o aps_ids para recalcular")
+
+    statement = select(APS).where(APS.is_active == True)
+    if payload.get("aps_ids"):
+        statement = statement.where(APS.id.in_(payload["aps_ids"]))
+    if company_id is not None:
+        statement = statement.where(APS.company_id == company_id)
+    aps_list = list(session.exec(statement.order_by(APS.id)).all())
+
+    already_calculated = set(session.exec(
+        select(TariffCalculation.aps_id).where(
+            TariffCalculation.period == period,
+            TariffCalculation.calculation_type == "official",
+            TariffCalculation.aps_id.in_([aps.id for aps in aps_list])
+        )
+    ).all())
+
+    service = TariffCalculationService(session)
+    # Parámetros vigentes de todos los APS del lote en una consulta
+    service.prefetch_tariff_parameters(aps_list, [period])
+    calculated, skipped, errors = [], [], {}
+    total = len(aps_list)
+
+    for aps in aps_list:
+        if aps.id not in already_calculated:
+            try:
+                service.record_municipality_costs(aps, period)
+            except ValueError:
+                pass  # El error se reporta al calcular la tarifa del APS
+    session.commit()
+
+    for index, aps in enumerate(aps_list, start=1):
+        if aps.id in already_calculated:
+            skipped.append(aps.id)
+        else:
+            try:
+                calculation = service.calculate_official_tariff(
+                    aps_id=aps.id,
+                    period=period,
+                    calculated_by=context.submitted_by,
+                    subsidy_factors=subsidy_factors
+                )
+                calculated.append(calculation.id)
+            except ValueError as e:
+                session.rollback()
+                errors[str(aps.id)] = str(e)
+
+        context.report_progress(index / total, f"APS {index}/{total}")
+
+    return {
+        "period": period,
+        "total_aps": total,
+        "calculation_ids": calculated,
+        "skipped_aps_ids": skipped,
+        "errors": errors,
+    }
+
+
+@register_job_handler("tariff.replay", validate_payload=validate_replay_payload)
+def replay_tariffs(session: Session, payload: dict, context: JobContext) -> dict:
+    """
+    Repite los cálculos guardados con el calculador actual y reporta las
+    diferencias con lo guardado (no modifica los cálculos)
+
+    Payload (todo opcional):
+        {
+            "aps_ids": [1, 2, 3],
+            "calculation_type": "official",
+            "start_period": "2024-01",
+            "end_period": "2025-12",
+            "abs_tolerance": 0.01,
+            "rel_tolerance": 0.0,
+            "chunk_size": 2000
+        }
+
+    Sólo recorre los cálculos de la empresa que encoló el trabajo (SYSTEM
+    recorre todos).
+    """
+    options = {
+        key: payload[key]
+        for key in ("aps_ids", "calculation_type", "start_period", "end_period",
+                    "abs_tolerance", "rel_tolerance", "chunk_size")
+        if payload.get(key) is not None
+    }
+    return TariffReplayService(session).replay(
+        company_id=context.company_id,
+        progress=lambda done, total: context.report_progress(
+            done / total if total else 1.0, f"Cálculos {done}/{total}"
+        ),
+        **options
+    )
+
+
+@register_job_handler("sweeping.process_traces", validate_payload=validate_sweeping_payload)
+def process_sweeping_traces(session: Session, payload: dict, context: JobContext) -> dict:
+    """
+    Calcula los kilómetros barridos (LBL) de un APS desde trazas GPS
+
+    Payload:
+        {
+            "aps_id": 1,
+            "period": "2026-02",
+            "upload_id": "5f0c...",  # trazas guardadas en sweeping_trace_chunk
+            "files": 2
+        }
+
+    Todas las trazas del mes se procesan juntas para no contar dos veces
+    las cuadras barridas en varias jornadas. El resultado reemplaza el
+    del período y se copia a los datos mensuales si ya existen. Si las
+    trazas no tienen ningún segmento de barrido el trabajo falla y no se
+    guarda nada. Las trazas se eliminan al terminar con éxito, al
+    cancelarse o cuando falla el último intento.
+    """
+    repository = SweepingGpsRepository(session)
+    try:
+        period = validate_period_format(payload["period"])
+        aps = session.get(APS, payload["aps_id"])
+        if aps is None or (context.company_id is not None and aps.company_id != context.company_id):
+            raise ValueError(f"APS {payload['aps_id']} no encontrado")
+
+        with tempfile.TemporaryDirectory(prefix="gps_traces_") as directory:
+            files = repository.export_traces(payload["upload_id"], directory)
+            result = process_trace_files(
+                files, progress=lambda fraction: context.report_progress(fraction, "Procesando trazas")
+            )
+        if result["segments_used"] == 0:
+            raise ValueError("Las trazas no tienen segmentos de barrido válidos")
+
+        repository.save_result(aps.id, period, result, job_id=context.job_id)
+        monthly_data_updated = repository.sync_monthly_data(aps.id, period, result["swept_km"])
+        repository.delete_traces(payload["upload_id"])
+        session.commit()
+    except Exception as e:
+        # Cancelado o sin más intentos: las trazas ya no se van a usar
+        if context.is_last_attempt or isinstance(e, JobCancelled):
+            session.rollback()
+            repository.delete_traces(payload["upload_id"])
+            session.commit()
+        raise
+
+    return {"aps_id": aps.id, "period": period, **result, "monthly_data_updated": monthly_data_updated}
@@ -0,0 +1,325 @@
+"""
+Cola de trabajos en segundo plano
+
+Ejecuta operaciones pesadas (recálculos multi-APS, exportaciones,
+simulaciones) fuera del ciclo request/response. Los trabajos se
+persisten en la tabla background_job y los procesa un pool acotado
+de workers dentro del mismo proceso de la API.
+
+Cada trabajo en ejecución queda a nombre de su worker y se renueva un
+heartbeat (updated_at) cada JOB_HEARTBEAT_SECONDS; sólo si el heartbeat
+supera JOB_LEASE_SECONDS el trabajo se da por abandonado y vuelve a la
+cola, así que varias instancias de la API pueden compartir la tabla.
+"""
+
+import logging
+import os
+import socket
+import threading
+import traceback
+from typing import Callable, Dict, Optional
+
+from sqlmodel import Session
+
+from ..core.exceptions import ValidationError
+from ..models.job import Job, JobStatus
+from ..repositories.job_repository import JobRepository
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(min(2, os.cpu_count() or 1))))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1.0"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+
+# Handler: (session, payload, context) -> dict serializable como resultado
+JobHandler = Callable[[Session, dict, "JobContext"], Optional[dict]]
+
+# Validador: (session, payload, company_id del solicitante) -> payload normalizado
+PayloadValidator = Callable[[Session, dict, Optional[int]], dict]
+
+_HANDLERS: Dict[str, JobHandler] = {}
+_VALIDATORS: Dict[str, PayloadValidator] = {}
+
+
+class JobCancelled(Exception):
+    """Se lanza dentro del handler cuando el usuario cancela el trabajo"""
+
+
+def register_job_handler(job_type: str, validate_payload: Optional[PayloadValidator] = None):
+    """
+    Decorador para registrar el handler de un tipo de trabajo.
+
+    `validate_payload` revisa el payload al encolar (ver
+    validate_job_payload), así un payload inválido se rechaza con 422 en
+    vez de fallar en cada intento.
+
+    Usage:
+        @register_job_handler("tariff.recalculate", validate_payload=validate_recalculate)
+        def recalculate(session, payload, context):
+            ...
+    """
+    def decorator(func: JobHandler) -> JobHandler:
+        _HANDLERS[job_type] = func
+        if validate_payload is not None:
+            _VALIDATORS[job_type] = validate_payload
+        else:
+            _VALIDATORS.pop(job_type, None)
+        return func
+    return decorator
+
+
+def get_registered_job_types() -> list:
+    """Tipos de trabajo que la cola sabe ejecutar"""
+    return sorted(_HANDLERS.keys())
+
+
+def validate_job_payload(session: Session, job_type: str, payload: dict, company_id: Optional[int]) -> dict:
+    """
+    Valida el payload de un trabajo antes de encolarlo
+
+    Args:
+        company_id: empresa del solicitante (None = SYSTEM)
+
+    Returns:
+        Payload normalizado
+
+    Raises:
+        ValidationError: tipo desconocido o payload inválido
+    """
+    if job_type not in _HANDLERS:
+        raise ValidationError(
+            "job_type",
+            f"Tipo de trabajo desconocido: {job_type}",
+            {"available": get_registered_job_types()}
+        )
+    if not isinstance(payload, dict):
+        raise ValidationError("payload", "Debe ser un objeto")
+    validator = _VALIDATORS.get(job_type)
+    return validator(session, dict(payload), company_id) if validator else payload
+
+
+class JobContext:
+    """
+    Contexto entregado al handler para reportar progreso
+    y detectar cancelaciones.
+    """
+
+    def __init__(self, job: Job, repository: JobRepository):
+        self.job_id = job.id
+        self.job_type = job.job_type
+        self.company_id = job.company_id
+        self.submitted_by = job.submitted_by
+        self.attempt = job.attempts
+        self.max_attempts = job.max_attempts
+        self._repository = repository
+
+    @property
+    def is_last_attempt(self) -> bool:
+        """Si este intento falla, el trabajo no se reintenta"""
+        return self.attempt >= self.max_attempts
+
+    def report_progress(self, progress: float, message: Optional[str] = None) -> None:
+        """
+        Guarda el progreso (0.0 - 1.0).
+
+        Raises:
+            JobCancelled: si se solicitó la cancelación del trabajo
+        """
+        if self._repository.update_progress(self.job_id, progress, message):
+            raise JobCancelled()
+
+    def check_cancelled(self) -> None:
+        """Lanza JobCancelled si el usuario pidió cancelar"""
+        if self._repository.is_cancel_requested(self.job_id):
+            raise JobCancelled()
+
+
+class JobQueue:
+    """
+    Pool de workers que consume la tabla background_job.
+
+    Cada worker es un hilo con su propia sesión de BD por trabajo.
+    JOB_WORKERS sólo acota cuántos trabajos corren a la vez: los hilos
+    comparten el GIL con la API, así que no reservan cores. Los handlers
+    con cómputo pesado lo delegan a un ProcessPoolExecutor (réplica de
+    tarifas, reportes, optimizador de estaciones) y el hilo sólo espera.
+    """
+
+    def __init__(
+        self,
+        engine,
+        workers: int = JOB_WORKERS,
+        poll_interval: float = JOB_POLL_INTERVAL_SECONDS
+    ):
+        self.engine = engine
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._threads: list = []
+        self._stop_event = threading.Event()
+        # Trabajos en ejecución en este proceso: {job_id: worker_id}
+        self._running: Dict[int, str] = {}
+        self._running_lock = threading.Lock()
+
+    # ========================================
+    # CICLO DE VIDA
+    # ========================================
+
+    def start(self) -> None:
+        """Inicia los workers (idempotente)"""
+        if self._threads:
+            return
+
+        self._stop_event.clear()
+        self.renew_leases()
+
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                name=f"job-worker-{i + 1}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detiene los workers esperando a que terminen el trabajo actual"""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _worker_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                processed = self.run_pending_once()
+            except Exception:
+                logger.error("[Jobs] Error inesperado en worker", exc_info=True)
+                processed = None
+            if processed is None:
+                self._stop_event.wait(self.poll_interval)
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop_event.wait(JOB_HEARTBEAT_SECONDS):
+            try:
+                self.renew_leases()
+            except Exception:
+                logger.error("[Jobs] Error renovando leases", exc_info=True)
+
+    def renew_leases(self) -> int:
+        """
+        Renueva el heartbeat de los trabajos de este proceso y reencola
+        los de workers cuyo lease venció (p. ej. una instancia caída).
+
+        Returns:
+            Número de trabajos recuperados
+        """
+        with self._running_lock:
+            running = dict(self._running)
+        with Session(self.engine) as session:
+            repository = JobRepository(session)
+            for worker_id in set(running.values()):
+                repository.heartbeat(
+                    [job_id for job_id, owner in running.items() if owner == worker_id], worker_id
+                )
+            expired = repository.requeue_expired(JOB_LEASE_SECONDS)
+        if expired:
+            logger.warning(f"[Jobs] {expired} trabajos con lease vencido recuperados")
+        return expired
+
+    # ========================================
+    # EJECUCIÓN
+    # ========================================
+
+    def run_pending_once(self, worker_id: Optional[str] = None) -> Optional[int]:
+        """
+        Reclama y ejecuta un trabajo pendiente.
+
+        Args:
+            worker_id: dueño del trabajo (por defecto "host:pid:hilo")
+
+        Returns:
+            ID del trabajo procesado, o None si la cola está vacía
+        """
+        with Session(self.engine) as session:
+            repository = JobRepository(session)
+            worker_id = worker_id or f"{self.worker_prefix}:{threading.current_thread().name}"
+            job = repository.claim_next(worker_id)
+            if job is None:
+                return None
+
+            with self._running_lock:
+                self._running[job.id] = worker_id
+            try:
+                return self._execute(session, repository, job)
+            finally:
+                with self._running_lock:
+                    self._running.pop(job.id, None)
+
+    def _execute(self, session: Session, repository: JobRepository, job: Job) -> int:
+        """Corre el handler del trabajo y guarda su estado final"""
+        # Los commits del handler expiran `job`: el dueño se toma del reclamo
+        job_id, worker_id = job.id, job.worker_id
+        handler = _HANDLERS.get(job.job_type)
+        if handler is None:
+            repository.finish(
+                job,
+                worker_id,
+                JobStatus.FAILED,
+                error_message=f"Tipo de trabajo no registrado: {job.job_type}"
+            )
+            return job_id
+
+        context = JobContext(job, repository)
+        try:
+            context.check_cancelled()
+            result = handler(session, dict(job.payload or {}), context)
+        except JobCancelled:
+            session.rollback()
+            saved = repository.finish(job, worker_id, JobStatus.CANCELLED)
+        except Exception as e:
+            session.rollback()
+            logger.warning(
+                f"[Jobs] Trabajo {job_id} ({context.job_type}) falló "
+                f"en intento {context.attempt}/{context.max_attempts}: {e}"
+            )
+            error_message = f"{e.__class__.__name__}: {e}"
+            if not context.is_last_attempt:
+                saved = repository.requeue(job, worker_id, error_message)
+            else:
+                logger.debug(traceback.format_exc())
+                saved = repository.finish(job, worker_id, JobStatus.FAILED, error_message=error_message)
+        else:
+            saved = repository.finish(job, worker_id, JobStatus.SUCCEEDED, result=result or {})
+
+        if not saved:
+            logger.warning(f"[Jobs] Trabajo {job_id}: lease perdido, otro worker lo reclamó; se descarta el resultado")
+        return job_id
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> Optional[JobQueue]:
+    """Retorna la cola iniciada por la aplicación (None si está deshabilitada)"""
+    return _queue
+
+
+def start_job_queue(engine) -> JobQueue:
+    """Crea e inicia la cola global de trabajos"""
+    global _queue
+    if _queue is None:
+        _queue = JobQueue(engine)
+    _queue.start()
+    return _queue
+
+
+def stop_job_queue() -> None:
+    """Detiene la cola global de trabajos"""
+    global _queue
+    if _queue is not None:
+        _queue.stop()
+        _queue = None
@@ -0,0 +1,124 @@
+"""
+Simulación en vivo sobre el grafo de fórmulas
+
+Una sesión conserva la evaluación del grafo de un APS-período. Cada
+delta (campos modificados) re-evalúa sólo los nodos afectados y devuelve
+únicamente las salidas que cambiaron; en las salidas tipo diccionario
+(tarifas, TRNA, toneladas) sólo van las claves que cambiaron.
+
+Protocolo (mensajes JSON):
+    cliente -> {"type": "init", "aps_id": 1, "period": "2025-06"}
+    servidor -> {"type": "snapshot", "inputs": {...}, "outputs": {...}}
+    cliente -> {"type": "delta", "seq": 7, "changes": {"leachate_volume_m3": 420}}
+    servidor -> {"type": "update", "seq": 7, "recomputed": [...], "changed": {...}}
+    servidor -> {"type": "error", "seq": 7, "detail": "..."}
+"""
+
+import math
+from numbers import Real
+from typing import Dict
+
+from ..tariff_core.formula_graph import AVERAGE_INPUTS, FormulaEvaluation
+from ..tariff_core.tariff_calculator_720 import to_float
+
+# Salidas que se envían al cliente
+PUBLISHED_OUTPUTS = (
+    "ccs", "clus", "cbls", "cft",
+    "crt", "cdf", "ctl", "cvna", "vba",
+    "common_tons", "trna_by_stratum", "tariffs",
+)
+
+# Entradas que el cliente puede modificar
+EDITABLE_INPUTS = tuple(AVERAGE_INPUTS) + ("subsidy_factors",)
+
+# Máximo de campos por delta
+MAX_DELTA_FIELDS = 50
+
+
+def _is_number(value) -> bool:
+    # json.loads acepta NaN e Infinity (y 1e400 -> inf); se rechazan porque
+    # send_json los escribe como tokens que no son JSON válido
+    return isinstance(value, Real) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def validate_subsidy_factors(factors) -> Dict[str, float]:
+    """
+    Raises:
+        ValueError: si no es un objeto {categoría: factor finito}
+    """
+    if not isinstance(factors, dict) or not all(_is_number(v) for v in factors.values()):
+        raise ValueError("subsidy_factors debe ser un objeto {categoría: factor}")
+    return factors
+
+
+def _diff(previous, current):
+    """Parte de `current` que difiere de `previous` (recursivo en diccionarios)"""
+    if not isinstance(previous, dict) or not isinstance(current, dict):
+        return current
+    return {
+        key: _diff(previous.get(key), value)
+        for key, value in current.items()
+        if previous.get(key) != value
+    }
+
+
+class LiveSimulationSession:
+    """Estado de una simulación en vivo (sin acceso a BD)"""
+
+    def __init__(self, evaluation: FormulaEvaluation, aps_id: int, period: str):
+        self.evaluation = evaluation
+        self.aps_id = aps_id
+        self.period = period
+
+    def snapshot(self) -> Dict:
+        """Entradas editables y todas las salidas publicadas"""
+        values = self.evaluation.values
+        return to_float({
+            "aps_id": self.aps_id,
+            "period": self.period,
+            "inputs": {name: values[name] for name in EDITABLE_INPUTS},
+            "outputs": {name: values[name] for name in PUBLISHED_OUTPUTS},
+        })
+
+    def apply(self, changes: Dict) -> Dict:
+        """
+        Aplica un delta de entradas
+
+        Returns:
+            {"recomputed": nodos recalculados, "changed": salidas que cambiaron}
+
+        Raises:
+            ValueError: campos no editables o valores no numéricos (o no finitos)
+        """
+        if not isinstance(changes, dict) or not changes:
+            raise ValueError("changes debe ser un objeto con al menos un campo")
+        if len(changes) > MAX_DELTA_FIELDS:
+            raise ValueError(f"Máximo {MAX_DELTA_FIELDS} campos por delta")
+
+        unknown = sorted(name for name in changes if name not in EDITABLE_INPUTS)
+        if unknown:
+            raise ValueError(f"Campos no editables: {', '.join(unknown)}")
+
+        changes = dict(changes)
+        if "subsidy_factors" in changes:
+            factors = validate_subsidy_factors(changes["subsidy_factors"])
+            # Delta sobre los factores actuales
+            changes["subsidy_factors"] = {**self.evaluation["subsidy_factors"], **factors}
+        invalid = sorted(
+            name for name, value in changes.items()
+            if name != "subsidy_factors" and not _is_number(value)
+        )
+        if invalid:
+            raise ValueError(f"Valores no numéricos o no finitos: {', '.join(invalid)}")
+
+        recomputed = self.evaluation.update(changes)
+        previous = self.evaluation.previous
+        values = self.evaluation.values
+        return to_float({
+            "recomputed": recomputed,
+            "changed": {
+                name: _diff(previous[name], values[name])
+                for name in PUBLISHED_OUTPUTS
+                if name in previous
+            },
+        })
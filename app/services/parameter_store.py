@@ -0,0 +1,182 @@
+"""
+Parámetros de cálculo con vigencia: precio del agua, peajes, aporte
+público, post-clausura extendida, DINC y factores de subsidio
+
+Cada valor aplica a un APS, a un municipio o a todos los APS desde un
+período hasta otro. ParameterStore ordena los valores de cada parámetro
+por inicio de vigencia y responde "valor de X para el APS Y en el
+período P" con una búsqueda binaria. Se arma con una sola consulta para
+todos los APS y períodos de un lote.
+
+Usage:
+    store = ParameterStore(repo.get_for_aps(aps_list, "2025-01", "2025-12"))
+    store.lookup("tolls_cost_month", aps, "2025-06", default=0.0)
+    store.resolve(aps, "2025-06")  # -> {"tolls_cost_month": 1200000.0, ...}
+"""
+import bisect
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session
+
+from app.core.exceptions import APSNotFoundError, ValidationError
+from app.core.validators import validate_period_format
+from app.models.aps import APS
+from app.models.tariff_parameter import TariffParameter, TariffParameterName, TariffParameterScope
+from app.repositories.aps_repository import APSRepository
+from app.repositories.tariff_parameter_repository import TariffParameterRepository
+
+# Rango permitido por parámetro
+PARAMETER_LIMITS = {
+    TariffParameterName.WATER_PRICE_PER_M3: (0.0, None),
+    TariffParameterName.TOLLS_COST_MONTH: (0.0, None),
+    TariffParameterName.PUBLIC_CONTRIBUTION: (0.0, 1.0),
+    TariffParameterName.EXTENDED_POSTCLOSURE_YEARS: (0.0, 50.0),
+    TariffParameterName.INCENTIVE_DISCOUNT: (0.0, 0.04),
+}
+SUBSIDY_FACTOR_LIMITS = (-1.0, 1.0)
+
+
+class ParameterTimeline:
+    """Valores de un parámetro en un alcance, ordenados y sin cruces de vigencia"""
+
+    __slots__ = ("starts", "ends", "values")
+
+    def __init__(self, entries: Iterable[Tuple[str, Optional[str], float]]):
+        ordered = sorted(entries, key=lambda entry: entry[0])
+        self.starts = [entry[0] for entry in ordered]
+        self.ends = [entry[1] for entry in ordered]
+        self.values = [entry[2] for entry in ordered]
+
+    def value_at(self, period: str) -> Optional[float]:
+        """Valor vigente en el período (YYYY-MM se ordena como texto), o None"""
+        index = bisect.bisect_right(self.starts, period) - 1
+        if index < 0:
+            return None
+        end = self.ends[index]
+        if end is not None and period > end:
+            return None
+        return self.values[index]
+
+
+def parameter_key(parameter: TariffParameter) -> Tuple[Hashable, ...]:
+    """Llave del alcance de un valor"""
+    if parameter.scope == TariffParameterScope.APS:
+        return (TariffParameterScope.APS, parameter.aps_id)
+    if parameter.scope == TariffParameterScope.MUNICIPALITY:
+        return (TariffParameterScope.MUNICIPALITY, parameter.company_id, parameter.department, parameter.municipality)
+    return (TariffParameterScope.GLOBAL, parameter.company_id)
+
+
+def scope_keys(aps: APS) -> List[Tuple[Hashable, ...]]:
+    """Alcances que aplican a un APS, del más específico al más general"""
+    return [
+        (TariffParameterScope.APS, aps.id),
+        (TariffParameterScope.MUNICIPALITY, aps.company_id, aps.department, aps.municipality),
+        (TariffParameterScope.MUNICIPALITY, None, aps.department, aps.municipality),
+        (TariffParameterScope.GLOBAL, aps.company_id),
+        (TariffParameterScope.GLOBAL, None),
+    ]
+
+
+class ParameterStore:
+    """Índice en memoria de parámetros por alcance y nombre"""
+
+    def __init__(self, parameters: Iterable[TariffParameter]):
+        grouped: Dict[Tuple[Hashable, ...], Dict[str, List[Tuple[str, Optional[str], float]]]] = {}
+        for parameter in parameters:
+            grouped.setdefault(parameter_key(parameter), {}).setdefault(parameter.name, []).append(
+                (parameter.valid_from, parameter.valid_to, parameter.value)
+            )
+        self._timelines = {
+            key: {name: ParameterTimeline(entries) for name, entries in by_name.items()}
+            for key, by_name in grouped.items()
+        }
+
+    def lookup(self, name: str, aps: APS, period: str, default: Optional[float] = None) -> Optional[float]:
+        """Valor de un parámetro para el APS en el período"""
+        for key in scope_keys(aps):
+            timeline = self._timelines.get(key, {}).get(name)
+            if timeline is not None:
+                value = timeline.value_at(period)
+                if value is not None:
+                    return value
+        return default
+
+    def resolve(self, aps: APS, period: str) -> Dict[str, float]:
+        """Todos los parámetros vigentes para el APS en el período"""
+        values: Dict[str, float] = {}
+        # Del más general al más específico: los específicos sobrescriben
+        for key in reversed(scope_keys(aps)):
+            for name, timeline in self._timelines.get(key, {}).items():
+                value = timeline.value_at(period)
+                if value is not None:
+                    values[name] = value
+        return values
+
+
+class TariffParameterService:
+    """Registro y consulta de parámetros con vigencia"""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.repo = TariffParameterRepository(session)
+        self.aps_repo = APSRepository(session)
+
+    def create(self, parameter: TariffParameter, company_id: Optional[int] = None) -> TariffParameter:
+        """
+        Valida y guarda un valor. company_id es la empresa del usuario
+        (None = SYSTEM): los APS de otra empresa no son visibles.
+        """
+        self._validate_name_and_value(parameter.name, parameter.value)
+        parameter.valid_from = validate_period_format(parameter.valid_from)
+        if parameter.valid_to is not None:
+            parameter.valid_to = validate_period_format(parameter.valid_to)
+            if parameter.valid_to < parameter.valid_from:
+                raise ValidationError("valid_to", "Debe ser igual o posterior a valid_from")
+
+        if parameter.scope == TariffParameterScope.APS:
+            aps = self.aps_repo.get_by_id(parameter.aps_id) if parameter.aps_id else None
+            if aps is None or (company_id is not None and aps.company_id != company_id):
+                raise APSNotFoundError(parameter.aps_id)
+            parameter.company_id = aps.company_id
+            parameter.municipality = parameter.department = None
+        elif parameter.scope == TariffParameterScope.MUNICIPALITY:
+            if not parameter.municipality or not parameter.department:
+                raise ValidationError("municipality", "El alcance municipal requiere municipality y department")
+            parameter.aps_id = None
+        elif parameter.scope == TariffParameterScope.GLOBAL:
+            parameter.aps_id = parameter.municipality = parameter.department = None
+        else:
+            raise ValidationError("scope", f"Alcances soportados: {', '.join(TariffParameterScope.ALL)}")
+
+        overlapping = self.repo.find_overlapping(parameter)
+        if overlapping:
+            raise ValidationError(
+                "valid_from",
+                "La vigencia se cruza con otro valor del mismo parámetro y alcance",
+                {"overlapping_ids": [existing.id for existing in overlapping]}
+            )
+        return self.repo.create(parameter)
+
+    @staticmethod
+    def _validate_name_and_value(name: str, value: float) -> None:
+        if name.startswith(TariffParameterName.SUBSIDY_FACTOR_PREFIX):
+            if not name[len(TariffParameterName.SUBSIDY_FACTOR_PREFIX):]:
+                raise ValidationError("name", "Falta la categoría del factor de subsidio")
+            low, high = SUBSIDY_FACTOR_LIMITS
+        elif name in PARAMETER_LIMITS:
+            low, high = PARAMETER_LIMITS[name]
+        else:
+            raise ValidationError(
+                "name",
+                f"Parámetros soportados: {', '.join(TariffParameterName.ALL)}, "
+                f"{TariffParameterName.SUBSIDY_FACTOR_PREFIX}<categoría>"
+            )
+        if value < low or (high is not None and value > high):
+            raise ValidationError("value", f"{name} debe estar entre {low} y {high if high is not None else '∞'}")
+
+    def store_for(self, aps_list: Sequence[APS], periods: Sequence[str]) -> ParameterStore:
+        """Parámetros de todos los APS y períodos (una consulta)"""
+        if not aps_list or not periods:
+            return ParameterStore([])
+        return ParameterStore(self.repo.get_for_aps(aps_list, min(periods), max(periods)))
@@ -0,0 +1,118 @@
+"""
+Generador de PDF de texto (sólo librería estándar)
+
+Produce documentos de páginas tamaño carta con líneas de texto en
+Helvetica (codificación WinAnsi, suficiente para español). Pensado para
+reportes tabulares simples; no maneja imágenes ni fuentes embebidas.
+
+Usage:
+    document = SimplePdfDocument(title="Reporte tarifario")
+    document.heading("APS Norte - 2026-02")
+    document.line("CFT", "12,345.67")
+    pdf_bytes = document.render()
+"""
+
+from typing import List, Optional, Tuple
+
+PAGE_WIDTH = 612   # Carta: 8.5 x 11 pulgadas en puntos
+PAGE_HEIGHT = 792
+MARGIN = 50
+FONT_SIZE = 10
+HEADING_SIZE = 13
+LEADING = 14
+# Columna donde empieza el valor en líneas "etiqueta  valor"
+VALUE_COLUMN = 300
+
+
+def _escape(text: str) -> bytes:
+    """Texto a string literal de PDF en WinAnsi (cp1252)"""
+    data = str(text).encode("cp1252", errors="replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class SimplePdfDocument:
+    """Documento PDF construido línea a línea; `render()` retorna los bytes"""
+
+    def __init__(self, title: str = ""):
+        self.title = title
+        self._pages: List[List[bytes]] = []
+        self._y = 0.0
+        self._new_page()
+
+    def _new_page(self) -> None:
+        self._pages.append([])
+        self._y = PAGE_HEIGHT - MARGIN
+
+    def _text(self, x: float, size: int, font: str, text: str) -> None:
+        self._pages[-1].append(
+            b"BT /" + font.encode() + b" %d Tf %.2f %.2f Td (" % (size, x, self._y)
+            + _escape(text) + b") Tj ET"
+        )
+
+    def _advance(self, leading: float) -> None:
+        if self._y - leading < MARGIN:
+            self._new_page()
+        else:
+            self._y -= leading
+
+    def heading(self, text: str) -> None:
+        """Título de sección en negrilla, con espacio antes"""
+        if self._pages[-1]:
+            self._advance(LEADING)
+        self._advance(HEADING_SIZE + 4)
+        self._text(MARGIN, HEADING_SIZE, "F2", text)
+
+    def line(self, label: str, value: Optional[str] = None) -> None:
+        """Línea de texto; con `value`, en dos columnas (etiqueta, valor)"""
+        self._advance(LEADING)
+        self._text(MARGIN, FONT_SIZE, "F1", label)
+        if value is not None:
+            self._text(VALUE_COLUMN, FONT_SIZE, "F1", value)
+
+    def table(self, header: Tuple[str, ...], rows: List[Tuple], widths: Tuple[int, ...]) -> None:
+        """Tabla de texto con columnas de ancho fijo (en puntos)"""
+        for index, values in enumerate([header] + list(rows)):
+            self._advance(LEADING)
+            x = MARGIN
+            for value, width in zip(values, widths):
+                self._text(x, FONT_SIZE, "F2" if index == 0 else "F1", str(value))
+                x += width
+
+    def render(self) -> bytes:
+        """Serializa el documento (objetos, tabla xref y trailer)"""
+        page_count = len(self._pages)
+        # 1 catálogo, 2 páginas, 3-4 fuentes, 5 info; luego (página, contenido) por página
+        first_page = 6
+        objects = {
+            1: b"<< /Type /Catalog /Pages 2 0 R >>",
+            2: b"<< /Type /Pages /Kids [" + b" ".join(
+                b"%d 0 R" % (first_page + 2 * index) for index in range(page_count)
+            ) + b"] /Count %d >>" % page_count,
+            3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            4: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+            5: b"<< /Title (" + _escape(self.title) + b") /Producer (Sanitation Operators API) >>",
+        }
+        for index, commands in enumerate(self._pages):
+            page_id = first_page + 2 * index
+            content = b"\n".join(commands)
+            objects[page_id] = (
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] " % (PAGE_WIDTH, PAGE_HEIGHT)
+                + b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>" % (page_id + 1)
+            )
+            objects[page_id + 1] = b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+
+        output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for object_id in sorted(objects):
+            offsets.append(len(output))
+            output += b"%d 0 obj\n" % object_id + objects[object_id] + b"\nendobj\n"
+
+        xref_offset = len(output)
+        output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        for offset in offsets:
+            output += b"%010d 00000 n \n" % offset
+        output += (
+            b"trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%EOF\n"
+            % (len(objects) + 1, xref_offset)
+        )
+        return bytes(output)
@@ -0,0 +1,492 @@
+"""
+Generador de reportes tarifarios (XLSX / PDF) para muchos cálculos
+
+Arma un paquete zip con un libro XLSX y/o un PDF por cálculo (componentes,
+entradas, fórmulas, tarifas por estrato y comparación histórica) más un
+resumen.xlsx de todo el lote. El zip se genera en streaming:
+
+- Los datos se cargan por lotes de REPORT_LOAD_BATCH cálculos (tres
+  consultas por lote) y se convierten a dicts serializables.
+- Cada archivo se renderiza en un pool de procesos (REPORT_WORKERS) con a
+  lo sumo 2 x workers archivos en vuelo; los lotes pequeños
+  (< REPORT_PARALLEL_MIN) se renderizan en el mismo proceso.
+- Cada archivo terminado se escribe al zip de salida y sus bytes se
+  entregan de inmediato al cliente: la memoria no crece con el lote.
+
+Configuración:
+    REPORT_WORKERS          procesos de renderizado (default min(4, CPUs))
+    REPORT_PARALLEL_MIN     cálculos desde los que se usa el pool (default 20)
+    REPORT_LOAD_BATCH       cálculos por consulta (default 100)
+    REPORT_HISTORY_PERIODS  meses anteriores en la comparación (default 12)
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session, select
+
+from ..models.aps import APS
+from ..models.tariff_calculation import TariffCalculation
+from ..repositories.tariff_calculation_repository import TARIFF_STRATA, TariffCalculationRepository
+from .pdf_writer import SimplePdfDocument
+from .xlsx_writer import StreamingXlsxWriter
+
+logger = logging.getLogger(__name__)
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", str(min(4, os.cpu_count() or 1))))
+REPORT_PARALLEL_MIN = int(os.getenv("REPORT_PARALLEL_MIN", "20"))
+REPORT_LOAD_BATCH = int(os.getenv("REPORT_LOAD_BATCH", "100"))
+REPORT_HISTORY_PERIODS = int(os.getenv("REPORT_HISTORY_PERIODS", "12"))
+
+REPORT_FORMATS = ("xlsx", "pdf")
+
+STRATUM_LABELS = {
+    "stratum_1": "Estrato 1",
+    "stratum_2": "Estrato 2",
+    "stratum_3": "Estrato 3",
+    "stratum_4": "Estrato 4",
+    "stratum_5": "Estrato 5",
+    "stratum_6": "Estrato 6",
+    "commercial": "No residencial",
+}
+
+# (campo, etiqueta, descripción)
+COMPONENT_ROWS = (
+    ("cft", "CFT", "Costo fijo total por suscriptor (Art. 11)"),
+    ("ccs", "CCS", "Comercialización (Art. 14)"),
+    ("clus", "CLUS", "Limpieza urbana (Art. 15)"),
+    ("cbls", "CBLS", "Barrido y limpieza (Art. 21)"),
+    ("cvna", "CVNA", "Costo variable por tonelada no aprovechable"),
+    ("crt", "CRT", "Recolección y transporte (Art. 24)"),
+    ("cdf", "CDF", "Disposición final (Art. 28)"),
+    ("ctl", "CTL", "Tratamiento de lixiviados (Art. 32)"),
+    ("vba", "VBA", "Valor base de aprovechamiento"),
+    ("trbl", "TRBL", "Barrido y limpieza por suscriptor"),
+    ("trlu", "TRLU", "Limpieza urbana por suscriptor"),
+    ("trra", "TRRA", "Rechazo del aprovechamiento por suscriptor"),
+    ("tra", "TRA", "Aprovechamiento por suscriptor"),
+)
+
+DETAIL_ROWS = (
+    ("crt_function_used", "CRT - función usada"),
+    ("crt_distance_km", "CRT - distancia (km)"),
+    ("crt_avg_tons", "CRT - QRT promedio"),
+    ("crt_tolls", "CRT - peajes"),
+    ("crt_coastal_adjustment", "CRT - ajuste costero"),
+    ("crt_fleet_age_discount", "CRT - descuento antigüedad flota"),
+    ("cdf_vu", "CDF - vida útil"),
+    ("cdf_pc", "CDF - post-clausura"),
+    ("cdf_avg_tons_landfill", "CDF - QRS promedio"),
+    ("cdf_adjustment_small_landfill", "CDF - ajuste relleno pequeño"),
+    ("ctl_scenario", "CTL - escenario"),
+    ("ctl_volume_m3", "CTL - volumen lixiviados (m3)"),
+    ("ctl_environmental_tax", "CTL - tasa ambiental"),
+    ("ctl_vu", "CTL - vida útil"),
+    ("ctl_pc", "CTL - post-clausura"),
+    ("vba_incentive_discount", "VBA - descuento incentivo"),
+)
+
+SUMMARY_HEADER = (
+    ["ID", "Código APS", "APS", "Municipio", "Período", "Tipo", "CFT", "CVNA"]
+    + [f"Final {STRATUM_LABELS[stratum]}" for stratum in TARIFF_STRATA]
+    + ["Período anterior", "Variación estrato 4 (%)"]
+)
+
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+# ========================================
+# DATOS DEL REPORTE (serializables)
+# ========================================
+
+def _shift_period(period: str, months: int) -> str:
+    """'2026-02' desplazado `months` meses ('2026-02', -3 -> '2025-11')"""
+    year, month = map(int, period.split('-'))
+    year, month = divmod(year * 12 + month - 1 + months, 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+def _previous_periods(history: List, period: str) -> List[Dict]:
+    """
+    Último cálculo de cada período de los REPORT_HISTORY_PERIODS meses
+    anteriores a `period` (más reciente al final)
+    """
+    from_period = _shift_period(period, -REPORT_HISTORY_PERIODS)
+    by_period = {}
+    for row in history:
+        if from_period <= row.period < period:
+            by_period[row.period] = {
+                stratum: getattr(row, f"tariff_{stratum}_final") for stratum in TARIFF_STRATA
+            }
+    return [{"period": key, "finals": by_period[key]} for key in sorted(by_period)]
+
+
+def build_payload(calculation: TariffCalculation, aps: Optional[APS], history: List) -> Dict:
+    """Datos de un cálculo para renderizar (dict picklable, sin sesión)"""
+    return {
+        "calculation": calculation.model_dump(),
+        "aps": {
+            "name": aps.name if aps else f"APS {calculation.aps_id}",
+            "code": aps.code if aps else str(calculation.aps_id),
+            "municipality": aps.municipality if aps else "",
+            "department": aps.department if aps else "",
+        },
+        "history": _previous_periods(history, calculation.period),
+    }
+
+
+def change_percent(current: float, previous: Optional[float]) -> Optional[float]:
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 2)
+
+
+def _flatten(data, prefix: str = "") -> Iterator[Tuple[str, object]]:
+    """Dict anidado -> (clave.con.puntos, valor)"""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _flatten(value, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(data, (list, tuple)) and any(isinstance(item, (dict, list)) for item in data):
+        for index, value in enumerate(data):
+            yield from _flatten(value, f"{prefix}[{index}]")
+    elif isinstance(data, (list, tuple)):
+        yield prefix, ", ".join(str(item) for item in data)
+    else:
+        yield prefix, data
+
+
+def _formula_rows(calculation: Dict) -> List[Tuple[str, str, str]]:
+    formulas = calculation.get("formulas_used") or {}
+    references = calculation.get("regulatory_references") or {}
+    rows = []
+    for key in list(formulas) + [key for key in references if key not in formulas]:
+        refs = references.get(key, [])
+        rows.append((key, str(formulas.get(key, "")), ", ".join(refs) if isinstance(refs, list) else str(refs)))
+    return rows
+
+
+def _tariff_rows(calculation: Dict) -> List[Tuple]:
+    factors = calculation.get("subsidy_contribution_factors") or {}
+    return [
+        (
+            STRATUM_LABELS[stratum],
+            calculation.get(f"trna_{stratum}", 0.0),
+            calculation.get(f"tariff_{stratum}_base", 0.0),
+            factors.get(stratum),
+            calculation.get(f"tariff_{stratum}_final", 0.0),
+        )
+        for stratum in TARIFF_STRATA
+    ]
+
+
+def _history_rows(payload: Dict) -> List[List]:
+    calculation = payload["calculation"]
+    current = {
+        "period": calculation["period"],
+        "finals": {stratum: calculation.get(f"tariff_{stratum}_final", 0.0) for stratum in TARIFF_STRATA},
+    }
+    rows = []
+    previous = None
+    for entry in payload["history"] + [current]:
+        change = change_percent(
+            entry["finals"]["stratum_4"], previous["finals"]["stratum_4"] if previous else None
+        )
+        rows.append([entry["period"]] + [entry["finals"][stratum] for stratum in TARIFF_STRATA] + [change])
+        previous = entry
+    return rows
+
+
+def summary_row(payload: Dict) -> List:
+    """Fila del resumen del paquete para un cálculo"""
+    calculation = payload["calculation"]
+    previous = payload["history"][-1] if payload["history"] else None
+    current_4 = calculation.get("tariff_stratum_4_final", 0.0)
+    return (
+        [
+            calculation["id"], payload["aps"]["code"], payload["aps"]["name"],
+            payload["aps"]["municipality"], calculation["period"], calculation["calculation_type"],
+            calculation["cft"], calculation["cvna"],
+        ]
+        + [calculation.get(f"tariff_{stratum}_final", 0.0) for stratum in TARIFF_STRATA]
+        + [
+            previous["period"] if previous else None,
+            change_percent(current_4, previous["finals"]["stratum_4"] if previous else None),
+        ]
+    )
+
+
+def report_basename(payload: Dict) -> str:
+    calculation = payload["calculation"]
+    code = _UNSAFE_FILENAME.sub("_", payload["aps"]["code"]).strip("_") or "aps"
+    return f"{calculation['period']}/{code}_{calculation['period']}_calc{calculation['id']}"
+
+
+# ========================================
+# RENDERIZADO (funciones puras, corren en el pool)
+# ========================================
+
+def render_xlsx(payload: Dict) -> bytes:
+    calculation = payload["calculation"]
+    aps = payload["aps"]
+    buffer = io.BytesIO()
+    with StreamingXlsxWriter(buffer) as book:
+        book.write_sheet("Resumen", [
+            ("Cálculo", calculation["id"]),
+            ("APS", aps["name"]),
+            ("Código APS", aps["code"]),
+            ("Municipio", aps["municipality"]),
+            ("Departamento", aps["department"]),
+            ("Período", calculation["period"]),
+            ("Tipo", calculation["calculation_type"]),
+            ("Fecha de cálculo", calculation.get("calculation_date")),
+            ("Notas", calculation.get("notes")),
+        ], header=["Campo", "Valor"])
+        book.write_sheet(
+            "Componentes",
+            [(label, calculation.get(field), description) for field, label, description in COMPONENT_ROWS]
+            + [(f"CLUS - {key}", value, "") for key, value in (calculation.get("clus_breakdown") or {}).items()]
+            + [(label, calculation.get(field), "") for field, label in DETAIL_ROWS],
+            header=["Componente", "Valor", "Descripción"]
+        )
+        book.write_sheet(
+            "Tarifas", _tariff_rows(calculation),
+            header=["Estrato", "TRNA", "Tarifa base", "Factor subsidio/contribución", "Tarifa final"]
+        )
+        book.write_sheet(
+            "Entradas", _flatten(calculation.get("input_data") or {}), header=["Entrada", "Valor"]
+        )
+        book.write_sheet("Fórmulas", _formula_rows(calculation), header=["Componente", "Fórmula", "Referencias"])
+        book.write_sheet(
+            "Histórico", _history_rows(payload),
+            header=["Período"] + [STRATUM_LABELS[stratum] for stratum in TARIFF_STRATA]
+            + ["Variación estrato 4 (%)"]
+        )
+    return buffer.getvalue()
+
+
+def _money(value) -> str:
+    if isinstance(value, bool) or value is None:
+        return "" if value is None else ("Sí" if value else "No")
+    if isinstance(value, (int, float)):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def render_pdf(payload: Dict) -> bytes:
+    calculation = payload["calculation"]
+    aps = payload["aps"]
+    document = SimplePdfDocument(title=f"Reporte tarifario {aps['name']} {calculation['period']}")
+    document.heading(f"Reporte tarifario - {aps['name']} ({aps['code']})")
+    document.line("Período", calculation["period"])
+    document.line("Municipio", f"{aps['municipality']} - {aps['department']}")
+    document.line("Tipo de cálculo", calculation["calculation_type"])
+    document.line("Cálculo", str(calculation["id"]))
+
+    document.heading("Componentes de costo")
+    for field, label, description in COMPONENT_ROWS:
+        document.line(f"{label}  {description}", _money(calculation.get(field)))
+    for field, label in DETAIL_ROWS:
+        document.line(label, _money(calculation.get(field)))
+
+    document.heading("Tarifas por estrato")
+    document.table(
+        ("Estrato", "TRNA", "Base", "Factor", "Final"),
+        [
+            (label, _money(trna), _money(base), "" if factor is None else f"{factor:+.2f}", _money(final))
+            for label, trna, base, factor, final in _tariff_rows(calculation)
+        ],
+        (110, 100, 100, 80, 100)
+    )
+
+    formulas = _formula_rows(calculation)
+    if formulas:
+        document.heading("Fórmulas y referencias")
+        for key, formula, references in formulas:
+            document.line(f"{key}: {formula}", references)
+
+    inputs = list(_flatten(calculation.get("input_data") or {}))
+    if inputs:
+        document.heading("Datos de entrada")
+        for key, value in inputs:
+            document.line(key, _money(value))
+
+    document.heading("Comparación histórica (estrato 4)")
+    document.table(
+        ("Período", "Tarifa final", "Variación %"),
+        [
+            (row[0], _money(row[4]), "" if row[-1] is None else f"{row[-1]:+.2f}")
+            for row in _history_rows(payload)
+        ],
+        (110, 120, 100)
+    )
+    return document.render()
+
+
+def render_calculation_files(payload: Dict, formats: Sequence[str]) -> List[Tuple[str, bytes]]:
+    """Archivos (nombre dentro del zip, bytes) de un cálculo"""
+    basename = report_basename(payload)
+    files = []
+    if "xlsx" in formats:
+        files.append((f"{basename}.xlsx", render_xlsx(payload)))
+    if "pdf" in formats:
+        files.append((f"{basename}.pdf", render_pdf(payload)))
+    return files
+
+
+# ========================================
+# POOL DE PROCESOS
+# ========================================
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_report_pool() -> ProcessPoolExecutor:
+    """
+    Pool compartido, creado al primer uso. Usa "spawn" para no heredar
+    hilos ni conexiones de BD del proceso de la API.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=REPORT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_report_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# ========================================
+# ZIP EN STREAMING
+# ========================================
+
+class _ChunkStream:
+    """
+    Destino no seekable para ZipFile: acumula lo escrito hasta que el
+    generador lo entrega con `drain()`
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class TariffReportGenerator:
+    """
+    Reportes de cálculos tarifarios guardados
+
+    Usage:
+        generator = TariffReportGenerator(session)
+        for chunk in generator.stream_pack([1, 2, 3], formats=("xlsx", "pdf")):
+            ...
+    """
+
+    def __init__(self, session: Session, workers: int = REPORT_WORKERS):
+        self.session = session
+        self.repo = TariffCalculationRepository(session)
+        self.workers = workers
+
+    def iter_payloads(self, calculation_ids: List[int]) -> Iterator[Dict]:
+        """Datos de cada cálculo en el orden recibido, cargados por lotes"""
+        for start in range(0, len(calculation_ids), REPORT_LOAD_BATCH):
+            calculations = self.repo.get_by_ids(calculation_ids[start:start + REPORT_LOAD_BATCH])
+            if not calculations:
+                continue
+            aps_ids = sorted({calculation.aps_id for calculation in calculations})
+            aps_by_id = {
+                aps.id: aps for aps in self.session.exec(select(APS).where(APS.id.in_(aps_ids))).all()
+            }
+            periods = [calculation.period for calculation in calculations]
+            history_by_aps: Dict[int, List] = {}
+            for row in self.repo.get_final_tariff_history(
+                aps_ids,
+                max(periods),
+                from_period=_shift_period(min(periods), -REPORT_HISTORY_PERIODS),
+            ):
+                history_by_aps.setdefault(row.aps_id, []).append(row)
+
+            for calculation in calculations:
+                yield build_payload(
+                    calculation,
+                    aps_by_id.get(calculation.aps_id),
+                    history_by_aps.get(calculation.aps_id, []),
+                )
+            # Libera los objetos del lote antes de cargar el siguiente
+            self.session.expunge_all()
+
+    def render(self, calculation_ids: List[int], formats: Sequence[str]) -> Iterator[Tuple[Dict, List]]:
+        """(payload, archivos) de cada cálculo en orden, en paralelo si el lote lo amerita"""
+        payloads = self.iter_payloads(calculation_ids)
+        if self.workers <= 1 or len(calculation_ids) < REPORT_PARALLEL_MIN:
+            for payload in payloads:
+                yield payload, render_calculation_files(payload, formats)
+            return
+
+        pool = get_report_pool()
+        in_flight = deque()
+        for payload in payloads:
+            in_flight.append((payload, pool.submit(render_calculation_files, payload, tuple(formats))))
+            if len(in_flight) >= self.workers * 2:
+                payload, future = in_flight.popleft()
+                yield payload, future.result()
+        while in_flight:
+            payload, future = in_flight.popleft()
+            yield payload, future.result()
+
+    def stream_pack(
+        self,
+        calculation_ids: List[int],
+        formats: Sequence[str] = REPORT_FORMATS,
+        include_summary: bool = True
+    ) -> Iterator[bytes]:
+        """Bytes del zip del paquete, entregados a medida que se renderiza cada archivo"""
+        started = datetime.utcnow()
+        stream = _ChunkStream()
+        summary_rows = []
+        rendered = 0
+        with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for payload, files in self.render(calculation_ids, formats):
+                for name, data in files:
+                    # Los .xlsx ya vienen comprimidos
+                    compression = zipfile.ZIP_STORED if name.endswith(".xlsx") else zipfile.ZIP_DEFLATED
+                    archive.writestr(zipfile.ZipInfo(name, date_time=started.timetuple()[:6]), data, compression)
+                    yield stream.drain()
+                rendered += 1
+                if include_summary:
+                    summary_rows.append(summary_row(payload))
+
+            if include_summary:
+                with archive.open(zipfile.ZipInfo("resumen.xlsx", date_time=started.timetuple()[:6]), "w") as entry:
+                    with StreamingXlsxWriter(entry) as book:
+                        book.write_sheet("Resumen", summary_rows, header=SUMMARY_HEADER)
+        yield stream.drain()
+        logger.info(
+            "Paquete de reportes: %d cálculos en %.1f s", rendered, (datetime.utcnow() - started).total_seconds()
+        )
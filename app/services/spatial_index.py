@@ -0,0 +1,215 @@
+"""
+Índice espacial sobre puntos (centroides de APS, rellenos, estaciones)
+
+Los puntos se guardan como vectores unitarios 3D: la distancia euclidiana
+(cuerda) crece con la distancia sobre la esfera, así un KD-tree normal
+responde vecino más cercano y radio sin errores de proyección. Las
+consultas por lote (matriz de distancias, vecino más cercano de todos los
+APS) usan numpy cuando está instalado.
+"""
+import heapq
+import math
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+from .gps_sweeping import EARTH_RADIUS_M
+from ..tariff_core.stratum_tariffs import load_numpy
+
+EARTH_RADIUS_KM = EARTH_RADIUS_M / 1000
+
+# Puntos por hoja del árbol
+KD_LEAF_SIZE = 16
+
+# Celdas (consultas x puntos) por bloque en las consultas por lote con numpy
+BATCH_BLOCK_CELLS = 2_000_000
+
+
+def to_unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    lat, lon = math.radians(lat), math.radians(lon)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat))
+
+
+def chord_to_km(chord: float) -> float:
+    """Distancia sobre la esfera para una cuerda del vector unitario"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)
+
+
+def haversine_km(lat0: float, lon0: float, lat1: float, lon1: float) -> float:
+    lat0, lon0, lat1, lon1 = map(math.radians, (lat0, lon0, lat1, lon1))
+    a = math.sin((lat1 - lat0) / 2) ** 2 + math.cos(lat0) * math.cos(lat1) * math.sin((lon1 - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+class SpatialIndex:
+    """
+    KD-tree de puntos (id, lat, lon)
+
+    Los nodos se guardan en listas planas; cada hoja apunta a un rango de
+    `self._order`. Construirlo para miles de puntos toma milisegundos.
+    """
+
+    def __init__(self, points: Sequence[Tuple[Hashable, float, float]], leaf_size: int = KD_LEAF_SIZE):
+        self.ids: List[Hashable] = [point[0] for point in points]
+        self.lats: List[float] = [float(point[1]) for point in points]
+        self.lons: List[float] = [float(point[2]) for point in points]
+        self.vectors = [to_unit_vector(lat, lon) for lat, lon in zip(self.lats, self.lons)]
+        self.leaf_size = max(1, leaf_size)
+
+        self._order = list(range(len(self.ids)))
+        # Por nodo: (inicio, fin, eje, corte, hijo izquierdo, hijo derecho); eje -1 = hoja
+        self._nodes: List[Tuple[int, int, int, float, int, int]] = []
+        if self._order:
+            self._build(0, len(self._order))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _build(self, start: int, end: int) -> int:
+        node_id = len(self._nodes)
+        self._nodes.append((start, end, -1, 0.0, -1, -1))
+        if end - start <= self.leaf_size:
+            return node_id
+
+        members = self._order[start:end]
+        columns = [[self.vectors[i][axis] for i in members] for axis in range(3)]
+        spreads = [max(column) - min(column) for column in columns]
+        axis = spreads.index(max(spreads))
+        if spreads[axis] == 0:
+            return node_id  # Puntos repetidos: hoja grande
+
+        ordered = sorted(zip(columns[axis], members))
+        self._order[start:end] = [index for _, index in ordered]
+        middle = (start + end) // 2
+        split = ordered[middle - start][0]
+        left = self._build(start, middle)
+        right = self._build(middle, end)
+        self._nodes[node_id] = (start, end, axis, split, left, right)
+        return node_id
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[Hashable, float]]:
+        """Los k puntos más cercanos como [(id, km)], del más cercano al más lejano"""
+        if not self._nodes or k < 1:
+            return []
+        query = to_unit_vector(lat, lon)
+        heap: List[Tuple[float, int]] = []  # (-cuerda², índice)
+        self._search_nearest(0, query, k, heap)
+        found = sorted((-negative, index) for negative, index in heap)
+        return [(self.ids[index], chord_to_km(math.sqrt(squared))) for squared, index in found]
+
+    def _search_nearest(self, node_id: int, query, k: int, heap) -> None:
+        start, end, axis, split, left, right = self._nodes[node_id]
+        if axis < 0:
+            for index in self._order[start:end]:
+                vector = self.vectors[index]
+                squared = (
+                    (vector[0] - query[0]) ** 2 + (vector[1] - query[1]) ** 2 + (vector[2] - query[2]) ** 2
+                )
+                if len(heap) < k:
+                    heapq.heappush(heap, (-squared, index))
+                elif squared < -heap[0][0]:
+                    heapq.heapreplace(heap, (-squared, index))
+            return
+
+        difference = query[axis] - split
+        near, far = (left, right) if difference < 0 else (right, left)
+        self._search_nearest(near, query, k, heap)
+        if len(heap) < k or difference * difference < -heap[0][0]:
+            self._search_nearest(far, query, k, heap)
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[Hashable, float]]:
+        """Puntos a menos de radius_km como [(id, km)], ordenados por distancia"""
+        if not self._nodes:
+            return []
+        query = to_unit_vector(lat, lon)
+        limit = km_to_chord(radius_km) ** 2
+        found: List[Tuple[float, int]] = []
+        stack = [0]
+        while stack:
+            start, end, axis, split, left, right = self._nodes[stack.pop()]
+            if axis < 0:
+                for index in self._order[start:end]:
+                    vector = self.vectors[index]
+                    squared = (
+                        (vector[0] - query[0]) ** 2 + (vector[1] - query[1]) ** 2 + (vector[2] - query[2]) ** 2
+                    )
+                    if squared <= limit:
+                        found.append((squared, index))
+                continue
+            difference = query[axis] - split
+            if difference < 0 or difference * difference <= limit:
+                stack.append(left)
+            if difference >= 0 or difference * difference <= limit:
+                stack.append(right)
+        found.sort()
+        return [(self.ids[index], chord_to_km(math.sqrt(squared))) for squared, index in found]
+
+    def nearest_batch(self, lats: Sequence[float], lons: Sequence[float]) -> List[Optional[Tuple[Hashable, float]]]:
+        """Punto más cercano para cada consulta (numpy por bloques si está disponible)"""
+        if not self.ids:
+            return [None] * len(lats)
+        np = load_numpy()
+        if np is None:
+            return [self.nearest(lat, lon)[0] for lat, lon in zip(lats, lons)]
+
+        rows = max(1, BATCH_BLOCK_CELLS // len(self.ids))
+        results: List[Optional[Tuple[Hashable, float]]] = []
+        for start in range(0, len(lats), rows):
+            matrix = distance_matrix_km(lats[start:start + rows], lons[start:start + rows], self.lats, self.lons)
+            best = matrix.argmin(axis=1)
+            results.extend(
+                (self.ids[index], distance)
+                for index, distance in zip(best.tolist(), matrix[np.arange(len(best)), best].tolist())
+            )
+        return results
+
+
+def distance_matrix_km(
+    origin_lats: Sequence[float],
+    origin_lons: Sequence[float],
+    destination_lats: Sequence[float],
+    destination_lons: Sequence[float],
+):
+    """
+    Matriz de distancias haversine en km (orígenes x destinos)
+
+    Con numpy retorna un ndarray; sin numpy, listas de listas.
+    """
+    np = load_numpy()
+    if np is None:
+        return [
+            [haversine_km(lat0, lon0, lat1, lon1) for lat1, lon1 in zip(destination_lats, destination_lons)]
+            for lat0, lon0 in zip(origin_lats, origin_lons)
+        ]
+
+    lat0 = np.radians(np.asarray(origin_lats, dtype=float))[:, None]
+    lon0 = np.radians(np.asarray(origin_lons, dtype=float))[:, None]
+    lat1 = np.radians(np.asarray(destination_lats, dtype=float))[None, :]
+    lon1 = np.radians(np.asarray(destination_lons, dtype=float))[None, :]
+    a = np.sin((lat1 - lat0) / 2) ** 2 + np.cos(lat0) * np.cos(lat1) * np.sin((lon1 - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def effective_distances(distances_km: Sequence[float], unpaved_percentages: Sequence[float]) -> List[float]:
+    """
+    APS.get_effective_distance() para muchos APS a la vez (Art. 24: cada
+    km de vía despavimentada equivale a 1,25 km pavimentados)
+    """
+    np = load_numpy()
+    if np is None:
+        return [
+            distance if unpaved == 0 else round(distance * (1 - unpaved / 100) + distance * (unpaved / 100) * 1.25, 2)
+            for distance, unpaved in zip(distances_km, unpaved_percentages)
+        ]
+
+    distance = np.asarray(distances_km, dtype=float)
+    unpaved = np.asarray(unpaved_percentages, dtype=float)
+    adjusted = distance * (1 - unpaved / 100) + distance * (unpaved / 100) * 1.25
+    # round() de Python para redondear igual que get_effective_distance
+    return [
+        plain if percentage == 0 else round(value, 2)
+        for plain, percentage, value in zip(distance.tolist(), unpaved.tolist(), adjusted.tolist())
+    ]
@@ -0,0 +1,152 @@
+"""
+Consultas de planeación regional sobre centroides de APS y sitios de
+disposición (rellenos y estaciones de transferencia)
+
+Carga APS y sitios con una consulta cada uno, arma los índices espaciales
+una vez por servicio y responde en memoria.
+"""
+from typing import Dict, List, Optional
+
+from sqlmodel import Session
+
+from app.core.exceptions import APSNotFoundError, ValidationError
+from app.models.aps import APS
+from app.models.disposal_site import DisposalSite, DisposalSiteType
+from app.repositories.aps_repository import APSRepository
+from app.repositories.disposal_site_repository import DisposalSiteRepository
+from app.services.spatial_index import SpatialIndex, distance_matrix_km, effective_distances
+
+
+class SpatialPlanningService:
+    """Vecino más cercano, radio y matrices de distancia por empresa"""
+
+    def __init__(self, session: Session, company_id: Optional[int] = None):
+        self.session = session
+        # None = todas las empresas (usuario SYSTEM)
+        self.company_id = company_id
+        self._aps: Optional[List[APS]] = None
+        self._sites: Optional[List[DisposalSite]] = None
+        self._indexes: Dict[str, SpatialIndex] = {}
+
+    @property
+    def aps(self) -> List[APS]:
+        if self._aps is None:
+            self._aps = APSRepository(self.session).get_located(self.company_id)
+        return self._aps
+
+    @property
+    def sites(self) -> List[DisposalSite]:
+        if self._sites is None:
+            self._sites = DisposalSiteRepository(self.session).get_active(self.company_id)
+        return self._sites
+
+    def sites_of_type(self, site_type: Optional[str]) -> List[DisposalSite]:
+        if site_type is not None and site_type not in DisposalSiteType.ALL:
+            raise ValidationError("site_type", f"Tipos soportados: {', '.join(DisposalSiteType.ALL)}")
+        return [site for site in self.sites if site_type is None or site.site_type == site_type]
+
+    def site_index(self, site_type: Optional[str] = None) -> SpatialIndex:
+        key = f"site:{site_type}"
+        if key not in self._indexes:
+            self._indexes[key] = SpatialIndex([
+                (site.id, site.latitude, site.longitude) for site in self.sites_of_type(site_type)
+            ])
+        return self._indexes[key]
+
+    def aps_index(self) -> SpatialIndex:
+        if "aps" not in self._indexes:
+            self._indexes["aps"] = SpatialIndex([
+                (aps.id, aps.centroid_lat, aps.centroid_lon) for aps in self.aps
+            ])
+        return self._indexes["aps"]
+
+    # ========================================
+    # CONSULTAS
+    # ========================================
+
+    def nearest_sites(self, lat: float, lon: float, site_type: Optional[str] = None, k: int = 1) -> List[Dict]:
+        """Los k sitios más cercanos a un punto"""
+        sites = {site.id: site for site in self.sites_of_type(site_type)}
+        return [
+            {
+                "site_id": site_id,
+                "name": sites[site_id].name,
+                "site_type": sites[site_id].site_type,
+                "distance_km": round(distance, 3),
+            }
+            for site_id, distance in self.site_index(site_type).nearest(lat, lon, k)
+        ]
+
+    def aps_within_radius(self, lat: float, lon: float, radius_km: float) -> List[Dict]:
+        """APS cuyo centroide está a menos de radius_km del punto"""
+        aps_by_id = {aps.id: aps for aps in self.aps}
+        return [
+            {
+                "aps_id": aps_id,
+                "code": aps_by_id[aps_id].code,
+                "name": aps_by_id[aps_id].name,
+                "distance_km": round(distance, 3),
+            }
+            for aps_id, distance in self.aps_index().within_radius(lat, lon, radius_km)
+        ]
+
+    def distance_matrix(self, aps_ids: Optional[List[int]] = None, site_type: Optional[str] = None) -> Dict:
+        """Distancias en línea recta (km) de cada centroide de APS a cada sitio"""
+        aps_by_id = {aps.id: aps for aps in self.aps}
+        if aps_ids is None:
+            aps_ids = list(aps_by_id)
+        missing = [aps_id for aps_id in aps_ids if aps_id not in aps_by_id]
+        if missing:
+            raise APSNotFoundError(missing[0])
+
+        origins = [aps_by_id[aps_id] for aps_id in aps_ids]
+        sites = self.sites_of_type(site_type)
+        matrix = distance_matrix_km(
+            [aps.centroid_lat for aps in origins], [aps.centroid_lon for aps in origins],
+            [site.latitude for site in sites], [site.longitude for site in sites],
+        )
+        rows = matrix.tolist() if hasattr(matrix, "tolist") else matrix
+        return {
+            "aps_ids": aps_ids,
+            "site_ids": [site.id for site in sites],
+            "distances_km": [[round(value, 3) for value in row] for row in rows],
+        }
+
+    def effective_distance_report(self) -> List[Dict]:
+        """
+        Distancia efectiva registrada (Art. 24) de todos los APS en un lote,
+        junto al relleno y la estación de transferencia más cercanos a su
+        centroide. Sirve para revisar la D declarada y los APS que podrían
+        usar f2.
+        """
+        aps_list = self.aps
+        effective = effective_distances(
+            [aps.distance_to_landfill_km for aps in aps_list],
+            [aps.unpaved_road_percentage for aps in aps_list],
+        )
+        lats = [aps.centroid_lat for aps in aps_list]
+        lons = [aps.centroid_lon for aps in aps_list]
+        nearest = {
+            site_type: self.site_index(site_type).nearest_batch(lats, lons)
+            for site_type in DisposalSiteType.ALL
+        }
+        names = {site.id: site.name for site in self.sites}
+
+        def describe(found):
+            if found is None:
+                return None
+            site_id, distance = found
+            return {"site_id": site_id, "name": names[site_id], "straight_line_km": round(distance, 3)}
+
+        return [
+            {
+                "aps_id": aps.id,
+                "code": aps.code,
+                "distance_to_landfill_km": aps.distance_to_landfill_km,
+                "effective_distance_km": effective[i],
+                "uses_transfer_station": aps.uses_transfer_station,
+                "nearest_landfill": describe(nearest[DisposalSiteType.LANDFILL][i]),
+                "nearest_transfer_station": describe(nearest[DisposalSiteType.TRANSFER_STATION][i]),
+            }
+            for i, aps in enumerate(aps_list)
+        ]
@@ -5,11 +5,15 @@ Orquesta el TariffCalculator720 y retorna resultados auditables para:
 2. Creador: Crear tarifas mensuales oficiales (guardar en BD)
 """
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 from datetime import datetime
 from sqlmodel import Session
 
-from .tariff_calculator_720 import TariffCalculator720
+from ..tariff_core.tariff_calculator_720 import (
+    ARITHMETIC_DECIMAL,
+    OFFICIAL_TARIFF_ARITHMETIC,
+    to_float,
+)
 from ..schemas.tariff_calculation import (
     TariffCalculationInput,
     TariffCalculationResult,
@@ -18,6 +22,15 @@ from ..schemas.tariff_calculation import (
 from ..models.tariff_calculation import TariffCalculation
 from ..models.user import User
 from ..models.aps import APS
+from ..models.tariff_parameter import TariffParameterName
+from ..repositories.aps_repository import APSRepository, APSMonthlyDataRepository
+from ..repositories.municipality_cost_repository import MunicipalityCostRepository
+from ..tariff_core import engine
+from ..tariff_core.formula_graph import AVERAGE_INPUTS, FormulaEvaluation
+from ..tariff_core.records import APSProfile, TariffInput
+from ..tariff_core.rule_sets import CompiledRuleSet, compiled_rule_set_for
+from .live_simulation import LiveSimulationSession, validate_subsidy_factors
+from .parameter_store import ParameterStore, TariffParameterService
 
 
 class TariffCalculationService:
@@ -28,7 +41,15 @@ class TariffCalculationService:
     
     def __init__(self, session: Session):
         self.session = session
-        self.calculator = TariffCalculator720()
+        # Calculadora de la versión vigente para calculate_tariff (los
+        # cálculos por período toman su versión de rules_for)
+        self.calculator = compiled_rule_set_for().calculator
+        self.aps_repo = APSRepository(session)
+        self.monthly_repo = APSMonthlyDataRepository(session)
+        self.municipality_repo = MunicipalityCostRepository(session)
+        self.parameter_service = TariffParameterService(session)
+        # (ids de APS, primer período, último período, store) del último prefetch
+        self._parameter_cache: Optional[Tuple[set, str, str, ParameterStore]] = None
     
     def calculate_tariff(
         self,
@@ -334,6 +355,14 @@ class TariffCalculationService:
         self.session.refresh(tariff_record)
         
         return tariff_record
+    
+    def calculate_official_tariff(
+        self,
+        aps_id: int,
+        period: str,
+        calculated_by: int,
+        subsidy_factors: Optional[Dict[str, float]] = None
+    ) -> TariffCalculation:
         """
         Calcula la tarifa oficial para un APS en un período
         
@@ -390,6 +419,148 @@ class TariffCalculationService:
             subsidy_factors=subsidy_factors
         )
     
+    def back_calculate_range(
+        self,
+        aps_id: int,
+        start_period: str,
+        end_period: str,
+        subsidy_factors: Optional[Dict[str, float]] = None,
+        extra_categories: Optional[List[Dict]] = None,
+        exact: bool = False
+    ) -> List[Dict]:
+        """
+        Recalcula las tarifas de un APS para cada período de un rango
+        (validación contra tarifas históricas). NO guarda en BD.
+        
+        Lee los datos mensuales una sola vez y arma las ventanas de 6 meses
+        con sumas acumuladas. Las tarifas de todos los períodos y categorías
+        se evalúan en una sola operación sobre la matriz período x categoría.
+        Con exact=True se usa aritmética Decimal (igual que las tarifas oficiales).
+        
+        Returns:
+            Lista ordenada por período con componentes y tarifas por estrato,
+            o con "error" si el período no tiene datos en su ventana
+        """
+        aps = self.aps_repo.get_by_id(aps_id)
+        if not aps:
+            raise ValueError(f"APS {aps_id} no encontrado")
+        
+        windows = self.monthly_repo.calculate_rolling_6_month_averages(
+            aps_id, start_period, end_period
+        )
+        # Sumas de CRT/CDF del municipio y parámetros vigentes de todos los
+        # períodos, una consulta cada uno
+        municipality_costs = self.municipality_repo.get_other_aps_costs(aps, list(windows))
+        parameter_store = self.prefetch_tariff_parameters([aps], list(windows))
+        
+        # Una entrada por período con datos; el núcleo evalúa los costos por
+        # período con la regla vigente en cada uno y las tarifas de todas
+        # las celdas período x categoría de una misma versión en una sola
+        # operación (los factores de subsidio pueden cambiar entre períodos)
+        inputs = [
+            self._tariff_input(
+                aps, period, averages, subsidy_factors, exact, municipality_costs[period],
+                parameter_store.resolve(aps, period), extra_categories
+            )
+            for period, averages in windows.items() if averages
+        ]
+        results = engine.calculate_batch(inputs)
+        
+        by_period = {}
+        for tariff_input, result in zip(inputs, results):
+            by_period[tariff_input.period] = {
+                "period": tariff_input.period,
+                "rule_set_version": result.rule_set_version,
+                "months_count": tariff_input.averages["months_count"],
+                **result.costs,
+                "tariffs": result.tariffs,
+            }
+        
+        return [
+            by_period.get(period) or {
+                "period": period,
+                "error": f"No hay suficientes datos para calcular promedios en {period}"
+            }
+            for period in windows
+        ]
+    
+    def what_if(
+        self,
+        aps_id: int,
+        period: str,
+        overrides: Dict[str, float],
+        subsidy_factors: Optional[Dict[str, float]] = None,
+        include_trace: bool = False
+    ) -> Dict:
+        """
+        Evalúa un escenario sobre los promedios de un período. NO guarda en BD.
+        
+        Sólo se recalculan los nodos del grafo aguas abajo de las entradas
+        modificadas; la respuesta indica cuáles fueron.
+        """
+        aps = self.aps_repo.get_by_id(aps_id)
+        if not aps:
+            raise ValueError(f"APS {aps_id} no encontrado")
+        
+        averages = self.monthly_repo.calculate_6_month_averages(aps_id, period)
+        if not averages:
+            raise ValueError(f"No hay suficientes datos para calcular promedios en {period}")
+        
+        unknown = [name for name in overrides if name not in AVERAGE_INPUTS]
+        if unknown:
+            raise ValueError(f"Entradas no modificables: {unknown}")
+        
+        parameters = self.get_tariff_parameters(aps, period)
+        evaluation = self.evaluate_formula_graph(
+            aps, averages, subsidy_factors,
+            municipality_costs=self.get_municipality_costs(aps, period), parameters=parameters, period=period
+        )
+        baseline = to_float(evaluation["tariffs"])
+        recomputed = evaluation.update(overrides)
+        
+        result = {
+            "aps_id": aps_id,
+            "period": period,
+            "overrides": overrides,
+            "recomputed_nodes": recomputed,
+            "baseline_tariffs": baseline,
+            "tariffs": to_float(evaluation["tariffs"]),
+            "components": to_float({
+                name: evaluation[name]
+                for name in ("ccs", "clus", "cbls", "cft", "crt", "cdf", "ctl", "cvna", "vba")
+            }),
+        }
+        if include_trace:
+            result["trace"] = to_float(evaluation.trace())
+        return result
+    
+    def start_live_simulation(
+        self,
+        aps_id: int,
+        period: str,
+        subsidy_factors: Optional[Dict[str, float]] = None
+    ) -> LiveSimulationSession:
+        """
+        Evalúa el grafo para los promedios de un período y retorna una
+        sesión que acepta deltas de entradas (simulación en vivo)
+        """
+        if subsidy_factors is not None:
+            validate_subsidy_factors(subsidy_factors)
+        aps = self.aps_repo.get_by_id(aps_id)
+        if not aps:
+            raise ValueError(f"APS {aps_id} no encontrado")
+        
+        averages = self.monthly_repo.calculate_6_month_averages(aps_id, period)
+        if not averages:
+            raise ValueError(f"No hay suficientes datos para calcular promedios en {period}")
+        
+        parameters = self.get_tariff_parameters(aps, period)
+        evaluation = self.evaluate_formula_graph(
+            aps, averages, subsidy_factors,
+            municipality_costs=self.get_municipality_costs(aps, period), parameters=parameters, period=period
+        )
+        return LiveSimulationSession(evaluation, aps_id, period)
+    
     def _calculate_tariff(
         self,
         aps_id: int,
@@ -417,141 +588,39 @@ class TariffCalculationService:
         if simulation_data:
             averages.update(simulation_data)
         
-        # 4. Determinar si hay aprovechamiento
-        has_recycling = averages.get("tons_collected_recyclable", 0) > 0
-        
-        # 5. Calcular componentes
-        
-        # CCS - Comercialización
-        ccs = self.calculator.calculate_ccs(
-            segment=aps.segment,
-            billing_type=aps.billing_type,
-            has_recycling=has_recycling
-        )
-        
-        # CLUS - Limpieza Urbana
-        clus, clus_breakdown = self.calculator.calculate_clus(
-            num_subscribers=int(averages["num_subscribers_total"]),
-            tree_pruning_cost=averages.get("cost_tree_pruning", 0),
-            grass_area_m2=averages.get("grass_area_cut_m2", 0),
-            washing_area_m2=averages.get("public_areas_washed_m2", 0),
-            beach_area_m2=averages.get("beach_cleaning_m2", 0),
-            baskets_installed=averages.get("baskets_installed", 0),
-            baskets_maintained=averages.get("baskets_maintained", 0),
-            segment=aps.segment,
-            water_price_per_m3=0  # TODO: Obtener precio del agua
-        )
-        
-        # CBLS - Barrido y Limpieza
-        cbls = self.calculator.calculate_cbls(
-            sweeping_km=averages.get("sweeping_length_km", 0),
-            num_subscribers=int(averages["num_subscribers_total"]),
-            has_public_contribution=False  # TODO: Determinar si hay aporte
-        )
-        
-        # CFT - Costo Fijo Total
-        cft = self.calculator.calculate_cft(ccs, clus, cbls)
-        
-        # CRT - Recolección y Transporte
-        crt, crt_details = self.calculator.calculate_crt(
-            distance_km=aps.get_effective_distance(),
-            avg_tons_month=averages["tons_collected_non_recyclable"],
-            tolls_cost_month=0,  # TODO: Obtener peajes
-            is_coastal=aps.is_coastal_municipality,
-            uses_transfer_station=aps.uses_transfer_station,
-            transfer_distance_km=aps.transfer_station_distance_km or 0,
-            fleet_age_years=averages.get("fleet_average_age_years", 0),
-            fleet_daily_shifts=averages.get("fleet_daily_shifts", 1),
-            has_public_contribution=False  # TODO: Determinar si hay aporte
-        )
-        
-        # CDF - Disposición Final
-        cdf, cdf_details = self.calculator.calculate_cdf(
-            avg_tons_landfill_month=averages["tons_received_landfill"],
-            is_small_landfill=(averages["tons_received_landfill"] < 2400),
-            extended_postclosure_years=0,  # TODO: Obtener de configuración
-            has_public_contribution=False  # TODO: Determinar si hay aporte
-        )
-        
-        # CTL - Tratamiento Lixiviados
-        ctl, ctl_details = self.calculator.calculate_ctl(
-            leachate_volume_m3=averages["leachate_volume_m3"],
-            avg_tons_landfill_month=averages["tons_received_landfill"],
-            scenario=averages.get("leachate_treatment_scenario", 2),
-            environmental_tax=averages.get("environmental_tax_rate", 0),
-            extended_postclosure_years=0,
-            has_public_contribution=False
-        )
-        
-        # CVNA - Costo Variable
-        cvna = self.calculator.calculate_cvna(crt, cdf, ctl)
-        
-        # VBA - Aprovechamiento
-        vba = self.calculator.calculate_vba(
-            crt_avg=crt,  # Simplificado, debería ser promedio ponderado del municipio
-            cdf_avg=cdf,
-            incentive_discount=0.0  # TODO: Implementar DINC
-        )
-        
-        # Toneladas comunes por suscriptor
-        common_tons = self.calculator.calculate_tons_per_subscriber_common(
-            tons_sweeping_month=averages["tons_collected_sweeping"],
-            tons_urban_cleaning_month=averages["tons_collected_urban_cleaning"],
-            tons_rejection_month=averages["tons_rejection_recycling"],
-            tons_recycled_month=averages["tons_collected_recyclable"],
-            num_subscribers_total=int(averages["num_subscribers_total"]),
-            num_subscribers_vacant=int(averages["num_subscribers_vacant"]),
-            num_subscribers_large_producers=averages.get("num_subscribers_large_producers", 0)
-        )
-        
-        # TODO: Obtener distribución de suscriptores por estrato del monthly_data
-        subscribers_by_stratum = {
-            "stratum_1": averages.get("subscribers_stratum_1", 0),
-            "stratum_2": averages.get("subscribers_stratum_2", 0),
-            "stratum_3": averages.get("subscribers_stratum_3", 0),
-            "stratum_4": averages.get("subscribers_stratum_4", 0),
-            "stratum_5": averages.get("subscribers_stratum_5", 0),
-            "stratum_6": averages.get("subscribers_stratum_6", 0),
-            "commercial": averages.get("subscribers_commercial", 0),
-        }
-        
-        # TRNA por estrato
-        trna_by_stratum = self.calculator.calculate_trna_by_stratum(
-            tons_non_recyclable_aps=averages["tons_collected_non_recyclable"],
-            tons_rejection=averages["tons_rejection_recycling"],
-            subscribers_by_stratum=subscribers_by_stratum,
-            num_subscribers_vacant=int(averages["num_subscribers_vacant"]),
-            tons_weighed_total=0  # TODO: Sumar toneladas aforadas
-        )
-        
-        # Factores de subsidio/contribución por defecto
-        if not subsidy_factors:
-            subsidy_factors = {
-                "stratum_1": -0.70,  # 70% subsidio
-                "stratum_2": -0.40,  # 40% subsidio
-                "stratum_3": -0.15,  # 15% subsidio
-                "stratum_4": 0.00,   # Sin subsidio ni contribución
-                "stratum_5": 0.20,   # 20% contribución
-                "stratum_6": 0.20,   # 20% contribución
-                "commercial": 0.30   # 30% contribución
-            }
-        
-        # Calcular tarifas finales por estrato
-        tariffs = {}
-        for stratum in ["stratum_1", "stratum_2", "stratum_3", "stratum_4", 
-                       "stratum_5", "stratum_6", "commercial"]:
-            base, final = self.calculator.calculate_final_tariff(
-                cft=cft,
-                cvna=cvna,
-                vba=vba,
-                trbl=common_tons["trbl"],
-                trlu=common_tons["trlu"],
-                trra=common_tons["trra"],
-                tra=common_tons["tra"],
-                trna=trna_by_stratum[stratum],
-                subsidy_contribution_factor=subsidy_factors[stratum]
-            )
-            tariffs[stratum] = {"base": base, "final": final}
+        # 4. Calcular componentes y tarifas por estrato
+        #    Las tarifas oficiales usan aritmética Decimal exacta.
+        #    El VBA usa CRT/CDF ponderados con los demás APS del municipio.
+        #    Peajes, aporte público, DINC, etc. son los parámetros vigentes en el período.
+        use_exact = calculation_type == "official" and OFFICIAL_TARIFF_ARITHMETIC == ARITHMETIC_DECIMAL
+        municipality_costs = self.get_municipality_costs(aps, period)
+        parameters = self.get_tariff_parameters(aps, period)
+        components = to_float(self._compute_tariff_components(
+            aps,
+            averages,
+            subsidy_factors,
+            exact=use_exact,
+            municipality_costs=municipality_costs,
+            parameters=parameters,
+            period=period
+        ))
+        ccs = components["ccs"]
+        clus = components["clus"]
+        clus_breakdown = components["clus_breakdown"]
+        cbls = components["cbls"]
+        cft = components["cft"]
+        crt = components["crt"]
+        crt_details = components["crt_details"]
+        cdf = components["cdf"]
+        cdf_details = components["cdf_details"]
+        ctl = components["ctl"]
+        ctl_details = components["ctl_details"]
+        cvna = components["cvna"]
+        vba = components["vba"]
+        common_tons = components["common_tons"]
+        trna_by_stratum = components["trna_by_stratum"]
+        tariffs = components["tariffs"]
+        subsidy_factors = components["subsidy_factors"]
         
         # Crear registro de cálculo
         calculation = TariffCalculation(
@@ -596,7 +665,7 @@ class TariffCalculationService:
             
             # Aprovechamiento
             vba=vba,
-            vba_incentive_discount=0.0,
+            vba_incentive_discount=parameters.get(TariffParameterName.INCENTIVE_DISCOUNT, 0.0),
             
             # Toneladas
             trbl=common_tons["trbl"],
@@ -632,12 +701,18 @@ class TariffCalculationService:
             # Subsidios
             subsidy_contribution_factors=subsidy_factors,
             
-            # Snapshot de datos
-            input_data=averages,
+            # Snapshot de datos (incluye las sumas del municipio usadas en el VBA
+            # y los parámetros vigentes)
+            input_data={
+                **averages,
+                "municipality_costs": municipality_costs,
+                "parameters": parameters,
+                "rule_set_version": self.rules_for(period).version,
+            },
             
             # Fórmulas usadas
-            formulas_used=self._get_formulas_used(),
-            regulatory_references=self._get_regulatory_references(),
+            formulas_used=self._get_formulas_used(period),
+            regulatory_references=self._get_regulatory_references(period),
             
             # Validaciones
             validations=self._validate_calculation(aps, averages, tariffs),
@@ -647,38 +722,146 @@ class TariffCalculationService:
             simulation_name=simulation_name
         )
         
-        # Guardar en base de datos
+        # Guardar en base de datos; las tarifas oficiales actualizan las
+        # sumas del municipio en la misma transacción
         self.session.add(calculation)
+        if calculation_type == "official":
+            self.municipality_repo.record_contribution(
+                aps, period,
+                crt=crt, crt_tons=averages["tons_collected_non_recyclable"],
+                cdf=cdf, cdf_tons=averages["tons_received_landfill"]
+            )
         self.session.commit()
         self.session.refresh(calculation)
         
         return calculation
     
-    def _get_formulas_used(self) -> Dict:
-        """Retorna las fórmulas usadas con referencias"""
-        return {
-            "CFT": "CFT = CCS + CLUS + CBLS",
-            "CVNA": "CVNA = CRT + CDF + CTL",
-            "CRT": "CRT = MIN(f1, f2) + PRT",
-            "CDF": "CDF = CDF_VU + CDF_PC",
-            "CTL": "CTL = ((CTLM × VL) + CMTLX) / QRS",
-            "VBA": "VBA = (CRT_p + CDF_p) × (1 - DINC)",
-            "TFS": "TFS = (CFT + CVNA × (TRBL + TRLU + TRNA + TRRA) + (VBA × TRA)) × (1 ± FCS)"
-        }
+    def _compute_tariff_components(
+        self,
+        aps: APS,
+        averages: Dict,
+        subsidy_factors: Optional[Dict[str, float]] = None,
+        extra_categories: Optional[List[Dict]] = None,
+        exact: bool = False,
+        municipality_costs: Optional[Dict[str, float]] = None,
+        parameters: Optional[Dict[str, float]] = None,
+        period: Optional[str] = None
+    ) -> Dict:
+        """
+        Calcula todos los componentes y tarifas por estrato a partir de los
+        promedios de 6 meses evaluando el grafo de fórmulas. No accede a la BD.
+        
+        Con exact=True los valores quedan en Decimal.
+        """
+        return self.evaluate_formula_graph(
+            aps, averages, subsidy_factors, extra_categories, exact, municipality_costs, parameters, period
+        ).values
     
-    def _get_regulatory_references(self) -> Dict:
-        """Retorna las referencias a artículos de la Resolución 720"""
-        return {
-            "CFT": ["Art. 11"],
-            "CCS": ["Art. 14"],
-            "CLUS": ["Art. 15-20"],
-            "CBLS": ["Art. 21-23"],
-            "CRT": ["Art. 24-27"],
-            "CDF": ["Art. 28-31"],
-            "CTL": ["Art. 32-33", "Anexo II"],
-            "VBA": ["Art. 34-35"],
-            "TFS": ["Art. 39"]
-        }
+    def evaluate_formula_graph(
+        self,
+        aps: APS,
+        averages: Dict,
+        subsidy_factors: Optional[Dict[str, float]] = None,
+        extra_categories: Optional[List[Dict]] = None,
+        exact: bool = False,
+        municipality_costs: Optional[Dict[str, float]] = None,
+        parameters: Optional[Dict[str, float]] = None,
+        period: Optional[str] = None
+    ) -> FormulaEvaluation:
+        """
+        Evaluación completa del grafo de fórmulas; conserva los valores
+        intermedios y permite re-evaluar sólo lo afectado por un cambio.
+        Usa la versión de la regla vigente en `period` (la actual si es None)
+        y, sin subsidy_factors, los factores por defecto con los vigentes
+        de `parameters` encima.
+        """
+        return engine.evaluate(self._tariff_input(
+            aps, period, averages, subsidy_factors, exact, municipality_costs, parameters, extra_categories
+        ))
+    
+    @staticmethod
+    def _tariff_input(
+        aps: APS,
+        period: Optional[str],
+        averages: Dict,
+        subsidy_factors: Optional[Dict[str, float]] = None,
+        exact: bool = False,
+        municipality_costs: Optional[Dict[str, float]] = None,
+        parameters: Optional[Dict[str, float]] = None,
+        extra_categories: Optional[List[Dict]] = None
+    ) -> TariffInput:
+        """Entradas del núcleo de cálculo para un APS del ORM"""
+        return TariffInput(
+            aps=APSProfile.from_aps(aps),
+            averages=averages,
+            period=period,
+            municipality_costs=municipality_costs,
+            parameters=parameters,
+            subsidy_factors=subsidy_factors,
+            extra_categories=extra_categories,
+            exact=exact,
+        )
+    
+    def rules_for(self, period: Optional[str] = None, exact: bool = False) -> CompiledRuleSet:
+        """Versión de la regla vigente en el período, compilada (en caché)"""
+        return compiled_rule_set_for(period, exact)
+    
+    def prefetch_tariff_parameters(self, aps_list: Sequence[APS], periods: Sequence[str]) -> ParameterStore:
+        """
+        Carga en una consulta los parámetros de todos los APS y períodos de
+        un lote; los cálculos siguientes de esos APS y períodos los leen de
+        memoria
+        """
+        store = self.parameter_service.store_for(aps_list, periods)
+        if aps_list and periods:
+            self._parameter_cache = ({aps.id for aps in aps_list}, min(periods), max(periods), store)
+        return store
+    
+    def get_tariff_parameters(self, aps: APS, period: str) -> Dict[str, float]:
+        """Parámetros vigentes del APS en el período (del prefetch si lo cubre)"""
+        cache = self._parameter_cache
+        if cache is not None and aps.id in cache[0] and cache[1] <= period <= cache[2]:
+            store = cache[3]
+        else:
+            store = self.parameter_service.store_for([aps], [period])
+        return store.resolve(aps, period)
+    
+    def get_municipality_costs(self, aps: APS, period: str) -> Dict[str, float]:
+        """Sumas ponderadas de CRT/CDF de los demás APS del municipio (una consulta)"""
+        return self.municipality_repo.get_other_aps_costs(aps, [period])[period]
+    
+    def record_municipality_costs(self, aps: APS, period: str) -> bool:
+        """
+        Registra el aporte de CRT/CDF del APS a su municipio sin calcular
+        la tarifa (no hace commit). Permite cargar todos los APS de un
+        período antes de calcular sus tarifas, para que el VBA de cada uno
+        no dependa del orden de cálculo.
+        
+        Returns:
+            False si el APS no tiene datos en la ventana del período
+        """
+        averages = self.monthly_repo.calculate_6_month_averages(aps.id, period)
+        if not averages:
+            return False
+        tariff_input = self._tariff_input(
+            aps, period, averages, exact=OFFICIAL_TARIFF_ARITHMETIC == ARITHMETIC_DECIMAL,
+            parameters=self.get_tariff_parameters(aps, period)
+        )
+        values = to_float(engine.evaluate(tariff_input, targets=["crt", "cdf"]).values)
+        self.municipality_repo.record_contribution(
+            aps, period,
+            crt=values["crt"], crt_tons=averages["tons_collected_non_recyclable"],
+            cdf=values["cdf"], cdf_tons=averages["tons_received_landfill"]
+        )
+        return True
+    
+    def _get_formulas_used(self, period: Optional[str] = None) -> Dict:
+        """Retorna las fórmulas usadas con referencias (versión vigente en el período)"""
+        return dict(self.rules_for(period).rule_set.formulas)
+    
+    def _get_regulatory_references(self, period: Optional[str] = None) -> Dict:
+        """Retorna las referencias a artículos de la versión vigente en el período"""
+        return dict(self.rules_for(period).rule_set.references)
     
     def _validate_calculation(
         self, 
@@ -0,0 +1,323 @@
+"""
+Repetición determinística de cálculos guardados (validación de cambios)
+
+TariffCalculation.input_data guarda los promedios de 6 meses, las sumas
+del municipio y los parámetros vigentes de cada cálculo. La repetición
+vuelve a evaluar cada cálculo con el calculador y las reglas actuales y
+compara componentes y tarifas por estrato contra lo guardado, con una
+tolerancia absoluta y una relativa. No escribe en la BD.
+
+Los cálculos se leen en bloques ordenados por ID (paginación por llave,
+sólo las columnas necesarias) y cada bloque se evalúa con
+tariff_core.calculate_batch: componentes de costo por cálculo con la
+versión de la regla vigente en su período y tarifas por estrato de cada
+versión en una sola operación sobre la matriz cálculo x categoría. Con
+varios workers los bloques se evalúan en procesos separados (que sólo
+importan tariff_core) y la lectura y comparación de los demás bloques se
+solapa con la evaluación.
+
+Los atributos del APS (distancia, segmento, municipio costero) se leen
+como están hoy: si cambiaron después del cálculo aparecen como
+diferencias. Los procesos de los workers sólo conocen las versiones de
+la regla registradas al importar los módulos.
+
+Usage:
+    report = TariffReplayService(session).replay(start_period="2024-01", abs_tolerance=0.01)
+    report["mismatched"], report["discrepancies"][:10]
+"""
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session
+
+from app.core.exceptions import ValidationError
+from app.core.validators import validate_period_format
+from app.repositories.aps_repository import APSRepository
+from app.repositories.tariff_calculation_repository import (
+    COST_COLUMNS, TARIFF_STRATA, TariffCalculationRepository
+)
+from app.tariff_core.engine import batch_task
+from app.tariff_core.records import APSProfile, TariffInput, TariffResult
+from app.tariff_core.tariff_calculator_720 import ARITHMETIC_DECIMAL, OFFICIAL_TARIFF_ARITHMETIC
+
+REPLAY_CHUNK_ROWS = int(os.getenv("REPLAY_CHUNK_ROWS", "2000"))
+REPLAY_WORKERS = int(os.getenv("REPLAY_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Diferencias que se devuelven con detalle (el conteo incluye todas)
+REPLAY_MAX_DISCREPANCIES = int(os.getenv("REPLAY_MAX_DISCREPANCIES", "1000"))
+
+# Columnas comparadas: componentes de costo y tarifa base/final por estrato
+COMPARED_FIELDS = COST_COLUMNS + tuple(
+    f"tariff_{stratum}_{kind}" for stratum in TARIFF_STRATA for kind in ("base", "final")
+)
+
+
+def _exceeds(stored: float, replayed: float, abs_tolerance: float, rel_tolerance: float) -> bool:
+    return abs(replayed - stored) > abs_tolerance + rel_tolerance * abs(stored)
+
+
+def chunk_inputs(
+    rows: Sequence[Dict],
+    profiles: Dict[int, APSProfile]
+) -> Tuple[List[TariffInput], List[int], Dict[int, str]]:
+    """
+    Entradas del núcleo para un bloque de cálculos guardados
+
+    Returns:
+        (entradas, índice de la fila de cada entrada, errores por índice
+        de fila para los cálculos sin APS)
+    """
+    inputs, positions, errors = [], [], {}
+    for index, row in enumerate(rows):
+        profile = profiles.get(row["aps_id"])
+        if profile is None:
+            errors[index] = f"APS {row['aps_id']} no encontrado"
+            continue
+        inputs.append(TariffInput.from_snapshot(
+            profile, row["period"], row["input_data"],
+            subsidy_factors=row["subsidy_contribution_factors"] or None,
+            exact=row["calculation_type"] == "official" and OFFICIAL_TARIFF_ARITHMETIC == ARITHMETIC_DECIMAL
+        ))
+        positions.append(index)
+    return inputs, positions, errors
+
+
+def compare_chunk(
+    rows: Sequence[Dict],
+    positions: Sequence[int],
+    results: Sequence[Optional[TariffResult]],
+    errors: Dict[int, str],
+    abs_tolerance: float,
+    rel_tolerance: float,
+    max_discrepancies: int
+) -> Dict:
+    """
+    Compara los resultados de un bloque con lo guardado
+
+    Args:
+        positions: índice de la fila de cada resultado
+        errors: errores por índice de fila
+
+    Returns:
+        Resultado parcial con el mismo formato que combina merge_replay_results
+    """
+    result = _empty_result()
+    replayed_by_row = {positions[index]: replayed for index, replayed in enumerate(results)}
+    for index, row in enumerate(rows):
+        if index in errors:
+            _add_error(result, row, errors[index], max_discrepancies)
+            continue
+        replayed = replayed_by_row[index]
+        version = replayed.rule_set_version
+        result["versions"][version] = result["versions"].get(version, 0) + 1
+        values = {name: replayed.costs[name] for name in COST_COLUMNS}
+        for stratum in TARIFF_STRATA:
+            for kind in ("base", "final"):
+                values[f"tariff_{stratum}_{kind}"] = replayed.tariffs[stratum][kind]
+        _compare(result, row, version, values, abs_tolerance, rel_tolerance, max_discrepancies)
+    return result
+
+
+def _empty_result() -> Dict:
+    return {
+        "checked": 0,
+        "matched": 0,
+        "mismatched": 0,
+        "errors": 0,
+        "versions": {},
+        "max_abs_difference": {field: 0.0 for field in COMPARED_FIELDS},
+        "mismatches_by_field": {field: 0 for field in COMPARED_FIELDS},
+        "discrepancies": [],
+    }
+
+
+def _row_reference(row: Dict) -> Dict:
+    return {
+        "calculation_id": row["id"],
+        "aps_id": row["aps_id"],
+        "period": row["period"],
+        "calculation_type": row["calculation_type"],
+    }
+
+
+def _add_error(result: Dict, row: Dict, message: str, max_discrepancies: int) -> None:
+    result["checked"] += 1
+    result["errors"] += 1
+    if len(result["discrepancies"]) < max_discrepancies:
+        result["discrepancies"].append({**_row_reference(row), "error": message})
+
+
+def _compare(
+    result: Dict,
+    row: Dict,
+    version: str,
+    replayed: Dict[str, float],
+    abs_tolerance: float,
+    rel_tolerance: float,
+    max_discrepancies: int
+) -> None:
+    fields = {}
+    for field in COMPARED_FIELDS:
+        stored, value = row[field], replayed[field]
+        if stored is None:
+            fields[field] = {"stored": None, "replayed": value, "difference": None}
+            continue
+        difference = abs(value - stored)
+        if difference > result["max_abs_difference"][field]:
+            result["max_abs_difference"][field] = difference
+        if _exceeds(stored, value, abs_tolerance, rel_tolerance):
+            fields[field] = {"stored": stored, "replayed": value, "difference": round(value - stored, 6)}
+
+    result["checked"] += 1
+    if not fields:
+        result["matched"] += 1
+        return
+    result["mismatched"] += 1
+    for field in fields:
+        result["mismatches_by_field"][field] += 1
+    if len(result["discrepancies"]) < max_discrepancies:
+        result["discrepancies"].append({
+            **_row_reference(row),
+            "rule_set_version": version,
+            "stored_rule_set_version": (row["input_data"] or {}).get("rule_set_version"),
+            "fields": fields,
+        })
+
+
+def merge_replay_results(total: Dict, partial: Dict, max_discrepancies: int) -> Dict:
+    """Suma el resultado de un bloque al acumulado (en el orden de los bloques)"""
+    for key in ("checked", "matched", "mismatched", "errors"):
+        total[key] += partial[key]
+    for version, count in partial["versions"].items():
+        total["versions"][version] = total["versions"].get(version, 0) + count
+    for field, difference in partial["max_abs_difference"].items():
+        total["max_abs_difference"][field] = max(total["max_abs_difference"][field], difference)
+    for field, count in partial["mismatches_by_field"].items():
+        total["mismatches_by_field"][field] += count
+    room = max_discrepancies - len(total["discrepancies"])
+    if room > 0:
+        total["discrepancies"].extend(partial["discrepancies"][:room])
+    return total
+
+
+class TariffReplayService:
+    """Repite cálculos guardados y reporta las diferencias"""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.repo = TariffCalculationRepository(session)
+        self.aps_repo = APSRepository(session)
+
+    def replay(
+        self,
+        company_id: Optional[int] = None,
+        aps_ids: Optional[Sequence[int]] = None,
+        calculation_type: Optional[str] = None,
+        start_period: Optional[str] = None,
+        end_period: Optional[str] = None,
+        abs_tolerance: float = 0.01,
+        rel_tolerance: float = 0.0,
+        chunk_size: int = REPLAY_CHUNK_ROWS,
+        workers: int = REPLAY_WORKERS,
+        max_discrepancies: int = REPLAY_MAX_DISCREPANCIES,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict:
+        """
+        Repite los cálculos que cumplen los filtros (todos si no hay filtros)
+
+        Args:
+            abs_tolerance / rel_tolerance: una columna difiere si
+                |repetido - guardado| > abs_tolerance + rel_tolerance × |guardado|
+            workers: procesos para evaluar bloques (1 = en este proceso)
+            progress: callback(procesados, total) después de cada bloque
+
+        Returns:
+            Conteos (checked, matched, mismatched, errors), cálculos por
+            versión de la regla, diferencia máxima y número de diferencias
+            por columna y hasta `max_discrepancies` diferencias con detalle,
+            en orden de ID
+        """
+        if start_period is not None:
+            start_period = validate_period_format(start_period)
+        if end_period is not None:
+            end_period = validate_period_format(end_period)
+        if start_period and end_period and end_period < start_period:
+            raise ValidationError("end_period", "Debe ser igual o posterior a start_period")
+        if abs_tolerance < 0 or rel_tolerance < 0:
+            raise ValidationError("abs_tolerance", "Las tolerancias no pueden ser negativas")
+        if chunk_size < 1:
+            raise ValidationError("chunk_size", "Debe ser mayor que cero")
+
+        filters = dict(
+            company_id=company_id, aps_ids=aps_ids, calculation_type=calculation_type,
+            start_period=start_period, end_period=end_period
+        )
+        total_rows = self.repo.count_for_replay(**filters)
+        report = _empty_result()
+        started = time.perf_counter()
+        profiles: Dict[int, Optional[APSProfile]] = {}
+
+        processed = 0
+
+        def chunks():
+            for rows in self.repo.iter_replay_chunks(chunk_size, **filters):
+                rows = [dict(row._mapping) for row in rows]
+                yield (rows, *chunk_inputs(rows, self._aps_profiles(rows, profiles)))
+
+        def collect(rows, positions, errors, batch) -> None:
+            nonlocal processed
+            results, batch_errors = batch
+            # Los errores del núcleo vienen por índice de entrada
+            errors = {**errors, **{positions[index]: message for index, message in batch_errors.items()}}
+            merge_replay_results(report, compare_chunk(
+                rows, positions, results, errors, abs_tolerance, rel_tolerance, max_discrepancies
+            ), max_discrepancies)
+            processed += len(rows)
+            if progress is not None:
+                progress(processed, total_rows)
+
+        if workers > 1 and total_rows > chunk_size:
+            # Ventana acotada de bloques en vuelo: memoria constante aunque
+            # la tabla tenga millones de filas
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                in_flight = deque()
+                for rows, inputs, positions, errors in chunks():
+                    in_flight.append((rows, positions, errors, pool.submit(batch_task, inputs)))
+                    if len(in_flight) >= workers * 2:
+                        rows, positions, errors, future = in_flight.popleft()
+                        collect(rows, positions, errors, future.result())
+                while in_flight:
+                    rows, positions, errors, future = in_flight.popleft()
+                    collect(rows, positions, errors, future.result())
+        else:
+            for rows, inputs, positions, errors in chunks():
+                collect(rows, positions, errors, batch_task(inputs))
+
+        elapsed = time.perf_counter() - started
+        report.update({
+            "filters": filters,
+            "abs_tolerance": abs_tolerance,
+            "rel_tolerance": rel_tolerance,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(report["checked"] / elapsed, 1) if elapsed > 0 else None,
+            "discrepancies_truncated": report["mismatched"] + report["errors"] > len(report["discrepancies"]),
+        })
+        return report
+
+    def _aps_profiles(
+        self,
+        rows: Sequence[Dict],
+        cache: Dict[int, Optional[APSProfile]]
+    ) -> Dict[int, APSProfile]:
+        """Perfiles de los APS del bloque; los que faltan se leen en una consulta"""
+        missing = sorted({row["aps_id"] for row in rows if row["aps_id"] not in cache})
+        if missing:
+            found = {aps.id: APSProfile.from_aps(aps) for aps in self.aps_repo.get_by_ids(missing)}
+            for aps_id in missing:
+                cache[aps_id] = found.get(aps_id)
+        return {row["aps_id"]: cache[row["aps_id"]] for row in rows if cache[row["aps_id"]] is not None}
@@ -0,0 +1,358 @@
+"""
+Ubicación de estaciones de transferencia compartidas (Art. 24)
+
+El CRT de cada APS es MIN(f1, f2): f1 lleva los residuos directo al
+relleno y f2 pasa por una estación de transferencia. Para cada sitio
+candidato se evalúa f2 con la ruta centroide -> estación -> relleno más
+cercano a la estación, con las mismas constantes de calculate_crt, en
+una matriz APS x candidatos (numpy cuando está instalado).
+
+El problema de ubicación (elegir hasta `max_stations` sitios que
+minimicen Σ toneladas × CRT) se resuelve con una heurística:
+1. Greedy: se abre el sitio que más ahorra mientras haya ahorro
+2. Búsqueda local: se intercambia cada sitio abierto por el mejor cerrado
+Con problemas grandes se corren varios arranques (greedy aleatorizado)
+en procesos separados y se conserva el mejor.
+"""
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session
+
+from app.core.exceptions import ValidationError
+from app.models.disposal_site import DisposalSiteType
+from app.repositories.aps_repository import APSMonthlyDataRepository
+from app.services.spatial_index import SpatialIndex, distance_matrix_km, effective_distances
+from app.services.spatial_planning import SpatialPlanningService
+from app.tariff_core.stratum_tariffs import load_numpy
+from app.tariff_core.tariff_calculator_720 import TariffCalculator720
+
+OPTIMIZER_WORKERS = int(os.getenv("OPTIMIZER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Celdas APS x candidatos desde las que se usan varios procesos
+OPTIMIZER_PARALLEL_MIN_CELLS = int(os.getenv("OPTIMIZER_PARALLEL_MIN_CELLS", "250000"))
+OPTIMIZER_RESTARTS = int(os.getenv("OPTIMIZER_RESTARTS", "8"))
+# Km por vía / km en línea recta para las rutas hacia y desde la estación
+ROAD_CIRCUITY_FACTOR = float(os.getenv("ROAD_CIRCUITY_FACTOR", "1.3"))
+
+MAX_SWAP_ROUNDS = 50
+
+
+# ========================================
+# MODELO DE COSTO VECTORIZADO
+# ========================================
+
+def crt_function_values(
+    calculator: TariffCalculator720,
+    function: str,
+    distances_km,
+    tons,
+    coastal_factors,
+):
+    """
+    f1 o f2 de calculate_crt (con inflación y ajuste costero, sin redondeo)
+    para un vector de APS o una matriz APS x candidatos.
+    """
+    base, distance_factor, scale_factor = (
+        (calculator.F1_BASE, calculator.F1_DISTANCE_FACTOR, calculator.F1_SCALE_FACTOR)
+        if function == "f1" else
+        (calculator.F2_BASE, calculator.F2_DISTANCE_FACTOR, calculator.F2_SCALE_FACTOR)
+    )
+    inflation = 1 + float(calculator.inflation_rate)
+    np = load_numpy()
+    if np is None:
+        def value(distance, tons_month, coastal):
+            scale = scale_factor / tons_month if tons_month > 0 else 0
+            return (base + distance_factor * distance + scale) * inflation * coastal
+
+        if distances_km and isinstance(distances_km[0], list):
+            return [
+                [value(distance, tons_month, coastal) for distance in row]
+                for row, tons_month, coastal in zip(distances_km, tons, coastal_factors)
+            ]
+        return [value(*args) for args in zip(distances_km, tons, coastal_factors)]
+
+    distances = np.asarray(distances_km, dtype=float)
+    tons = np.asarray(tons, dtype=float)
+    coastal = np.asarray(coastal_factors, dtype=float)
+    with np.errstate(divide="ignore"):
+        scale = np.where(tons > 0, scale_factor / np.where(tons > 0, tons, 1.0), 0.0)
+    if distances.ndim == 2:
+        scale, coastal = scale[:, None], coastal[:, None]
+    return (base + distance_factor * distances + scale) * inflation * coastal
+
+
+# ========================================
+# HEURÍSTICA (funciones puras, se ejecutan en procesos)
+# ========================================
+
+def _column(matrix, column: int):
+    np = load_numpy()
+    return matrix[:, column] if np is not None else [row[column] for row in matrix]
+
+
+def _minimum(left, right):
+    np = load_numpy()
+    return np.minimum(left, right) if np is not None else [min(a, b) for a, b in zip(left, right)]
+
+
+def _weighted_total(tons, costs) -> float:
+    np = load_numpy()
+    return float(np.dot(tons, costs)) if np is not None else sum(t * c for t, c in zip(tons, costs))
+
+
+def _gains(matrix, tons, current) -> List[float]:
+    """Ahorro mensual de abrir cada candidato dado el costo actual por APS"""
+    np = load_numpy()
+    if np is not None:
+        return (tons[:, None] * np.maximum(current[:, None] - matrix, 0.0)).sum(axis=0).tolist()
+    gains = [0.0] * (len(matrix[0]) if matrix else 0)
+    for row, tons_month, cost in zip(matrix, tons, current):
+        for column, value in enumerate(row):
+            if value < cost:
+                gains[column] += tons_month * (cost - value)
+    return gains
+
+
+def _costs_with(baseline, matrix, stations: Sequence[int]):
+    current = baseline
+    for column in stations:
+        current = _minimum(current, _column(matrix, column))
+    return current
+
+
+def solve_location(baseline, matrix, tons, max_stations: int, seed: int = 0) -> Tuple[List[int], float]:
+    """
+    Greedy + intercambios. seed 0 es el greedy puro; los demás eligen al
+    azar entre los tres mejores candidatos de cada paso.
+    """
+    np = load_numpy()
+    if np is not None:
+        baseline, matrix, tons = (np.asarray(value, dtype=float) for value in (baseline, matrix, tons))
+    rng = random.Random(seed)
+
+    stations: List[int] = []
+    current = baseline
+    while len(stations) < max_stations:
+        gains = _gains(matrix, tons, current)
+        ranked = sorted(
+            (column for column, gain in enumerate(gains) if gain > 1e-9 and column not in stations),
+            key=lambda column: -gains[column]
+        )
+        if not ranked:
+            break
+        column = ranked[0] if seed == 0 else rng.choice(ranked[:3])
+        stations.append(column)
+        current = _minimum(current, _column(matrix, column))
+
+    cost = _weighted_total(tons, current)
+    for _ in range(MAX_SWAP_ROUNDS):
+        improved = False
+        for position, station in enumerate(stations):
+            others = stations[:position] + stations[position + 1:]
+            without = _costs_with(baseline, matrix, others)
+            gains = _gains(matrix, tons, without)
+            for column in others:
+                gains[column] = 0.0
+            best = max(range(len(gains)), key=gains.__getitem__)
+            new_cost = _weighted_total(tons, without) - gains[best]
+            if best != station and new_cost < cost - 1e-6:
+                stations[position] = best
+                cost = new_cost
+                improved = True
+        if not improved:
+            break
+    return sorted(stations), cost
+
+
+def _solve_seed(args):
+    return solve_location(*args)
+
+
+def solve_location_parallel(
+    baseline, matrix, tons, max_stations: int,
+    restarts: int = OPTIMIZER_RESTARTS, workers: int = OPTIMIZER_WORKERS,
+) -> Tuple[List[int], float]:
+    """Mejor solución entre varios arranques, en paralelo si el problema es grande"""
+    cells = len(baseline) * (len(matrix[0]) if len(matrix) else 0)
+    tasks = [(baseline, matrix, tons, max_stations, seed) for seed in range(max(1, restarts))]
+    if workers > 1 and len(tasks) > 1 and cells >= OPTIMIZER_PARALLEL_MIN_CELLS:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)), mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            results = list(pool.map(_solve_seed, tasks))
+    else:
+        results = [_solve_seed(task) for task in tasks]
+    return min(results, key=lambda result: (result[1], result[0]))
+
+
+# ========================================
+# SERVICIO
+# ========================================
+
+class TransferStationOptimizer:
+    """Ranking de sitios para estaciones de transferencia compartidas"""
+
+    def __init__(self, session: Session, company_id: Optional[int] = None, calculator: Optional[TariffCalculator720] = None):
+        self.session = session
+        self.planning = SpatialPlanningService(session, company_id)
+        self.calculator = calculator or TariffCalculator720()
+
+    def _candidates(self, include_aps_centroids: bool, extra: Sequence[Dict]) -> List[Dict]:
+        candidates = [
+            {"source": "registered", "site_id": site.id, "name": site.name,
+             "latitude": site.latitude, "longitude": site.longitude}
+            for site in self.planning.sites_of_type(DisposalSiteType.TRANSFER_STATION)
+        ]
+        if include_aps_centroids:
+            candidates += [
+                {"source": "aps_centroid", "aps_id": aps.id, "name": f"Centroide {aps.code}",
+                 "latitude": aps.centroid_lat, "longitude": aps.centroid_lon}
+                for aps in self.planning.aps
+            ]
+        candidates += [
+            {"source": "custom", "name": point.get("name") or f"Punto {index + 1}",
+             "latitude": point["latitude"], "longitude": point["longitude"]}
+            for index, point in enumerate(extra)
+        ]
+        return candidates
+
+    def optimize(
+        self,
+        aps_ids: Optional[List[int]] = None,
+        max_stations: int = 1,
+        include_aps_centroids: bool = True,
+        candidates: Sequence[Dict] = (),
+        top: int = 10,
+    ) -> Dict:
+        np = load_numpy()
+        aps_list = self.planning.aps
+        if aps_ids is not None:
+            wanted = set(aps_ids)
+            aps_list = [aps for aps in aps_list if aps.id in wanted]
+        if not aps_list:
+            raise ValidationError("aps_ids", "No hay APS con centroide para optimizar")
+
+        landfills = SpatialIndex([
+            (site.id, site.latitude, site.longitude)
+            for site in self.planning.sites_of_type(DisposalSiteType.LANDFILL)
+        ])
+        if not len(landfills):
+            raise ValidationError("landfill", "Registre al menos un relleno sanitario con coordenadas")
+
+        sites = self._candidates(include_aps_centroids, candidates)
+        if not sites:
+            raise ValidationError("candidates", "No hay sitios candidatos")
+
+        # Datos por APS: toneladas promedio (6 meses), distancia efectiva registrada
+        stats = APSMonthlyDataRepository(self.session).get_summary_stats_batch([aps.id for aps in aps_list])
+        averages = [stats[aps.id]["six_month_averages"] or {} for aps in aps_list]
+        tons = [row.get("tons_collected_non_recyclable", 0.0) for row in averages]
+        subscribers = [row.get("num_subscribers_total", 0.0) for row in averages]
+        effective = effective_distances(
+            [aps.distance_to_landfill_km for aps in aps_list],
+            [aps.unpaved_road_percentage for aps in aps_list],
+        )
+        unpaved_factor = [
+            value / aps.distance_to_landfill_km if aps.distance_to_landfill_km else 1.0
+            for value, aps in zip(effective, aps_list)
+        ]
+        coastal = [
+            1 + self.calculator.CRT_COASTAL_ADJUSTMENT if aps.is_coastal_municipality else 1.0
+            for aps in aps_list
+        ]
+
+        # Costo actual: f1, o MIN(f1, f2) si ya usa estación (como calculate_crt)
+        f1 = crt_function_values(self.calculator, "f1", effective, tons, coastal)
+        f2_current = crt_function_values(self.calculator, "f2", effective, tons, coastal)
+        f1_list = f1.tolist() if np is not None else f1
+        f2_list = f2_current.tolist() if np is not None else f2_current
+        baseline = [
+            min(direct, transfer) if aps.uses_transfer_station and (aps.transfer_station_distance_km or 0) > 0 else direct
+            for aps, direct, transfer in zip(aps_list, f1_list, f2_list)
+        ]
+
+        # Ruta por cada candidato: centroide -> estación -> relleno más cercano a la estación
+        site_lats = [site["latitude"] for site in sites]
+        site_lons = [site["longitude"] for site in sites]
+        to_landfill = [distance for _, distance in landfills.nearest_batch(site_lats, site_lons)]
+        legs = distance_matrix_km(
+            [aps.centroid_lat for aps in aps_list], [aps.centroid_lon for aps in aps_list], site_lats, site_lons
+        )
+        if np is not None:
+            via = ROAD_CIRCUITY_FACTOR * (
+                legs * np.asarray(unpaved_factor)[:, None] + np.asarray(to_landfill)[None, :]
+            )
+        else:
+            via = [
+                [ROAD_CIRCUITY_FACTOR * (leg * factor + tail) for leg, tail in zip(row, to_landfill)]
+                for row, factor in zip(legs, unpaved_factor)
+            ]
+        matrix = crt_function_values(self.calculator, "f2", via, tons, coastal)
+
+        if np is not None:
+            baseline, tons = np.asarray(baseline, dtype=float), np.asarray(tons, dtype=float)
+        stations, _ = solve_location_parallel(baseline, matrix, tons, min(max_stations, len(sites)))
+        # Ahorro de cada sitio si fuera la única estación nueva
+        ranking = _gains(matrix, tons, baseline)
+        if np is not None:
+            baseline, tons = baseline.tolist(), tons.tolist()
+        return self._build_result(aps_list, sites, baseline, matrix, tons, subscribers, stations, ranking, top)
+
+    def _build_result(self, aps_list, sites, baseline, matrix, tons, subscribers, stations, ranking, top) -> Dict:
+        rows = matrix.tolist() if hasattr(matrix, "tolist") else matrix
+
+        savings = {column: 0.0 for column in stations}
+        served = {column: [] for column in stations}
+        aps_impact, assigned = [], []
+        for aps, row, current, tons_month, subscribers_total in zip(aps_list, rows, baseline, tons, subscribers):
+            station = min(stations, key=lambda column: row[column], default=None)
+            projected = current
+            if station is not None and row[station] < current:
+                projected = row[station]
+                savings[station] += tons_month * (current - projected)
+                served[station].append(aps.id)
+            else:
+                station = None
+            assigned.append(station)
+            monthly_change = tons_month * (projected - current)
+            aps_impact.append({
+                "aps_id": aps.id,
+                "code": aps.code,
+                "avg_tons_month": round(tons_month, 3),
+                "current_crt": round(current, 2),
+                "projected_crt": round(projected, 2),
+                "crt_change_per_ton": round(projected - current, 2),
+                "monthly_cost_change": round(monthly_change, 2),
+                "change_per_subscriber": round(monthly_change / subscribers_total, 2) if subscribers_total else None,
+            })
+
+        ordered = sorted(stations, key=lambda column: -savings[column])
+        for impact, station in zip(aps_impact, assigned):
+            impact["station_rank"] = None if station is None else ordered.index(station) + 1
+
+        ranked_sites = sorted(range(len(sites)), key=lambda column: -ranking[column])[:top]
+        return {
+            "stations": [
+                {
+                    "rank": rank,
+                    **sites[column],
+                    "monthly_savings": round(savings[column], 2),
+                    "served_aps_ids": served[column],
+                }
+                for rank, column in enumerate(ordered, start=1)
+            ],
+            "single_site_ranking": [
+                {**sites[column], "monthly_savings": round(ranking[column], 2)}
+                for column in ranked_sites if ranking[column] > 0
+            ],
+            "aps_impact": aps_impact,
+            "total_monthly_savings": round(sum(savings.values()), 2),
+            "parameters": {
+                "road_circuity_factor": ROAD_CIRCUITY_FACTOR,
+                "candidates": len(sites),
+                "aps": len(aps_list),
+            },
+        }
@@ -0,0 +1,120 @@
+"""
+Ingesta de tiquetes de báscula
+
+Cada lote se procesa en una sola transacción:
+1. Descarta tiquetes repetidos dentro del lote
+2. Inserta los tiquetes con INSERT ... ON CONFLICT DO NOTHING RETURNING:
+   los ya ingeridos (también por un lote concurrente) se omiten
+3. Acumula los deltas de los insertados por APS/tipo/día/mes en memoria
+   (WeighTicketAggregator)
+4. Aplica los deltas a WeighTicketRollup con un upsert
+5. Copia el total mensual a APSMonthlyData (QNA / QRS) si el mes ya existe
+
+El costo por lote es un número fijo de sentencias, independiente del
+número de tiquetes, lo que permite decenas de miles de tiquetes por minuto.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlmodel import Session
+
+from app.repositories.weigh_ticket_repository import RollupKey, WeighTicketRepository
+from app.schemas.weigh_ticket import WeighTicketCreate
+
+
+class WeighTicketAggregator:
+    """Acumula toneladas y número de tiquetes por bucket diario y mensual"""
+
+    def __init__(self):
+        self.deltas: Dict[RollupKey, Tuple[float, int]] = {}
+
+    def add(self, aps_id: int, ticket_type: str, weighed_at: datetime, net_tons: float) -> None:
+        day = weighed_at.strftime("%Y-%m-%d")
+        for granularity, bucket in (("day", day), ("month", day[:7])):
+            key = (aps_id, granularity, bucket, ticket_type)
+            tons, count = self.deltas.get(key, (0.0, 0))
+            self.deltas[key] = (tons + net_tons, count + 1)
+
+    def months(self) -> List[Tuple[int, str]]:
+        """(aps_id, período) tocados por el lote"""
+        return sorted({
+            (aps_id, bucket)
+            for aps_id, granularity, bucket, _ in self.deltas
+            if granularity == "month"
+        })
+
+
+class WeighTicketIngestionService:
+    """Servicio de ingesta de lotes de tiquetes"""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.repository = WeighTicketRepository(session)
+
+    def ingest(self, tickets: Iterable[WeighTicketCreate]) -> Dict[str, int]:
+        """Ingresa un lote y actualiza los rollups; hace commit al final"""
+        tickets = list(tickets)
+
+        # Reintentos de la báscula: el número de tiquete es idempotente
+        by_number: Dict[str, WeighTicketCreate] = {}
+        for ticket in tickets:
+            by_number.setdefault(ticket.ticket_number, ticket)
+
+        now = datetime.utcnow()
+        rows = []
+        for ticket in by_number.values():
+            rows.append({
+                "ticket_number": ticket.ticket_number,
+                "aps_id": ticket.aps_id,
+                "vehicle_plate": ticket.vehicle_plate.upper(),
+                "ticket_type": ticket.ticket_type,
+                # Las fechas se guardan sin zona horaria, como el resto del modelo
+                "weighed_at": ticket.weighed_at.replace(tzinfo=None),
+                "net_tons": ticket.net_tons,
+                "received_at": now,
+            })
+
+        result = {
+            "received": len(tickets),
+            "inserted": 0,
+            "duplicates": len(tickets),
+            "rollups_updated": 0,
+            "monthly_data_updated": 0,
+        }
+        if not rows:
+            return result
+
+        try:
+            inserted = self.repository.insert_new(rows)
+            result["inserted"] = len(inserted)
+            result["duplicates"] = len(tickets) - len(inserted)
+            if not inserted:
+                self.session.commit()
+                return result
+
+            # Sólo los tiquetes que insertó este lote suman a los rollups
+            aggregator = WeighTicketAggregator()
+            for row in rows:
+                if row["ticket_number"] in inserted:
+                    aggregator.add(row["aps_id"], row["ticket_type"], row["weighed_at"], row["net_tons"])
+
+            result["rollups_updated"] = self.repository.add_to_rollups(aggregator.deltas)
+            totals = self.repository.get_monthly_totals(aggregator.months())
+            result["monthly_data_updated"] = self.repository.sync_monthly_data(totals)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return result
+
+    def get_rollups(self, aps_id: int, period: str) -> Dict:
+        """Totales del mes por tipo y detalle diario"""
+        monthly: Dict[str, Dict[str, float]] = {}
+        daily = []
+        for rollup in self.repository.get_rollups(aps_id, period):
+            values = {"tons": round(rollup.tons, 6), "ticket_count": rollup.ticket_count}
+            if rollup.granularity == "month":
+                monthly[rollup.ticket_type] = values
+            else:
+                daily.append({"date": rollup.bucket, "ticket_type": rollup.ticket_type, **values})
+        return {"aps_id": aps_id, "period": period, "monthly": monthly, "daily": daily}
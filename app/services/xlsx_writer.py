@@ -0,0 +1,213 @@
+"""
+Escritor XLSX en streaming (sólo librería estándar)
+
+Cada hoja se escribe fila por fila directamente dentro del zip del libro,
+sin mantener las filas en memoria: el consumo es constante sin importar
+el número de filas. Las hojas se escriben una a la vez, en orden.
+
+Usage:
+    with StreamingXlsxWriter(fileobj) as book:
+        book.write_sheet("Resumen", rows, header=["APS", "Período", "Tarifa"])
+"""
+
+import re
+import zipfile
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+# Estilos: 0 = normal, 1 = encabezado (negrilla)
+_STYLE_HEADER = 1
+
+_CONTENT_TYPES_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '</styleSheet>'
+)
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+# Caracteres de control no permitidos en XML 1.0
+_INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# Caracteres no permitidos en nombres de hoja de Excel
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]\*\?/\\:]")
+_MAX_SHEET_NAME = 31
+
+
+def column_letter(index: int) -> str:
+    """Índice de columna (0 = A) a letra de Excel: 0 -> A, 26 -> AA"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell(reference: str, value, style: int = 0) -> str:
+    style_attr = f' s="{style}"' if style else ""
+    if value is None or value == "":
+        return ""
+    if isinstance(value, bool):
+        return f'<c r="{reference}" t="b"{style_attr}><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        if value != value or value in (float("inf"), float("-inf")):
+            value = str(value)
+        else:
+            return f'<c r="{reference}"{style_attr}><v>{value!r}</v></c>'
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    text = _INVALID_XML_CHARS.sub("", str(value))
+    return (
+        f'<c r="{reference}" t="inlineStr"{style_attr}>'
+        f'<is><t xml:space="preserve">{escape(text)}</t></is></c>'
+    )
+
+
+def _row(number: int, values: Sequence, style: int = 0) -> str:
+    cells = "".join(
+        _cell(f"{column_letter(index)}{number}", value, style)
+        for index, value in enumerate(values)
+    )
+    return f'<row r="{number}">{cells}</row>'
+
+
+class StreamingXlsxWriter:
+    """
+    Libro XLSX escrito en streaming sobre `fileobj` (archivo, BytesIO o
+    cualquier stream binario; no necesita ser seekable).
+
+    Los textos se escriben como inlineStr (sin tabla de strings
+    compartidos) para no acumular estado entre filas.
+    """
+
+    def __init__(self, fileobj, compresslevel: int = 6):
+        self._zip = zipfile.ZipFile(
+            fileobj, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel
+        )
+        self._sheets: List[str] = []
+        self._closed = False
+
+    def __enter__(self) -> "StreamingXlsxWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
+
+    def _sheet_name(self, name: str) -> str:
+        base = _INVALID_SHEET_CHARS.sub("_", name).strip("'")[:_MAX_SHEET_NAME] or "Hoja"
+        candidate, suffix = base, 2
+        while candidate.lower() in (sheet.lower() for sheet in self._sheets):
+            tag = f" ({suffix})"
+            candidate = base[:_MAX_SHEET_NAME - len(tag)] + tag
+            suffix += 1
+        return candidate
+
+    def write_sheet(
+        self,
+        name: str,
+        rows: Iterable[Sequence],
+        header: Optional[Sequence[str]] = None
+    ) -> int:
+        """
+        Escribe una hoja completa consumiendo `rows` (puede ser un generador).
+        Retorna el número de filas escritas (sin contar el encabezado).
+        """
+        if self._closed:
+            raise ValueError("El libro ya fue cerrado")
+        self._sheets.append(self._sheet_name(name))
+        path = f"xl/worksheets/sheet{len(self._sheets)}.xml"
+
+        written = 0
+        with self._zip.open(path, "w") as stream:
+            stream.write(_SHEET_HEAD.encode("utf-8"))
+            number = 1
+            if header:
+                stream.write(_row(number, header, _STYLE_HEADER).encode("utf-8"))
+                number += 1
+            for values in rows:
+                stream.write(_row(number, values).encode("utf-8"))
+                number += 1
+                written += 1
+            stream.write(_SHEET_TAIL.encode("utf-8"))
+        return written
+
+    def close(self) -> None:
+        """Escribe libro, relaciones y tipos de contenido y cierra el zip"""
+        if self._closed:
+            return
+        if not self._sheets:
+            self.write_sheet("Hoja", [])
+        self._closed = True
+
+        sheets = "".join(
+            f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{index}" r:id="rId{index}"/>'
+            for index, name in enumerate(self._sheets, start=1)
+        )
+        self._zip.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheets}</sheets></workbook>'
+        )
+
+        relationships = "".join(
+            f'<Relationship Id="rId{index}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{index}.xml"/>'
+            for index in range(1, len(self._sheets) + 1)
+        )
+        styles_id = len(self._sheets) + 1
+        self._zip.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{relationships}'
+            f'<Relationship Id="rId{styles_id}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/>'
+            '</Relationships>'
+        )
+        self._zip.writestr("xl/styles.xml", _STYLES)
+        self._zip.writestr("_rels/.rels", _ROOT_RELS)
+
+        overrides = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{index}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for index in range(1, len(self._sheets) + 1)
+        )
+        self._zip.writestr("[Content_Types].xml", _CONTENT_TYPES_HEAD + overrides + "</Types>")
+        self._zip.close()
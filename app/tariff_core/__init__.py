@@ -0,0 +1,47 @@
+"""
+Núcleo de cálculo tarifario de la Resolución CRA 720
+
+Sólo usa la biblioteca estándar (numpy es opcional y se carga en la
+primera evaluación vectorizada): no importa SQLModel, los modelos ni los
+esquemas, así que carga en milisegundos y sirve para workers de procesos,
+CLIs y notebooks. TariffCalculationService es el adaptador que arma los
+TariffInput desde la BD y guarda los resultados.
+
+    from app.tariff_core import APSProfile, TariffInput, calculate, calculate_batch
+"""
+from .engine import (
+    COST_COMPONENTS,
+    DEFAULT_SUBSIDY_FACTORS,
+    SUBSIDY_FACTOR_PREFIX,
+    batch_task,
+    calculate,
+    calculate_batch,
+    evaluate,
+    subsidy_factors_from,
+)
+from .records import APSProfile, TariffInput, TariffResult
+from .rule_sets import RuleSet, compiled_rule_set_for, register_rule_set, rule_set_for, rule_sets
+from .tariff_calculator_720 import ARITHMETIC_DECIMAL, ARITHMETIC_FLOAT, OFFICIAL_TARIFF_ARITHMETIC, TariffCalculator720
+
+__all__ = [
+    "APSProfile",
+    "ARITHMETIC_DECIMAL",
+    "ARITHMETIC_FLOAT",
+    "COST_COMPONENTS",
+    "DEFAULT_SUBSIDY_FACTORS",
+    "OFFICIAL_TARIFF_ARITHMETIC",
+    "RuleSet",
+    "SUBSIDY_FACTOR_PREFIX",
+    "TariffCalculator720",
+    "TariffInput",
+    "TariffResult",
+    "batch_task",
+    "calculate",
+    "calculate_batch",
+    "compiled_rule_set_for",
+    "evaluate",
+    "register_rule_set",
+    "rule_set_for",
+    "rule_sets",
+    "subsidy_factors_from",
+]
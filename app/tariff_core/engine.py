@@ -0,0 +1,175 @@
+"""
+Cálculo de tarifas sobre registros tipados (sin BD ni ORM)
+
+calculate() evalúa el grafo completo de un TariffInput; calculate_batch()
+evalúa muchos: los componentes de costo fila por fila y las tarifas por
+estrato de todas las filas de una misma versión de la regla en una sola
+operación sobre la matriz fila x categoría. batch_task() es la forma que
+se manda a un pool de procesos: el proceso sólo importa este paquete.
+
+Usage:
+    from app.tariff_core import APSProfile, TariffInput, calculate
+
+    profile = APSProfile(segment="2", billing_type="monthly", distance_km=18.0)
+    result = calculate(TariffInput(aps=profile, averages=averages, period="2025-06"))
+    result.tariffs["stratum_4"]["final"]
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .formula_graph import COST_OUTPUTS, FormulaEvaluation, tariff_inputs
+from .records import TariffInput, TariffResult
+from .rule_sets import CompiledRuleSet, compiled_rule_set_for
+from .stratum_tariffs import COST_FIELDS, build_stratum_table, evaluate_stratum_tariffs, row_to_category_dict
+from .tariff_calculator_720 import to_float
+
+# Factores de subsidio/contribución por defecto (negativo = subsidio)
+DEFAULT_SUBSIDY_FACTORS = {
+    "stratum_1": -0.70,  # 70% subsidio
+    "stratum_2": -0.40,  # 40% subsidio
+    "stratum_3": -0.15,  # 15% subsidio
+    "stratum_4": 0.00,   # Sin subsidio ni contribución
+    "stratum_5": 0.20,   # 20% contribución
+    "stratum_6": 0.20,   # 20% contribución
+    "commercial": 0.30   # 30% contribución
+}
+
+# Prefijo de los parámetros con vigencia que son factores de subsidio
+SUBSIDY_FACTOR_PREFIX = "subsidy_factor."
+
+# Componentes escalares de TariffResult.costs
+COST_COMPONENTS = ("ccs", "clus", "cbls", "cft", "crt", "cdf", "ctl", "cvna", "vba")
+
+
+def subsidy_factors_from(parameters: Dict[str, float], base: Dict[str, float]) -> Dict[str, float]:
+    """Factores de subsidio/contribución: `base` con los valores vigentes encima"""
+    return {
+        **base,
+        **{
+            name[len(SUBSIDY_FACTOR_PREFIX):]: value
+            for name, value in parameters.items() if name.startswith(SUBSIDY_FACTOR_PREFIX)
+        },
+    }
+
+
+def rules_for(tariff_input: TariffInput) -> CompiledRuleSet:
+    """Versión de la regla vigente en el período del cálculo, compilada"""
+    return compiled_rule_set_for(tariff_input.period, tariff_input.exact)
+
+
+def resolved_subsidy_factors(tariff_input: TariffInput) -> Dict[str, float]:
+    return tariff_input.subsidy_factors or subsidy_factors_from(tariff_input.parameters, DEFAULT_SUBSIDY_FACTORS)
+
+
+def graph_inputs(tariff_input: TariffInput) -> Dict:
+    """Entradas del grafo de fórmulas"""
+    return tariff_inputs(
+        tariff_input.aps,
+        tariff_input.averages,
+        resolved_subsidy_factors(tariff_input),
+        tariff_input.extra_categories,
+        tariff_input.municipality_costs,
+        tariff_input.parameters,
+    )
+
+
+def evaluate(tariff_input: TariffInput, targets: Optional[Sequence[str]] = None) -> FormulaEvaluation:
+    """
+    Evaluación del grafo con los valores intermedios (Decimal en modo
+    exacto); `targets` limita la evaluación a esos valores
+    """
+    return rules_for(tariff_input).graph.evaluate(graph_inputs(tariff_input), targets=targets)
+
+
+def calculate(tariff_input: TariffInput) -> TariffResult:
+    """Componentes y tarifas por estrato de un cálculo"""
+    compiled = rules_for(tariff_input)
+    values = compiled.graph.evaluate(graph_inputs(tariff_input)).values
+    return TariffResult(
+        period=tariff_input.period,
+        rule_set_version=compiled.version,
+        exact=tariff_input.exact,
+        costs=to_float({name: values[name] for name in COST_COMPONENTS}),
+        tariffs=to_float(values["tariffs"]),
+        trna=to_float(values["trna_by_stratum"]),
+        subsidy_factors=to_float(values["subsidy_factors"]),
+    )
+
+
+def calculate_batch(
+    inputs: Sequence[TariffInput],
+    errors: Optional[Dict[int, str]] = None
+) -> List[Optional[TariffResult]]:
+    """
+    Calcula muchos TariffInput (mismos resultados que calculate)
+
+    Args:
+        errors: si se pasa, las filas que no se pueden calcular quedan
+            como None y su mensaje en errors[índice]; si no, se propaga
+            la excepción
+
+    Returns:
+        Un resultado por entrada, en el mismo orden
+    """
+    # 1. Componentes de costo por fila, con la regla vigente en su período;
+    #    las versiones que reemplazan el nodo por estrato se calculan
+    #    completas fila por fila
+    results: List[Optional[TariffResult]] = [None] * len(inputs)
+    computed: List[Tuple[int, TariffInput, CompiledRuleSet, Dict, Dict]] = []
+    for index, tariff_input in enumerate(inputs):
+        compiled = rules_for(tariff_input)
+        try:
+            if compiled.overrides_stratum_tariffs:
+                results[index] = calculate(tariff_input)
+                continue
+            values = compiled.graph.evaluate(graph_inputs(tariff_input), targets=COST_OUTPUTS).values
+        except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+            if errors is None:
+                raise
+            errors[index] = f"{type(e).__name__}: {e}"
+            continue
+        computed.append((index, tariff_input, compiled, values, resolved_subsidy_factors(tariff_input)))
+
+    # 2. Tarifas por estrato: una evaluación por versión, aritmética y
+    #    conjunto de categorías
+    tables = [
+        build_stratum_table(
+            values["subscribers_by_stratum"], subsidies,
+            compiled.calculator.PRODUCTION_FACTORS, tariff_input.extra_categories
+        )
+        for _, tariff_input, compiled, values, subsidies in computed
+    ]
+    groups: Dict[Tuple, List[int]] = {}
+    for position, (_, tariff_input, compiled, _, _) in enumerate(computed):
+        key = (compiled.version, tariff_input.exact, tuple(tables[position][0]))
+        groups.setdefault(key, []).append(position)
+
+    for positions in groups.values():
+        compiled = computed[positions[0]][2]
+        categories, factors = tables[positions[0]][0], tables[positions[0]][1]
+        evaluated = evaluate_stratum_tariffs(
+            {field: [computed[position][3]["costs"][field] for position in positions] for field in COST_FIELDS},
+            factors,
+            [tables[position][2] for position in positions],
+            [tables[position][3] for position in positions],
+            [tables[position][4] for position in positions],
+            exact=compiled.calculator.exact
+        )
+        for row, position in enumerate(positions):
+            index, tariff_input, _, values, subsidies = computed[position]
+            trna, tariffs = row_to_category_dict(categories, evaluated, row)
+            results[index] = TariffResult(
+                period=tariff_input.period,
+                rule_set_version=compiled.version,
+                exact=tariff_input.exact,
+                costs=to_float({name: values[name] for name in COST_COMPONENTS}),
+                tariffs=tariffs,
+                trna=trna,
+                subsidy_factors=to_float(subsidies),
+            )
+    return results
+
+
+def batch_task(inputs: Sequence[TariffInput]) -> Tuple[List[Optional[TariffResult]], Dict[int, str]]:
+    """calculate_batch para un pool de procesos: (resultados, errores por índice)"""
+    errors: Dict[int, str] = {}
+    return calculate_batch(inputs, errors), errors
@@ -0,0 +1,513 @@
+"""
+Grafo de fórmulas de la Resolución 720
+
+La tarifa es un grafo dirigido acíclico:
+
+    CCS, CLUS, CBLS ──> CFT ─────────────┐
+    CRT, CDF, CTL ──> CVNA ──────────────┤
+    CRT, CDF, municipio ──> VBA ─────────┼──> costos ──> TRNA, TFS
+    toneladas ──> TRBL, TRLU, TRRA, TRA ─┘        ^
+    suscriptores, subsidios ──> tabla por estrato ┘
+
+Cada nodo declara sus entradas; el grafo se compila una vez (orden
+topológico y descendientes de cada valor). Una evaluación guarda todos
+los valores intermedios para auditoría y, cuando cambia una entrada,
+recalcula sólo los nodos aguas abajo. Si un nodo recalculado produce el
+mismo valor, sus dependientes no se vuelven a evaluar.
+
+Usage:
+    graph = build_tariff_graph(TariffCalculator720())
+    evaluation = graph.evaluate(tariff_inputs(aps, averages, subsidy_factors))
+    evaluation["tariffs"]["stratum_4"]["final"]
+    evaluation.update({"leachate_volume_m3": 420.0})  # -> ["ctl", "ctl_details", "cvna", ...]
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .records import APSProfile
+from .stratum_tariffs import build_stratum_table, evaluate_stratum_tariffs, row_to_category_dict
+from .tariff_calculator_720 import TariffCalculator720
+
+
+class FormulaNode:
+    """
+    Nodo del grafo: `func` recibe las entradas como argumentos con nombre y
+    devuelve un valor, o una tupla si el nodo produce varias salidas
+    """
+
+    __slots__ = ("outputs", "inputs", "func", "reference")
+
+    def __init__(
+        self,
+        outputs: Sequence[str],
+        inputs: Sequence[str],
+        func: Callable,
+        reference: Optional[str] = None
+    ):
+        self.outputs = tuple(outputs)
+        self.inputs = tuple(inputs)
+        self.func = func
+        self.reference = reference
+
+    @property
+    def name(self) -> str:
+        return self.outputs[0]
+
+    def compute(self, values: Dict) -> Tuple:
+        result = self.func(**{name: values[name] for name in self.inputs})
+        return result if len(self.outputs) > 1 else (result,)
+
+
+class FormulaGraph:
+    """
+    Grafo compilado: valida entradas y ciclos, y precalcula el orden
+    topológico y los nodos afectados por cada valor
+    """
+
+    def __init__(self, inputs: Iterable[str], nodes: Iterable[FormulaNode]):
+        self.inputs = tuple(inputs)
+        self.nodes: List[FormulaNode] = []
+        self._producer: Dict[str, FormulaNode] = {}
+
+        known = set(self.inputs)
+        pending = list(nodes)
+        for node in pending:
+            for output in node.outputs:
+                if output in known or output in self._producer:
+                    raise ValueError(f"Valor duplicado en el grafo: {output}")
+                self._producer[output] = node
+        known.update(self._producer)
+        for node in pending:
+            missing = [name for name in node.inputs if name not in known]
+            if missing:
+                raise ValueError(f"Nodo {node.name}: entradas desconocidas {missing}")
+
+        # Orden topológico (Kahn)
+        resolved = set(self.inputs)
+        while pending:
+            ready = [node for node in pending if all(name in resolved for name in node.inputs)]
+            if not ready:
+                raise ValueError(f"Ciclo en el grafo: {[node.name for node in pending]}")
+            for node in ready:
+                self.nodes.append(node)
+                resolved.update(node.outputs)
+            pending = [node for node in pending if node not in ready]
+        self._position = {id(node): index for index, node in enumerate(self.nodes)}
+
+        # Consumidores directos y descendientes (en orden topológico) de cada valor
+        consumers: Dict[str, List[FormulaNode]] = {name: [] for name in known}
+        for node in self.nodes:
+            for name in node.inputs:
+                consumers[name].append(node)
+        self._downstream: Dict[str, List[FormulaNode]] = {}
+        for name in known:
+            reached = {}
+            stack = list(consumers[name])
+            while stack:
+                node = stack.pop()
+                if id(node) in reached:
+                    continue
+                reached[id(node)] = node
+                for output in node.outputs:
+                    stack.extend(consumers[output])
+            self._downstream[name] = sorted(reached.values(), key=lambda n: self._position[id(n)])
+
+    def evaluate(self, inputs: Dict, targets: Optional[Iterable[str]] = None) -> "FormulaEvaluation":
+        """Evalúa el grafo (o sólo los ancestros de `targets`)"""
+        return FormulaEvaluation(self, inputs, targets)
+
+    def downstream(self, names: Iterable[str]) -> List[FormulaNode]:
+        """Nodos afectados por un cambio en `names`, en orden topológico"""
+        affected = {}
+        for name in names:
+            for node in self._downstream[name]:
+                affected[id(node)] = node
+        return sorted(affected.values(), key=lambda n: self._position[id(n)])
+
+    def required_nodes(self, targets: Iterable[str]) -> List[FormulaNode]:
+        """Nodos necesarios para calcular `targets`, en orden topológico"""
+        required = {}
+        stack = [self._producer[name] for name in targets if name in self._producer]
+        while stack:
+            node = stack.pop()
+            if id(node) in required:
+                continue
+            required[id(node)] = node
+            stack.extend(self._producer[name] for name in node.inputs if name in self._producer)
+        return sorted(required.values(), key=lambda n: self._position[id(n)])
+
+    def describe(self) -> List[Dict]:
+        """Nodos con sus entradas y referencia normativa"""
+        return [
+            {"node": node.name, "outputs": list(node.outputs), "inputs": list(node.inputs),
+             "reference": node.reference}
+            for node in self.nodes
+        ]
+
+
+class FormulaEvaluation:
+    """
+    Valores de una evaluación del grafo (entradas e intermedios)
+    con re-evaluación incremental
+    """
+
+    def __init__(self, graph: FormulaGraph, inputs: Dict, targets: Optional[Iterable[str]] = None):
+        missing = [name for name in graph.inputs if name not in inputs]
+        if missing:
+            raise ValueError(f"Faltan entradas del grafo: {missing}")
+        self.graph = graph
+        self.values: Dict = {name: inputs[name] for name in graph.inputs}
+        self._nodes = graph.nodes if targets is None else graph.required_nodes(targets)
+        self._active = {id(node) for node in self._nodes}
+        # Valores previos de los nodos que cambiaron en el último update()
+        self.previous: Dict = {}
+        for node in self._nodes:
+            self.values.update(zip(node.outputs, node.compute(self.values)))
+
+    def __getitem__(self, name: str):
+        return self.values[name]
+
+    def update(self, changes: Dict) -> List[str]:
+        """
+        Cambia entradas y recalcula sólo los nodos aguas abajo
+
+        Returns:
+            Nodos recalculados, en orden de evaluación (los valores previos
+            de las salidas que cambiaron quedan en `previous`)
+        """
+        unknown = [name for name in changes if name not in self.graph.inputs]
+        if unknown:
+            raise ValueError(f"No son entradas del grafo: {unknown}")
+
+        changed = {name for name, value in changes.items() if self.values[name] != value}
+        self.values.update(changes)
+        self.previous = {}
+
+        recomputed = []
+        for node in self.graph.downstream(changed):
+            if id(node) not in self._active or not changed.intersection(node.inputs):
+                continue
+            recomputed.append(node.name)
+            for output, value in zip(node.outputs, node.compute(self.values)):
+                if self.values[output] != value:
+                    self.previous[output] = self.values[output]
+                    self.values[output] = value
+                    changed.add(output)
+        return recomputed
+
+    def trace(self) -> List[Dict]:
+        """Valor de cada nodo con los valores de sus entradas (auditoría)"""
+        return [
+            {
+                "node": node.name,
+                "reference": node.reference,
+                "inputs": {name: self.values[name] for name in node.inputs},
+                "outputs": {name: self.values[name] for name in node.outputs},
+            }
+            for node in self._nodes
+        ]
+
+
+# ========================================
+# GRAFO DE LA RESOLUCIÓN 720
+# ========================================
+
+STRATUM_SUBSCRIBER_INPUTS = {
+    "stratum_1": "subscribers_stratum_1",
+    "stratum_2": "subscribers_stratum_2",
+    "stratum_3": "subscribers_stratum_3",
+    "stratum_4": "subscribers_stratum_4",
+    "stratum_5": "subscribers_stratum_5",
+    "stratum_6": "subscribers_stratum_6",
+    "commercial": "subscribers_commercial",
+}
+
+# Entradas tomadas de los promedios de 6 meses, con su valor por defecto
+# (None = obligatoria)
+AVERAGE_INPUTS = {
+    "num_subscribers_total": None,
+    "num_subscribers_vacant": None,
+    "num_subscribers_large_producers": 0,
+    "tons_collected_non_recyclable": None,
+    "tons_collected_sweeping": None,
+    "tons_collected_urban_cleaning": None,
+    "tons_collected_recyclable": 0,
+    "tons_rejection_recycling": None,
+    "tons_received_landfill": None,
+    "leachate_volume_m3": None,
+    "leachate_treatment_scenario": 2,
+    "environmental_tax_rate": 0,
+    "sweeping_length_km": 0,
+    "cost_tree_pruning": 0,
+    "grass_area_cut_m2": 0,
+    "public_areas_washed_m2": 0,
+    "beach_cleaning_m2": 0,
+    "baskets_installed": 0,
+    "baskets_maintained": 0,
+    "fleet_average_age_years": 0,
+    "fleet_daily_shifts": 1,
+    **{name: 0 for name in STRATUM_SUBSCRIBER_INPUTS.values()},
+}
+
+# Entradas tomadas del APS
+APS_INPUTS = (
+    "segment",
+    "billing_type",
+    "distance_km",
+    "is_coastal",
+    "uses_transfer_station",
+    "transfer_distance_km",
+)
+
+# Parámetros con vigencia (ver ParameterStore), con su valor por defecto;
+# el tipo del valor por defecto es el que recibe el calculador
+PARAMETER_INPUTS = {
+    "water_price_per_m3": 0.0,
+    "tolls_cost_month": 0.0,
+    "has_public_contribution": False,
+    "extended_postclosure_years": 0,
+    "incentive_discount": 0.0,
+}
+
+TARIFF_GRAPH_INPUTS = APS_INPUTS + tuple(AVERAGE_INPUTS) + tuple(PARAMETER_INPUTS) + (
+    "municipality_costs", "subsidy_factors", "extra_categories"
+)
+
+# Nodo de la evaluación por estrato (calculate_batch la vectoriza salvo
+# que la versión de la regla lo reemplace)
+STRATUM_TARIFFS_NODE = "trna_by_stratum"
+
+# Valores que sólo dependen de los costos (sin evaluación por estrato)
+COST_OUTPUTS = (
+    "ccs", "clus", "clus_breakdown", "cbls", "cft",
+    "crt", "crt_details", "cdf", "cdf_details", "ctl", "ctl_details",
+    "cvna", "vba", "common_tons", "costs", "subscribers_by_stratum",
+)
+
+
+def tariff_inputs(
+    aps,
+    averages: Dict,
+    subsidy_factors: Optional[Dict[str, float]] = None,
+    extra_categories: Optional[List[Dict]] = None,
+    municipality_costs: Optional[Dict[str, float]] = None,
+    parameters: Optional[Dict[str, float]] = None
+) -> Dict:
+    """
+    Arma las entradas del grafo a partir del APS (o su APSProfile) y los promedios
+
+    `municipality_costs` son las sumas ponderadas de CRT/CDF de los demás
+    APS del municipio (ver MunicipalityCostRepository); sin ellas el VBA
+    usa sólo los costos del APS. `parameters` son los parámetros vigentes
+    del APS en el período (ParameterStore.resolve).
+    """
+    profile = APSProfile.from_aps(aps)
+    inputs = {
+        "segment": profile.segment,
+        "billing_type": profile.billing_type,
+        "distance_km": profile.distance_km,
+        "is_coastal": profile.is_coastal,
+        "uses_transfer_station": profile.uses_transfer_station,
+        "transfer_distance_km": profile.transfer_distance_km,
+        "municipality_costs": municipality_costs or {},
+        "subsidy_factors": subsidy_factors or {},
+        "extra_categories": extra_categories or [],
+    }
+    for name, default in AVERAGE_INPUTS.items():
+        inputs[name] = averages[name] if default is None else averages.get(name, default)
+    parameters = parameters or {}
+    for name, default in PARAMETER_INPUTS.items():
+        inputs[name] = type(default)(parameters.get(name, default))
+    return inputs
+
+
+def build_tariff_graph(
+    calculator: TariffCalculator720,
+    overrides: Optional[Dict[str, Callable[[TariffCalculator720], FormulaNode]]] = None
+) -> FormulaGraph:
+    """
+    Compila el grafo de fórmulas sobre un calculador (float o Decimal)
+
+    `overrides` reemplaza nodos por nombre (ver rule_sets.RuleSet); un
+    nombre nuevo agrega el nodo.
+    """
+
+    def clus(num_subscribers_total, cost_tree_pruning, grass_area_cut_m2, public_areas_washed_m2,
+             beach_cleaning_m2, baskets_installed, baskets_maintained, segment, water_price_per_m3):
+        return calculator.calculate_clus(
+            num_subscribers=int(num_subscribers_total),
+            tree_pruning_cost=cost_tree_pruning,
+            grass_area_m2=grass_area_cut_m2,
+            washing_area_m2=public_areas_washed_m2,
+            beach_area_m2=beach_cleaning_m2,
+            baskets_installed=baskets_installed,
+            baskets_maintained=baskets_maintained,
+            segment=segment,
+            water_price_per_m3=water_price_per_m3
+        )
+
+    def crt(distance_km, tons_collected_non_recyclable, is_coastal, uses_transfer_station,
+            transfer_distance_km, fleet_average_age_years, fleet_daily_shifts, tolls_cost_month,
+            has_public_contribution):
+        return calculator.calculate_crt(
+            distance_km=distance_km,
+            avg_tons_month=tons_collected_non_recyclable,
+            tolls_cost_month=tolls_cost_month,
+            is_coastal=is_coastal,
+            uses_transfer_station=uses_transfer_station,
+            transfer_distance_km=transfer_distance_km,
+            fleet_age_years=fleet_average_age_years,
+            fleet_daily_shifts=fleet_daily_shifts,
+            has_public_contribution=has_public_contribution
+        )
+
+    def cdf(tons_received_landfill, extended_postclosure_years, has_public_contribution):
+        return calculator.calculate_cdf(
+            avg_tons_landfill_month=tons_received_landfill,
+            is_small_landfill=(tons_received_landfill < 2400),
+            extended_postclosure_years=extended_postclosure_years,
+            has_public_contribution=has_public_contribution
+        )
+
+    def ctl(leachate_volume_m3, tons_received_landfill, leachate_treatment_scenario, environmental_tax_rate,
+            extended_postclosure_years, has_public_contribution):
+        return calculator.calculate_ctl(
+            leachate_volume_m3=leachate_volume_m3,
+            avg_tons_landfill_month=tons_received_landfill,
+            scenario=leachate_treatment_scenario,
+            environmental_tax=environmental_tax_rate,
+            extended_postclosure_years=extended_postclosure_years,
+            has_public_contribution=has_public_contribution
+        )
+
+    def vba(crt, cdf, tons_collected_non_recyclable, tons_received_landfill, municipality_costs,
+            incentive_discount):
+        # CRT_p y CDF_p: promedios del municipio ponderados por toneladas
+        return calculator.calculate_vba(
+            crt_avg=calculator.calculate_municipality_average(
+                crt, tons_collected_non_recyclable,
+                municipality_costs.get("crt_sum", 0.0), municipality_costs.get("crt_tons", 0.0)
+            ),
+            cdf_avg=calculator.calculate_municipality_average(
+                cdf, tons_received_landfill,
+                municipality_costs.get("cdf_sum", 0.0), municipality_costs.get("cdf_tons", 0.0)
+            ),
+            incentive_discount=incentive_discount
+        )
+
+    def common_tons(tons_collected_sweeping, tons_collected_urban_cleaning, tons_rejection_recycling,
+                    tons_collected_recyclable, num_subscribers_total, num_subscribers_vacant,
+                    num_subscribers_large_producers):
+        return calculator.calculate_tons_per_subscriber_common(
+            tons_sweeping_month=tons_collected_sweeping,
+            tons_urban_cleaning_month=tons_collected_urban_cleaning,
+            tons_rejection_month=tons_rejection_recycling,
+            tons_recycled_month=tons_collected_recyclable,
+            num_subscribers_total=int(num_subscribers_total),
+            num_subscribers_vacant=int(num_subscribers_vacant),
+            num_subscribers_large_producers=num_subscribers_large_producers
+        )
+
+    def costs(cft, cvna, vba, common_tons, tons_collected_non_recyclable, tons_rejection_recycling):
+        return {
+            "cft": cft,
+            "cvna": cvna,
+            "vba": vba,
+            "trbl": common_tons["trbl"],
+            "trlu": common_tons["trlu"],
+            "trra": common_tons["trra"],
+            "tra": common_tons["tra"],
+            # QNA - QR (las toneladas aforadas se descuentan por categoría)
+            "available_tons": tons_collected_non_recyclable - tons_rejection_recycling,
+        }
+
+    def stratum_tariffs(costs, subscribers_by_stratum, subsidy_factors, extra_categories):
+        categories, factors, subscribers, subsidies, weighed = build_stratum_table(
+            subscribers_by_stratum, subsidy_factors, calculator.PRODUCTION_FACTORS, extra_categories
+        )
+        evaluated = evaluate_stratum_tariffs(
+            costs, factors, subscribers, subsidies, weighed, exact=calculator.exact
+        )
+        return row_to_category_dict(categories, evaluated)
+
+    nodes = [
+        FormulaNode(
+            ["has_recycling"], ["tons_collected_recyclable"],
+            lambda tons_collected_recyclable: tons_collected_recyclable > 0
+        ),
+        FormulaNode(
+            ["ccs"], ["segment", "billing_type", "has_recycling"],
+            lambda segment, billing_type, has_recycling: calculator.calculate_ccs(
+                segment=segment, billing_type=billing_type, has_recycling=has_recycling
+            ),
+            "Art. 14"
+        ),
+        FormulaNode(
+            ["clus", "clus_breakdown"],
+            ["num_subscribers_total", "cost_tree_pruning", "grass_area_cut_m2", "public_areas_washed_m2",
+             "beach_cleaning_m2", "baskets_installed", "baskets_maintained", "segment", "water_price_per_m3"],
+            clus, "Art. 15-20"
+        ),
+        FormulaNode(
+            ["cbls"], ["sweeping_length_km", "num_subscribers_total", "has_public_contribution"],
+            lambda sweeping_length_km, num_subscribers_total, has_public_contribution: calculator.calculate_cbls(
+                sweeping_km=sweeping_length_km,
+                num_subscribers=int(num_subscribers_total),
+                has_public_contribution=has_public_contribution
+            ),
+            "Art. 21-23"
+        ),
+        FormulaNode(["cft"], ["ccs", "clus", "cbls"], calculator.calculate_cft, "Art. 11"),
+        FormulaNode(
+            ["crt", "crt_details"],
+            ["distance_km", "tons_collected_non_recyclable", "is_coastal", "uses_transfer_station",
+             "transfer_distance_km", "fleet_average_age_years", "fleet_daily_shifts", "tolls_cost_month",
+             "has_public_contribution"],
+            crt, "Art. 24-27"
+        ),
+        FormulaNode(
+            ["cdf", "cdf_details"],
+            ["tons_received_landfill", "extended_postclosure_years", "has_public_contribution"],
+            cdf, "Art. 28-31"
+        ),
+        FormulaNode(
+            ["ctl", "ctl_details"],
+            ["leachate_volume_m3", "tons_received_landfill", "leachate_treatment_scenario",
+             "environmental_tax_rate", "extended_postclosure_years", "has_public_contribution"],
+            ctl, "Art. 32-33"
+        ),
+        FormulaNode(["cvna"], ["crt", "cdf", "ctl"], calculator.calculate_cvna, "Art. 12"),
+        FormulaNode(
+            ["vba"],
+            ["crt", "cdf", "tons_collected_non_recyclable", "tons_received_landfill", "municipality_costs",
+             "incentive_discount"],
+            vba, "Art. 34-35"
+        ),
+        FormulaNode(
+            ["common_tons"],
+            ["tons_collected_sweeping", "tons_collected_urban_cleaning", "tons_rejection_recycling",
+             "tons_collected_recyclable", "num_subscribers_total", "num_subscribers_vacant",
+             "num_subscribers_large_producers"],
+            common_tons, "Art. 40"
+        ),
+        FormulaNode(
+            ["subscribers_by_stratum"], list(STRATUM_SUBSCRIBER_INPUTS.values()),
+            lambda **counts: {
+                category: counts[name] for category, name in STRATUM_SUBSCRIBER_INPUTS.items()
+            }
+        ),
+        FormulaNode(
+            ["costs"],
+            ["cft", "cvna", "vba", "common_tons", "tons_collected_non_recyclable", "tons_rejection_recycling"],
+            costs
+        ),
+        FormulaNode(
+            [STRATUM_TARIFFS_NODE, "tariffs"],
+            ["costs", "subscribers_by_stratum", "subsidy_factors", "extra_categories"],
+            stratum_tariffs, "Art. 39, 41, 42"
+        ),
+    ]
+    if overrides:
+        replaced = {name: factory(calculator) for name, factory in overrides.items()}
+        nodes = [replaced.pop(node.name, node) for node in nodes] + list(replaced.values())
+    return FormulaGraph(TARIFF_GRAPH_INPUTS, nodes)
@@ -0,0 +1,114 @@
+"""
+Registros de entrada y salida del núcleo de cálculo
+
+No dependen del ORM: APSProfile copia del APS sólo lo que usan las
+fórmulas, y TariffInput / TariffResult se pueden serializar (pickle,
+JSON con to_dict) para mandarlos a procesos, CLIs o notebooks.
+"""
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+# Llaves del snapshot TariffCalculation.input_data que no son promedios
+SNAPSHOT_KEYS = ("municipality_costs", "parameters", "rule_set_version")
+
+
+@dataclass(slots=True)
+class APSProfile:
+    """Atributos del APS que entran al grafo de fórmulas (APS_INPUTS)"""
+
+    segment: str
+    billing_type: str
+    distance_km: float
+    is_coastal: bool = False
+    uses_transfer_station: bool = False
+    transfer_distance_km: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_aps(cls, aps) -> "APSProfile":
+        """Perfil de un APS del ORM (o de cualquier objeto con sus atributos)"""
+        if isinstance(aps, cls):
+            return aps
+        return cls(
+            segment=aps.segment,
+            billing_type=aps.billing_type,
+            distance_km=aps.get_effective_distance(),
+            is_coastal=bool(aps.is_coastal_municipality),
+            uses_transfer_station=bool(aps.uses_transfer_station),
+            transfer_distance_km=aps.transfer_station_distance_km or 0,
+        )
+
+
+@dataclass(slots=True)
+class TariffInput:
+    """
+    Entradas de un cálculo (un APS en un período)
+
+    Args:
+        averages: promedios de 6 meses (ver AVERAGE_INPUTS)
+        period: elige la versión de la regla (None = la más reciente)
+        subsidy_factors: None = DEFAULT_SUBSIDY_FACTORS con los factores
+            vigentes de `parameters` encima
+        exact: aritmética Decimal (tarifas oficiales)
+    """
+
+    aps: APSProfile
+    averages: Dict[str, Any]
+    period: Optional[str] = None
+    municipality_costs: Optional[Dict[str, float]] = None
+    parameters: Optional[Dict[str, Any]] = None
+    subsidy_factors: Optional[Dict[str, float]] = None
+    extra_categories: Optional[List[Dict]] = None
+    exact: bool = False
+
+    def __post_init__(self):
+        self.municipality_costs = self.municipality_costs or {}
+        self.parameters = self.parameters or {}
+        self.extra_categories = self.extra_categories or []
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        aps,
+        period: str,
+        input_data: Dict,
+        subsidy_factors: Optional[Dict[str, float]] = None,
+        exact: bool = False
+    ) -> "TariffInput":
+        """Entradas guardadas en TariffCalculation.input_data"""
+        input_data = input_data or {}
+        return cls(
+            aps=APSProfile.from_aps(aps),
+            averages={key: value for key, value in input_data.items() if key not in SNAPSHOT_KEYS},
+            period=period,
+            municipality_costs=input_data.get("municipality_costs"),
+            parameters=input_data.get("parameters"),
+            subsidy_factors=subsidy_factors,
+            exact=exact,
+        )
+
+
+@dataclass(slots=True)
+class TariffResult:
+    """
+    Resultado de un cálculo, en float
+
+    `costs` son los componentes escalares (CCS, CLUS, CBLS, CFT, CRT, CDF,
+    CTL, CVNA, VBA); `tariffs` es {categoría: {"base", "final"}}.
+    """
+
+    period: Optional[str]
+    rule_set_version: str
+    exact: bool
+    costs: Dict[str, float]
+    tariffs: Dict[str, Dict[str, float]]
+    trna: Dict[str, float]
+    subsidy_factors: Dict[str, float]
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
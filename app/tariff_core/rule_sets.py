@@ -0,0 +1,186 @@
+"""
+Versiones de la regla tarifaria (constantes y fórmulas vigentes por período)
+
+La CRA modifica la metodología con resoluciones posteriores; los períodos
+históricos se recalculan con las reglas vigentes en su momento. Cada
+RuleSet declara desde qué período rige, las constantes que cambia
+respecto de TariffCalculator720 y los nodos del grafo de fórmulas que
+reemplaza.
+
+Una versión se compila una sola vez por aritmética (calculador con sus
+constantes + grafo ordenado) y queda en caché; los lotes que cruzan
+varias versiones agrupan los períodos por versión y evalúan cada grupo
+en una sola operación.
+
+Usage:
+    register_rule_set(RuleSet(
+        version="cra-xxx-2026",
+        effective_from="2026-07",
+        constants={"F1_BASE": 70000},
+        formula_overrides={"vba": lambda calculator: FormulaNode([...], [...], ...)},
+        formulas={"VBA": "..."},
+    ))
+    compiled = compiled_rule_set_for("2026-08", exact=True)
+    compiled.graph.evaluate(inputs)
+"""
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .formula_graph import STRATUM_TARIFFS_NODE, FormulaGraph, FormulaNode, build_tariff_graph
+from .tariff_calculator_720 import ARITHMETIC_DECIMAL, ARITHMETIC_FLOAT, TariffCalculator720
+
+# Versión base: constantes de diciembre de 2014 y fórmulas de la Res. 720
+BASE_RULE_SET_VERSION = "res720-2015"
+
+# Fórmulas y referencias de la versión base
+BASE_FORMULAS = {
+    "CFT": "CFT = CCS + CLUS + CBLS",
+    "CVNA": "CVNA = CRT + CDF + CTL",
+    "CRT": "CRT = MIN(f1, f2) + PRT",
+    "CDF": "CDF = CDF_VU + CDF_PC",
+    "CTL": "CTL = ((CTLM × VL) + CMTLX) / QRS",
+    "VBA": "VBA = (CRT_p + CDF_p) × (1 - DINC)",
+    "TFS": "TFS = (CFT + CVNA × (TRBL + TRLU + TRNA + TRRA) + (VBA × TRA)) × (1 ± FCS)"
+}
+
+BASE_REFERENCES = {
+    "CFT": ["Art. 11"],
+    "CCS": ["Art. 14"],
+    "CLUS": ["Art. 15-20"],
+    "CBLS": ["Art. 21-23"],
+    "CRT": ["Art. 24-27"],
+    "CDF": ["Art. 28-31"],
+    "CTL": ["Art. 32-33", "Anexo II"],
+    "VBA": ["Art. 34-35"],
+    "TFS": ["Art. 39"]
+}
+
+
+class RuleSet:
+    """
+    Versión de la regla tarifaria
+
+    Args:
+        version: identificador único (ej. "res720-2015")
+        effective_from: primer período en que rige (YYYY-MM)
+        constants: constantes de TariffCalculator720 que cambian (los
+            diccionarios como CTL_SCENARIOS se reemplazan completos)
+        formula_overrides: {nombre del nodo: fábrica(calculador) -> FormulaNode};
+            un nombre que no existe agrega el nodo al grafo
+        formulas / references: textos que cambian respecto de la versión base
+    """
+
+    def __init__(
+        self,
+        version: str,
+        effective_from: str,
+        description: str = "",
+        constants: Optional[Dict] = None,
+        formula_overrides: Optional[Dict[str, Callable[[TariffCalculator720], FormulaNode]]] = None,
+        formulas: Optional[Dict[str, str]] = None,
+        references: Optional[Dict[str, List[str]]] = None
+    ):
+        unknown = [name for name in constants or {} if not hasattr(TariffCalculator720, name)]
+        if unknown:
+            raise ValueError(f"Constantes desconocidas en {version}: {unknown}")
+        self.version = version
+        self.effective_from = effective_from
+        self.description = description
+        self.constants = dict(constants or {})
+        self.formula_overrides = dict(formula_overrides or {})
+        self.formulas = {**BASE_FORMULAS, **(formulas or {})}
+        self.references = {**BASE_REFERENCES, **(references or {})}
+
+
+class CompiledRuleSet:
+    """Calculador y grafo de una versión, listos para evaluar"""
+
+    __slots__ = ("rule_set", "calculator", "graph", "overrides_stratum_tariffs")
+
+    def __init__(self, rule_set: RuleSet, arithmetic: str):
+        self.rule_set = rule_set
+        calculator_class = TariffCalculator720
+        if rule_set.constants:
+            # Subclase con las constantes de la versión: el modo exacto las
+            # convierte a Decimal igual que las de la clase base
+            calculator_class = type(
+                f"TariffCalculator_{rule_set.version.replace('-', '_')}",
+                (TariffCalculator720,),
+                dict(rule_set.constants)
+            )
+        self.calculator = calculator_class(arithmetic=arithmetic)
+        self.graph: FormulaGraph = build_tariff_graph(self.calculator, rule_set.formula_overrides)
+        # Con el nodo por estrato reemplazado los lotes evalúan el grafo completo
+        self.overrides_stratum_tariffs = STRATUM_TARIFFS_NODE in rule_set.formula_overrides
+
+    @property
+    def version(self) -> str:
+        return self.rule_set.version
+
+
+# Versiones ordenadas por inicio de vigencia
+_RULE_SETS: List[RuleSet] = []
+_EFFECTIVE_FROM: List[str] = []
+_COMPILED: Dict[Tuple[str, str], CompiledRuleSet] = {}
+_lock = threading.Lock()
+
+
+def register_rule_set(rule_set: RuleSet) -> RuleSet:
+    """Registra una versión; no puede repetir versión ni inicio de vigencia"""
+    with _lock:
+        for existing in _RULE_SETS:
+            if existing.version == rule_set.version or existing.effective_from == rule_set.effective_from:
+                raise ValueError(f"Versión ya registrada: {existing.version} ({existing.effective_from})")
+        index = bisect.bisect_right(_EFFECTIVE_FROM, rule_set.effective_from)
+        _RULE_SETS.insert(index, rule_set)
+        _EFFECTIVE_FROM.insert(index, rule_set.effective_from)
+    return rule_set
+
+
+def unregister_rule_set(version: str) -> None:
+    """Retira una versión y sus compilaciones (pruebas y correcciones)"""
+    with _lock:
+        for index, rule_set in enumerate(_RULE_SETS):
+            if rule_set.version == version:
+                del _RULE_SETS[index]
+                del _EFFECTIVE_FROM[index]
+                break
+        for key in [key for key in _COMPILED if key[0] == version]:
+            del _COMPILED[key]
+
+
+def rule_sets() -> List[RuleSet]:
+    return list(_RULE_SETS)
+
+
+def rule_set_for(period: Optional[str] = None) -> RuleSet:
+    """Versión vigente en el período (la más reciente si period es None)"""
+    if period is None:
+        return _RULE_SETS[-1]
+    index = bisect.bisect_right(_EFFECTIVE_FROM, period) - 1
+    return _RULE_SETS[max(index, 0)]
+
+
+def compile_rule_set(rule_set: RuleSet, exact: bool = False) -> CompiledRuleSet:
+    """Compila la versión una vez por aritmética"""
+    arithmetic = ARITHMETIC_DECIMAL if exact else ARITHMETIC_FLOAT
+    key = (rule_set.version, arithmetic)
+    compiled = _COMPILED.get(key)
+    if compiled is None:
+        with _lock:
+            compiled = _COMPILED.get(key)
+            if compiled is None:
+                compiled = _COMPILED[key] = CompiledRuleSet(rule_set, arithmetic)
+    return compiled
+
+
+def compiled_rule_set_for(period: Optional[str] = None, exact: bool = False) -> CompiledRuleSet:
+    return compile_rule_set(rule_set_for(period), exact)
+
+
+register_rule_set(RuleSet(
+    version=BASE_RULE_SET_VERSION,
+    effective_from="0000-01",
+    description="Resolución CRA 720 de 2015, precios de diciembre de 2014",
+))
@@ -0,0 +1,215 @@
+"""
+Evaluación vectorizada de TRNA y tarifas por tipo de suscriptor (Art. 39, 41, 42)
+
+Los estratos y demás categorías de suscriptor se representan como arrays
+de ancho fijo indexados por categoría (factor de producción, suscriptores,
+factor de subsidio/contribución, toneladas aforadas). Una sola evaluación
+calcula todas las categorías; si los costos vienen como arrays de N filas
+(APS-período) y los suscriptores como matriz N x K, se calculan todas las
+celdas en una sola operación.
+
+Categorías adicionales (oficiales, especiales, grandes productores con
+aforo) se agregan como datos, sin tocar el código:
+
+    extra_categories=[
+        {"name": "official", "production_factor": 1.0, "subscribers": 40},
+        {"name": "large_producer", "production_factor": 0.0,
+         "subscribers": 3, "weighed_tons": 12.5},
+    ]
+
+Usa numpy cuando está instalado; si no, evalúa fila por fila en Python.
+En modo exacto (exact=True) evalúa en Decimal con la política de redondeo
+del calculador.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .tariff_calculator_720 import quantize, to_decimal
+
+# numpy se importa en la primera evaluación para no cargarlo al arrancar la app
+np = None
+_numpy_loaded = False
+
+
+def load_numpy():
+    """Módulo numpy, o None si no está instalado"""
+    global np, _numpy_loaded
+    if not _numpy_loaded:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:  # pragma: no cover - depende del entorno
+            np = None
+        _numpy_loaded = True
+    return np
+
+# Categorías con columna propia en TariffCalculation
+RESIDENTIAL_CATEGORIES = (
+    "stratum_1", "stratum_2", "stratum_3",
+    "stratum_4", "stratum_5", "stratum_6",
+    "commercial",
+)
+
+# Costos escalares por fila que entran a la fórmula TFS
+COST_FIELDS = ("cft", "cvna", "vba", "trbl", "trlu", "trra", "tra", "available_tons")
+
+
+def build_stratum_table(
+    subscribers_by_category: Dict[str, float],
+    subsidy_factors: Dict[str, float],
+    production_factors: Dict[str, float],
+    extra_categories: Optional[List[Dict]] = None
+) -> Tuple[List[str], List[float], List[float], List[float], List[float]]:
+    """
+    Arma los arrays por categoría: (categorías, factores de producción,
+    suscriptores, factores de subsidio, toneladas aforadas)
+    """
+    categories = list(RESIDENTIAL_CATEGORIES)
+    factors = [production_factors.get(name, 1.0) for name in categories]
+    subscribers = [subscribers_by_category.get(name, 0) or 0 for name in categories]
+    subsidies = [subsidy_factors.get(name, 0.0) for name in categories]
+    weighed = [0.0] * len(categories)
+
+    for category in extra_categories or []:
+        categories.append(category["name"])
+        factors.append(category.get("production_factor", production_factors.get(category["name"], 1.0)))
+        subscribers.append(category.get("subscribers", 0) or 0)
+        subsidies.append(category.get("subsidy_factor", subsidy_factors.get(category["name"], 0.0)))
+        weighed.append(category.get("weighed_tons", 0.0) or 0.0)
+
+    return categories, factors, subscribers, subsidies, weighed
+
+
+def evaluate_stratum_tariffs(
+    costs: Dict,
+    factors: Sequence[float],
+    subscribers,
+    subsidies,
+    weighed_tons=None,
+    exact: bool = False
+) -> Dict:
+    """
+    TRNA, tarifa base y tarifa final para todas las categorías
+
+    Art. 41: TRNA_u = ((QNA - QR - ΣTAFNA) × F_u) / Σ((n_u - na_u) × F_u)
+             (categorías aforadas: TRNA_u = TAFNA_u / na_u)
+    Art. 39: TFS = (CFT + CVNA × (TRBL + TRLU + TRNA + TRRA) + VBA × TRA) × (1 + FCS)
+
+    Args:
+        costs: COST_FIELDS como escalares (una fila) o secuencias de N filas
+        factors: factor de producción por categoría (K)
+        subscribers: suscriptores por categoría (K) o por fila (N x K)
+        subsidies: factor de subsidio/contribución (K) o (N x K)
+        weighed_tons: toneladas aforadas por categoría (K) o (N x K)
+        exact: evaluar en Decimal (tarifas oficiales)
+
+    Returns:
+        dict con arrays "trna", "base" y "final" de forma (K) o (N x K)
+    """
+    if weighed_tons is None:
+        weighed_tons = [0.0] * len(factors)
+    if exact:
+        return _evaluate_python(costs, factors, subscribers, subsidies, weighed_tons, exact=True)
+    if load_numpy() is not None:
+        return _evaluate_numpy(costs, factors, subscribers, subsidies, weighed_tons)
+    return _evaluate_python(costs, factors, subscribers, subsidies, weighed_tons)
+
+
+def row_to_category_dict(categories: Sequence[str], evaluated: Dict, row: Optional[int] = None) -> Tuple[Dict, Dict]:
+    """
+    Convierte el resultado de una fila a ({categoría: trna}, {categoría: {base, final}})
+    """
+    trna, base, final = evaluated["trna"], evaluated["base"], evaluated["final"]
+    if row is not None:
+        trna, base, final = trna[row], base[row], final[row]
+    trna_by_category = {}
+    tariffs = {}
+    for i, name in enumerate(categories):
+        trna_by_category[name] = float(trna[i])
+        tariffs[name] = {"base": float(base[i]), "final": float(final[i])}
+    return trna_by_category, tariffs
+
+
+def _evaluate_numpy(costs, factors, subscribers, subsidies, weighed_tons) -> Dict:
+    # Escalares -> (1,), filas (N,) -> (N, 1): se difunden contra las K categorías
+    column = {field: np.asarray(costs[field], dtype=float)[..., None] for field in COST_FIELDS}
+    factors = np.asarray(factors, dtype=float)
+    subscribers = np.asarray(subscribers, dtype=float)
+    subsidies = np.asarray(subsidies, dtype=float)
+    weighed_tons = np.asarray(weighed_tons, dtype=float)
+
+    weighed_mask = weighed_tons > 0
+    available = column["available_tons"] - weighed_tons.sum(axis=-1, keepdims=True)
+    denominator = np.where(weighed_mask, 0.0, subscribers * factors).sum(axis=-1, keepdims=True)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shared = np.where(denominator > 0, available * factors / denominator, 0.0)
+        weighed_per_subscriber = np.where(subscribers > 0, weighed_tons / subscribers, 0.0)
+    trna = np.round(np.where(weighed_mask, weighed_per_subscriber, shared), 6)
+
+    base = (
+        column["cft"]
+        + column["cvna"] * (column["trbl"] + column["trlu"] + trna + column["trra"])
+        + column["vba"] * column["tra"]
+    )
+    final = base * (1 + subsidies)
+    return {"trna": trna, "base": np.round(base, 2), "final": np.round(final, 2)}
+
+
+def _evaluate_python(costs, factors, subscribers, subsidies, weighed_tons, exact: bool = False) -> Dict:
+    multi_row = isinstance(costs["cft"], (list, tuple))
+    if not multi_row:
+        return _evaluate_row(costs, factors, subscribers, subsidies, weighed_tons, exact)
+
+    rows = len(costs["cft"])
+
+    def row_of(values, i):
+        return values[i] if values and isinstance(values[0], (list, tuple)) else values
+
+    results = [
+        _evaluate_row(
+            {field: costs[field][i] for field in COST_FIELDS},
+            factors, row_of(subscribers, i), row_of(subsidies, i), row_of(weighed_tons, i), exact
+        )
+        for i in range(rows)
+    ]
+    return {key: [result[key] for result in results] for key in ("trna", "base", "final")}
+
+
+def _evaluate_row(costs, factors, subscribers, subsidies, weighed_tons, exact: bool = False) -> Dict:
+    if exact:
+        costs = {field: to_decimal(costs[field]) for field in COST_FIELDS}
+        factors, subscribers, subsidies, weighed_tons = (
+            [to_decimal(value) for value in values]
+            for values in (factors, subscribers, subsidies, weighed_tons)
+        )
+        round_to = quantize
+    else:
+        round_to = round
+
+    available = costs["available_tons"] - sum(weighed_tons)
+    denominator = sum(
+        count * factor
+        for count, factor, weighed in zip(subscribers, factors, weighed_tons)
+        if weighed <= 0
+    )
+
+    trna = []
+    for count, factor, weighed in zip(subscribers, factors, weighed_tons):
+        if weighed > 0:
+            value = weighed / count if count > 0 else 0.0
+        else:
+            value = available * factor / denominator if denominator > 0 else 0.0
+        trna.append(round_to(value, 6))
+
+    base = []
+    final = []
+    for value, subsidy in zip(trna, subsidies):
+        tariff_base = (
+            costs["cft"]
+            + costs["cvna"] * (costs["trbl"] + costs["trlu"] + value + costs["trra"])
+            + costs["vba"] * costs["tra"]
+        )
+        base.append(round_to(tariff_base, 2))
+        final.append(round_to(tariff_base * (1 + subsidy), 2))
+    return {"trna": trna, "base": base, "final": final}
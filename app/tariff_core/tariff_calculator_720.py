@@ -11,8 +11,49 @@ Referencias:
 
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 import math
+import os
+
+# Modos de aritmética del calculador
+ARITHMETIC_FLOAT = "float"      # Rápido, redondeo de Python (half-even sobre binario)
+ARITHMETIC_DECIMAL = "decimal"  # Exacto en base 10, redondeo half-up como Excel
+
+# Aritmética usada para tarifas oficiales (las simulaciones usan float)
+OFFICIAL_TARIFF_ARITHMETIC = os.getenv("OFFICIAL_TARIFF_ARITHMETIC", ARITHMETIC_DECIMAL)
+
+# Política de redondeo del modo exacto: ROUND(x; n) de Excel
+DECIMAL_ROUNDING = ROUND_HALF_UP
+
+
+# Cuantos precalculados: 2 -> Decimal("0.01")
+_QUANTUMS = {places: Decimal(1).scaleb(-places) for places in range(0, 9)}
+
+
+def to_decimal(value) -> Decimal:
+    """Convierte a Decimal usando la representación decimal más corta del float"""
+    value_type = type(value)
+    if value_type is Decimal:
+        return value
+    if value_type is int:
+        return Decimal(value)
+    return Decimal(str(value))
+
+
+def quantize(value, places: int) -> Decimal:
+    """Redondea un Decimal a `places` decimales con DECIMAL_ROUNDING"""
+    return to_decimal(value).quantize(_QUANTUMS[places], rounding=DECIMAL_ROUNDING)
+
+
+def to_float(value):
+    """Convierte recursivamente Decimals a float (para JSON y columnas Float)"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, dict):
+        return {key: to_float(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(to_float(item) for item in value)
+    return value
 
 
 class TariffCalculator720:
@@ -138,15 +179,36 @@ class TariffCalculator720:
         "vacant": 0.00  # Inmuebles desocupados
     }
     
-    def __init__(self, inflation_rate: float = 0.0):
+    def __init__(self, inflation_rate: float = 0.0, arithmetic: str = ARITHMETIC_FLOAT):
         """
         Inicializa el calculador
         
         Args:
             inflation_rate: Tasa de inflación acumulada desde diciembre 2014
                            para actualizar costos. Por defecto 0.0.
+            arithmetic: "float" (rápido) o "decimal" (exacto, redondeo half-up
+                        en cada paso igual que el modelo Excel del regulador)
         """
-        self.inflation_rate = inflation_rate
+        if arithmetic not in (ARITHMETIC_FLOAT, ARITHMETIC_DECIMAL):
+            raise ValueError(f"Aritmética no soportada: {arithmetic}")
+        self.arithmetic = arithmetic
+        self.exact = arithmetic == ARITHMETIC_DECIMAL
+        
+        if self.exact:
+            # Constantes de la resolución como Decimal en la instancia
+            for name in dir(type(self)):
+                value = getattr(type(self), name)
+                if name.isupper() and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    setattr(self, name, to_decimal(value))
+            self.CTL_SCENARIOS = {
+                scenario: {key: to_decimal(value) for key, value in data.items()}
+                for scenario, data in type(self).CTL_SCENARIOS.items()
+            }
+            self.PRODUCTION_FACTORS = {
+                key: to_decimal(value) for key, value in type(self).PRODUCTION_FACTORS.items()
+            }
+        
+        self.inflation_rate = self._num(inflation_rate)
     
     # ========================================
     # COSTO FIJO TOTAL (CFT) - Art. 11
@@ -238,6 +300,10 @@ class TariffCalculator720:
             Tuple[float, Dict]: (CLUS total, desglose por componente)
         """
         breakdown = {}
+        tree_pruning_cost, grass_area_m2, washing_area_m2, beach_area_m2, water_price_per_m3 = map(
+            self._num, (tree_pruning_cost, grass_area_m2, washing_area_m2, beach_area_m2, water_price_per_m3)
+        )
+        baskets_installed, baskets_maintained = map(self._num, (baskets_installed, baskets_maintained))
         
         # Poda de árboles (Art. 16)
         pruning_per_subscriber = tree_pruning_cost / num_subscribers if num_subscribers > 0 else 0
@@ -273,7 +339,7 @@ class TariffCalculator720:
         # Total CLUS
         clus_total = sum(breakdown.values())
         
-        return round(clus_total, 2), breakdown
+        return self._round(clus_total, 2), breakdown
     
     def calculate_cbls(
         self,
@@ -295,6 +361,7 @@ class TariffCalculator720:
         Returns:
             float: Costo de Barrido y Limpieza ($/suscriptor-mes)
         """
+        sweeping_km = self._num(sweeping_km)
         cbl = self._apply_inflation(self.CBL)
         
         # Descuento si hay aporte público (Art. 21 Par. 4)
@@ -304,7 +371,7 @@ class TariffCalculator720:
         total_cost = cbl * sweeping_km
         cbls = total_cost / num_subscribers if num_subscribers > 0 else 0
         
-        return round(cbls, 2)
+        return self._round(cbls, 2)
     
     # ========================================
     # COSTO VARIABLE (CVNA) - Art. 12
@@ -365,6 +432,9 @@ class TariffCalculator720:
             Tuple[float, Dict]: (CRT total, detalles del cálculo)
         """
         details = {}
+        distance_km, avg_tons_month, tolls_cost_month, transfer_distance_km, fleet_age_years = map(
+            self._num, (distance_km, avg_tons_month, tolls_cost_month, transfer_distance_km, fleet_age_years)
+        )
         
         # Calcular f1 (directo)
         f1 = self._apply_inflation(
@@ -372,7 +442,7 @@ class TariffCalculator720:
             (self.F1_DISTANCE_FACTOR * distance_km) + 
             (self.F1_SCALE_FACTOR / avg_tons_month if avg_tons_month > 0 else 0)
         )
-        details["f1"] = round(f1, 2)
+        details["f1"] = self._round(f1, 2)
         
         # Calcular f2 (con transferencia)
         f2 = self._apply_inflation(
@@ -380,7 +450,7 @@ class TariffCalculator720:
             (self.F2_DISTANCE_FACTOR * distance_km) + 
             (self.F2_SCALE_FACTOR / avg_tons_month if avg_tons_month > 0 else 0)
         )
-        details["f2"] = round(f2, 2)
+        details["f2"] = self._round(f2, 2)
         
         # Seleccionar función de mínimo costo
         if uses_transfer_station and transfer_distance_km > 0:
@@ -413,9 +483,9 @@ class TariffCalculator720:
         # Agregar peajes (PRT)
         prt = tolls_cost_month / avg_tons_month if avg_tons_month > 0 else 0
         crt_total = crt_base + prt
-        details["tolls_per_ton"] = round(prt, 2)
+        details["tolls_per_ton"] = self._round(prt, 2)
         
-        return round(crt_total, 2), details
+        return self._round(crt_total, 2), details
     
     def calculate_cdf(
         self,
@@ -439,13 +509,14 @@ class TariffCalculator720:
             Tuple[float, Dict]: (CDF total, detalles)
         """
         details = {}
+        avg_tons_landfill_month = self._num(avg_tons_landfill_month)
         
         # CDF Vida Útil (20 años)
         cdf_vu = min(
             self._apply_inflation(18722 + (132924379 / avg_tons_landfill_month if avg_tons_landfill_month > 0 else 0)),
             self._apply_inflation(139896)
         )
-        details["cdf_vu"] = round(cdf_vu, 2)
+        details["cdf_vu"] = self._round(cdf_vu, 2)
         
         # CDF Post-Clausura (10 años base)
         cdf_pc_base = min(
@@ -455,14 +526,14 @@ class TariffCalculator720:
         
         # Factor k para post-clausura extendida (Art. 28 Par. 5)
         if extended_postclosure_years > 0:
-            k_factor = 0.8211 * math.log(10 + extended_postclosure_years) - 0.8954
+            k_factor = self._num(0.8211) * self._log(10 + extended_postclosure_years) - self._num(0.8954)
             cdf_pc = cdf_pc_base * k_factor
             details["postclosure_extended"] = extended_postclosure_years
-            details["k_factor"] = round(k_factor, 4)
+            details["k_factor"] = self._round(k_factor, 4)
         else:
             cdf_pc = cdf_pc_base
         
-        details["cdf_pc"] = round(cdf_pc, 2)
+        details["cdf_pc"] = self._round(cdf_pc, 2)
         
         # Total CDF
         cdf_total = cdf_vu + cdf_pc
@@ -471,18 +542,18 @@ class TariffCalculator720:
         if is_small_landfill and avg_tons_landfill_month < self.CDF_SMALL_LANDFILL_THRESHOLD:
             adjustment = cdf_total * self.CDF_SMALL_LANDFILL_MAX_INCREASE
             cdf_total += adjustment
-            details["small_landfill_adjustment"] = round(adjustment, 2)
+            details["small_landfill_adjustment"] = self._round(adjustment, 2)
         
         # Descuento por aporte público (Art. 29)
         if has_public_contribution:
             # El descuento varía según tamaño: 21%, 32% o 37%
             # Por simplicidad, usamos 32% (promedio)
-            discount_rate = 0.32
+            discount_rate = self._num(0.32)
             cdf_total *= (1 - discount_rate)
             details["public_contribution_discount"] = True
             details["discount_rate"] = discount_rate
         
-        return round(cdf_total, 2), details
+        return self._round(cdf_total, 2), details
     
     def calculate_ctl(
         self,
@@ -510,13 +581,16 @@ class TariffCalculator720:
             Tuple[float, Dict]: (CTL por tonelada, detalles)
         """
         details = {"scenario": scenario}
+        leachate_volume_m3, avg_tons_landfill_month, environmental_tax = map(
+            self._num, (leachate_volume_m3, avg_tons_landfill_month, environmental_tax)
+        )
         
         # Escenario 5: Solo recirculación
         if scenario == 5:
             ctlm = self._apply_inflation(self.CTL_SCENARIOS[5]["recirculation_cost"])
-            details["ctlm"] = round(ctlm, 2)
+            details["ctlm"] = self._round(ctlm, 2)
             ctl_total = (ctlm * leachate_volume_m3) / avg_tons_landfill_month if avg_tons_landfill_month > 0 else 0
-            return round(ctl_total, 2), details
+            return self._round(ctl_total, 2), details
         
         # Escenarios 1-4
         scenario_data = self.CTL_SCENARIOS[scenario]
@@ -526,7 +600,7 @@ class TariffCalculator720:
             self._apply_inflation(scenario_data["vu_base"] + (scenario_data["vu_scale"] / leachate_volume_m3 if leachate_volume_m3 > 0 else 0)),
             self._apply_inflation(scenario_data["vu_max"])
         )
-        details["ctlm_vu"] = round(ctlm_vu, 2)
+        details["ctlm_vu"] = self._round(ctlm_vu, 2)
         
         # CTLM Post-Clausura
         ctlm_pc_base = min(
@@ -536,21 +610,21 @@ class TariffCalculator720:
         
         # Factor k para post-clausura extendida
         if extended_postclosure_years > 0:
-            k_factor = 0.8415 * math.log(10 + extended_postclosure_years) - 0.9429
+            k_factor = self._num(0.8415) * self._log(10 + extended_postclosure_years) - self._num(0.9429)
             ctlm_pc = ctlm_pc_base * k_factor
-            details["k_factor"] = round(k_factor, 4)
+            details["k_factor"] = self._round(k_factor, 4)
         else:
             ctlm_pc = ctlm_pc_base
         
-        details["ctlm_pc"] = round(ctlm_pc, 2)
+        details["ctlm_pc"] = self._round(ctlm_pc, 2)
         
         # CTLM Total
         ctlm = ctlm_vu + ctlm_pc
-        details["ctlm"] = round(ctlm, 2)
+        details["ctlm"] = self._round(ctlm, 2)
         
         # Costo total incluyendo tasa ambiental
         total_cost = (ctlm * leachate_volume_m3) + (environmental_tax * leachate_volume_m3)
-        details["environmental_tax_total"] = round(environmental_tax * leachate_volume_m3, 2)
+        details["environmental_tax_total"] = self._round(environmental_tax * leachate_volume_m3, 2)
         
         # CTL por tonelada
         ctl_per_ton = total_cost / avg_tons_landfill_month if avg_tons_landfill_month > 0 else 0
@@ -559,17 +633,45 @@ class TariffCalculator720:
         if has_public_contribution:
             # Descuento varía por escenario: 38%, 49%, 47%, 46%, 80%
             discount_rates = {1: 0.38, 2: 0.49, 3: 0.47, 4: 0.46, 5: 0.80}
-            discount_rate = discount_rates.get(scenario, 0.0)
+            discount_rate = self._num(discount_rates.get(scenario, 0.0))
             ctl_per_ton *= (1 - discount_rate)
             details["public_contribution_discount"] = True
             details["discount_rate"] = discount_rate
         
-        return round(ctl_per_ton, 2), details
+        return self._round(ctl_per_ton, 2), details
     
     # ========================================
     # APROVECHAMIENTO - Art. 34
     # ========================================
     
+    def calculate_municipality_average(
+        self,
+        own_value: float,
+        own_tons: float,
+        others_weighted_sum: float = 0.0,
+        others_tons: float = 0.0
+    ):
+        """
+        Promedio ponderado por toneladas de un costo en el municipio
+        (CRT_p o CDF_p del Art. 34), incluyendo el APS que se calcula
+        
+        Args:
+            own_value: Costo del APS ($/tonelada)
+            own_tons: Toneladas del APS (peso)
+            others_weighted_sum: Σ costo × toneladas de los demás APS del municipio
+            others_tons: Σ toneladas de los demás APS del municipio
+            
+        Returns:
+            Promedio ponderado; el costo propio si no hay toneladas
+        """
+        own_value, own_tons, others_weighted_sum, others_tons = map(
+            self._num, (own_value, own_tons, others_weighted_sum, others_tons)
+        )
+        total_tons = own_tons + others_tons
+        if total_tons <= 0:
+            return own_value
+        return (own_value * own_tons + others_weighted_sum) / total_tons
+    
     def calculate_vba(
         self,
         crt_avg: float,
@@ -589,8 +691,9 @@ class TariffCalculator720:
         Returns:
             float: Valor Base Aprovechamiento ($/tonelada)
         """
+        crt_avg, cdf_avg, incentive_discount = map(self._num, (crt_avg, cdf_avg, incentive_discount))
         vba = (crt_avg + cdf_avg) * (1 - incentive_discount)
-        return round(vba, 2)
+        return self._round(vba, 2)
     
     # ========================================
     # TONELADAS POR SUSCRIPTOR - Art. 40, 41
@@ -623,15 +726,18 @@ class TariffCalculator720:
         Returns:
             Dict con TRBL, TRLU, TRRA, TRA
         """
+        tons_sweeping_month, tons_urban_cleaning_month, tons_rejection_month, tons_recycled_month = map(
+            self._num, (tons_sweeping_month, tons_urban_cleaning_month, tons_rejection_month, tons_recycled_month)
+        )
         n = num_subscribers_total
         n_occupied = n - num_subscribers_vacant
         n_available_recycling = n_occupied - num_subscribers_large_producers
         
         return {
-            "trbl": round(tons_sweeping_month / n, 6) if n > 0 else 0,
-            "trlu": round(tons_urban_cleaning_month / n, 6) if n > 0 else 0,
-            "trra": round(tons_rejection_month / n_occupied, 6) if n_occupied > 0 else 0,
-            "tra": round(tons_recycled_month / n_available_recycling, 6) if n_available_recycling > 0 else 0
+            "trbl": self._round(tons_sweeping_month / n, 6) if n > 0 else 0,
+            "trlu": self._round(tons_urban_cleaning_month / n, 6) if n > 0 else 0,
+            "trra": self._round(tons_rejection_month / n_occupied, 6) if n_occupied > 0 else 0,
+            "tra": self._round(tons_recycled_month / n_available_recycling, 6) if n_available_recycling > 0 else 0
         }
     
     def calculate_trna_by_stratum(
@@ -658,16 +764,19 @@ class TariffCalculator720:
             Dict con TRNA por cada estrato
         """
         # Toneladas disponibles para distribuir
+        tons_non_recyclable_aps, tons_rejection, tons_weighed_total = map(
+            self._num, (tons_non_recyclable_aps, tons_rejection, tons_weighed_total)
+        )
         available_tons = tons_non_recyclable_aps - tons_rejection - tons_weighed_total
         
         # Calcular denominador: Σ((n_u - nD_u) × F_u)
-        denominator = 0.0
+        denominator = self._num(0.0)
         for stratum, count in subscribers_by_stratum.items():
             if stratum == "vacant":
                 continue  # Los desocupados no cuentan
-            factor = self.PRODUCTION_FACTORS.get(stratum, 1.0)
+            factor = self.PRODUCTION_FACTORS.get(stratum, self._num(1.0))
             # Restar proporcional de desocupados si los hay
-            effective_count = count
+            effective_count = self._num(count)
             denominator += effective_count * factor
         
         # Calcular TRNA para cada estrato
@@ -675,14 +784,14 @@ class TariffCalculator720:
         if denominator > 0:
             for stratum in subscribers_by_stratum.keys():
                 if stratum == "vacant":
-                    trna_by_stratum[stratum] = 0.0
+                    trna_by_stratum[stratum] = self._num(0.0)
                 else:
-                    factor = self.PRODUCTION_FACTORS.get(stratum, 1.0)
+                    factor = self.PRODUCTION_FACTORS.get(stratum, self._num(1.0))
                     trna = (available_tons * factor) / denominator
-                    trna_by_stratum[stratum] = round(trna, 6)
+                    trna_by_stratum[stratum] = self._round(trna, 6)
         else:
             for stratum in subscribers_by_stratum.keys():
-                trna_by_stratum[stratum] = 0.0
+                trna_by_stratum[stratum] = self._num(0.0)
         
         return trna_by_stratum
     
@@ -721,6 +830,10 @@ class TariffCalculator720:
         Returns:
             Tuple[float, float]: (Tarifa base, Tarifa final con subsidio/contribución)
         """
+        cft, cvna, vba, trbl, trlu, trra, tra, trna, subsidy_contribution_factor = map(
+            self._num, (cft, cvna, vba, trbl, trlu, trra, tra, trna, subsidy_contribution_factor)
+        )
+        
         # Componente fijo
         fixed_component = cft
         
@@ -736,7 +849,7 @@ class TariffCalculator720:
         # Aplicar subsidio/contribución
         tariff_final = tariff_base * (1 + subsidy_contribution_factor)
         
-        return round(tariff_base, 2), round(tariff_final, 2)
+        return self._round(tariff_base, 2), self._round(tariff_final, 2)
     
     # ========================================
     # UTILIDADES
@@ -746,6 +859,18 @@ class TariffCalculator720:
         """Aplica inflación a un valor base de diciembre 2014"""
         return base_value * (1 + self.inflation_rate)
     
+    def _num(self, value):
+        """Convierte una entrada al tipo numérico del modo (Decimal en modo exacto)"""
+        return to_decimal(value) if self.exact else value
+    
+    def _round(self, value, places: int):
+        """Redondeo según el modo: half-up en Decimal, round() en float"""
+        return quantize(value, places) if self.exact else round(value, places)
+    
+    def _log(self, value):
+        """Logaritmo natural en el tipo numérico del modo"""
+        return to_decimal(value).ln() if self.exact else math.log(value)
+    
     def get_formula_reference(self, component: str) -> str:
         """
         Retorna la referencia al artículo de la Resolución 720
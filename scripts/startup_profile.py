@@ -0,0 +1,118 @@
+"""
+Perfil de arranque en frío de la API
+
+Importa app.main en un proceso nuevo con `python -X importtime` y muestra
+el desglose: tiempo total, paquetes externos más costosos y módulos de la
+app con más tiempo propio. Con --lifespan mide además el arranque completo
+(init_db, seed y workers) con TestClient.
+
+Termina con código 1 si el total supera el presupuesto:
+    STARTUP_IMPORT_BUDGET_MS   (default 1500)
+    STARTUP_LIFESPAN_BUDGET_MS (default 500)
+
+Usage:
+    python scripts/startup_profile.py
+    python scripts/startup_profile.py --top 15 --lifespan
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500"))
+STARTUP_LIFESPAN_BUDGET_MS = float(os.getenv("STARTUP_LIFESPAN_BUDGET_MS", "500"))
+
+
+def parse_importtime(output: str) -> list:
+    """
+    Líneas de `-X importtime` -> [(módulo, propio_ms, acumulado_ms, nivel)]
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        level = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, level))
+    return entries
+
+
+def profile_imports(module: str = "app.main") -> list:
+    """Importa `module` en un intérprete nuevo y retorna las entradas de importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return parse_importtime(result.stderr)
+
+
+def summarize(entries: list, top: int) -> dict:
+    total = entries[-1][2] if entries else 0.0
+
+    # Tiempo propio de cada módulo sumado por paquete raíz (fastapi, sqlalchemy, numpy...)
+    packages = {}
+    for name, self_ms, _, _ in entries:
+        root = name.split(".")[0]
+        if root != "app":
+            packages[root] = packages.get(root, 0.0) + self_ms
+
+    app_modules = sorted(
+        ((name, self_ms) for name, self_ms, _, _ in entries if name == "app" or name.startswith("app.")),
+        key=lambda item: item[1], reverse=True
+    )
+    return {
+        "total_ms": total,
+        "packages": sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top],
+        "app_modules": app_modules[:top],
+    }
+
+
+def measure_lifespan() -> float:
+    """Tiempo de arranque (lifespan) de la app ya importada, en ms"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    started = time.perf_counter()
+    with TestClient(app):
+        elapsed = (time.perf_counter() - started) * 1000
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Perfil de arranque en frío")
+    parser.add_argument("--top", type=int, default=10, help="Entradas por sección")
+    parser.add_argument("--lifespan", action="store_true", help="Medir también el lifespan")
+    args = parser.parse_args()
+
+    summary = summarize(profile_imports(), args.top)
+    over_budget = summary["total_ms"] > STARTUP_IMPORT_BUDGET_MS
+
+    print(f"Importar app.main: {summary['total_ms']:.0f} ms (presupuesto {STARTUP_IMPORT_BUDGET_MS:.0f} ms)")
+    print("\nPaquetes externos (tiempo propio sumado):")
+    for name, ms in summary["packages"]:
+        print(f"  {ms:8.1f} ms  {name}")
+    print("\nMódulos de la app (tiempo propio):")
+    for name, ms in summary["app_modules"]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    if args.lifespan:
+        lifespan_ms = measure_lifespan()
+        print(f"\nLifespan: {lifespan_ms:.0f} ms (presupuesto {STARTUP_LIFESPAN_BUDGET_MS:.0f} ms)")
+        over_budget = over_budget or lifespan_ms > STARTUP_LIFESPAN_BUDGET_MS
+
+    if over_budget:
+        print("\n❌ Arranque por encima del presupuesto")
+        return 1
+    print("\n✅ Arranque dentro del presupuesto")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,19 @@
 import pytest
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
 from app.main import app
 from app.db import engine
-from sqlmodel import Session, SQLModel, delete
+from app.core.query_monitor import capture_queries
+from sqlmodel import Session, SQLModel, create_engine, delete
+from sqlalchemy.pool import StaticPool
 from app.models.user import User
 from app.models.company import Company
 from app.models.audit_log import AuditLog
+from app.models.aps import APS
+from app.models.aps_monthly_data import APSMonthlyData
+from app.repositories.aps_repository import APSMonthlyDataRepository
+from app.tariff_core.formula_graph import FormulaNode
+from app.tariff_core.rule_sets import RuleSet, register_rule_set, unregister_rule_set
 
 @pytest.fixture(scope="function", autouse=True)
 def clean_db():
@@ -30,3 +38,84 @@ def clean_db():
 def client():
     with TestClient(app) as c:
         yield c
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Verifica el número de consultas de un bloque (p.ej. una llamada a una ruta).
+
+    Usage:
+        with assert_max_queries(3):
+            client.get("/auth/me", headers=headers)
+    """
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        with capture_queries(engine) as stats:
+            yield stats
+        assert stats.count <= limit, f"Se esperaban máximo {limit} consultas:\n{stats.report()}"
+    return _assert_max_queries
+
+
+@pytest.fixture(scope="function")
+def range_session():
+    """Sesión sobre una BD SQLite en memoria con todas las tablas"""
+    memory_engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(memory_engine)
+    with Session(memory_engine) as session:
+        yield session
+    memory_engine.dispose()
+
+
+@pytest.fixture
+def aps_with_history(range_session):
+    """APS con datos mensuales 2023-01 a 2025-12 (falta 2024-07)"""
+    aps = APS(
+        company_id=1, name="APS Norte", code="APS-N",
+        municipality="Bogotá", department="Cundinamarca",
+        distance_to_landfill_km=25.0
+    )
+    range_session.add(aps)
+    range_session.commit()
+    range_session.refresh(aps)
+
+    repo = APSMonthlyDataRepository(range_session)
+    periods = [f"{y}-{m:02d}" for y in (2023, 2024, 2025) for m in range(1, 13)]
+    periods.remove("2024-07")  # hueco dentro del rango
+    for i, period in enumerate(periods):
+        repo.create(APSMonthlyData(
+            aps_id=aps.id, period=period, year=0, month=0,
+            num_subscribers_total=10000 + 10 * i, num_subscribers_occupied=9500,
+            num_subscribers_vacant=500 + i,
+            tons_collected_non_recyclable=800.0 + 3.5 * i,
+            tons_collected_sweeping=40.0 + i,
+            tons_collected_urban_cleaning=12.0,
+            tons_collected_recyclable=5.0 + 0.1 * i,
+            tons_received_landfill=820.0 + 2.25 * i,
+            leachate_volume_m3=300.0 + i,
+            sweeping_length_km=120.0 + 0.5 * i,
+        ))
+    return aps
+
+
+@pytest.fixture
+def amended_rules():
+    """Versión de la regla vigente desde 2025-01 (F1 y VBA modificados)"""
+    rule_set = register_rule_set(RuleSet(
+        version="test-2025",
+        effective_from="2025-01",
+        description="Enmienda de prueba",
+        constants={"F1_BASE": 70000, "PRODUCTION_FACTORS": {"stratum_1": 0.70, "stratum_4": 1.00}},
+        formula_overrides={
+            "vba": lambda calculator: FormulaNode(
+                ["vba"], ["crt", "cdf"], lambda crt, cdf: calculator._round((crt + cdf) * calculator._num(0.9), 2)
+            ),
+        },
+        formulas={"VBA": "VBA = (CRT + CDF) × 0.9"},
+    ))
+    yield rule_set
+    unregister_rule_set(rule_set.version)
@@ -0,0 +1,133 @@
+import pytest
+from sqlalchemy import event
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models.aps import APS
+from app.models.aps_monthly_data import APSMonthlyData
+from app.models.tariff_calculation import TariffCalculation
+from app.controllers.aps_controller import APSController
+from app.repositories.aps_repository import APSMonthlyDataRepository
+
+# Registrar todos los modelos en la metadata
+import app.main  # noqa: F401
+
+
+@pytest.fixture(scope="function")
+def summary_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _add_aps(session, code: str) -> APS:
+    aps = APS(
+        company_id=1, name=f"APS {code}", code=code,
+        municipality="Bogotá", department="Cundinamarca",
+        distance_to_landfill_km=20.0
+    )
+    session.add(aps)
+    session.commit()
+    session.refresh(aps)
+    return aps
+
+
+def _add_months(session, aps_id: int, periods):
+    repo = APSMonthlyDataRepository(session)
+    for i, period in enumerate(periods):
+        repo.create(APSMonthlyData(
+            aps_id=aps_id, period=period, year=0, month=0,
+            num_subscribers_total=100 + i, num_subscribers_occupied=90, num_subscribers_vacant=10,
+            tons_collected_non_recyclable=50.0 + i, tons_received_landfill=40.0 + 2 * i
+        ))
+
+
+def test_summary_matches_full_history_computation(summary_session):
+    aps = _add_aps(summary_session, "N")
+    # Varios años y un hueco dentro de la ventana de 6 meses
+    periods = [f"{y}-{m:02d}" for y in (2023, 2024, 2025) for m in range(1, 13)]
+    periods += ["2026-01", "2026-03"]
+    _add_months(summary_session, aps.id, periods)
+
+    repo = APSMonthlyDataRepository(summary_session)
+    stats = repo.get_summary_stats(aps.id)
+
+    assert stats["last_month_data"].period == "2026-03"
+    assert stats["total_months_registered"] == len(periods)
+    expected = repo.calculate_6_month_averages(aps.id, "2026-03")
+    assert stats["six_month_averages"]["months_count"] == expected["months_count"] == 5
+    for key, value in expected.items():
+        assert stats["six_month_averages"][key] == pytest.approx(value)
+
+
+def test_summary_batch_handles_aps_without_data(summary_session):
+    with_data = _add_aps(summary_session, "A")
+    without_data = _add_aps(summary_session, "B")
+    _add_months(summary_session, with_data.id, ["2026-01", "2026-02"])
+
+    stats = APSMonthlyDataRepository(summary_session).get_summary_stats_batch(
+        [with_data.id, without_data.id]
+    )
+
+    assert stats[with_data.id]["last_month_data"].period == "2026-02"
+    assert stats[with_data.id]["total_months_registered"] == 2
+    assert stats[without_data.id] == {
+        "last_month_data": None,
+        "total_months_registered": 0,
+        "verified_months": 0,
+        "six_month_averages": None,
+    }
+
+
+def _add_tariff(session, aps_id: int, period: str, stratum_4_final: float):
+    required = dict.fromkeys((
+        "cft", "ccs", "clus", "cbls", "cvna", "crt", "cdf", "ctl",
+        "crt_distance_km", "crt_avg_tons", "cdf_vu", "cdf_pc", "cdf_avg_tons_landfill",
+        "ctl_volume_m3", "ctl_environmental_tax", "ctl_vu", "ctl_pc",
+        "vba", "trbl", "trlu", "trra", "tra",
+    ), 1.0)
+    session.add(TariffCalculation(
+        company_id=1, aps_id=aps_id, period=period, calculated_by=1, ctl_scenario=1,
+        tariff_stratum_4_final=stratum_4_final, **required
+    ))
+    session.commit()
+
+
+def test_company_dashboard_uses_fixed_number_of_queries(summary_session):
+    aps_ids = [_add_aps(summary_session, f"D{i}").id for i in range(5)]
+    for aps_id in aps_ids:
+        _add_months(summary_session, aps_id, ["2026-01", "2026-02"])
+        _add_tariff(summary_session, aps_id, "2026-01", 1000.0)
+        _add_tariff(summary_session, aps_id, "2026-02", 2000.0 + aps_id)
+    APSMonthlyDataRepository(summary_session).verify_data(1, verified_by=1)
+    summary_session.expire_all()
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = summary_session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        dashboard = APSController(summary_session).get_company_dashboard(
+            company_id=1, current_user_company_id=1
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 4
+    assert dashboard["total_aps"] == 5
+    first = dashboard["aps"][0]
+    assert first["latest_tariff"]["period"] == "2026-02"
+    assert first["latest_tariff"]["final"]["stratum_4"] == 2000.0 + first["aps"]["id"]
+    assert first["verification"]["total_months"] == 2
+    assert first["six_month_averages"]["months_count"] == 2
+    verified = sum(card["verification"]["verified_months"] for card in dashboard["aps"])
+    assert verified == 1
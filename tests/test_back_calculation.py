@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import event
+
+from app.repositories.aps_repository import APSMonthlyDataRepository
+from app.services.tariff_calculation_service import TariffCalculationService
+
+
+def test_rolling_averages_match_per_period_windows(range_session, aps_with_history):
+    repo = APSMonthlyDataRepository(range_session)
+    rolling = repo.calculate_rolling_6_month_averages(aps_with_history.id, "2024-01", "2025-12")
+
+    assert list(rolling) == [f"{y}-{m:02d}" for y in (2024, 2025) for m in range(1, 13)]
+    for period, averages in rolling.items():
+        expected = repo.calculate_6_month_averages(aps_with_history.id, period)
+        assert averages.keys() == expected.keys()
+        for key, value in expected.items():
+            assert averages[key] == pytest.approx(value), (period, key)
+
+
+def test_back_calculation_matches_single_period_and_reads_once(range_session, aps_with_history):
+    service = TariffCalculationService(range_session)
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        if "aps_monthly_data" in statement:
+            statements.append(statement)
+
+    engine = range_session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        results = service.back_calculate_range(aps_with_history.id, "2024-01", "2025-12")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(results) == 24
+    assert len(statements) == 1
+
+    for item in (results[0], results[6], results[-1]):
+        single = service.calculate_simulation(
+            aps_id=aps_with_history.id, period=item["period"], calculated_by=1,
+            simulation_name="check", simulation_data={}
+        )
+        assert item["cft"] == pytest.approx(single.cft)
+        assert item["cvna"] == pytest.approx(single.cvna)
+        assert item["tariffs"]["stratum_4"]["final"] == pytest.approx(single.tariff_stratum_4_final)
+
+
+def test_back_calculation_reports_periods_without_data(range_session, aps_with_history):
+    results = TariffCalculationService(range_session).back_calculate_range(
+        aps_with_history.id, "2026-06", "2026-07"
+    )
+    assert results[0]["period"] == "2026-06"
+    assert "error" in results[0]
@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+import pytest
+
+from app.tariff_core.tariff_calculator_720 import (
+    ARITHMETIC_DECIMAL, TariffCalculator720, quantize, to_float
+)
+from app.services.tariff_calculation_service import TariffCalculationService
+
+
+def test_quantize_rounds_half_up():
+    assert quantize(1.005, 2) == Decimal("1.01")
+    assert quantize(2.675, 2) == Decimal("2.68")
+    # El float binario redondea hacia abajo el mismo caso
+    assert round(2.675, 2) == 2.67
+
+
+def test_decimal_calculator_matches_float_within_a_cent():
+    exact = TariffCalculator720(arithmetic=ARITHMETIC_DECIMAL)
+    fast = TariffCalculator720()
+
+    crt_exact, details = exact.calculate_crt(distance_km=25.0, avg_tons_month=830.3)
+    crt_fast, _ = fast.calculate_crt(distance_km=25.0, avg_tons_month=830.3)
+    base_exact, final_exact = exact.calculate_final_tariff(
+        cft=8250.0, cvna=35890.0, vba=1710.0, trbl=0.004, trlu=0.0012,
+        trra=0.0005, tra=0.0004, trna=0.071234, subsidy_contribution_factor=-0.5
+    )
+
+    assert isinstance(crt_exact, Decimal)
+    assert crt_exact == crt_exact.quantize(Decimal("0.01"))
+    assert float(crt_exact) == pytest.approx(crt_fast, abs=0.02)
+    assert isinstance(final_exact, Decimal)
+    assert to_float(details)["f1"] == float(details["f1"])
+
+
+def test_unsupported_arithmetic_is_rejected():
+    with pytest.raises(ValueError):
+        TariffCalculator720(arithmetic="fixed")
+
+
+def test_exact_back_calculation_matches_float(range_session, aps_with_history):
+    service = TariffCalculationService(range_session)
+    fast = service.back_calculate_range(aps_with_history.id, "2025-01", "2025-03")
+    exact = service.back_calculate_range(aps_with_history.id, "2025-01", "2025-03", exact=True)
+
+    for fast_row, exact_row in zip(fast, exact):
+        assert isinstance(exact_row["cft"], float)
+        assert exact_row["cvna"] == pytest.approx(fast_row["cvna"], abs=0.02)
+        for stratum, tariff in fast_row["tariffs"].items():
+            assert exact_row["tariffs"][stratum]["final"] == pytest.approx(tariff["final"], abs=0.05)
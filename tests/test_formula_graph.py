@@ -0,0 +1,59 @@
+import pytest
+
+from app.tariff_core.formula_graph import FormulaGraph, FormulaNode
+from app.services.tariff_calculation_service import TariffCalculationService
+
+
+def test_update_reevaluates_only_downstream_nodes():
+    calls = []
+
+    def track(name, func):
+        def wrapper(**kwargs):
+            calls.append(name)
+            return func(**kwargs)
+        return wrapper
+
+    graph = FormulaGraph(["a", "b", "c"], [
+        FormulaNode(["total"], ["sum_ab", "c"], track("total", lambda sum_ab, c: sum_ab * c)),
+        FormulaNode(["sum_ab"], ["a", "b"], track("sum_ab", lambda a, b: a + b)),
+        FormulaNode(["double_c"], ["c"], track("double_c", lambda c: c * 2)),
+    ])
+    evaluation = graph.evaluate({"a": 1, "b": 2, "c": 3})
+    assert evaluation["total"] == 9
+
+    calls.clear()
+    assert evaluation.update({"a": 2}) == ["sum_ab", "total"]
+    assert calls == ["sum_ab", "total"] and evaluation["total"] == 12
+
+    # Mismo resultado intermedio: no se propaga
+    calls.clear()
+    assert evaluation.update({"a": 3, "b": 1}) == ["sum_ab"]
+    assert evaluation["total"] == 12
+
+
+def test_graph_rejects_cycles_and_unknown_inputs():
+    with pytest.raises(ValueError):
+        FormulaGraph(["a"], [
+            FormulaNode(["x"], ["a", "y"], lambda a, y: a),
+            FormulaNode(["y"], ["x"], lambda x: x),
+        ])
+    with pytest.raises(ValueError):
+        FormulaGraph(["a"], [FormulaNode(["x"], ["missing"], lambda missing: missing)])
+
+
+def test_what_if_matches_full_recalculation(range_session, aps_with_history):
+    service = TariffCalculationService(range_session)
+    result = service.what_if(
+        aps_with_history.id, "2025-06", {"leachate_volume_m3": 900.0}, include_trace=True
+    )
+
+    assert result["recomputed_nodes"][0] == "ctl"
+    assert "ccs" not in result["recomputed_nodes"]
+    assert {"node", "reference", "inputs", "outputs"} == set(result["trace"][0])
+
+    averages = service.monthly_repo.calculate_6_month_averages(aps_with_history.id, "2025-06")
+    averages["leachate_volume_m3"] = 900.0
+    expected = service._compute_tariff_components(aps_with_history, averages)
+    assert result["components"]["cvna"] == pytest.approx(expected["cvna"])
+    assert result["tariffs"]["stratum_4"]["final"] == pytest.approx(expected["tariffs"]["stratum_4"]["final"])
+    assert result["tariffs"]["stratum_4"]["final"] > result["baseline_tariffs"]["stratum_4"]["final"]
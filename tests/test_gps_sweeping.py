@@ -0,0 +1,167 @@
+import io
+import math
+
+import pytest
+from sqlmodel import select
+
+from app.models.aps_monthly_data import APSMonthlyData
+from app.models.job import Job
+from app.models.sweeping_gps import SweepingTraceChunk
+from app.repositories.job_repository import JobRepository
+from app.repositories.sweeping_gps_repository import SweepingGpsRepository
+from app.services import gps_sweeping
+from app.tariff_core import stratum_tariffs
+from app.services.job_handlers import process_sweeping_traces
+from app.services.job_queue import JobContext
+
+LAT0, LON0 = 4.60, -74.08
+
+
+def _street(track, meters, heading=30.0, step=1.5, t0=0, seconds_per_step=1.0):
+    """Puntos a lo largo de una recta desde (LAT0, LON0)"""
+    points = []
+    for i in range(int(meters / step) + 1):
+        distance = i * step
+        lat = LAT0 + distance * math.cos(math.radians(heading)) / gps_sweeping.METERS_PER_DEGREE
+        lon = LON0 + distance * math.sin(math.radians(heading)) / (
+            gps_sweeping.METERS_PER_DEGREE * math.cos(math.radians(LAT0))
+        )
+        points.append((track, t0 + i * seconds_per_step, lat, lon))
+    return points
+
+
+def _accumulate(points, chunk=500):
+    accumulator = gps_sweeping.SweptDistanceAccumulator(cell_meters=5.0)
+    for start in range(0, len(points), chunk):
+        accumulator.add_chunk(*(list(column) for column in zip(*points[start:start + chunk])))
+    return accumulator.result()
+
+
+@pytest.fixture(params=["numpy", "python"])
+def numpy_mode(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(stratum_tariffs, "np", None)
+        monkeypatch.setattr(stratum_tariffs, "_numpy_loaded", True)
+    return request.param
+
+
+def test_repeated_passes_count_once(numpy_mode):
+    points = (
+        _street("dia-1", 1000)
+        + _street("dia-2", 1000, t0=86400)    # misma cuadra otro día
+        + _street("dia-3", 600, heading=120)  # otra calle
+    )
+    result = _accumulate(points)
+
+    assert result["traveled_km"] == pytest.approx(2.6, abs=0.01)
+    assert result["swept_km"] == pytest.approx(1.6, rel=0.01)
+    assert result["segments_discarded"] == 0
+
+
+def test_transit_and_gaps_are_not_swept(numpy_mode):
+    sweeping = _street("t", 300)
+    # El vehículo sigue a 54 km/h (tránsito) y luego pierde señal 10 minutos
+    transit = _street("t", 300, heading=200, step=15.0, t0=sweeping[-1][1] + 1)
+    gap = [("t", transit[-1][1] + 600, LAT0 + 0.01, LON0)]
+    result = _accumulate(sweeping + transit + gap)
+
+    assert result["swept_km"] == pytest.approx(0.3, rel=0.02)
+    assert result["segments_discarded"] == len(transit) + 1
+
+
+def test_gpx_and_csv_chunks_match(tmp_path):
+    points = _street("1:1", 800) + _street("1:2", 400, heading=90)
+
+    csv_path = tmp_path / "trazas.csv"
+    with open(csv_path, "w") as fileobj:
+        fileobj.write("vehicle,timestamp,lat,lon\n")
+        for track, seconds, lat, lon in points:
+            fileobj.write(f"{track},{seconds},{lat!r},{lon!r}\n")
+
+    segments = {}
+    for track, seconds, lat, lon in points:
+        segments.setdefault(track, []).append(
+            f'<trkpt lat="{lat!r}" lon="{lon!r}"><time>{seconds}</time></trkpt>'
+        )
+    gpx_path = tmp_path / "trazas.gpx"
+    gpx_path.write_text(
+        '<?xml version="1.0"?><gpx xmlns="http://www.topografix.com/GPX/1/1"><trk>'
+        + "".join(f"<trkseg>{''.join(rows)}</trkseg>" for rows in segments.values())
+        + "</trk></gpx>"
+    )
+
+    from_csv = gps_sweeping.process_trace_files([str(csv_path)], chunk_points=97)
+    from_gpx = gps_sweeping.process_trace_files([str(gpx_path)], chunk_points=10000)
+    assert from_csv["points"] == from_gpx["points"] == len(points)
+    assert from_csv["swept_km"] == pytest.approx(from_gpx["swept_km"], rel=0.005)
+    assert from_gpx["swept_km"] == pytest.approx(1.2, rel=0.01)
+
+
+def _upload(session, upload_id, rows):
+    content = "track_id,timestamp,lat,lon\n" + "".join(
+        f"{track},{seconds},{lat!r},{lon!r}\n" for track, seconds, lat, lon in rows
+    )
+    SweepingGpsRepository(session).store_trace(upload_id, 0, ".csv", io.BytesIO(content.encode()), chunk_bytes=4096)
+    session.commit()
+
+
+def _trace_job(session, aps_id, upload_id, max_attempts=3):
+    job = JobRepository(session).create(Job(
+        job_type="sweeping.process_traces",
+        payload={"aps_id": aps_id, "period": "2025-05", "upload_id": upload_id, "files": 1},
+        company_id=1, submitted_by=1, max_attempts=max_attempts,
+    ))
+    job.attempts = 1
+    return job
+
+
+def _stored_chunks(session, upload_id):
+    return session.exec(select(SweepingTraceChunk).where(SweepingTraceChunk.upload_id == upload_id)).all()
+
+
+def test_job_writes_sweeping_length(range_session, aps_with_history):
+    _upload(range_session, "mayo", _street("a", 2000) + _street("b", 2000, t0=3600))
+    assert len(_stored_chunks(range_session, "mayo")) > 1
+
+    job = _trace_job(range_session, aps_with_history.id, "mayo")
+    result = process_sweeping_traces(
+        range_session, dict(job.payload), JobContext(job, JobRepository(range_session))
+    )
+
+    assert result["monthly_data_updated"]
+    assert result["swept_km"] == pytest.approx(2.0, rel=0.01)
+    assert _stored_chunks(range_session, "mayo") == []
+
+    summary = SweepingGpsRepository(range_session).get_by_aps_and_period(aps_with_history.id, "2025-05")
+    assert summary.job_id == job.id
+    monthly = range_session.exec(select(APSMonthlyData).where(
+        APSMonthlyData.aps_id == aps_with_history.id, APSMonthlyData.period == "2025-05"
+    )).one()
+    range_session.refresh(monthly)
+    assert monthly.sweeping_length_km == pytest.approx(result["swept_km"])
+
+
+def test_traces_without_sweeping_segments_fail_the_job(range_session, aps_with_history):
+    monthly = range_session.exec(select(APSMonthlyData).where(
+        APSMonthlyData.aps_id == aps_with_history.id, APSMonthlyData.period == "2025-05"
+    )).one()
+    previous_km = monthly.sweeping_length_km
+
+    # Sólo tránsito a 54 km/h: ningún segmento de barrido
+    _upload(range_session, "transito", _street("t", 3000, step=15.0))
+    job = _trace_job(range_session, aps_with_history.id, "transito", max_attempts=2)
+    context = JobContext(job, JobRepository(range_session))
+    with pytest.raises(ValueError, match="segmentos de barrido"):
+        process_sweeping_traces(range_session, dict(job.payload), context)
+
+    # Quedan intentos: las trazas se conservan para el reintento
+    assert _stored_chunks(range_session, "transito")
+    assert SweepingGpsRepository(range_session).get_by_aps_and_period(aps_with_history.id, "2025-05") is None
+    range_session.refresh(monthly)
+    assert monthly.sweeping_length_km == previous_km
+
+    # En el último intento se eliminan aunque el trabajo falle
+    job.attempts = 2
+    with pytest.raises(ValueError):
+        process_sweeping_traces(range_session, dict(job.payload), JobContext(job, JobRepository(range_session)))
+    assert _stored_chunks(range_session, "transito") == []
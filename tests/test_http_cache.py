@@ -0,0 +1,96 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.http_cache import make_etag, etag_matches, not_modified_response, cache_headers
+from app.core.responses import FastJSONResponse
+from app.models.aps import APS
+from app.models.aps_monthly_data import APSMonthlyData
+from app.repositories.aps_repository import APSMonthlyDataRepository
+
+# Registrar todos los modelos en la metadata
+import app.main  # noqa: F401
+
+
+@pytest.fixture(scope="function")
+def cache_engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _make_app(version: dict) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/resource")
+    def resource(request: Request):
+        etag = make_etag("resource", version["value"])
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
+        version["loads"] += 1
+        return FastJSONResponse({"value": version["value"]}, headers=cache_headers(etag))
+
+    return app
+
+
+def test_conditional_get_returns_304_until_version_changes():
+    version = {"value": 1, "loads": 0}
+    client = TestClient(_make_app(version))
+
+    first = client.get("/resource")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert "max-age" in first.headers["cache-control"]
+
+    cached = client.get("/resource", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    assert version["loads"] == 1
+
+    version["value"] = 2
+    fresh = client.get("/resource", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+
+
+def test_if_none_match_list_and_weak_prefix():
+    version = {"value": 1, "loads": 0}
+    client = TestClient(_make_app(version))
+    etag = client.get("/resource").headers["etag"]
+
+    assert client.get("/resource", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get("/resource", headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get("/resource", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_monthly_version_changes_on_update(cache_engine):
+    with Session(cache_engine) as session:
+        aps = APS(
+            company_id=1, name="APS Norte", code="APS-N",
+            municipality="Bogotá", department="Cundinamarca",
+            distance_to_landfill_km=20.0
+        )
+        session.add(aps)
+        session.commit()
+        session.refresh(aps)
+
+        repo = APSMonthlyDataRepository(session)
+        empty_version = repo.get_version(aps.id)
+        data = repo.create(APSMonthlyData(
+            aps_id=aps.id, period="2026-01", year=0, month=0,
+            num_subscribers_total=100, num_subscribers_occupied=90, num_subscribers_vacant=10,
+            tons_collected_non_recyclable=50.0, tons_received_landfill=50.0
+        ))
+        created_version = repo.get_version(aps.id)
+        assert created_version != empty_version
+
+        repo.update(data.id, {"num_subscribers_total": 120})
+        assert repo.get_version(aps.id) != created_version
@@ -0,0 +1,216 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models.job import Job, JobStatus
+from app.repositories.job_repository import JobRepository
+from app.core.exceptions import ValidationError
+from app.services.job_queue import JOB_LEASE_SECONDS, JobQueue, register_job_handler, validate_job_payload
+
+# Registrar todos los modelos en la metadata
+import app.main  # noqa: F401
+
+
+@pytest.fixture(scope="function")
+def job_engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _submit(engine, job_type, payload=None, priority=0, max_attempts=3) -> int:
+    with Session(engine) as session:
+        job = JobRepository(session).create(Job(
+            job_type=job_type,
+            payload=payload or {},
+            priority=priority,
+            max_attempts=max_attempts,
+            submitted_by=1,
+        ))
+        return job.id
+
+
+def _get(engine, job_id) -> Job:
+    with Session(engine) as session:
+        return JobRepository(session).get_by_id(job_id)
+
+
+@register_job_handler("test.echo")
+def _echo_handler(session, payload, context):
+    context.report_progress(0.5, "mitad")
+    return {"echo": payload.get("value")}
+
+
+_flaky_calls = {"count": 0}
+
+
+@register_job_handler("test.flaky")
+def _flaky_handler(session, payload, context):
+    _flaky_calls["count"] += 1
+    if _flaky_calls["count"] < payload["fail_times"] + 1:
+        raise RuntimeError("fallo temporal")
+    return {"calls": _flaky_calls["count"]}
+
+
+def test_job_runs_and_stores_result(job_engine):
+    job_id = _submit(job_engine, "test.echo", {"value": 42})
+    queue = JobQueue(job_engine, workers=1)
+
+    assert queue.run_pending_once() == job_id
+    job = _get(job_engine, job_id)
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.result == {"echo": 42}
+    assert job.progress == 1.0
+    assert queue.run_pending_once() is None
+
+
+def test_higher_priority_runs_first(job_engine):
+    low = _submit(job_engine, "test.echo", priority=0)
+    high = _submit(job_engine, "test.echo", priority=5)
+    queue = JobQueue(job_engine, workers=1)
+
+    assert queue.run_pending_once() == high
+    assert queue.run_pending_once() == low
+
+
+def test_failed_job_is_retried_until_max_attempts(job_engine):
+    _flaky_calls["count"] = 0
+    job_id = _submit(job_engine, "test.flaky", {"fail_times": 1}, max_attempts=2)
+    queue = JobQueue(job_engine, workers=1)
+
+    queue.run_pending_once()
+    assert _get(job_engine, job_id).status == JobStatus.QUEUED
+    queue.run_pending_once()
+    job = _get(job_engine, job_id)
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.attempts == 2
+
+    _flaky_calls["count"] = 0
+    job_id = _submit(job_engine, "test.flaky", {"fail_times": 5}, max_attempts=1)
+    queue.run_pending_once()
+    job = _get(job_engine, job_id)
+    assert job.status == JobStatus.FAILED
+    assert "fallo temporal" in job.error_message
+
+
+def test_cancel_queued_and_running_jobs(job_engine):
+    queued_id = _submit(job_engine, "test.echo")
+    with Session(job_engine) as session:
+        repo = JobRepository(session)
+        job = repo.request_cancel(repo.get_by_id(queued_id))
+        assert job.status == JobStatus.CANCELLED
+
+    running_id = _submit(job_engine, "test.echo")
+    with Session(job_engine) as session:
+        repo = JobRepository(session)
+        job = repo.get_by_id(running_id)
+        job.cancel_requested = True
+        session.add(job)
+        session.commit()
+
+    JobQueue(job_engine, workers=1).run_pending_once()
+    assert _get(job_engine, running_id).status == JobStatus.CANCELLED
+
+
+def test_only_jobs_with_expired_lease_are_requeued(job_engine):
+    alive_id = _submit(job_engine, "test.echo")
+    dead_id = _submit(job_engine, "test.echo")
+    exhausted_id = _submit(job_engine, "test.echo", max_attempts=1)
+    with Session(job_engine) as session:
+        repo = JobRepository(session)
+        for worker_id in ("otra-instancia:1:job-worker-1", "caida:7:job-worker-1", "caida:7:job-worker-2"):
+            repo.claim_next(worker_id)
+
+        # La instancia viva renueva su heartbeat; la caída dejó de hacerlo
+        expired_at = datetime.utcnow() - timedelta(seconds=JOB_LEASE_SECONDS + 60)
+        for job_id in (dead_id, exhausted_id):
+            job = repo.get_by_id(job_id)
+            job.updated_at = expired_at
+            session.add(job)
+        session.commit()
+        assert repo.heartbeat([alive_id, dead_id], "otra-instancia:1:job-worker-1") == 1
+
+    # Al arrancar otra instancia sólo se recuperan los trabajos abandonados
+    assert JobQueue(job_engine, workers=1).renew_leases() == 2
+
+    alive = _get(job_engine, alive_id)
+    assert alive.status == JobStatus.RUNNING
+    assert alive.worker_id == "otra-instancia:1:job-worker-1"
+    dead = _get(job_engine, dead_id)
+    assert dead.status == JobStatus.QUEUED and dead.worker_id is None
+    assert _get(job_engine, exhausted_id).status == JobStatus.FAILED
+
+
+def test_finish_is_ignored_after_losing_the_lease(job_engine):
+    job_id = _submit(job_engine, "test.echo")
+    with Session(job_engine) as session:
+        repo = JobRepository(session)
+        stale = repo.claim_next("lenta:1:job-worker-1")
+
+        # El lease vence y otro worker toma el trabajo
+        stale_copy = repo.get_by_id(job_id)
+        stale_copy.updated_at = datetime.utcnow() - timedelta(seconds=JOB_LEASE_SECONDS + 60)
+        session.add(stale_copy)
+        session.commit()
+        assert repo.requeue_expired(JOB_LEASE_SECONDS) == 1
+        assert repo.claim_next("nueva:2:job-worker-1").id == job_id
+
+        assert not repo.finish(stale, "lenta:1:job-worker-1", JobStatus.SUCCEEDED, result={"viejo": True})
+        assert not repo.requeue(stale, "lenta:1:job-worker-1", "fallo viejo")
+        assert repo.finish(stale, "nueva:2:job-worker-1", JobStatus.SUCCEEDED, result={"nuevo": True})
+
+    job = _get(job_engine, job_id)
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.result == {"nuevo": True}
+    assert job.attempts == 2
+
+
+def test_payloads_are_validated_on_submit(job_engine):
+    invalid = [
+        ("tariff.recalculate", {}),
+        ("tariff.recalculate", {"period": "2025-13"}),
+        ("tariff.recalculate", {"period": "2025-06", "aps_ids": "1,2"}),
+        ("tariff.recalculate", {"period": "2025-06", "subsidy_factors": {"stratum_1": "mucho"}}),
+        ("tariff.replay", {"start_period": "2025-06", "end_period": "2025-01"}),
+        ("tariff.replay", {"chunk_size": 0}),
+        ("sweeping.process_traces", {"aps_id": 1, "period": "2025-05", "upload_id": "no-existe"}),
+        ("tipo.desconocido", {}),
+    ]
+    with Session(job_engine) as session:
+        for job_type, payload in invalid:
+            with pytest.raises(ValidationError):
+                validate_job_payload(session, job_type, payload, company_id=1)
+
+        payload = {"period": "2025-06", "aps_ids": [1, 2]}
+        assert validate_job_payload(session, "tariff.recalculate", payload, company_id=1) == payload
+        assert validate_job_payload(session, "tariff.replay", {}, company_id=1) == {}
+
+
+def test_submit_rejects_invalid_payload(client):
+    token = client.post("/auth/login", json={"username": "system", "password": "system1234"}).json()["access_token"]
+    response = client.post(
+        "/jobs", json={"job_type": "tariff.recalculate", "payload": {}},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 422
+    assert response.json()["error"]["details"]["field"] == "payload.period"
+
+
+def test_system_recalculation_requires_explicit_scope(job_engine):
+    with Session(job_engine) as session:
+        # SYSTEM (sin empresa) no puede recalcular todas las empresas
+        with pytest.raises(ValidationError):
+            validate_job_payload(session, "tariff.recalculate", {"period": "2025-06"}, company_id=None)
+        for payload in ({"period": "2025-06", "company_id": 3}, {"period": "2025-06", "aps_ids": [7]}):
+            assert validate_job_payload(session, "tariff.recalculate", payload, company_id=None) == payload
+
+        # ADMIN sólo su propia empresa
+        with pytest.raises(ValidationError):
+            validate_job_payload(session, "tariff.recalculate", {"period": "2025-06", "company_id": 3}, company_id=1)
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.routes import tariff_calculation as tariff_routes
+from app.services.tariff_calculation_service import TariffCalculationService
+
+LIVE_URL = "/api/api/tariff-calculation/validator/live"
+
+
+def test_delta_pushes_only_changed_outputs(range_session, aps_with_history):
+    service = TariffCalculationService(range_session)
+    live = service.start_live_simulation(aps_with_history.id, "2025-06")
+    snapshot = live.snapshot()
+    assert snapshot["inputs"]["leachate_volume_m3"] > 0
+    assert "stratum_4" in snapshot["outputs"]["tariffs"]
+
+    update = live.apply({"leachate_volume_m3": 900.0})
+    assert update["recomputed"][0] == "ctl"
+    assert "ccs" not in update["changed"] and "cft" not in update["changed"]
+    assert set(update["changed"]) >= {"ctl", "cvna", "tariffs"}
+
+    averages = service.monthly_repo.calculate_6_month_averages(aps_with_history.id, "2025-06")
+    averages["leachate_volume_m3"] = 900.0
+    expected = service._compute_tariff_components(aps_with_history, averages)
+    assert update["changed"]["tariffs"]["stratum_4"]["final"] == pytest.approx(
+        expected["tariffs"]["stratum_4"]["final"]
+    )
+
+    # Subsidio de un solo estrato: sólo cambia esa categoría
+    update = live.apply({"subsidy_factors": {"stratum_1": -0.5}})
+    assert list(update["changed"]["tariffs"]) == ["stratum_1"]
+    assert list(update["changed"]["tariffs"]["stratum_1"]) == ["final"]
+
+
+def test_delta_rejects_unknown_or_non_numeric_fields(range_session, aps_with_history):
+    live = TariffCalculationService(range_session).start_live_simulation(aps_with_history.id, "2025-06")
+    with pytest.raises(ValueError):
+        live.apply({"cft": 1.0})
+    with pytest.raises(ValueError):
+        live.apply({"leachate_volume_m3": "mucho"})
+    # json.loads produce NaN/inf desde "NaN" y "1e400"
+    with pytest.raises(ValueError):
+        live.apply({"leachate_volume_m3": float("inf")})
+    with pytest.raises(ValueError):
+        live.apply({"subsidy_factors": {"stratum_1": float("nan")}})
+    # Los valores rechazados no llegan al grafo: todo sigue siendo JSON válido
+    json.dumps(live.snapshot(), allow_nan=False)
+    assert "ctl" in live.apply({"leachate_volume_m3": 900.0})["changed"]
+
+
+def test_websocket_requires_token(client):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect(LIVE_URL) as websocket:
+            websocket.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_websocket_reports_errors_without_closing(client):
+    token = client.post("/auth/login", json={"username": "system", "password": "system1234"}).json()["access_token"]
+    with client.websocket_connect(f"{LIVE_URL}?token={token}") as websocket:
+        websocket.send_json({"type": "delta", "seq": 1, "changes": {"leachate_volume_m3": 1}})
+        assert websocket.receive_json() == {
+            "type": "error", "seq": 1, "detail": "Sesión no iniciada: envíe primero un mensaje init"
+        }
+        websocket.send_json({"type": "init", "seq": 2, "aps_id": 999999, "period": "2025-06"})
+        message = websocket.receive_json()
+        assert message["type"] == "error" and message["seq"] == 2
+
+
+def test_websocket_reports_unexpected_errors(client, monkeypatch):
+    def failing_start(self, aps_id, period, subsidy_factors=None):
+        raise KeyError("tons_received_landfill")
+
+    monkeypatch.setattr(tariff_routes, "validate_user_owns_aps", lambda session, aps_id, user: None)
+    monkeypatch.setattr(TariffCalculationService, "start_live_simulation", failing_start)
+    token = client.post("/auth/login", json={"username": "system", "password": "system1234"}).json()["access_token"]
+    with client.websocket_connect(f"{LIVE_URL}?token={token}") as websocket:
+        websocket.send_json({"type": "init", "seq": 3, "aps_id": 1, "period": "2025-06"})
+        message = websocket.receive_json()
+        assert message["type"] == "error" and message["seq"] == 3
+        assert "KeyError" in message["detail"]
+        # La conexión sigue abierta
+        websocket.send_json({"type": "otro", "seq": 4})
+        assert websocket.receive_json()["seq"] == 4
@@ -0,0 +1,112 @@
+import pytest
+
+from app.core.query_monitor import capture_queries
+from app.models.aps import APS
+from app.models.aps_monthly_data import APSMonthlyData
+from app.repositories.aps_repository import APSMonthlyDataRepository
+from app.repositories.municipality_cost_repository import MunicipalityCostRepository
+from app.services.tariff_calculation_service import TariffCalculationService
+
+PERIOD = "2025-06"
+
+
+def _add_aps(session, code: str, distance_km: float, tons: float, municipality: str = "Bogotá") -> APS:
+    aps = APS(
+        company_id=1, name=f"APS {code}", code=code,
+        municipality=municipality, department="Cundinamarca",
+        distance_to_landfill_km=distance_km
+    )
+    session.add(aps)
+    session.commit()
+    session.refresh(aps)
+
+    repo = APSMonthlyDataRepository(session)
+    for month in range(1, 7):
+        repo.create(APSMonthlyData(
+            aps_id=aps.id, period=f"2025-{month:02d}", year=0, month=0,
+            num_subscribers_total=10000, num_subscribers_occupied=9500, num_subscribers_vacant=500,
+            tons_collected_non_recyclable=tons, tons_received_landfill=tons * 1.1,
+            leachate_volume_m3=300.0, sweeping_length_km=120.0,
+        ))
+    return aps
+
+
+def _weighted(pairs):
+    return sum(value * tons for value, tons in pairs) / sum(tons for _, tons in pairs)
+
+
+def test_vba_uses_tonnage_weighted_municipality_costs(range_session):
+    north = _add_aps(range_session, "N", distance_km=10.0, tons=800.0)
+    south = _add_aps(range_session, "S", distance_km=60.0, tons=200.0)
+    other = _add_aps(range_session, "O", distance_km=35.0, tons=500.0, municipality="Chía")
+    service = TariffCalculationService(range_session)
+
+    first = service.calculate_official_tariff(north.id, PERIOD, calculated_by=1)
+    # Sin otros APS en el municipio el VBA usa los costos propios
+    assert first.vba == pytest.approx(first.crt + first.cdf, abs=0.01)
+
+    second = service.calculate_official_tariff(south.id, PERIOD, calculated_by=1)
+    crt_p = _weighted([(first.crt, 800.0), (second.crt, 200.0)])
+    cdf_p = _weighted([(first.cdf, 880.0), (second.cdf, 220.0)])
+    assert second.vba == pytest.approx(crt_p + cdf_p, abs=0.01)
+    assert second.input_data["municipality_costs"]["crt_tons"] == pytest.approx(800.0)
+
+    # Otro municipio no se mezcla
+    third = service.calculate_official_tariff(other.id, PERIOD, calculated_by=1)
+    assert third.vba == pytest.approx(third.crt + third.cdf, abs=0.01)
+
+    aggregate = MunicipalityCostRepository(range_session).get_aggregate("Bogotá", "Cundinamarca", PERIOD)
+    assert aggregate.aps_count == 2
+    assert aggregate.crt_weighted_sum / aggregate.crt_tons == pytest.approx(crt_p)
+    assert aggregate.cdf_weighted_sum / aggregate.cdf_tons == pytest.approx(cdf_p)
+
+
+def test_recording_again_replaces_previous_contribution(range_session):
+    north = _add_aps(range_session, "N", distance_km=10.0, tons=800.0)
+    repo = MunicipalityCostRepository(range_session)
+
+    repo.record_contribution(north, PERIOD, crt=100.0, crt_tons=10.0, cdf=50.0, cdf_tons=20.0)
+    repo.record_contribution(north, PERIOD, crt=120.0, crt_tons=12.0, cdf=40.0, cdf_tons=20.0)
+    range_session.commit()
+
+    aggregate = repo.get_aggregate("Bogotá", "Cundinamarca", PERIOD)
+    assert aggregate.aps_count == 1
+    assert aggregate.crt_weighted_sum == pytest.approx(1440.0)
+    assert aggregate.crt_tons == pytest.approx(12.0)
+    assert aggregate.cdf_weighted_sum == pytest.approx(800.0)
+    # Los demás APS del municipio excluyen el aporte propio
+    assert repo.get_other_aps_costs(north, [PERIOD])[PERIOD] == pytest.approx(
+        {"crt_sum": 0.0, "crt_tons": 0.0, "cdf_sum": 0.0, "cdf_tons": 0.0}
+    )
+
+    # Si el APS cambia de municipio el aporte se mueve
+    north.municipality = "Chía"
+    repo.record_contribution(north, PERIOD, crt=120.0, crt_tons=12.0, cdf=40.0, cdf_tons=20.0)
+    range_session.commit()
+    range_session.expire_all()
+    assert repo.get_aggregate("Bogotá", "Cundinamarca", PERIOD).aps_count == 0
+    assert repo.get_aggregate("Chía", "Cundinamarca", PERIOD).crt_tons == pytest.approx(12.0)
+
+
+def test_primed_costs_make_vba_order_independent(range_session):
+    north = _add_aps(range_session, "N", distance_km=10.0, tons=800.0)
+    south = _add_aps(range_session, "S", distance_km=60.0, tons=200.0)
+    service = TariffCalculationService(range_session)
+
+    assert service.record_municipality_costs(north, PERIOD)
+    assert service.record_municipality_costs(south, PERIOD)
+    assert not service.record_municipality_costs(north, "2030-01")
+    range_session.commit()
+    range_session.refresh(north)
+
+    with capture_queries(range_session.get_bind()) as stats:
+        costs = service.get_municipality_costs(north, PERIOD)
+    assert stats.count == 1
+    assert costs["crt_tons"] == pytest.approx(200.0)
+
+    first = service.calculate_official_tariff(north.id, PERIOD, calculated_by=1)
+    second = service.calculate_official_tariff(south.id, PERIOD, calculated_by=1)
+    assert first.vba == pytest.approx(second.vba, abs=0.01)
+    assert MunicipalityCostRepository(range_session).get_aggregate(
+        "Bogotá", "Cundinamarca", PERIOD
+    ).aps_count == 2
@@ -0,0 +1,48 @@
+import logging
+
+from sqlalchemy import text
+
+from app.core import query_monitor
+from app.core.query_monitor import capture_queries, check_query_budget, track_queries
+from app.db import engine
+
+
+def _login(client):
+    resp = client.post("/auth/login", json={"username": "system", "password": "system1234"})
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def test_repeated_statements_are_flagged_as_n_plus_one(caplog):
+    with track_queries() as stats:
+        with engine.connect() as conn:
+            for i in range(6):
+                conn.execute(text("SELECT :i"), {"i": i})
+            conn.execute(text("SELECT 1 + 1"))
+
+    assert stats.count == 7
+    assert stats.repeated() == {"SELECT ?": 6}
+    with caplog.at_level(logging.WARNING, logger=query_monitor.__name__):
+        assert check_query_budget("test", stats)
+    assert "N+1" in caplog.text
+
+
+def test_middleware_logs_requests_over_budget(client, monkeypatch, caplog):
+    headers = _login(client)
+    monkeypatch.setattr(query_monitor, "QUERY_BUDGET", 0)
+
+    with caplog.at_level(logging.WARNING, logger=query_monitor.__name__):
+        resp = client.get("/auth/me", headers=headers)
+
+    assert resp.status_code == 200
+    assert "GET /auth/me" in caplog.text
+
+
+def test_capture_counts_route_queries(client, assert_max_queries):
+    headers = _login(client)
+    with assert_max_queries(2) as stats:
+        client.get("/auth/me", headers=headers)
+    assert stats.count >= 1
+
+    with capture_queries(engine) as outside:
+        pass
+    assert outside.count == 0
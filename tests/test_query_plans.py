@@ -0,0 +1,89 @@
+"""
+Regresión de planes de consulta: las rutas de acceso calientes deben
+usar los índices compuestos (SQLite EXPLAIN QUERY PLAN).
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.validators import validate_tariff_not_exists
+from app.repositories.aps_repository import APSMonthlyDataRepository
+from app.repositories.tariff_calculation_repository import TariffCalculationRepository
+
+# Registrar todos los modelos en la metadata
+import app.main  # noqa: F401
+
+
+@pytest.fixture(scope="function")
+def plan_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _query_plans(session, run) -> list:
+    """Ejecuta `run` y devuelve el EXPLAIN QUERY PLAN de cada SELECT emitido"""
+    captured = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        plans = []
+        for statement, parameters in captured:
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            plans.append(" | ".join(row[-1] for row in cursor.fetchall()))
+        return plans
+    finally:
+        raw.close()
+
+
+def _assert_uses_index(plans, index_names):
+    assert plans
+    for plan in plans:
+        assert any(name in plan for name in index_names), plan
+
+
+def test_monthly_lookup_by_aps_and_period_uses_unique_index(plan_session):
+    repo = APSMonthlyDataRepository(plan_session)
+    plans = _query_plans(plan_session, lambda: repo.get_by_aps_and_period(1, "2026-02"))
+    _assert_uses_index(plans, ["uq_monthly_aps_period"])
+
+
+def test_last_six_months_uses_composite_index(plan_session):
+    repo = APSMonthlyDataRepository(plan_session)
+    plans = _query_plans(plan_session, lambda: repo.get_last_6_months(1, "2026-06"))
+    _assert_uses_index(plans, ["uq_monthly_aps_period", "idx_monthly_aps_year_month"])
+
+
+def test_tariff_lookups_use_composite_index(plan_session):
+    repo = TariffCalculationRepository(plan_session)
+
+    def run():
+        validate_tariff_not_exists(plan_session, 1, "2026-02")
+        repo.get_by_aps_and_period(1, "2026-02")
+        repo.get_history_rows(1)
+
+    plans = _query_plans(plan_session, run)
+    assert len(plans) == 3
+    _assert_uses_index(plans, ["idx_tariff_aps_period_type"])
+    # El histórico se ordena con el índice, sin ordenamiento temporal
+    assert "TEMP B-TREE" not in plans[-1]
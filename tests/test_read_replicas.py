@@ -0,0 +1,60 @@
+import time
+
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, create_engine
+
+from app.db import ReadRouter, read_router
+from app.models.company import Company
+
+
+def _sqlite_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def test_reads_go_to_replica_except_after_own_write(tmp_path):
+    primary = _sqlite_engine(tmp_path / "primary.db")
+    replica = _sqlite_engine(tmp_path / "replica.db")
+    router = ReadRouter(primary, [replica], read_your_writes_seconds=0.2)
+
+    with router.open_session(user_id=1) as session:
+        assert session.get_bind() is replica
+
+    router.record_write(1)
+    assert router.open_session(user_id=1) is None  # primario
+    with router.open_session(user_id=2) as session:
+        assert session.get_bind() is replica
+
+    time.sleep(0.25)
+    with router.open_session(user_id=1) as session:
+        assert session.get_bind() is replica
+
+
+def test_unreachable_replica_falls_back_and_is_skipped(tmp_path):
+    primary = _sqlite_engine(tmp_path / "primary.db")
+    healthy = _sqlite_engine(tmp_path / "replica.db")
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = ReadRouter(primary, [broken, healthy], retry_seconds=60)
+
+    with router.open_session(user_id=1) as session:
+        assert session.get_bind() is healthy
+    # La réplica caída queda fuera de rotación
+    assert broken not in router.candidates(user_id=1)
+
+    assert ReadRouter(primary, [broken]).open_session(user_id=1) is None
+
+
+def test_committed_write_is_recorded_for_session_owner():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.info["user_id"] = 424242
+        session.get(Company, 1)
+        session.commit()
+        assert not read_router.wrote_recently(424242)
+
+        session.add(Company(name="Réplica S.A.S.", nit="901000000", email="r@example.com"))
+        session.commit()
+    assert read_router.wrote_recently(424242)
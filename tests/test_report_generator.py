@@ -0,0 +1,197 @@
+import io
+import re
+import zipfile
+from xml.etree import ElementTree
+
+import pytest
+
+from app.core.query_monitor import capture_queries
+from app.models.tariff_calculation import TariffCalculation
+from app.repositories.tariff_calculation_repository import TariffCalculationRepository
+from app.services import report_generator
+from app.services.report_generator import TariffReportGenerator, shutdown_report_pool
+from app.services.pdf_writer import SimplePdfDocument
+from app.services.xlsx_writer import StreamingXlsxWriter, column_letter
+
+SHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+def _add_calculation(session, aps, period: str, final: float, calculation_type: str = "official"):
+    calculation = TariffCalculation(
+        company_id=aps.company_id, aps_id=aps.id, period=period,
+        calculation_type=calculation_type, calculated_by=1,
+        cft=1000.0, ccs=400.0, clus=350.0, cbls=250.0, clus_breakdown={"tree_pruning": 12.5},
+        cvna=90000.0, crt=60000.0, cdf=25000.0, ctl=5000.0,
+        crt_distance_km=25.0, crt_avg_tons=800.0,
+        cdf_vu=20.0, cdf_pc=1.0, cdf_avg_tons_landfill=820.0,
+        ctl_scenario=2, ctl_volume_m3=300.0, ctl_environmental_tax=0.0, ctl_vu=20.0, ctl_pc=1.0,
+        vba=12000.0, trbl=3.2, trlu=1.1, trra=0.2, tra=0.4,
+        tariff_stratum_4_base=final, tariff_stratum_4_final=final,
+        tariff_stratum_1_final=final * 0.3,
+        subsidy_contribution_factors={"stratum_1": -0.7, "stratum_4": 0.0},
+        input_data={"averages": {"tons_collected_non_recyclable": 812.5}, "notes": ["a", "b"]},
+        formulas_used={"CFT": "CCS + CLUS + CBLS"},
+        regulatory_references={"CFT": ["Art. 11"], "CRT": ["Art. 24"]},
+        notes="Cierre (mes) & <ajustes>",
+    )
+    session.add(calculation)
+    session.commit()
+    session.refresh(calculation)
+    return calculation
+
+
+def _sheet_rows(book: zipfile.ZipFile, number: int):
+    root = ElementTree.fromstring(book.read(f"xl/worksheets/sheet{number}.xml"))
+    rows = []
+    for row in root.iter(f"{SHEET_NS}row"):
+        values = []
+        for cell in row:
+            text = cell.find(f"{SHEET_NS}is/{SHEET_NS}t")
+            values.append(text.text if text is not None else float(cell.find(f"{SHEET_NS}v").text))
+        rows.append(values)
+    return rows
+
+
+def _assert_valid_pdf(data: bytes):
+    assert data.startswith(b"%PDF-1.4")
+    assert data.rstrip().endswith(b"%EOF")
+    xref = int(re.search(rb"startxref\n(\d+)", data).group(1))
+    assert data[xref:].startswith(b"xref")
+    # Cada offset de la tabla xref apunta al objeto correspondiente
+    entries = re.findall(rb"(\d{10}) 00000 n ", data[xref:])
+    for object_id, offset in enumerate(entries, start=1):
+        assert data[int(offset):].startswith(b"%d 0 obj" % object_id)
+
+
+def test_column_letters():
+    assert [column_letter(i) for i in (0, 25, 26, 51, 701, 702)] == ["A", "Z", "AA", "AZ", "ZZ", "AAA"]
+
+
+def test_streaming_xlsx_accepts_unseekable_stream_and_generators():
+    class Unseekable(io.RawIOBase):
+        def __init__(self):
+            self.data = bytearray()
+
+        def writable(self):
+            return True
+
+        def write(self, chunk):
+            self.data += chunk
+            return len(chunk)
+
+    target = Unseekable()
+    with StreamingXlsxWriter(target) as book:
+        rows = ((i, i * 0.5, f"fila {i}") for i in range(1000))
+        written = book.write_sheet("Datos/2026", rows, header=["n", "x", "t"])
+        book.write_sheet("Datos/2026", [(None, True, "")])
+
+    assert written == 1000
+    with zipfile.ZipFile(io.BytesIO(bytes(target.data))) as book:
+        workbook = book.read("xl/workbook.xml").decode()
+        assert 'name="Datos_2026"' in workbook and 'name="Datos_2026 (2)"' in workbook
+        rows = _sheet_rows(book, 1)
+        assert rows[0] == ["n", "x", "t"]
+        assert rows[-1] == [999.0, 499.5, "fila 999"]
+        assert "[Content_Types].xml" in book.namelist()
+
+
+def test_pdf_pages_and_escaping():
+    document = SimplePdfDocument(title="Reporte (prueba)")
+    document.heading("Año 2026 \\ señal")
+    for i in range(120):
+        document.line(f"Línea {i}", "1,000.00")
+
+    data = document.render()
+    _assert_valid_pdf(data)
+    assert b"/Count 3" in data
+    assert b"Reporte \\(prueba\\)" in data
+
+
+def test_report_pack_contains_files_history_and_summary(range_session, aps_with_history):
+    for period, final in (("2025-10", 10000.0), ("2025-11", 10500.0)):
+        _add_calculation(range_session, aps_with_history, period, final)
+    simulation = _add_calculation(range_session, aps_with_history, "2025-11", 99999.0, "simulation")
+    current = _add_calculation(range_session, aps_with_history, "2025-12", 11025.0)
+
+    chunks = list(TariffReportGenerator(range_session).stream_pack([current.id, simulation.id]))
+    assert len(chunks) > 2  # un bloque por archivo renderizado
+
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as pack:
+        names = pack.namelist()
+        assert names == [
+            f"2025-12/APS-N_2025-12_calc{current.id}.xlsx",
+            f"2025-12/APS-N_2025-12_calc{current.id}.pdf",
+            f"2025-11/APS-N_2025-11_calc{simulation.id}.xlsx",
+            f"2025-11/APS-N_2025-11_calc{simulation.id}.pdf",
+            "resumen.xlsx",
+        ]
+        _assert_valid_pdf(pack.read(names[1]))
+
+        with zipfile.ZipFile(io.BytesIO(pack.read(names[0]))) as book:
+            sheets = re.findall(r'<sheet name="([^"]+)"', book.read("xl/workbook.xml").decode())
+            assert sheets == ["Resumen", "Componentes", "Tarifas", "Entradas", "Fórmulas", "Histórico"]
+            assert ["Notas", "Cierre (mes) & <ajustes>"] in _sheet_rows(book, 1)
+            assert ["CLUS - tree_pruning", 12.5] in _sheet_rows(book, 2)
+            assert ["averages.tons_collected_non_recyclable", 812.5] in _sheet_rows(book, 4)
+            assert ["CRT", "Art. 24"] in _sheet_rows(book, 5)
+            # Histórico: sólo cálculos oficiales anteriores, con variación del estrato 4
+            history = _sheet_rows(book, 6)
+            assert [row[0] for row in history[1:]] == ["2025-10", "2025-11", "2025-12"]
+            assert history[-1][4] == 11025.0 and history[-1][-1] == pytest.approx(5.0)
+
+        with zipfile.ZipFile(io.BytesIO(pack.read("resumen.xlsx"))) as summary:
+            rows = _sheet_rows(summary, 1)
+            assert [row[0] for row in rows[1:]] == [current.id, simulation.id]
+            assert rows[1][-2:] == ["2025-11", pytest.approx(5.0)]
+
+
+def test_report_pack_loads_in_batches(range_session, aps_with_history, monkeypatch):
+    monkeypatch.setattr(report_generator, "REPORT_LOAD_BATCH", 2)
+    ids = [
+        _add_calculation(range_session, aps_with_history, f"2025-{month:02d}", 1000.0 + month).id
+        for month in range(1, 6)
+    ]
+
+    with capture_queries(range_session.get_bind()) as stats:
+        pack = b"".join(TariffReportGenerator(range_session).stream_pack(ids, formats=["xlsx"]))
+
+    # 3 consultas por lote (cálculos, APS, histórico) y 3 lotes
+    assert stats.count == 9, stats.report()
+    with zipfile.ZipFile(io.BytesIO(pack)) as archive:
+        assert len(archive.namelist()) == 6
+
+
+def test_report_history_is_bounded_by_period_window(range_session, aps_with_history, monkeypatch):
+    monkeypatch.setattr(report_generator, "REPORT_HISTORY_PERIODS", 2)
+    for period in ("2024-01", "2025-09", "2025-10", "2025-11"):
+        _add_calculation(range_session, aps_with_history, period, 1000.0)
+    current = _add_calculation(range_session, aps_with_history, "2025-12", 1100.0)
+
+    rows = TariffCalculationRepository(range_session).get_final_tariff_history(
+        [aps_with_history.id], "2025-12", from_period="2025-10"
+    )
+    assert [row.period for row in rows] == ["2025-10", "2025-11", "2025-12"]
+
+    payload = next(TariffReportGenerator(range_session).iter_payloads([current.id]))
+    assert [entry["period"] for entry in payload["history"]] == ["2025-10", "2025-11"]
+
+
+def test_process_pool_renders_same_files(range_session, aps_with_history, monkeypatch):
+    ids = [
+        _add_calculation(range_session, aps_with_history, f"2025-{month:02d}", 1000.0 + month).id
+        for month in range(1, 4)
+    ]
+    generator = TariffReportGenerator(range_session)
+    sequential = [(payload["calculation"]["id"], files) for payload, files in generator.render(ids, ["pdf"])]
+
+    monkeypatch.setattr(report_generator, "REPORT_PARALLEL_MIN", 1)
+    monkeypatch.setattr(report_generator, "REPORT_WORKERS", 2)
+    try:
+        parallel = [
+            (payload["calculation"]["id"], files)
+            for payload, files in TariffReportGenerator(range_session, workers=2).render(ids, ["pdf"])
+        ]
+    finally:
+        shutdown_report_pool()
+
+    assert parallel == sequential
@@ -0,0 +1,83 @@
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, choose_encoding, brotli
+from app.core.responses import FastJSONResponse, dump_orm_rows
+from app.models.audit_log import AuditLog
+from app.schemas.audit_log import AuditLogRead
+
+
+def _make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/big")
+    def big():
+        return FastJSONResponse([{"period": f"2026-{i % 12 + 1:02d}", "value": i} for i in range(500)])
+
+    @app.get("/small")
+    def small():
+        return FastJSONResponse({"ok": True})
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((b"x" * 1000 for _ in range(5)), media_type="text/plain")
+
+    return app
+
+
+def test_large_response_is_gzipped():
+    client = TestClient(_make_app())
+    resp = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["vary"]
+    assert len(resp.json()) == 500
+
+
+def test_small_response_is_not_compressed():
+    client = TestClient(_make_app())
+    resp = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in resp.headers
+    assert resp.json() == {"ok": True}
+
+
+def test_streaming_response_is_compressed_incrementally():
+    client = TestClient(_make_app())
+    resp = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.content == b"x" * 5000
+
+
+def test_encoding_negotiation():
+    assert choose_encoding("") is None
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip, deflate") == "gzip"
+    expected_br = "br" if brotli is not None else "gzip"
+    assert choose_encoding("gzip, br") == expected_br
+    assert choose_encoding("br;q=0.5, gzip") == "gzip"
+
+
+def test_fast_json_matches_standard_json():
+    payload = {"when": datetime(2026, 2, 1, 10, 30), "items": [1, 2.5, None]}
+    body = FastJSONResponse(payload).body
+    assert json.loads(body) == {"when": "2026-02-01T10:30:00", "items": [1, 2.5, None]}
+
+
+def test_dump_orm_rows_uses_read_schema_fields():
+    log = AuditLog(
+        id=7, user_id=1, company_id=2, action="CREATE", resource_type="APS",
+        user_agent="secret-agent", timestamp=datetime(2026, 1, 1)
+    )
+    rows = dump_orm_rows([log], AuditLogRead)
+    assert rows[0]["id"] == 7
+    assert rows[0]["action"] == "CREATE"
+    assert "user_agent" not in rows[0]
+    assert set(rows[0]) == set(AuditLogRead.model_fields)
@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+import pytest
+
+from app.tariff_core.rule_sets import (
+    BASE_RULE_SET_VERSION, RuleSet, compile_rule_set, compiled_rule_set_for, register_rule_set,
+    rule_set_for, unregister_rule_set
+)
+from app.services.tariff_calculation_service import TariffCalculationService
+
+
+def test_versions_selected_by_period_and_compiled_once(amended_rules):
+    assert rule_set_for("2024-12").version == BASE_RULE_SET_VERSION
+    assert rule_set_for("2025-01") is amended_rules
+    assert rule_set_for() is amended_rules
+
+    compiled = compile_rule_set(amended_rules)
+    assert compiled_rule_set_for("2026-03") is compiled
+    assert compiled.calculator.F1_BASE == 70000
+    assert compiled_rule_set_for("2024-12").calculator.F1_BASE == 64745
+
+    exact = compiled_rule_set_for("2025-06", exact=True).calculator
+    assert exact.F1_BASE == Decimal("70000") and exact.PRODUCTION_FACTORS["stratum_1"] == Decimal("0.7")
+
+    with pytest.raises(ValueError):
+        register_rule_set(RuleSet(version="other", effective_from="2025-01"))
+    with pytest.raises(ValueError):
+        RuleSet(version="typo", effective_from="2027-01", constants={"F1_BASEE": 1})
+
+
+def test_back_calculation_spans_versions(range_session, aps_with_history, amended_rules):
+    service = TariffCalculationService(range_session)
+    results = service.back_calculate_range(aps_with_history.id, "2024-10", "2025-03")
+
+    assert [row["rule_set_version"] for row in results] == [BASE_RULE_SET_VERSION] * 3 + ["test-2025"] * 3
+
+    unregister_rule_set(amended_rules.version)
+    baseline = service.back_calculate_range(aps_with_history.id, "2024-10", "2025-03")
+    register_rule_set(amended_rules)
+
+    assert results[:3] == baseline[:3]
+    for row, before in zip(results[3:], baseline[3:]):
+        assert row["crt"] > before["crt"]
+        assert row["vba"] == pytest.approx(round((row["crt"] + row["cdf"]) * 0.9, 2))
+
+    for row in (results[1], results[4]):
+        single = service.calculate_simulation(
+            aps_id=aps_with_history.id, period=row["period"], calculated_by=1,
+            simulation_name="check", simulation_data={}
+        )
+        assert single.input_data["rule_set_version"] == row["rule_set_version"]
+        assert single.crt == pytest.approx(row["crt"])
+        assert single.tariff_stratum_1_final == pytest.approx(row["tariffs"]["stratum_1"]["final"])
+        assert single.tariff_stratum_6_final == pytest.approx(row["tariffs"]["stratum_6"]["final"])
+    assert single.formulas_used["VBA"] == "VBA = (CRT + CDF) × 0.9"
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from app.core import slow_query_log
+from app.repositories.aps_repository import APSMonthlyDataRepository
+
+
+@pytest.fixture
+def slow_log(tmp_path, monkeypatch):
+    """Registra todas las consultas como lentas en un archivo temporal"""
+    monkeypatch.setattr(slow_query_log, "SLOW_QUERY_THRESHOLD_MS", 0.000001)
+    monkeypatch.setattr(slow_query_log, "SLOW_QUERY_LOG_FILE", str(tmp_path / "slow.log"))
+    monkeypatch.setattr(slow_query_log, "_file_logger", None)
+    slow_query_log.clear_slow_queries()
+    yield tmp_path / "slow.log"
+    file_logger = slow_query_log._file_logger
+    if file_logger is not None:
+        for handler in list(file_logger.handlers):
+            file_logger.removeHandler(handler)
+            handler.close()
+    slow_query_log.clear_slow_queries()
+
+
+def test_records_caller_redacted_parameters_and_plan(range_session, aps_with_history, slow_log):
+    slow_query_log.install_slow_query_log(range_session.get_bind())
+    slow_query_log.clear_slow_queries()
+
+    APSMonthlyDataRepository(range_session).get_by_aps_and_period(aps_with_history.id, "2025-06")
+
+    record = slow_query_log.get_recent_slow_queries(1)[0]
+    assert record["caller"].startswith("APSMonthlyDataRepository.get_by_aps_and_period")
+    assert aps_with_history.id in record["parameters"]
+    assert "2025-06" not in json.dumps(record["parameters"])
+    assert "uq_monthly_aps_period" in record["plan"]
+
+    lines = slow_log.read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[-1])["caller"] == record["caller"]
+
+
+def test_redact_parameters_keeps_numbers_only():
+    assert slow_query_log.redact_parameters({"id": 3, "name": "secreto", "flag": None}) == {
+        "id": 3, "name": "<str len=7>", "flag": None
+    }
+
+
+def test_admin_endpoint_requires_system_user(client):
+    assert client.get("/admin/slow-queries").status_code == 401
+
+    token = client.post("/auth/login", json={"username": "system", "password": "system1234"}).json()["access_token"]
+    resp = client.get("/admin/slow-queries", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    assert set(resp.json()) == {"threshold_ms", "total", "queries"}
@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from app.core.exceptions import APSNotFoundError
+from app.models.aps import APS
+from app.models.disposal_site import DisposalSite
+from app.tariff_core import stratum_tariffs
+from app.services.spatial_index import SpatialIndex, distance_matrix_km, effective_distances, haversine_km
+from app.services.spatial_planning import SpatialPlanningService
+
+
+@pytest.fixture(params=["numpy", "python"])
+def numpy_mode(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(stratum_tariffs, "np", None)
+        monkeypatch.setattr(stratum_tariffs, "_numpy_loaded", True)
+    return request.param
+
+
+def _random_points(count, seed=7):
+    rng = random.Random(seed)
+    return [(i, rng.uniform(-4.0, 12.0), rng.uniform(-79.0, -67.0)) for i in range(count)]
+
+
+def _brute_force(points, lat, lon):
+    return sorted((haversine_km(lat, lon, p_lat, p_lon), point_id) for point_id, p_lat, p_lon in points)
+
+
+def test_kd_tree_matches_brute_force():
+    points = _random_points(3000)
+    index = SpatialIndex(points)
+    rng = random.Random(3)
+
+    for _ in range(50):
+        lat, lon = rng.uniform(-4.0, 12.0), rng.uniform(-79.0, -67.0)
+        expected = _brute_force(points, lat, lon)
+
+        nearest = index.nearest(lat, lon, k=5)
+        assert [point_id for point_id, _ in nearest] == [point_id for _, point_id in expected[:5]]
+        assert nearest[0][1] == pytest.approx(expected[0][0], rel=1e-9)
+
+        within = index.within_radius(lat, lon, 40.0)
+        assert [point_id for point_id, _ in within] == [point_id for distance, point_id in expected if distance <= 40.0]
+
+
+def test_batch_queries_agree(numpy_mode):
+    sites = _random_points(40, seed=11)
+    queries = _random_points(300, seed=12)
+    index = SpatialIndex(sites)
+
+    batch = index.nearest_batch([lat for _, lat, _ in queries], [lon for _, _, lon in queries])
+    assert [found[0] for found in batch] == [index.nearest(lat, lon)[0][0] for _, lat, lon in queries]
+
+    matrix = distance_matrix_km([4.6], [-74.08], [6.25, 4.6], [-75.56, -74.08])
+    row = list(matrix[0])
+    assert row[0] == pytest.approx(haversine_km(4.6, -74.08, 6.25, -75.56))
+    assert row[1] == pytest.approx(0.0)
+
+
+def test_effective_distances_match_model(numpy_mode):
+    rng = random.Random(5)
+    distances = [round(rng.uniform(1, 150), 2) for _ in range(500)]
+    unpaved = [rng.choice([0.0, round(rng.uniform(0, 100), 1), rng.uniform(0, 100)]) for _ in distances]
+
+    expected = [
+        APS(
+            company_id=1, name="APS", code="A", municipality="M", department="D",
+            distance_to_landfill_km=distance, unpaved_road_percentage=percentage
+        ).get_effective_distance()
+        for distance, percentage in zip(distances, unpaved)
+    ]
+    assert effective_distances(distances, unpaved) == expected
+
+
+def test_planning_service_scopes_by_company(range_session):
+    for code, company_id, lat, lon in [("BOG", 1, 4.65, -74.10), ("SOA", 1, 4.58, -74.22), ("MED", 2, 6.25, -75.56)]:
+        range_session.add(APS(
+            company_id=company_id, name=f"APS {code}", code=code, municipality=code, department="D",
+            distance_to_landfill_km=25.0, unpaved_road_percentage=20.0, centroid_lat=lat, centroid_lon=lon
+        ))
+    range_session.add(APS(
+        company_id=1, name="Sin centroide", code="NC", municipality="X", department="D", distance_to_landfill_km=5.0
+    ))
+    range_session.add(DisposalSite(
+        name="Doña Juana", site_type="landfill", municipality="Bogotá", department="Cundinamarca",
+        latitude=4.50, longitude=-74.13
+    ))
+    range_session.add(DisposalSite(
+        company_id=1, name="ET Norte", site_type="transfer_station", municipality="Bogotá",
+        department="Cundinamarca", latitude=4.70, longitude=-74.08
+    ))
+    range_session.add(DisposalSite(
+        company_id=2, name="ET Medellín", site_type="transfer_station", municipality="Medellín",
+        department="Antioquia", latitude=6.30, longitude=-75.55
+    ))
+    range_session.commit()
+
+    service = SpatialPlanningService(range_session, company_id=1)
+    report = service.effective_distance_report()
+    assert [row["code"] for row in report] == ["BOG", "SOA"]
+    assert report[0]["effective_distance_km"] == 26.25
+    assert report[0]["nearest_landfill"]["name"] == "Doña Juana"
+    assert report[0]["nearest_transfer_station"]["name"] == "ET Norte"
+
+    assert [site["name"] for site in service.nearest_sites(6.25, -75.56, k=5)] == ["ET Norte", "Doña Juana"]
+    assert [row["code"] for row in service.aps_within_radius(4.6, -74.1, 20)] == ["BOG", "SOA"]
+
+    matrix = service.distance_matrix(site_type="landfill")
+    assert len(matrix["distances_km"]) == 2 and len(matrix["site_ids"]) == 1
+    with pytest.raises(APSNotFoundError):
+        service.distance_matrix(aps_ids=[3])
+
+    assert len(SpatialPlanningService(range_session).effective_distance_report()) == 3
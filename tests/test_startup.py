@@ -0,0 +1,46 @@
+from sqlalchemy import event, text
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, create_engine
+
+from app.db import get_alembic_head, schema_is_current
+from app.main import DEFAULT_COMPANY_NAME, get_seed_state
+from app.models.company import Company
+
+
+def _memory_engine():
+    return create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+
+def test_alembic_head_is_read_from_versions():
+    assert get_alembic_head() == "009"
+
+
+def test_schema_is_current_requires_head_and_all_tables():
+    engine = _memory_engine()
+    with engine.begin() as connection:
+        assert not schema_is_current(connection)
+        SQLModel.metadata.create_all(connection)
+        connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        connection.execute(text("INSERT INTO alembic_version VALUES ('001')"))
+        assert not schema_is_current(connection)
+        connection.execute(text("UPDATE alembic_version SET version_num = '009'"))
+        assert schema_is_current(connection)
+        connection.execute(text("DROP TABLE audit_log"))
+        assert not schema_is_current(connection)
+
+
+def test_seed_state_uses_a_single_query():
+    engine = _memory_engine()
+    SQLModel.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    with Session(engine) as session:
+        assert get_seed_state(session, "system") == (None, False)
+        session.add(Company(name=DEFAULT_COMPANY_NAME, nit="0000000000", email="admin@default.com"))
+        session.commit()
+        statements.clear()
+        company_id, admin_exists = get_seed_state(session, "system")
+
+    assert company_id is not None and not admin_exists
+    assert len(statements) == 1
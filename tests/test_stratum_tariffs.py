@@ -0,0 +1,95 @@
+import pytest
+
+from app.tariff_core import stratum_tariffs
+from app.tariff_core.stratum_tariffs import (
+    RESIDENTIAL_CATEGORIES, build_stratum_table, evaluate_stratum_tariffs, row_to_category_dict
+)
+from app.tariff_core.engine import DEFAULT_SUBSIDY_FACTORS
+from app.tariff_core.tariff_calculator_720 import TariffCalculator720
+
+COSTS = {
+    "cft": 8250.0, "cvna": 35890.0, "vba": 1710.0,
+    "trbl": 0.004, "trlu": 0.0012, "trra": 0.0005, "tra": 0.0004,
+    "available_tons": 820.0 - 15.0,
+}
+SUBSCRIBERS = {
+    "stratum_1": 3200, "stratum_2": 4100, "stratum_3": 2500, "stratum_4": 900,
+    "stratum_5": 300, "stratum_6": 120, "commercial": 650,
+}
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(stratum_tariffs, "load_numpy", lambda: None)
+    elif stratum_tariffs.load_numpy() is None:
+        pytest.skip("numpy no instalado")
+    return request.param
+
+
+def _scalar_reference(costs, subscribers, subsidy_factors):
+    calculator = TariffCalculator720()
+    trna = calculator.calculate_trna_by_stratum(
+        tons_non_recyclable_aps=costs["available_tons"],
+        tons_rejection=0.0,
+        subscribers_by_stratum=subscribers,
+    )
+    tariffs = {}
+    for stratum in RESIDENTIAL_CATEGORIES:
+        base, final = calculator.calculate_final_tariff(
+            cft=costs["cft"], cvna=costs["cvna"], vba=costs["vba"],
+            trbl=costs["trbl"], trlu=costs["trlu"], trra=costs["trra"], tra=costs["tra"],
+            trna=trna[stratum], subsidy_contribution_factor=subsidy_factors[stratum]
+        )
+        tariffs[stratum] = {"base": base, "final": final}
+    return trna, tariffs
+
+
+def test_vectorized_matches_scalar_calculator(backend):
+    categories, factors, subscribers, subsidies, weighed = build_stratum_table(
+        SUBSCRIBERS, DEFAULT_SUBSIDY_FACTORS, TariffCalculator720.PRODUCTION_FACTORS
+    )
+    evaluated = evaluate_stratum_tariffs(COSTS, factors, subscribers, subsidies, weighed)
+    trna, tariffs = row_to_category_dict(categories, evaluated)
+
+    expected_trna, expected_tariffs = _scalar_reference(COSTS, SUBSCRIBERS, DEFAULT_SUBSIDY_FACTORS)
+    for stratum in RESIDENTIAL_CATEGORIES:
+        assert trna[stratum] == pytest.approx(expected_trna[stratum], abs=1e-6)
+        assert tariffs[stratum]["base"] == pytest.approx(expected_tariffs[stratum]["base"], abs=0.01)
+        assert tariffs[stratum]["final"] == pytest.approx(expected_tariffs[stratum]["final"], abs=0.01)
+
+
+def test_matrix_evaluation_matches_row_by_row(backend):
+    categories, factors, subscribers, subsidies, weighed = build_stratum_table(
+        SUBSCRIBERS, DEFAULT_SUBSIDY_FACTORS, TariffCalculator720.PRODUCTION_FACTORS
+    )
+    rows = [dict(COSTS, cft=COSTS["cft"] + i * 10, available_tons=COSTS["available_tons"] + i) for i in range(4)]
+    matrix_subscribers = [[count + i for count in subscribers] for i in range(4)]
+    costs = {field: [row[field] for row in rows] for field in stratum_tariffs.COST_FIELDS}
+
+    evaluated = evaluate_stratum_tariffs(costs, factors, matrix_subscribers, subsidies, weighed)
+
+    for i in range(4):
+        single = evaluate_stratum_tariffs(rows[i], factors, matrix_subscribers[i], subsidies, weighed)
+        assert row_to_category_dict(categories, evaluated, i) == row_to_category_dict(categories, single)
+
+
+def test_extra_categories_with_weighed_tons(backend):
+    categories, factors, subscribers, subsidies, weighed = build_stratum_table(
+        SUBSCRIBERS, DEFAULT_SUBSIDY_FACTORS, TariffCalculator720.PRODUCTION_FACTORS,
+        extra_categories=[
+            {"name": "official", "production_factor": 1.0, "subscribers": 40},
+            {"name": "large_producer", "production_factor": 0.0, "subscribers": 4,
+             "weighed_tons": 12.0, "subsidy_factor": 0.5},
+        ]
+    )
+    trna, tariffs = row_to_category_dict(
+        categories, evaluate_stratum_tariffs(COSTS, factors, subscribers, subsidies, weighed)
+    )
+
+    assert categories[-2:] == ["official", "large_producer"]
+    assert trna["large_producer"] == pytest.approx(3.0)
+    # Las toneladas aforadas se descuentan antes de repartir entre los demás
+    shared_total = sum(trna[name] * count for name, count in zip(categories[:-1], subscribers[:-1]))
+    assert shared_total == pytest.approx(COSTS["available_tons"] - 12.0, rel=1e-5)
+    assert tariffs["large_producer"]["final"] == pytest.approx(tariffs["large_producer"]["base"] * 1.5, abs=0.01)
@@ -0,0 +1,122 @@
+import os
+import pickle
+import subprocess
+import sys
+
+import pytest
+
+from app.tariff_core import (
+    APSProfile, RuleSet, TariffInput, calculate, calculate_batch, compiled_rule_set_for, register_rule_set
+)
+from app.tariff_core.formula_graph import STRATUM_TARIFFS_NODE, FormulaNode
+from app.tariff_core.rule_sets import unregister_rule_set
+from app.services.tariff_calculation_service import TariffCalculationService
+
+AVERAGES = {
+    "num_subscribers_total": 12000,
+    "num_subscribers_vacant": 300,
+    "tons_collected_non_recyclable": 2100.0,
+    "tons_collected_sweeping": 150.0,
+    "tons_collected_urban_cleaning": 60.0,
+    "tons_collected_recyclable": 120.0,
+    "tons_rejection_recycling": 15.0,
+    "tons_received_landfill": 2200.0,
+    "leachate_volume_m3": 380.0,
+    "subscribers_stratum_1": 3000,
+    "subscribers_stratum_2": 4000,
+    "subscribers_stratum_3": 2500,
+    "subscribers_stratum_4": 1200,
+    "subscribers_stratum_5": 500,
+    "subscribers_stratum_6": 300,
+    "subscribers_commercial": 200,
+}
+
+
+def test_core_imports_without_web_or_orm_dependencies():
+    code = (
+        "import sys, app.tariff_core; "
+        "print(sorted(m for m in ('sqlmodel', 'sqlalchemy', 'pydantic', 'fastapi', 'numpy') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ).stdout
+    assert output.strip() == "[]"
+
+
+def test_batch_matches_single_calculations():
+    profile = APSProfile(segment="2", billing_type="monthly", distance_km=18.0)
+    coastal = APSProfile(segment="1", billing_type="monthly", distance_km=42.0, is_coastal=True)
+    inputs = [
+        TariffInput(aps=profile, averages=AVERAGES, period="2025-01"),
+        TariffInput(aps=coastal, averages=AVERAGES, period="2025-02", exact=True,
+                    parameters={"tolls_cost_month": 2_500_000.0, "subsidy_factor.stratum_1": -0.5}),
+        TariffInput(aps=profile, averages={**AVERAGES, "leachate_volume_m3": 900.0}, period="2025-03",
+                    extra_categories=[{"name": "large_producer", "production_factor": 0.0,
+                                       "subscribers": 3, "weighed_tons": 12.5}]),
+        TariffInput(aps=profile, averages={"num_subscribers_total": 10}, period="2025-03"),
+    ]
+
+    errors = {}
+    results = calculate_batch(inputs, errors)
+    assert list(errors) == [3] and results[3] is None
+    with pytest.raises(KeyError):
+        calculate_batch(inputs)
+
+    for tariff_input, result in zip(inputs[:3], results[:3]):
+        assert result == calculate(tariff_input)
+    assert results[1].subsidy_factors["stratum_1"] == -0.5
+    assert results[1].subsidy_factors["stratum_2"] == -0.40
+    assert "large_producer" in results[2].tariffs
+    assert results[0].rule_set_version == compiled_rule_set_for("2025-01").version
+
+    # Entradas y resultados viajan a procesos y a JSON sin el ORM
+    assert pickle.loads(pickle.dumps(inputs[1])) == inputs[1]
+    assert pickle.loads(pickle.dumps(results[1])) == results[1]
+    assert inputs[1].to_dict()["aps"]["is_coastal"] is True
+
+
+def test_batch_honors_stratum_node_override():
+    flat = register_rule_set(RuleSet(
+        version="test-flat-2040",
+        effective_from="2040-01",
+        formula_overrides={
+            STRATUM_TARIFFS_NODE: lambda calculator: FormulaNode(
+                [STRATUM_TARIFFS_NODE, "tariffs"], ["subscribers_by_stratum"],
+                lambda subscribers_by_stratum: (
+                    {category: 0.0 for category in subscribers_by_stratum},
+                    {category: {"base": 1.0, "final": 1.0} for category in subscribers_by_stratum},
+                )
+            ),
+        },
+    ))
+    try:
+        profile = APSProfile(segment="2", billing_type="monthly", distance_km=18.0)
+        inputs = [
+            TariffInput(aps=profile, averages=AVERAGES, period="2039-12"),
+            TariffInput(aps=profile, averages=AVERAGES, period="2040-02"),
+            TariffInput(aps=profile, averages=AVERAGES, period="2040-03", exact=True),
+        ]
+        results = calculate_batch(inputs)
+
+        for tariff_input, result in zip(inputs, results):
+            assert result == calculate(tariff_input)
+        assert results[0].tariffs["stratum_1"]["final"] != 1.0
+        assert results[1].tariffs["stratum_1"] == {"base": 1.0, "final": 1.0}
+        assert results[2].rule_set_version == flat.version
+    finally:
+        unregister_rule_set(flat.version)
+
+
+def test_service_is_an_adapter_over_the_core(range_session, aps_with_history):
+    service = TariffCalculationService(range_session)
+    official = service.calculate_official_tariff(aps_id=aps_with_history.id, period="2025-02", calculated_by=1)
+
+    result = calculate(TariffInput.from_snapshot(
+        aps_with_history, official.period, official.input_data,
+        subsidy_factors=official.subsidy_contribution_factors, exact=True
+    ))
+    assert result.costs["crt"] == official.crt
+    assert result.costs["vba"] == official.vba
+    assert result.tariffs["stratum_1"]["final"] == official.tariff_stratum_1_final
+    assert result.tariffs["commercial"]["base"] == official.tariff_commercial_base
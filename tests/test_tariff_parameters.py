@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import event
+
+from app.core.exceptions import ValidationError
+from app.models.aps import APS
+from app.models.tariff_parameter import TariffParameter
+from app.services.parameter_store import ParameterStore, TariffParameterService
+from app.services.tariff_calculation_service import TariffCalculationService
+
+
+def _parameter(name, value, valid_from, valid_to=None, scope="global", **keys):
+    return TariffParameter(name=name, value=value, valid_from=valid_from, valid_to=valid_to, scope=scope, **keys)
+
+
+def test_store_resolves_most_specific_value_in_effect():
+    aps = APS(id=7, company_id=1, name="APS", code="A", municipality="Tunja", department="Boyacá",
+              distance_to_landfill_km=10.0)
+    store = ParameterStore([
+        _parameter("tolls_cost_month", 100.0, "2024-01", "2024-12"),
+        _parameter("tolls_cost_month", 150.0, "2025-01"),
+        _parameter("tolls_cost_month", 120.0, "2024-06", "2024-08", company_id=1),
+        _parameter("tolls_cost_month", 90.0, "2024-07", "2024-07", scope="municipality",
+                   municipality="Tunja", department="Boyacá"),
+        _parameter("tolls_cost_month", 5.0, "2024-01", scope="municipality",
+                   municipality="Tunja", department="Cundinamarca"),
+        _parameter("incentive_discount", 0.02, "2024-03", "2024-04", scope="aps", aps_id=7),
+        _parameter("incentive_discount", 0.03, "2024-03", scope="aps", aps_id=8),
+    ])
+
+    lookups = {period: store.lookup("tolls_cost_month", aps, period) for period in
+               ("2023-12", "2024-01", "2024-06", "2024-07", "2024-09", "2025-02")}
+    assert lookups == {"2023-12": None, "2024-01": 100.0, "2024-06": 120.0, "2024-07": 90.0,
+                       "2024-09": 100.0, "2025-02": 150.0}
+
+    assert store.resolve(aps, "2024-04") == {"tolls_cost_month": 100.0, "incentive_discount": 0.02}
+    assert store.resolve(aps, "2024-05") == {"tolls_cost_month": 100.0}
+    assert store.lookup("incentive_discount", aps, "2024-05", default=0.0) == 0.0
+
+
+def test_service_rejects_overlaps_and_invalid_values(range_session, aps_with_history):
+    service = TariffParameterService(range_session)
+    service.create(_parameter("water_price_per_m3", 3200.0, "2024-01", "2024-12"))
+    service.create(_parameter("water_price_per_m3", 3500.0, "2025-01"))
+    service.create(_parameter("water_price_per_m3", 3000.0, "2024-06", scope="aps", aps_id=aps_with_history.id))
+
+    with pytest.raises(ValidationError) as error:
+        service.create(_parameter("water_price_per_m3", 3300.0, "2024-10", "2025-02"))
+    assert len(error.value.details["overlapping_ids"]) == 2
+
+    invalid = [
+        _parameter("fuel_price", 1.0, "2024-01"),
+        _parameter("incentive_discount", 0.05, "2024-01"),
+        _parameter("subsidy_factor.", 0.1, "2024-01"),
+        _parameter("tolls_cost_month", 1.0, "2024-05", "2024-01"),
+        _parameter("tolls_cost_month", 1.0, "2024-01", scope="municipality", municipality="Bogotá"),
+    ]
+    for parameter in invalid:
+        with pytest.raises(ValidationError):
+            service.create(parameter)
+
+
+def test_calculations_use_parameters_in_effect(range_session, aps_with_history):
+    aps_id = aps_with_history.id
+    service = TariffCalculationService(range_session)
+    baseline = service.back_calculate_range(aps_id, "2024-10", "2025-03")
+
+    parameters = TariffParameterService(range_session)
+    parameters.create(_parameter("tolls_cost_month", 4_000_000.0, "2025-01"))
+    parameters.create(_parameter("incentive_discount", 0.04, "2025-01", scope="aps", aps_id=aps_id))
+    parameters.create(_parameter("subsidy_factor.stratum_1", -0.5, "2025-01", scope="municipality",
+                                 municipality="Bogotá", department="Cundinamarca"))
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        if "tariff_parameter" in statement:
+            statements.append(statement)
+
+    engine = range_session.get_bind()
+    service = TariffCalculationService(range_session)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        results = service.back_calculate_range(aps_id, "2024-10", "2025-03")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 1
+
+    # Antes de la vigencia nada cambia
+    assert results[:3] == baseline[:3]
+    for before, after in zip(baseline[3:], results[3:]):
+        assert after["crt"] > before["crt"]
+        assert after["vba"] < before["vba"]
+        assert after["tariffs"]["stratum_1"]["final"] > before["tariffs"]["stratum_1"]["final"]
+
+    single = service.calculate_simulation(
+        aps_id=aps_id, period="2025-02", calculated_by=1, simulation_name="check", simulation_data={}
+    )
+    assert single.crt == pytest.approx(results[4]["crt"])
+    assert single.tariff_stratum_1_final == pytest.approx(results[4]["tariffs"]["stratum_1"]["final"])
+    assert single.vba_incentive_discount == 0.04
+    assert single.input_data["parameters"]["tolls_cost_month"] == 4_000_000.0
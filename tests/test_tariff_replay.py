@@ -0,0 +1,68 @@
+import pytest
+
+from app.models.tariff_calculation import TariffCalculation
+from app.tariff_core.rule_sets import BASE_RULE_SET_VERSION
+from app.services.tariff_calculation_service import TariffCalculationService
+from app.services.tariff_replay import TariffReplayService
+
+PERIODS = ["2024-10", "2024-11", "2024-12", "2025-01", "2025-02", "2025-03"]
+
+
+@pytest.fixture
+def stored_calculations(range_session, aps_with_history):
+    service = TariffCalculationService(range_session)
+    calculations = []
+    for period in PERIODS:
+        calculations.append(service.calculate_official_tariff(
+            aps_id=aps_with_history.id, period=period, calculated_by=1
+        ))
+        calculations.append(service.calculate_simulation(
+            aps_id=aps_with_history.id, period=period, calculated_by=1,
+            simulation_name="escenario", simulation_data={"tons_collected_non_recyclable": 900.0}
+        ))
+    return calculations
+
+
+def test_replay_matches_stored_and_detects_tampering(range_session, stored_calculations):
+    replay = TariffReplayService(range_session)
+    report = replay.replay(workers=1)
+    assert (report["checked"], report["matched"], report["mismatched"], report["errors"]) == (12, 12, 0, 0)
+    assert report["versions"] == {BASE_RULE_SET_VERSION: 12}
+    assert report["discrepancies"] == []
+
+    tampered = range_session.get(TariffCalculation, stored_calculations[3].id)
+    tampered.tariff_stratum_1_final += 5.0
+    tampered.crt *= 1.01
+    range_session.add(tampered)
+    range_session.commit()
+
+    progress = []
+    report = replay.replay(chunk_size=1, workers=1, progress=lambda done, total: progress.append((done, total)))
+    assert (report["checked"], report["mismatched"]) == (12, 1)
+    assert progress[-1] == (12, 12) and len(progress) == 12
+    discrepancy = report["discrepancies"][0]
+    assert discrepancy["calculation_id"] == tampered.id
+    assert set(discrepancy["fields"]) == {"crt", "tariff_stratum_1_final"}
+    assert discrepancy["fields"]["tariff_stratum_1_final"]["difference"] == pytest.approx(-5.0)
+    assert report["mismatches_by_field"]["crt"] == 1
+    assert report["max_abs_difference"]["tariff_stratum_1_final"] == pytest.approx(5.0)
+
+    assert replay.replay(abs_tolerance=5.0, rel_tolerance=0.02, workers=1)["mismatched"] == 0
+    parallel = replay.replay(chunk_size=5, workers=2)
+    assert {key: parallel[key] for key in ("checked", "mismatched", "discrepancies")} == \
+        {key: report[key] for key in ("checked", "mismatched", "discrepancies")}
+
+    filtered = replay.replay(calculation_type="official", start_period="2025-01", workers=1)
+    assert (filtered["checked"], filtered["mismatched"]) == (3, 0)
+
+
+def test_replay_reports_rule_changes_by_period(range_session, stored_calculations, amended_rules):
+    replay = TariffReplayService(range_session)
+    report = replay.replay(chunk_size=5, workers=1)
+
+    # Sólo los cálculos desde la vigencia de la enmienda cambian
+    assert report["versions"] == {BASE_RULE_SET_VERSION: 6, "test-2025": 6}
+    assert report["mismatched"] == 6
+    assert {row["period"] for row in report["discrepancies"]} == {"2025-01", "2025-02", "2025-03"}
+    assert all(row["stored_rule_set_version"] == BASE_RULE_SET_VERSION for row in report["discrepancies"])
+
@@ -0,0 +1,132 @@
+import pytest
+
+from app.core.exceptions import ValidationError
+from app.models.aps import APS
+from app.models.aps_monthly_data import APSMonthlyData
+from app.models.disposal_site import DisposalSite
+from app.repositories.aps_repository import APSMonthlyDataRepository
+from app.services import transfer_station_optimizer
+from app.tariff_core import stratum_tariffs
+from app.tariff_core.tariff_calculator_720 import TariffCalculator720
+from app.services.transfer_station_optimizer import (
+    TransferStationOptimizer, crt_function_values, solve_location, solve_location_parallel
+)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def numpy_mode(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(stratum_tariffs, "np", None)
+        monkeypatch.setattr(stratum_tariffs, "_numpy_loaded", True)
+    return request.param
+
+
+def _as_list(values):
+    return values.tolist() if hasattr(values, "tolist") else values
+
+
+def test_vectorized_functions_match_calculate_crt(numpy_mode):
+    calculator = TariffCalculator720()
+    cases = [(12.5, 850.0, False), (48.0, 120.0, True), (3.0, 0.0, False)]
+
+    f1 = _as_list(crt_function_values(calculator, "f1", *zip(*[
+        (distance, tons, 1.0197 if coastal else 1.0) for distance, tons, coastal in cases
+    ])))
+    f2 = _as_list(crt_function_values(
+        calculator, "f2", [[distance, distance] for distance, _, _ in cases],
+        [tons for _, tons, _ in cases], [1.0197 if coastal else 1.0 for _, _, coastal in cases]
+    ))
+
+    for (distance, tons, coastal), direct, transfer in zip(cases, f1, f2):
+        _, details = calculator.calculate_crt(distance, tons, is_coastal=coastal)
+        coastal_factor = 1.0197 if coastal else 1.0
+        assert direct == pytest.approx(details["f1"] * coastal_factor, abs=0.02)
+        assert transfer[0] == transfer[1] == pytest.approx(details["f2"] * coastal_factor, abs=0.02)
+
+
+def _two_cluster_problem():
+    # APS 0-1 ahorran con el candidato 1, APS 2-3 con el 3; el candidato 2 sirve a medias a todos
+    baseline = [100.0, 100.0, 100.0, 100.0]
+    matrix = [
+        [120.0, 60.0, 70.0, 130.0],
+        [120.0, 62.0, 70.0, 130.0],
+        [130.0, 140.0, 70.0, 55.0],
+        [130.0, 140.0, 70.0, 58.0],
+    ]
+    tons = [10.0, 10.0, 10.0, 10.0]
+    return baseline, matrix, tons
+
+
+def test_greedy_and_swaps_find_best_sites(numpy_mode):
+    baseline, matrix, tons = _two_cluster_problem()
+
+    single, single_cost = solve_location(baseline, matrix, tons, 1)
+    assert single == [2] and single_cost == pytest.approx(2800.0)
+
+    # Greedy abre primero el 2; el intercambio lo reemplaza por la pareja 1 + 3
+    pair, pair_cost = solve_location(baseline, matrix, tons, 2)
+    assert pair == [1, 3] and pair_cost == pytest.approx(2350.0)
+
+    # Ningún candidato ahorra: no se abre nada
+    assert solve_location([10.0] * 4, matrix, tons, 2) == ([], pytest.approx(400.0))
+
+
+def test_parallel_restarts_match_sequential(monkeypatch):
+    baseline, matrix, tons = _two_cluster_problem()
+    monkeypatch.setattr(transfer_station_optimizer, "OPTIMIZER_PARALLEL_MIN_CELLS", 0)
+
+    parallel = solve_location_parallel(baseline, matrix, tons, 2, restarts=3, workers=2)
+    sequential = solve_location_parallel(baseline, matrix, tons, 2, restarts=3, workers=1)
+    assert parallel == sequential == ([1, 3], pytest.approx(2350.0))
+
+
+def test_optimizer_ranks_sites_and_projects_crt(range_session, numpy_mode):
+    # Municipios lejos del relleno, agrupados alrededor de dos puntos
+    layout = [
+        ("N1", 5.60, -73.40, 220.0), ("N2", 5.62, -73.35, 225.0),
+        ("S1", 4.10, -73.60, 150.0), ("S2", 4.12, -73.62, 150.0),
+    ]
+    repo = APSMonthlyDataRepository(range_session)
+    for code, lat, lon, distance in layout:
+        aps = APS(
+            company_id=1, name=f"APS {code}", code=code, municipality=code, department="D",
+            distance_to_landfill_km=distance, unpaved_road_percentage=10.0, centroid_lat=lat, centroid_lon=lon
+        )
+        range_session.add(aps)
+        range_session.commit()
+        range_session.refresh(aps)
+        for month in range(1, 7):
+            repo.create(APSMonthlyData(
+                aps_id=aps.id, period=f"2025-{month:02d}", year=0, month=0,
+                num_subscribers_total=4000, num_subscribers_occupied=3800, num_subscribers_vacant=200,
+                tons_collected_non_recyclable=300.0, tons_received_landfill=300.0,
+            ))
+    range_session.add(DisposalSite(
+        name="Relleno Regional", site_type="landfill", municipality="Bogotá", department="Cundinamarca",
+        latitude=4.60, longitude=-74.10
+    ))
+    range_session.commit()
+
+    optimizer = TransferStationOptimizer(range_session, company_id=1)
+    result = optimizer.optimize(max_stations=2, candidates=[{"name": "Lote Norte", "latitude": 5.61, "longitude": -73.38}])
+
+    assert len(result["stations"]) == 2
+    assert result["total_monthly_savings"] > 0
+    assert result["parameters"]["candidates"] == 5
+    served = sorted(sorted(station["served_aps_ids"]) for station in result["stations"])
+    assert served == [[1, 2], [3, 4]]
+    assert result["single_site_ranking"][0]["monthly_savings"] > 0
+
+    for impact in result["aps_impact"]:
+        assert impact["projected_crt"] < impact["current_crt"]
+        assert impact["station_rank"] in (1, 2)
+        assert impact["monthly_cost_change"] == pytest.approx(300.0 * impact["crt_change_per_ton"], abs=2.0)
+        assert impact["change_per_subscriber"] < 0
+
+    direct, details = TariffCalculator720().calculate_crt(
+        APS(distance_to_landfill_km=220.0, unpaved_road_percentage=10.0).get_effective_distance(), 300.0
+    )
+    assert result["aps_impact"][0]["current_crt"] == pytest.approx(details["f1"], abs=0.02)
+
+    with pytest.raises(ValidationError):
+        TransferStationOptimizer(range_session, company_id=2).optimize()
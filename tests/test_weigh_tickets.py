@@ -0,0 +1,94 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select
+
+from app.controllers.aps_controller import APSController
+from app.core.query_monitor import capture_queries
+from app.models.aps_monthly_data import APSMonthlyData
+from app.models.weigh_ticket import WeighTicket
+from app.schemas.aps import APSMonthlyDataCreate
+from app.schemas.weigh_ticket import WeighTicketCreate
+from app.services.weigh_ticket_ingestion import WeighTicketIngestionService
+
+
+def _ticket(number, aps_id, weighed_at, tons, ticket_type="collection"):
+    return WeighTicketCreate(
+        ticket_number=number, aps_id=aps_id, vehicle_plate="abc123",
+        ticket_type=ticket_type, weighed_at=weighed_at, net_tons=tons
+    )
+
+
+def test_ingest_builds_rollups_and_feeds_monthly_data(range_session, aps_with_history):
+    service = WeighTicketIngestionService(range_session)
+    base = datetime(2025, 6, 1, 6, 0)
+    batch = [
+        _ticket("T-1", aps_with_history.id, base, 10.0),
+        _ticket("T-2", aps_with_history.id, base + timedelta(hours=3), 12.5),
+        _ticket("T-3", aps_with_history.id, base + timedelta(days=1), 8.0),
+        _ticket("T-4", aps_with_history.id, base + timedelta(days=1), 20.0, "landfill"),
+        _ticket("T-1", aps_with_history.id, base, 10.0),  # reintento dentro del lote
+    ]
+    result = service.ingest(batch)
+    assert result == {
+        "received": 5, "inserted": 4, "duplicates": 1,
+        "rollups_updated": 5, "monthly_data_updated": 2,
+    }
+
+    # Reenviar el lote no duplica toneladas
+    again = service.ingest(batch[:2] + [_ticket("T-5", aps_with_history.id, base, 1.5)])
+    assert again["inserted"] == 1 and again["duplicates"] == 2
+
+    rollups = service.get_rollups(aps_with_history.id, "2025-06")
+    assert rollups["monthly"]["collection"] == {"tons": 32.0, "ticket_count": 4}
+    assert rollups["monthly"]["landfill"] == {"tons": 20.0, "ticket_count": 1}
+    assert rollups["daily"][0] == {"date": "2025-06-01", "ticket_type": "collection", "tons": 24.0, "ticket_count": 3}
+
+    monthly = range_session.exec(select(APSMonthlyData).where(
+        APSMonthlyData.aps_id == aps_with_history.id, APSMonthlyData.period == "2025-06"
+    )).one()
+    range_session.refresh(monthly)
+    assert monthly.tons_collected_non_recyclable == pytest.approx(32.0)
+    assert monthly.tons_received_landfill == pytest.approx(20.0)
+    assert range_session.exec(select(WeighTicket).where(WeighTicket.ticket_number == "T-1")).one().vehicle_plate == "ABC123"
+
+
+def test_monthly_data_created_later_takes_ticket_tons(range_session, aps_with_history):
+    WeighTicketIngestionService(range_session).ingest([
+        _ticket("T-1", aps_with_history.id, datetime(2026, 1, 15), 30.0),
+    ])
+
+    controller = APSController(range_session)
+    monthly = controller.create_monthly_data(
+        APSMonthlyDataCreate(
+            aps_id=aps_with_history.id, period="2026-01",
+            num_subscribers_total=10000, num_subscribers_occupied=9500, num_subscribers_vacant=500,
+            tons_collected_non_recyclable=999.0, tons_received_landfill=810.0,
+        ),
+        current_user_company_id=1,
+    )
+    assert monthly.tons_collected_non_recyclable == pytest.approx(30.0)
+    # Sin tiquetes de relleno se conserva el valor digitado
+    assert monthly.tons_received_landfill == pytest.approx(810.0)
+
+
+def test_batch_cost_does_not_grow_with_ticket_count(range_session, aps_with_history):
+    service = WeighTicketIngestionService(range_session)
+    base = datetime(2025, 5, 1)
+    tickets = [
+        _ticket(f"B-{i}", aps_with_history.id, base + timedelta(minutes=2 * i), 7.5)
+        for i in range(20000)
+    ]
+
+    started = time.perf_counter()
+    with capture_queries(range_session.get_bind()) as stats:
+        for start in range(0, len(tickets), 5000):
+            service.ingest(tickets[start:start + 5000])
+    elapsed = time.perf_counter() - started
+
+    # Número fijo de sentencias por lote (no por tiquete)
+    assert stats.count <= 4 * 8
+    assert elapsed < 60
+    rollups = service.get_rollups(aps_with_history.id, "2025-05")
+    assert rollups["monthly"]["collection"]["ticket_count"] == 20000